@@ -1,3 +1,16 @@
-from .color import Color
+from .color import Color, ColorArray
 from .panel import Panel, PanelPlacement, PanelLayout
-from .display import Display
+from .layout import LedLayout, SamplingMode
+from .display import Display, CommitPolicy, FrameTransaction
+from .compositor import Compositor, Layer, BlendMode
+from .text import GlyphAtlas, Marquee
+from .wipes import WipeOrder
+from .transitions import Crossfade, Dissolve, MaskWipe, Slide, SlideDirection
+from .playback import PlaybackEngine
+from .viewport import Viewport
+from .tracing import Tracer
+from .strip import ColorOrder
+from .recording import LedRecorder, LedRecording
+from .calibration import PanelCalibration, CalibrationTable
+from .network import Destination, DdpSink, E131Sink
+from .stats import FrameStats
@@ -12,15 +12,38 @@ Example:
 
         $ python -m pixelpanels "../data/Example.gif" --debug
 
+    Record a timeline of every frame that can be opened in Perfetto once the CLI exits
+
+        $ python -m pixelpanels "../data/Example.gif" --trace out.json
+
+    Show the frames a lighting console or xLights sends over E1.31, printing the frame rate and
+    latency every 5 seconds
+
+        $ python -m pixelpanels receive --protocol e131 --stats 5
+
+    Show the frames local renderers draw into a shared memory ring named pixelpanels, see
+    `pixelpanels.ingest.FrameProducer`
+
+        $ python -m pixelpanels ingest --name pixelpanels
+
 """
 
 import argparse
+import signal
 import sys
+import time
+from contextlib import closing
+from threading import Event
+from typing import Iterable, Iterator, List
 
-from matplotlib import pyplot
+import numpy as np
 
 from pixelpanels import Display, PanelPlacement, Color
+from pixelpanels.assets import AssetPreparer, asset_frame_count, asset_frame_rate
+from pixelpanels.ingest import DEFAULT_SLOT_COUNT, FrameRing
 from pixelpanels.panel import PanelOrigin, Panel
+from pixelpanels.receiver import FrameReceiver, InputMapping, Protocol
+from pixelpanels.tracing import Tracer
 
 
 def apply_color_cal(raw_color: Color) -> Color:
@@ -39,6 +62,9 @@ def apply_color_cal(raw_color: Color) -> Color:
 def show_debug_image(image):
     """A simple debug display using matplotlib.pyplot
     """
+    # Importing pyplot takes seconds on a Pi, so it only happens once the debug display is used
+    from matplotlib import pyplot
+
     display_time = 0.001
 
     pyplot.clf()
@@ -47,20 +73,135 @@ def show_debug_image(image):
     pyplot.pause(display_time)
 
 
+def frames_until(frames: Iterable[np.ndarray], event: Event) -> Iterator[np.ndarray]:
+    """Passes frames through until an event is set
+
+    A generator of frames is closed as soon as the event stops it, so it releases its resources
+    before the CLI shuts down.
+    """
+    frames = iter(frames)
+    try:
+        for frame in frames:
+            if event.is_set():
+                return
+            yield frame
+    finally:
+        if hasattr(frames, "close"):
+            frames.close()
+
+
+def default_placements() -> List[PanelPlacement]:
+    return [PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 16), (15, 31)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 16), (31, 31)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 16), (47, 31)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 16), (63, 31)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 0), (15, 15)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 0), (31, 15)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 0), (47, 15)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 0), (63, 15))]
+
+
+def stop_on_signals() -> Event:
+    """Gets an event that is set by SIGINT and SIGTERM
+
+    The signal handlers only set the event, so the main thread can block on it while idle.
+    """
+    shutdown = Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda signum, frame: shutdown.set())
+    return shutdown
+
+
+def receive(argv: List[str]) -> int:
+    """Shows frames received over the network until the process is stopped
+    """
+    parser = argparse.ArgumentParser(prog="python -m pixelpanels receive")
+    parser.add_argument("--protocol", help="The network protocol of the input", choices=["e131", "artnet", "ddp"],
+                        default="e131")
+    parser.add_argument("--port", help="The UDP port to listen on, by default the standard port of the protocol",
+                        type=int)
+    parser.add_argument("--host", help="The address to listen on", default="0.0.0.0")
+    parser.add_argument("--mapping", help="Whether the channels are LEDs in strip order or an RGB frame in row order",
+                        choices=["leds", "frame"], default="leds")
+    parser.add_argument("--universe", help="The universe of the first channels for E1.31 and Art-Net", type=int)
+    parser.add_argument("--debug", help="Whether to activate the debug display window", action="store_true")
+    parser.add_argument("--use_cal", help="Whether to use the default cal function", action="store_true")
+    parser.add_argument("--stats", help="Print the frame rate and latency every this many seconds", type=float,
+                        default=0.0, metavar="SECONDS")
+    args = parser.parse_args(argv)
+
+    display = Display(default_placements(), show_debug_image if args.debug else None)
+    if args.use_cal:
+        display.color_cal = apply_color_cal
+
+    protocol = {"e131": Protocol.E131, "artnet": Protocol.ARTNET, "ddp": Protocol.DDP}[args.protocol]
+    mapping = InputMapping.LED_ORDER if args.mapping == "leds" else InputMapping.FRAME
+
+    shutdown = stop_on_signals()
+
+    with FrameReceiver(display, protocol, args.port, args.host, mapping, args.universe) as receiver:
+        print("Receiving {0} on {1}:{2}".format(protocol.name, *receiver.address), flush=True)
+
+        next_report = time.monotonic() + args.stats
+        reported_frames = 0
+        while not shutdown.is_set():
+            receiver.receive(0.1)
+
+            if args.stats > 0 and time.monotonic() >= next_report:
+                latency = receiver.mean_latency
+                print("{0:.1f} fps, {1} dropped, latency {2} ms mean, {3:.2f} ms max".format(
+                    (receiver.frames_shown - reported_frames) / args.stats, receiver.frames_dropped,
+                    "-" if latency is None else "{0:.2f}".format(latency * 1000.0), receiver.max_latency * 1000.0),
+                    flush=True)
+                reported_frames = receiver.frames_shown
+                next_report += args.stats
+
+    return 0
+
+
+def ingest(argv: List[str]) -> int:
+    """Shows frames drawn into a shared memory ring by local producers until the process is stopped
+    """
+    parser = argparse.ArgumentParser(prog="python -m pixelpanels ingest")
+    parser.add_argument("--name", help="The name producers attach to", default="pixelpanels")
+    parser.add_argument("--slots", help="The number of frames the ring holds", type=int, default=DEFAULT_SLOT_COUNT)
+    parser.add_argument("--fps", help="The rate at which the ring is checked for new frames", type=float,
+                        default=120.0)
+    parser.add_argument("--debug", help="Whether to activate the debug display window", action="store_true")
+    parser.add_argument("--use_cal", help="Whether to use the default cal function", action="store_true")
+    args = parser.parse_args(argv)
+
+    display = Display(default_placements(), show_debug_image if args.debug else None)
+    if args.use_cal:
+        display.color_cal = apply_color_cal
+
+    shutdown = stop_on_signals()
+
+    with FrameRing(display.pixel_width, display.pixel_height, args.slots, args.name) as ring:
+        print("Ingesting {0}x{1} frames from {2}".format(ring.width, ring.height, ring.name), flush=True)
+        ring.serve(display, shutdown, args.fps)
+        print("{0} frames shown, {1} skipped, {2} torn".format(ring.frames_received, ring.frames_skipped,
+                                                               ring.frames_torn), flush=True)
+
+    return 0
+
+
 def main() -> int:
-    placements = [PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 16), (15, 31)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 16), (31, 31)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 16), (47, 31)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 16), (63, 31)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 0), (15, 15)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 0), (31, 15)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 0), (47, 15)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 0), (63, 15))]
+    if sys.argv[1:2] == ["receive"]:
+        return receive(sys.argv[2:])
+    if sys.argv[1:2] == ["ingest"]:
+        return ingest(sys.argv[2:])
+
+    placements = default_placements()
 
     parser = argparse.ArgumentParser()
     parser.add_argument("gif_path", help="Path to a gif you wish to display")
     parser.add_argument("--debug", help="Whether to activate the debug display window", action="store_true")
     parser.add_argument("--use_cal", help="Whether to use the default cal function", action="store_true")
+    parser.add_argument("--workers", help="Decode and prepare frames in this many worker processes", type=int,
+                        default=0)
+    parser.add_argument("--trace", help="Record a timeline of every frame and write it to this Chrome trace file "
+                                        "on exit", metavar="PATH")
     args = parser.parse_args()
 
     draw_callback = None
@@ -72,11 +213,35 @@ def main() -> int:
     if args.use_cal:
         display.color_cal = apply_color_cal
 
+    if args.trace:
+        display.tracer = Tracer()
+
+    preparer = None
+    if args.workers > 0:
+        preparer = AssetPreparer(display, args.workers)
+
+    shutdown = stop_on_signals()
+
     try:
-        while True:
-            display.play_gif(args.gif_path)
-    except KeyboardInterrupt:
-        pass
+        if asset_frame_count(args.gif_path) == 1:
+            # A still image is shown once and held without redrawing until the process is stopped.
+            # The frames are closed first so the image file isn't held open while waiting.
+            with closing(display.gif_frames(args.gif_path)) as frames:
+                display.show_frame(next(frames))
+            shutdown.wait()
+        else:
+            fps = asset_frame_rate(args.gif_path)
+            while not shutdown.is_set():
+                if preparer is not None:
+                    frames = preparer.frames(args.gif_path)
+                else:
+                    frames = display.gif_frames(args.gif_path)
+                display.play_frames(frames_until(frames, shutdown), fps)
+    finally:
+        if preparer is not None:
+            preparer.close()
+        if display.tracer is not None:
+            display.tracer.save(args.trace)
 
     return 0
 
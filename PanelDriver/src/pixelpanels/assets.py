@@ -0,0 +1,267 @@
+"""Asset preparation in worker processes
+
+Decoding and resizing animations is CPU heavy and, when done on the render thread, competes
+for the GIL with `show()` and the RPC server threads. The `AssetPreparer` moves decoding,
+resizing, calibration and LED remapping into a pool of worker processes. Prepared frames are
+written straight into shared memory blocks owned by the preparer, so only a few integers are
+pickled for each chunk of frames.
+
+Workers are started by a fork server rather than forked from the caller, since forking a
+process with running gRPC threads can deadlock the child. The color calibration of the
+display is pickled to the workers, so it must be a module-level function. Any other
+calibration, such as a lambda, is applied by the thread playing the frames instead.
+
+Example:
+    Play a GIF prepared by two worker processes
+
+        with AssetPreparer(display, max_workers=2) as preparer:
+            display.play_frames(preparer.frames("../data/Test_64x32.gif"), fps=10.0)
+"""
+import multiprocessing
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Iterator
+
+import numpy as np
+from PIL import Image as ImageLib
+
+from .color import Color
+from .display import Display, PreparedFrame, calibrate_pixel_values, frame_to_led_values
+from .palette import PaletteMapper, seek_palette_frame
+
+
+def _chunk_block_size(chunk_frames: int, pixel_width: int, pixel_height: int, pixel_count: int) -> int:
+    return chunk_frames * (pixel_width * pixel_height * 3 + pixel_count * 4)
+
+
+def _chunk_views(buffer, chunk_frames: int, pixel_width: int, pixel_height: int, pixel_count: int):
+    """Lays out the RGB frames and LED values of a chunk in a shared memory buffer
+    """
+    rgb = np.ndarray((chunk_frames, pixel_height, pixel_width, 3), dtype=np.uint8, buffer=buffer)
+    led_values = np.ndarray((chunk_frames, pixel_count), dtype=np.uint32, buffer=buffer, offset=rgb.nbytes)
+    return rgb, led_values
+
+
+def _prepare_chunk(path: str, start: int, chunk_frames: int, pixel_width: int, pixel_height: int,
+                   led_order: np.ndarray, led_weights: np.ndarray, color_cal: Callable[[Color], Color],
+                   block_name: str) -> int:
+    """Decodes, resizes, calibrates and maps a run of frames into a shared memory block
+
+    This runs in a worker process.
+
+    Returns:
+        The total number of frames in the asset
+    """
+    block = SharedMemory(name=block_name)
+    try:
+        rgb, led_values = _chunk_views(block.buf, chunk_frames, pixel_width, pixel_height, len(led_order))
+
+        with ImageLib.open(path) as image:
+            frame_count = getattr(image, "n_frames", 1)
+
+            # Frames are mapped exactly like `Display.gif_frames` maps them on the render thread
+            mapper = None
+            resample = ImageLib.LANCZOS
+            if image.mode == 'P' and led_weights is None:
+                mapper = PaletteMapper(image.width, image.height, pixel_width, pixel_height, led_order, color_cal)
+                resample = ImageLib.NEAREST
+
+            for i in range(start, min(start + chunk_frames, frame_count)):
+                if mapper is not None and seek_palette_frame(image, i):
+                    rgb[i - start], led_values[i - start] = mapper.map(image)
+                    continue
+
+                image.seek(i)
+                frame = image.convert('RGB').resize((pixel_width, pixel_height), resample)
+                rgb[i - start] = np.asarray(frame, dtype=np.uint8)
+                led_values[i - start] = frame_to_led_values(rgb[i - start], led_order, color_cal, led_weights)
+
+        # Views must be released before the block can be closed
+        del rgb, led_values
+    finally:
+        block.close()
+
+    return frame_count
+
+
+def asset_frame_rate(path: str, default_fps: float = 10.0) -> float:
+    """Reads the frame rate of an animation from the duration of its first frame
+
+    Args:
+        path: The path to the asset
+        default_fps: The frame rate used when the asset doesn't specify a frame duration
+
+    Returns:
+        The number of frames per second
+    """
+    with ImageLib.open(path) as image:
+        frame_duration_ms = image.info.get("duration")
+
+    return 1000.0 / frame_duration_ms if frame_duration_ms else default_fps
+
+
+def asset_frame_count(path: str) -> int:
+    """Reads the number of frames in an asset, which is 1 for a still image
+
+    Args:
+        path: The path to the asset
+
+    Returns:
+        The number of frames
+    """
+    with ImageLib.open(path) as image:
+        return getattr(image, "n_frames", 1)
+
+
+def default_worker_count() -> int:
+    """The default pool size, which leaves one core free for the render loop
+
+    A Pi 3 or Pi 4 gets three workers and a single core board like a Pi Zero gets one.
+    """
+    return max((os.cpu_count() or 1) - 1, 1)
+
+
+def worker_context():
+    """The multiprocessing context of the worker processes
+
+    Uses a fork server where the platform has one and spawns workers elsewhere.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _picklable(value) -> bool:
+    try:
+        pickle.dumps(value)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
+    return True
+
+
+class AssetPreparer(object):
+    """Prepares animation frames for a display in a pool of worker processes
+
+    Frames are prepared in chunks. While the caller plays one chunk, the following chunks are
+    already being prepared so playback never waits on decoding.
+
+    Args:
+        display: The display frames are prepared for
+        max_workers: The number of worker processes. By default, one per core except one.
+        chunk_frames: The number of frames a worker prepares per task
+        prefetch_chunks: The number of chunks prepared ahead of the playback cursor
+    """
+    def __init__(self, display: Display, max_workers: int = None, chunk_frames: int = 16, prefetch_chunks: int = 2):
+
+        self.display = display
+        self.chunk_frames = chunk_frames
+        self.prefetch_chunks = max(prefetch_chunks, 1)
+
+        self.__executor = ProcessPoolExecutor(max_workers=max_workers or default_worker_count(),
+                                              mp_context=worker_context())
+        self.__blocks = {}
+        self.__free_blocks = []
+        self.__block_size = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Shuts down the worker pool and releases every shared memory block"""
+        self.__executor.shutdown(wait=True)
+
+        for block in self.__blocks:
+            block.close()
+            block.unlink()
+        self.__blocks = {}
+        self.__free_blocks = []
+
+    def __discard_block(self, block):
+        del self.__blocks[block]
+        block.close()
+        block.unlink()
+
+    def __acquire_block(self, block_size):
+        if block_size != self.__block_size:
+            # The display layout changed, so blocks of the old size are no longer useful
+            for block in self.__free_blocks:
+                self.__discard_block(block)
+            self.__free_blocks = []
+            self.__block_size = block_size
+
+        if self.__free_blocks:
+            return self.__free_blocks.pop()
+
+        block = SharedMemory(create=True, size=block_size)
+        self.__blocks[block] = block_size
+        return block
+
+    def __release_block(self, block):
+        if self.__blocks[block] == self.__block_size:
+            self.__free_blocks.append(block)
+        else:
+            self.__discard_block(block)
+
+    def frames(self, path: str) -> Iterator[PreparedFrame]:
+        """Generates the prepared frames of an animation or image
+
+        Args:
+            path: The path to the asset
+
+        Returns:
+            An iterator of frames as accepted by `Display.show_frame`
+        """
+        display = self.display
+        width, height, pixel_count = display.pixel_width, display.pixel_height, display.pixel_count
+        led_order, led_weights, color_cal = display.led_order, display.led_weights, display.color_cal
+        block_size = _chunk_block_size(self.chunk_frames, width, height, pixel_count)
+
+        # A calibration that can't be sent to the workers is applied here to their uncalibrated values
+        worker_cal, local_cal = (color_cal, None) if _picklable(color_cal) else (None, color_cal)
+
+        pending = deque()
+        next_start = 0
+
+        def submit():
+            nonlocal next_start
+            block = self.__acquire_block(block_size)
+            future = self.__executor.submit(_prepare_chunk, path, next_start, self.chunk_frames, width, height,
+                                            led_order, led_weights, worker_cal, block.name)
+            pending.append((future, block, next_start))
+            next_start += self.chunk_frames
+
+        try:
+            submit()
+            frame_count = None
+
+            while pending:
+                future, block, start = pending[0]
+                frame_count = future.result()
+
+                while len(pending) < self.prefetch_chunks + 1 and next_start < frame_count:
+                    submit()
+
+                rgb, led_values = _chunk_views(block.buf, self.chunk_frames, width, height, pixel_count)
+                for i in range(max(min(self.chunk_frames, frame_count - start), 0)):
+                    # Frames are copied out of the block so it can be reused as soon as the chunk is
+                    # played, even if the caller holds on to a frame
+                    frame = rgb[i].copy().view(PreparedFrame)
+                    frame.led_values = led_values[i].copy() if local_cal is None else \
+                        calibrate_pixel_values(led_values[i], local_cal)
+                    frame.led_order = led_order
+                    frame.color_cal = color_cal
+                    yield frame
+                del rgb, led_values
+
+                pending.popleft()
+                self.__release_block(block)
+        finally:
+            # Blocks can only be reused once the workers writing to them are done
+            for future, block, _ in pending:
+                future.exception()
+                self.__release_block(block)
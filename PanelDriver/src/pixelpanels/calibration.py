@@ -0,0 +1,206 @@
+"""Per-panel color calibration
+
+Panels from different batches often differ in their color response. Each `PanelPlacement`
+can carry a `PanelCalibration`, made of per-channel curves followed by a 3x3 color matrix.
+The calibrations of a display are compiled into a `CalibrationTable`, which stacks a lookup
+table for every calibration and keeps the calibration of every LED. A whole frame of mixed
+panels is then corrected with a single gather over the stacked table.
+
+Example:
+    Correct a panel that runs blue and a panel that runs dim
+
+        placements = [PanelPlacement(Panel(), (0, 0), (15, 15),
+                                     calibration=PanelCalibration(gains=(1.0, 1.0, 0.8))),
+                      PanelPlacement(Panel(), (16, 0), (31, 15),
+                                     calibration=PanelCalibration.from_gamma(2.2, gains=(1.0, 0.9, 1.0)))]
+        display = Display(placements)
+"""
+from typing import List, Sequence
+
+import numpy as np
+
+# Table entries of matrix calibrations are fixed point numbers with this many fraction bits
+FRACTION_BITS = 16
+
+# The shifts of the red, green and blue channels in a packed pixel value
+_CHANNEL_SHIFTS = np.array([16, 8, 0], dtype=np.uint32)
+
+# The offsets of the red, green and blue tables within the table of one calibration
+_CHANNEL_OFFSETS = np.array([0, 256, 512], dtype=np.intp)
+
+
+class PanelCalibration(object):
+    """A color correction for the LEDs of one panel
+
+    Each channel is first looked up in its curve and the result is then mixed by the
+    matrix, so the corrected color is clip(matrix @ (curves[0][r], curves[1][g], curves[2][b])).
+
+    Args:
+        curves: A (3, 256) array with the output level of every input level for red, green and
+        blue, or a single (256,) curve used for all three. Defaults to the identity.
+        matrix: A 3x3 matrix mixing the channels after the curves, or None for no mixing
+        gains: A scale for the red, green and blue output of the curves, applied before the
+        matrix. A shortcut for scaling the curves.
+    """
+    def __init__(self, curves: np.ndarray = None, matrix: np.ndarray = None, gains: Sequence[float] = (1.0, 1.0, 1.0)):
+
+        if curves is None:
+            curves = np.arange(256, dtype=np.float64)
+        curves = np.asarray(curves, dtype=np.float64)
+        if curves.shape == (256,):
+            curves = np.tile(curves, (3, 1))
+        if curves.shape != (3, 256):
+            raise ValueError("Curves must have a shape of (256,) or (3, 256), not {0}".format(curves.shape))
+
+        if matrix is not None:
+            matrix = np.asarray(matrix, dtype=np.float64)
+            if matrix.shape != (3, 3):
+                raise ValueError("The matrix must be 3x3, not {0}".format(matrix.shape))
+
+        self.curves = curves * np.asarray(gains, dtype=np.float64).reshape(3, 1)
+        self.matrix = matrix
+
+    @classmethod
+    def from_gamma(cls, gamma: float, gains: Sequence[float] = (1.0, 1.0, 1.0),
+                   matrix: np.ndarray = None) -> 'PanelCalibration':
+        """Creates a calibration from a gamma curve
+
+        Args:
+            gamma: The exponent of the curve, output = 255 * (input / 255) ** gamma
+            gains: A scale for the red, green and blue output of the curve
+            matrix: A 3x3 matrix mixing the channels after the curve, or None
+
+        Returns:
+            The calibration
+        """
+        return cls(255.0 * (np.arange(256) / 255.0) ** gamma, matrix, gains)
+
+    @property
+    def is_separable(self):
+        """Whether each output channel only depends on the same input channel"""
+        return self.matrix is None or not np.any(self.matrix[~np.eye(3, dtype=bool)])
+
+    def lut(self) -> np.ndarray:
+        """The calibration as a (3, 256) uint8 lookup table for each channel
+
+        Only separable calibrations can be written as a lookup table per channel.
+        """
+        if not self.is_separable:
+            raise ValueError("A calibration that mixes channels has no lookup table per channel")
+
+        curves = self.curves if self.matrix is None else self.curves * np.diag(self.matrix).reshape(3, 1)
+        # Halves round up like the fixed point terms, so both forms of a table agree
+        return np.clip(np.floor(curves + 0.5), 0, 255).astype(np.uint8)
+
+    def terms(self) -> np.ndarray:
+        """The calibration as a (3, 256, 3) table of fixed point terms
+
+        terms[channel, level] holds what an input channel at a level adds to the red, green and
+        blue output, so the corrected color is the sum of one term for each input channel.
+        """
+        matrix = np.eye(3) if self.matrix is None else self.matrix
+        terms = self.curves[:, :, np.newaxis] * matrix.T[:, np.newaxis, :]
+        return np.rint(terms * (1 << FRACTION_BITS)).astype(np.int64)
+
+    def apply(self, led_values: np.ndarray) -> np.ndarray:
+        """Calibrates an array of packed pixel values
+
+        Args:
+            led_values: An array of 24-bit packed pixel values
+
+        Returns:
+            A uint32 array of calibrated pixel values with the same shape
+        """
+        led_values = np.asarray(led_values, dtype=np.uint32)
+        table = CalibrationTable([self], np.zeros(led_values.size, dtype=np.intp))
+        return table.apply(led_values.ravel()).reshape(led_values.shape)
+
+
+class CalibrationTable(object):
+    """The calibrations of a display compiled into a single lookup table
+
+    When every calibration is separable, the table is a stack of uint8 lookup tables and
+    each channel of each LED is a single lookup. Otherwise it is a stack of fixed point terms
+    and each LED sums the terms of its three channels.
+
+    Args:
+        calibrations: The distinct calibrations of the display. None stands for an LED that is
+        not calibrated.
+        led_calibration: The index into calibrations for every LED of the strip
+    """
+    def __init__(self, calibrations: List[PanelCalibration], led_calibration: np.ndarray):
+
+        calibrations = [PanelCalibration() if calibration is None else calibration for calibration in calibrations]
+
+        self.calibrations = calibrations
+        self.led_calibration = np.asarray(led_calibration, dtype=np.intp)
+
+        self.__separable = all(calibration.is_separable for calibration in calibrations)
+        if self.__separable:
+            self.__table = np.concatenate([calibration.lut().ravel() for calibration in calibrations])
+        else:
+            terms = np.concatenate([calibration.terms().reshape(768, 3) for calibration in calibrations])
+            if np.abs(terms).max(initial=0) * 3 >= 1 << 31:
+                raise ValueError("Calibration matrix entries are too large")
+            self.__table = terms.astype(np.int32)
+
+        # The start of the table of each LED's calibration, offset for each channel
+        self.__led_offsets = (self.led_calibration * 768)[:, np.newaxis] + _CHANNEL_OFFSETS
+
+    @classmethod
+    def from_placements(cls, placements) -> 'CalibrationTable':
+        """Compiles the calibrations of the placements of a display
+
+        LEDs are numbered along the placements in order, like `Display` does.
+
+        Args:
+            placements: A list of PanelPlacement
+
+        Returns:
+            The table, or None if no placement has a calibration
+        """
+        if all(placement.calibration is None for placement in placements):
+            return None
+
+        calibrations = []
+        led_calibration = []
+        for placement in placements:
+            # Placements sharing a calibration share its part of the table
+            for index, calibration in enumerate(calibrations):
+                if calibration is placement.calibration:
+                    break
+            else:
+                index = len(calibrations)
+                calibrations.append(placement.calibration)
+
+            led_calibration.append(np.full(placement.panel.pixel_width * placement.panel.pixel_height, index,
+                                           dtype=np.intp))
+
+        return cls(calibrations, np.concatenate(led_calibration))
+
+    @property
+    def led_count(self):
+        return len(self.led_calibration)
+
+    def apply(self, led_values: np.ndarray) -> np.ndarray:
+        """Calibrates the LED values of a whole strip
+
+        Args:
+            led_values: A uint32 array of the form led_values[led_index] = pixel_value
+
+        Returns:
+            A uint32 array of calibrated LED values
+        """
+        if len(led_values) != self.led_count:
+            raise ValueError("Got {0} LED values for a table of {1} LEDs".format(len(led_values), self.led_count))
+
+        levels = (np.asarray(led_values, dtype=np.uint32)[:, np.newaxis] >> _CHANNEL_SHIFTS) & 0xFF
+        indices = self.__led_offsets + levels
+
+        if self.__separable:
+            rgb = self.__table.take(indices).astype(np.uint32)
+        else:
+            rgb = self.__table.take(indices, axis=0).sum(axis=1, dtype=np.int32)
+            rgb = np.clip((rgb + (1 << (FRACTION_BITS - 1))) >> FRACTION_BITS, 0, 255).astype(np.uint32)
+
+        return (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
@@ -0,0 +1,22 @@
+"""Clients of the PanelController service of one or more displays
+
+The server only accepts clients with a certificate signed by its root CA, so every client
+connects over mutual TLS. Channels stay open between calls and are kept alive with pings.
+
+Example:
+    Play a GIF on a display and save what it shows
+
+        with PanelClient("panel.local", TlsConfig.from_directory("./certificates")) as client:
+            client.play_gif("../data/local/NyanScaled.gif")
+            with open("preview.png", "wb") as f:
+                f.write(client.get_frame(scale=4).data)
+
+    Watch the frame rate of many displays from asyncio
+
+        async with AsyncClientPool(["panel-1.local", "panel-2.local"]) as pool:
+            async for snapshot in pool.client("panel-1.local").watch_stats():
+                print(snapshot.fps)
+"""
+from .common import TlsConfig, RetryPolicy, NO_RETRIES
+from .blocking import PanelClient, ClientPool
+from .aio import AsyncPanelClient, AsyncClientPool
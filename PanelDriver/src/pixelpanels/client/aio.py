@@ -0,0 +1,173 @@
+"""An asyncio client of the PanelController service
+
+Clients connect within the event loop of their first call and must only be used from that loop.
+"""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable
+
+import grpc
+
+from ..preview import PreviewFormat
+from ..rpc_library import panelrpc_pb2, panelrpc_pb2_grpc
+from .common import DEFAULT_TIMEOUT_S, RetryPolicy, TlsConfig, frame_format, normalize_target
+
+
+class AsyncPanelClient(object):
+    """An asyncio client of a single display over a persistent TLS channel
+
+    See `PanelClient` for how channels and retries behave.
+
+    Args:
+        target: The host of the display, with or without a port
+        tls: The certificates of the client. By default they are read from ./certificates.
+        retry_policy: How failed calls are retried
+        timeout: The deadline in seconds of calls that don't set one, including their retries
+
+    Attributes:
+        retry_count (int): The number of times a call was retried
+    """
+    def __init__(self, target: str, tls: TlsConfig = None, retry_policy: RetryPolicy = None,
+                 timeout: float = DEFAULT_TIMEOUT_S):
+
+        self.target = normalize_target(target)
+        self.tls = tls if tls is not None else TlsConfig.from_directory()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.timeout = timeout
+        self.retry_count = 0
+
+        self.__channel = None
+        self.__stub = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __get_stub(self) -> panelrpc_pb2_grpc.PanelControllerStub:
+        # The channel is bound to the event loop it is created in, so it waits for the first call
+        if self.__stub is None:
+            self.__channel = grpc.aio.secure_channel(self.target, self.tls.credentials(), self.tls.channel_options())
+            self.__stub = panelrpc_pb2_grpc.PanelControllerStub(self.__channel)
+        return self.__stub
+
+    async def close(self):
+        if self.__channel is not None:
+            await self.__channel.close()
+            self.__channel = None
+            self.__stub = None
+
+    async def __call(self, method_name: str, request, timeout: float):
+        """Makes a unary call, retrying failures the retry policy allows until the deadline"""
+        method = getattr(self.__get_stub(), method_name)
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        backoffs = self.retry_policy.backoffs()
+
+        while True:
+            try:
+                return await method(request, timeout=max(deadline - time.monotonic(), 0.0))
+            except grpc.aio.AioRpcError as error:
+                delay = next(backoffs, None)
+                if delay is None or not self.retry_policy.should_retry(error) or \
+                        time.monotonic() + delay >= deadline:
+                    raise
+
+            await asyncio.sleep(delay)
+            self.retry_count += 1
+
+    async def play_gif(self, path: str, timeout: float = None) -> str:
+        """Plays a GIF from a path on the display, see `PanelClient.play_gif`"""
+        response = await self.__call("PlayGif", panelrpc_pb2.PlayGifRequest(path=path), timeout)
+        return response.message
+
+    async def get_trace(self, clear: bool = False, timeout: float = None) -> dict:
+        """Gets the frame timeline of a server started with --trace, see `PanelClient.get_trace`"""
+        response = await self.__call("GetTrace", panelrpc_pb2.GetTraceRequest(clear=clear), timeout)
+        return json.loads(response.trace_json)
+
+    async def get_frame(self, format: PreviewFormat = PreviewFormat.PNG, scale: int = 1,
+                        timeout: float = None) -> panelrpc_pb2.FramePreview:
+        """Gets the frame being displayed, see `PanelClient.get_frame`"""
+        request = panelrpc_pb2.GetFrameRequest(format=frame_format(format), scale=scale)
+        return await self.__call("GetFrame", request, timeout)
+
+    def watch_stats(self, interval_s: float = 1.0) -> AsyncIterator[panelrpc_pb2.StatsSnapshot]:
+        """Streams statistics of the display
+
+        Returns:
+            An async iterator of snapshots, which stops the stream when its cancel method is called
+        """
+        return self.__get_stub().WatchStats(panelrpc_pb2.WatchStatsRequest(interval_s=interval_s))
+
+    def watch_frames(self, format: PreviewFormat = PreviewFormat.PNG, scale: int = 1,
+                     max_fps: float = 0.0) -> AsyncIterator[panelrpc_pb2.FramePreview]:
+        """Streams the frame being displayed whenever it changes, see `PanelClient.watch_frames`
+
+        Returns:
+            An async iterator of frames, which stops the stream when its cancel method is called
+        """
+        request = panelrpc_pb2.WatchFramesRequest(format=frame_format(format), scale=scale, max_fps=max_fps)
+        return self.__get_stub().WatchFrames(request)
+
+
+class AsyncClientPool(object):
+    """Persistent asyncio clients of many displays, see `ClientPool`
+
+    Args:
+        targets: The displays to keep clients of from the start
+        tls: The certificates of the clients. By default they are read from ./certificates.
+        retry_policy: How failed calls are retried
+        timeout: The deadline in seconds of calls that don't set one, including their retries
+    """
+    def __init__(self, targets: Iterable[str] = (), tls: TlsConfig = None, retry_policy: RetryPolicy = None,
+                 timeout: float = DEFAULT_TIMEOUT_S):
+
+        self.tls = tls if tls is not None else TlsConfig.from_directory()
+        self.retry_policy = retry_policy
+        self.timeout = timeout
+
+        self.__clients = {}
+        for target in targets:
+            self.client(target)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def targets(self):
+        """The displays the pool has clients of"""
+        return list(self.__clients)
+
+    def client(self, target: str) -> AsyncPanelClient:
+        """Gets the client of a display, creating it if the pool has no client of it yet"""
+        target = normalize_target(target)
+        client = self.__clients.get(target)
+        if client is None:
+            client = AsyncPanelClient(target, self.tls, self.retry_policy, self.timeout)
+            self.__clients[target] = client
+        return client
+
+    async def map(self, function: Callable[[AsyncPanelClient], Awaitable], targets: Iterable[str] = None) \
+            -> Dict[str, object]:
+        """Awaits a coroutine function with the client of every display at the same time
+
+        Args:
+            function: Called with each client
+            targets: The displays to call, or None for every display in the pool
+
+        Returns:
+            The result of each display by target, or the exception it raised
+        """
+        clients = [self.client(target) for target in (self.targets if targets is None else targets)]
+        results = await asyncio.gather(*(function(client) for client in clients), return_exceptions=True)
+        return {client.target: result for client, result in zip(clients, results)}
+
+    async def close(self):
+        clients = list(self.__clients.values())
+        self.__clients.clear()
+        await asyncio.gather(*(client.close() for client in clients))
@@ -0,0 +1,207 @@
+"""A blocking client of the PanelController service"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator
+
+import grpc
+
+from ..preview import PreviewFormat
+from ..rpc_library import panelrpc_pb2, panelrpc_pb2_grpc
+from .common import DEFAULT_TIMEOUT_S, RetryPolicy, TlsConfig, frame_format, normalize_target
+
+
+class PanelClient(object):
+    """A client of a single display over a persistent TLS channel
+
+    The channel connects on the first call and stays open, reconnecting by itself if the
+    connection drops. Unary calls are retried as set by the retry policy within their deadline.
+
+    Args:
+        target: The host of the display, with or without a port
+        tls: The certificates of the client. By default they are read from ./certificates.
+        retry_policy: How failed calls are retried
+        timeout: The deadline in seconds of calls that don't set one, including their retries
+
+    Attributes:
+        retry_count (int): The number of times a call was retried
+    """
+    def __init__(self, target: str, tls: TlsConfig = None, retry_policy: RetryPolicy = None,
+                 timeout: float = DEFAULT_TIMEOUT_S):
+
+        self.target = normalize_target(target)
+        self.tls = tls if tls is not None else TlsConfig.from_directory()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.timeout = timeout
+        self.retry_count = 0
+
+        self.__channel = grpc.secure_channel(self.target, self.tls.credentials(), self.tls.channel_options())
+        self.__stub = panelrpc_pb2_grpc.PanelControllerStub(self.__channel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.__channel.close()
+
+    def __call(self, method, request, timeout: float):
+        """Makes a unary call, retrying failures the retry policy allows until the deadline"""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        backoffs = self.retry_policy.backoffs()
+
+        while True:
+            try:
+                return method(request, timeout=max(deadline - time.monotonic(), 0.0))
+            except grpc.RpcError as error:
+                delay = next(backoffs, None)
+                if delay is None or not self.retry_policy.should_retry(error) or \
+                        time.monotonic() + delay >= deadline:
+                    raise
+
+            time.sleep(delay)
+            self.retry_count += 1
+
+    def play_gif(self, path: str, timeout: float = None) -> str:
+        """Plays a GIF from a path on the display
+
+        Returns:
+            The status message of the server
+        """
+        return self.__call(self.__stub.PlayGif, panelrpc_pb2.PlayGifRequest(path=path), timeout).message
+
+    def get_trace(self, clear: bool = False, timeout: float = None) -> dict:
+        """Gets the frame timeline of a server started with --trace
+
+        Args:
+            clear: Whether the server drops the spans it returned
+
+        Returns:
+            The timeline in the Chrome trace-event format
+        """
+        response = self.__call(self.__stub.GetTrace, panelrpc_pb2.GetTraceRequest(clear=clear), timeout)
+        return json.loads(response.trace_json)
+
+    def get_frame(self, format: PreviewFormat = PreviewFormat.PNG, scale: int = 1,
+                  timeout: float = None) -> panelrpc_pb2.FramePreview:
+        """Gets the frame being displayed
+
+        Args:
+            format: How the pixels are encoded
+            scale: The whole number of times each pixel is repeated in both directions
+        """
+        request = panelrpc_pb2.GetFrameRequest(format=frame_format(format), scale=scale)
+        return self.__call(self.__stub.GetFrame, request, timeout)
+
+    def watch_stats(self, interval_s: float = 1.0) -> Iterator[panelrpc_pb2.StatsSnapshot]:
+        """Streams statistics of the display
+
+        Returns:
+            An iterator of snapshots, which stops the stream when its cancel method is called
+        """
+        return self.__stub.WatchStats(panelrpc_pb2.WatchStatsRequest(interval_s=interval_s))
+
+    def watch_frames(self, format: PreviewFormat = PreviewFormat.PNG, scale: int = 1,
+                     max_fps: float = 0.0) -> Iterator[panelrpc_pb2.FramePreview]:
+        """Streams the frame being displayed whenever it changes
+
+        Args:
+            format: How the pixels are encoded
+            scale: The whole number of times each pixel is repeated in both directions
+            max_fps: The most frames sent per second, or 0 for the server default
+
+        Returns:
+            An iterator of frames, which stops the stream when its cancel method is called
+        """
+        request = panelrpc_pb2.WatchFramesRequest(format=frame_format(format), scale=scale, max_fps=max_fps)
+        return self.__stub.WatchFrames(request)
+
+
+class ClientPool(object):
+    """Persistent clients of many displays
+
+    A client is created the first time a display is used and kept open until the pool is
+    closed. Every client shares the settings of the pool.
+
+    Args:
+        targets: The displays to connect to up front
+        tls: The certificates of the clients. By default they are read from ./certificates.
+        retry_policy: How failed calls are retried
+        timeout: The deadline in seconds of calls that don't set one, including their retries
+        max_workers: The most displays `map` calls at the same time
+    """
+    def __init__(self, targets: Iterable[str] = (), tls: TlsConfig = None, retry_policy: RetryPolicy = None,
+                 timeout: float = DEFAULT_TIMEOUT_S, max_workers: int = 16):
+
+        self.tls = tls if tls is not None else TlsConfig.from_directory()
+        self.retry_policy = retry_policy
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+        self.__clients = {}
+        self.__lock = Lock()
+        self.__executor = None
+
+        for target in targets:
+            self.client(target)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def targets(self):
+        """The displays the pool has clients of"""
+        return list(self.__clients)
+
+    def client(self, target: str) -> PanelClient:
+        """Gets the client of a display, connecting to it if the pool has no client of it yet"""
+        target = normalize_target(target)
+        with self.__lock:
+            client = self.__clients.get(target)
+            if client is None:
+                client = PanelClient(target, self.tls, self.retry_policy, self.timeout)
+                self.__clients[target] = client
+        return client
+
+    def map(self, function: Callable[[PanelClient], object], targets: Iterable[str] = None) -> Dict[str, object]:
+        """Calls a function with the client of every display at the same time
+
+        Example:
+            Get the frame of every display in the pool
+
+                frames = pool.map(lambda client: client.get_frame())
+
+        Args:
+            function: Called with each client
+            targets: The displays to call, or None for every display in the pool
+
+        Returns:
+            The result of each display by target, or the exception it raised
+        """
+        clients = [self.client(target) for target in (self.targets if targets is None else targets)]
+
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="ClientPool")
+            calls = [(client.target, self.__executor.submit(function, client)) for client in clients]
+
+        results = {}
+        for target, call in calls:
+            error = call.exception()
+            results[target] = error if error is not None else call.result()
+        return results
+
+    def close(self):
+        with self.__lock:
+            if self.__executor is not None:
+                self.__executor.shutdown()
+                self.__executor = None
+            for client in self.__clients.values():
+                client.close()
+            self.__clients.clear()
@@ -0,0 +1,135 @@
+"""Settings shared by the blocking and asyncio clients"""
+import os
+import random
+from typing import Iterator, Union
+
+import grpc
+
+from ..preview import PreviewFormat
+from ..rpc_library import panelrpc_pb2
+
+# The port the server listens on unless told otherwise
+DEFAULT_PORT = 50051
+
+# The directory the server and clients read their certificates from by default
+CERTIFICATE_DIR = "./certificates"
+
+# Channels ping an idle server this often, so a display that went away is noticed before the
+# next call rather than by it and NAT routers keep the connection open
+KEEPALIVE_TIME_MS = 30000
+KEEPALIVE_TIMEOUT_MS = 10000
+
+CHANNEL_OPTIONS = [("grpc.keepalive_time_ms", KEEPALIVE_TIME_MS),
+                   ("grpc.keepalive_timeout_ms", KEEPALIVE_TIMEOUT_MS),
+                   ("grpc.keepalive_permit_without_calls", 1),
+                   ("grpc.http2.max_pings_without_data", 0)]
+
+# The deadline of a call, including all of its retries, when none is given
+DEFAULT_TIMEOUT_S = 10.0
+
+
+def normalize_target(target: str) -> str:
+    """Adds the default port to a host that doesn't name one
+
+    Args:
+        target: A host name, an IPv4 address or an IPv6 address in brackets, with or without a port
+
+    Returns:
+        The target in host:port form
+    """
+    if ":" not in target or target.endswith("]"):
+        return "{0}:{1}".format(target, DEFAULT_PORT)
+    return target
+
+
+def frame_format(format: Union[PreviewFormat, int]) -> int:
+    """Converts a preview format into the FrameFormat of the RPC messages
+
+    Args:
+        format: A PreviewFormat or a FrameFormat value
+    """
+    if isinstance(format, PreviewFormat):
+        return panelrpc_pb2.FrameFormat.Value(format.name)
+    return format
+
+
+class TlsConfig(object):
+    """The certificates a client presents to the server and the root CA it trusts
+
+    The server only accepts clients with a certificate signed by its root CA.
+
+    Args:
+        root_ca: The PEM encoded root CA the server certificate must be signed by
+        certificate: The PEM encoded certificate chain of the client
+        private_key: The PEM encoded private key of the client certificate
+        server_name: The name the server certificate is checked against instead of the host
+        of the target, or None. Useful when displays are reached by an address that isn't in
+        their certificate.
+    """
+    def __init__(self, root_ca: bytes, certificate: bytes, private_key: bytes, server_name: str = None):
+        self.root_ca = root_ca
+        self.certificate = certificate
+        self.private_key = private_key
+        self.server_name = server_name
+
+    @classmethod
+    def from_directory(cls, certificate_dir: str = CERTIFICATE_DIR, name: str = "panel_service",
+                       server_name: str = None) -> 'TlsConfig':
+        """Reads root_ca.crt along with the certificate and unencrypted key of a client
+
+        Args:
+            certificate_dir: The directory holding the certificates
+            name: The name of the client certificate, which is read from <name>.crt and
+            <name>_nopass.key
+            server_name: See `TlsConfig`
+        """
+        def read(file_name):
+            with open(os.path.join(certificate_dir, file_name), "rb") as f:
+                return f.read()
+
+        return cls(read("root_ca.crt"), read(name + ".crt"), read(name + "_nopass.key"), server_name)
+
+    def credentials(self) -> grpc.ChannelCredentials:
+        return grpc.ssl_channel_credentials(self.root_ca, self.private_key, self.certificate)
+
+    def channel_options(self) -> list:
+        """The options of channels that use these certificates, including keepalive"""
+        if self.server_name is None:
+            return list(CHANNEL_OPTIONS)
+        return CHANNEL_OPTIONS + [("grpc.ssl_target_name_override", self.server_name)]
+
+
+class RetryPolicy(object):
+    """How failed calls are retried
+
+    Calls are retried with exponential backoff and full jitter until they succeed, fail with a
+    code that isn't retryable, run out of attempts or would run past their deadline. Streaming
+    calls are never retried.
+
+    Args:
+        max_attempts: The most times a call is made, including the first attempt
+        initial_backoff_s: The longest wait before the first retry
+        max_backoff_s: The longest wait before any retry
+        multiplier: How much the longest wait grows with every retry
+        retryable_codes: The status codes of failures that are worth retrying
+    """
+    def __init__(self, max_attempts: int = 5, initial_backoff_s: float = 0.05, max_backoff_s: float = 1.0,
+                 multiplier: float = 2.0,
+                 retryable_codes=(grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.RESOURCE_EXHAUSTED)):
+        self.max_attempts = max_attempts
+        self.initial_backoff_s = initial_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.multiplier = multiplier
+        self.retryable_codes = frozenset(retryable_codes)
+
+    def backoffs(self) -> Iterator[float]:
+        """Generates the wait before each retry of a call"""
+        for retry in range(self.max_attempts - 1):
+            yield random.uniform(0.0, min(self.initial_backoff_s * self.multiplier ** retry, self.max_backoff_s))
+
+    def should_retry(self, error: grpc.RpcError) -> bool:
+        return error.code() in self.retryable_codes
+
+
+# A policy that makes every call exactly once
+NO_RETRIES = RetryPolicy(max_attempts=1)
@@ -0,0 +1,217 @@
+"""A load generator for PanelController servers
+
+Workers share a pool of persistent channels, spread across the targets in turn, and send
+requests picked at random from a weighted mix for a set time or number of requests. The
+latency percentiles of every kind of request are reported at the end. Streaming requests are
+timed until their first message arrives.
+
+Example:
+    Mostly fetch previews from two displays, with the odd GIF, from 16 concurrent workers
+
+        $ pixelpanels-load panel-1.local panel-2.local --mix get_frame=8,play_gif=1 --concurrency 16
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import grpc
+import numpy as np
+
+from ..preview import PreviewFormat
+from .aio import AsyncClientPool, AsyncPanelClient
+from .common import CERTIFICATE_DIR, DEFAULT_TIMEOUT_S, RetryPolicy, TlsConfig
+
+
+async def _first_message(call):
+    async for message in call:
+        call.cancel()
+        return message
+    return None
+
+
+# The requests a mix can be made of, called with a client and the parsed arguments
+REQUESTS = {
+    "get_frame": lambda client, args: client.get_frame(PreviewFormat[args.format.upper()], args.scale),
+    "play_gif": lambda client, args: client.play_gif(args.gif),
+    "get_trace": lambda client, args: client.get_trace(),
+    "watch_stats": lambda client, args: _first_message(client.watch_stats()),
+    "watch_frames": lambda client, args: _first_message(client.watch_frames(PreviewFormat[args.format.upper()],
+                                                                           args.scale)),
+}
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    """Parses a request mix of the form "name=weight,name=weight"
+
+    A request without a weight has a weight of 1.
+
+    Returns:
+        The name and weight of each request
+    """
+    requests = []
+    for entry in mix.split(","):
+        name, _, weight = entry.strip().partition("=")
+        if name not in REQUESTS:
+            raise ValueError("Unknown request {0}, expected one of {1}".format(name, ", ".join(REQUESTS)))
+        weight = float(weight) if weight else 1.0
+        if weight <= 0.0:
+            raise ValueError("The weight of {0} must be positive".format(name))
+        requests.append((name, weight))
+    return requests
+
+
+class LoadReport(object):
+    """The latencies and failures of the requests sent by a load run
+
+    Attributes:
+        latencies (Dict[str, List[float]]): The seconds each successful request took by request name
+
+        failures (Dict[str, Counter]): The status codes of failed requests by request name
+
+        elapsed (float): The seconds the run took
+    """
+    def __init__(self, names: List[str]):
+        self.latencies = {name: [] for name in names}
+        self.failures = {name: Counter() for name in names}
+        self.elapsed = 0.0
+
+    @property
+    def failure_count(self) -> int:
+        return sum(sum(codes.values()) for codes in self.failures.values())
+
+    def lines(self) -> List[str]:
+        """Formats the report as a table of percentiles in milliseconds followed by the failures"""
+        lines = ["{0:<14}{1:>8}{2:>8}{3:>10}{4:>9}{5:>9}{6:>9}{7:>9}".format(
+            "request", "ok", "failed", "req/s", "p50 ms", "p90 ms", "p99 ms", "max ms")]
+
+        rows = [(name, self.latencies[name], sum(self.failures[name].values())) for name in self.latencies]
+        rows.append(("all", [latency for latencies in self.latencies.values() for latency in latencies],
+                     self.failure_count))
+
+        for name, latencies, failed in rows:
+            rate = (len(latencies) + failed) / self.elapsed if self.elapsed > 0 else 0.0
+            if latencies:
+                p50, p90, p99, maximum = (np.percentile(latencies, [50, 90, 99, 100]) * 1000.0).tolist()
+                timings = "{0:>9.2f}{1:>9.2f}{2:>9.2f}{3:>9.2f}".format(p50, p90, p99, maximum)
+            else:
+                timings = "{0:>9}{0:>9}{0:>9}{0:>9}".format("-")
+            lines.append("{0:<14}{1:>8}{2:>8}{3:>10.1f}{4}".format(name, len(latencies), failed, rate, timings))
+
+        for name, codes in self.failures.items():
+            for code, count in sorted(codes.items()):
+                lines.append("{0} failed {1} times with {2}".format(name, count, code))
+
+        return lines
+
+
+async def run_load(pool: AsyncClientPool, mix: List[Tuple[str, float]], args: argparse.Namespace,
+                   concurrency: int = 8, duration: Optional[float] = 10.0, request_count: Optional[int] = None,
+                   seed: int = None) -> LoadReport:
+    """Sends a mix of requests to every display of a pool until the time or request count runs out
+
+    Args:
+        pool: The clients of the displays under load
+        mix: The name and weight of each request, see `parse_mix`
+        args: The arguments the requests are made with, see `REQUESTS`
+        concurrency: The number of requests in flight at any time
+        duration: The seconds to send requests for, or None to stop after request_count
+        request_count: The number of requests to send, or None to stop after duration
+        seed: Seeds the choice of requests so runs can be repeated
+
+    Returns:
+        The latencies and failures of the requests
+    """
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    report = LoadReport(names)
+    rng = random.Random(seed)
+    targets = pool.targets
+
+    start_time = time.monotonic()
+    deadline = start_time + duration if duration is not None else None
+    sent = 0
+
+    async def worker(client: AsyncPanelClient):
+        nonlocal sent
+        while (deadline is None or time.monotonic() < deadline) and (request_count is None or sent < request_count):
+            sent += 1
+            name = rng.choices(names, weights)[0]
+
+            request_start = time.perf_counter()
+            try:
+                await REQUESTS[name](client, args)
+            except grpc.aio.AioRpcError as error:
+                report.failures[name][error.code().name] += 1
+            else:
+                report.latencies[name].append(time.perf_counter() - request_start)
+
+    await asyncio.gather(*(worker(pool.client(targets[i % len(targets)])) for i in range(concurrency)))
+    report.elapsed = time.monotonic() - start_time
+    return report
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs the pixelpanels-load command
+
+    Returns:
+        0 if every request succeeded, otherwise 1
+    """
+    parser = argparse.ArgumentParser(prog="pixelpanels-load", description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="+", help="The displays to load, as host or host:port")
+    parser.add_argument("--mix", default="get_frame",
+                        help="The requests to send and their weights, as name=weight separated by commas. Requests "
+                             "are {0}.".format(", ".join(REQUESTS)))
+    parser.add_argument("--concurrency", help="The number of requests in flight at any time", type=int, default=8)
+    parser.add_argument("--duration", help="The seconds to send requests for, 10 unless --requests is given",
+                        type=float)
+    parser.add_argument("--requests", help="The number of requests to send", type=int)
+    parser.add_argument("--timeout", help="The deadline of each request in seconds", type=float,
+                        default=DEFAULT_TIMEOUT_S)
+    parser.add_argument("--attempts", help="The most times a failed request is made", type=int, default=1)
+    parser.add_argument("--gif", help="The path on the server played by play_gif requests",
+                        default="../data/local/NyanScaled.gif")
+    parser.add_argument("--format", help="The frame format of get_frame and watch_frames requests",
+                        choices=[format.name.lower() for format in PreviewFormat], default="png")
+    parser.add_argument("--scale", help="The upscale factor of get_frame and watch_frames requests", type=int,
+                        default=1)
+    parser.add_argument("--certificates", help="The directory holding root_ca.crt and the client certificate",
+                        default=CERTIFICATE_DIR)
+    parser.add_argument("--client_name", help="The name of the client certificate and key files",
+                        default="panel_service")
+    parser.add_argument("--server_name", help="The name the server certificates are checked against instead of "
+                                              "the target hosts")
+    parser.add_argument("--seed", help="Seeds the choice of requests", type=int)
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as error:
+        parser.error(str(error))
+
+    duration = args.duration
+    if duration is None and args.requests is None:
+        duration = 10.0
+
+    tls = TlsConfig.from_directory(args.certificates, args.client_name, args.server_name)
+    retry_policy = RetryPolicy(max_attempts=args.attempts)
+
+    async def run():
+        async with AsyncClientPool(args.targets, tls, retry_policy, args.timeout) as pool:
+            return await run_load(pool, mix, args, args.concurrency, duration, args.requests, args.seed)
+
+    print("Sending {0} to {1} target(s) from {2} workers".format(
+        ", ".join("{0}={1:g}".format(name, weight) for name, weight in mix), len(args.targets), args.concurrency),
+        flush=True)
+    report = asyncio.run(run())
+
+    for line in report.lines():
+        print(line)
+    return 1 if report.failure_count else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,41 @@
-from typing import Tuple
+from typing import Iterable, Iterator, Tuple, Union
+
+import numpy as np
 
 
 class Color:
     """Simple support class for translating different 24-bit RGB color formats.
 
+    Colors are slotted so that creating one per pixel stays cheap. For whole frames or
+    palettes, use `ColorArray` instead.
+
     Args:
         red: byte-value of the red channel from 0-255
         green: byte-value of the red channel from 0-255
         blue: byte-value of the red channel from 0-255
     """
+    __slots__ = ('red', 'green', 'blue')
 
     def __init__(self, red: int = 0, green: int = 0, blue: int = 0):
         self.red = red
         self.green = green
         self.blue = blue
 
+    def __repr__(self):
+        return "Color({0}, {1}, {2})".format(self.red, self.green, self.blue)
+
+    def replace(self, red: int = None, green: int = None, blue: int = None) -> 'Color':
+        """Creates a copy of this `Color` with some channels replaced
+
+        This lets calibration functions derive a new color without modifying the one passed in.
+
+        Returns:
+            A new Color instance
+        """
+        return Color(self.red if red is None else red,
+                     self.green if green is None else green,
+                     self.blue if blue is None else blue)
+
     @staticmethod
     def from_pixel_value(pixel_value: int) -> 'Color':
         """Creates a `Color` from a 24-bit packed integer
@@ -62,3 +83,156 @@ class Color:
             A tuple of the form (red, green, blue)
         """
         return self.red, self.green, self.blue
+
+
+class ColorArray(object):
+    """An array of colors backed by a uint8 NumPy array of the form rgb[..., channel]
+
+    A ColorArray converts whole frames or palettes in a single vectorized operation, where
+    `Color` converts one pixel at a time. It can be passed anywhere `Display` accepts a color
+    or a frame and `np.asarray(color_array)` gives the underlying RGB data without a copy.
+
+    Args:
+        rgb: An array-like of shape (..., 3) with values from 0-255. Values outside that range
+        saturate at 0 or 255.
+    """
+    __slots__ = ('__rgb',)
+
+    def __init__(self, rgb):
+        rgb = np.asarray(rgb)
+        if rgb.ndim == 0 or rgb.shape[-1] != 3:
+            raise ValueError("Color arrays must have a last dimension of 3, got shape {0}".format(rgb.shape))
+
+        if rgb.dtype != np.uint8:
+            rgb = np.clip(rgb, 0, 255).astype(np.uint8)
+        self.__rgb = rgb
+
+    @staticmethod
+    def from_pixel_values(pixel_values) -> 'ColorArray':
+        """Creates a `ColorArray` from 24-bit packed integers
+
+        Args:
+            pixel_values: An array-like of integers of the format (red << 16) | (green << 8) | (blue << 0)
+
+        Returns:
+            A new ColorArray instance with the shape of pixel_values
+        """
+        pixel_values = np.asarray(pixel_values, dtype=np.uint32)
+
+        rgb = np.empty(pixel_values.shape + (3,), dtype=np.uint8)
+        rgb[..., 0] = pixel_values >> 16
+        rgb[..., 1] = pixel_values >> 8
+        rgb[..., 2] = pixel_values
+        return ColorArray(rgb)
+
+    @staticmethod
+    def from_colors(colors: Iterable[Color]) -> 'ColorArray':
+        """Creates a `ColorArray` from a sequence of `Color` instances
+
+        Returns:
+            A new ColorArray instance of shape (N, 3)
+        """
+        return ColorArray(np.array([color.to_tuple() for color in colors], dtype=np.uint8).reshape(-1, 3))
+
+    @staticmethod
+    def from_hsv(hsv) -> 'ColorArray':
+        """Creates a `ColorArray` from hue, saturation and value channels
+
+        Args:
+            hsv: An array-like of shape (..., 3) with every channel from 0.0-1.0. A hue of 1.0
+            wraps around to red.
+
+        Returns:
+            A new ColorArray instance
+        """
+        hsv = np.asarray(hsv, dtype=np.float32)
+        hue, saturation, value = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+
+        # Each channel is the value minus a chroma ramp that peaks a third of the hue circle apart
+        k = (np.stack([hue, hue, hue], axis=-1) * 6.0 + np.array([5.0, 3.0, 1.0], dtype=np.float32)) % 6.0
+        ramp = np.clip(np.minimum(k, 4.0 - k), 0.0, 1.0)
+        rgb = value[..., None] * (1.0 - saturation[..., None] * ramp)
+
+        return ColorArray(np.round(rgb * 255.0).astype(np.uint8))
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """The colors as a uint8 array of shape (..., 3)"""
+        return self.__rgb
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """The shape of the array without the channel dimension"""
+        return self.__rgb.shape[:-1]
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.__rgb
+        return self.__rgb.astype(dtype)
+
+    def __len__(self):
+        return len(self.__rgb)
+
+    def __getitem__(self, index) -> Union[Color, 'ColorArray']:
+        rgb = self.__rgb[index]
+        if rgb.ndim == 1:
+            return Color(int(rgb[0]), int(rgb[1]), int(rgb[2]))
+        return ColorArray(rgb)
+
+    def __iter__(self) -> Iterator[Union[Color, 'ColorArray']]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if not isinstance(other, ColorArray):
+            return NotImplemented
+        return np.array_equal(self.__rgb, other.rgb)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "ColorArray(shape={0})".format(self.shape)
+
+    def to_pixel_values(self) -> np.ndarray:
+        """Converts the colors to 24-bit packed integers
+
+        Returns:
+            A uint32 array of the format (red << 16) | (green << 8) | (blue << 0) with the shape
+            of this array
+        """
+        rgb = self.__rgb.astype(np.uint32)
+        return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+    def to_hsv(self) -> np.ndarray:
+        """Converts the colors to hue, saturation and value channels
+
+        Returns:
+            A float32 array of shape (..., 3) with every channel from 0.0-1.0
+        """
+        rgb = self.__rgb.astype(np.float32) / 255.0
+        red, green, blue = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+
+        value = rgb.max(axis=-1)
+        chroma = value - rgb.min(axis=-1)
+        safe_chroma = np.where(chroma > 0.0, chroma, 1.0)
+
+        hue = np.where(value == red, ((green - blue) / safe_chroma) % 6.0,
+                       np.where(value == green, (blue - red) / safe_chroma + 2.0, (red - green) / safe_chroma + 4.0))
+        hue = np.where(chroma > 0.0, hue / 6.0, 0.0)
+        saturation = np.where(value > 0.0, chroma / np.where(value > 0.0, value, 1.0), 0.0)
+
+        return np.stack([hue, saturation, value], axis=-1).astype(np.float32)
+
+    def scale(self, factor: Union[float, Tuple[float, float, float]]) -> 'ColorArray':
+        """Scales the brightness of the colors
+
+        Results are truncated like `int(channel * factor)` and saturate at 0 and 255.
+
+        Args:
+            factor: A single factor for all channels or a (red, green, blue) tuple of factors
+
+        Returns:
+            A new ColorArray instance
+        """
+        scaled = self.__rgb * np.asarray(factor, dtype=np.float32)
+        return ColorArray(np.clip(scaled, 0.0, 255.0).astype(np.uint8))
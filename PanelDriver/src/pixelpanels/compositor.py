@@ -0,0 +1,368 @@
+from enum import Enum, auto
+from typing import List, Tuple, Optional, Union
+
+import numpy as np
+from PIL.Image import Image
+
+from .color import Color
+
+# A rectangle in canvas coordinates of the form (x0, y0, x1, y1) where the end coordinates are exclusive
+Rect = Tuple[int, int, int, int]
+
+
+class BlendMode(Enum):
+    """Defines how a layer is combined with the layers beneath it
+
+    NORMAL = The layer is painted over the layers beneath it
+    ADD = The layer is added to the layers beneath it, saturating at full brightness
+    MULTIPLY = The layer is multiplied with the layers beneath it, which can only darken
+    SCREEN = The inverse of the layers are multiplied, which can only brighten
+    """
+    NORMAL = auto()
+    ADD = auto()
+    MULTIPLY = auto()
+    SCREEN = auto()
+
+
+def _to_rgba_array(image) -> np.ndarray:
+    """Converts a PIL Image or an RGB/RGBA array into a (height, width, 4) uint8 array
+    """
+    if isinstance(image, Image):
+        return np.asarray(image.convert('RGBA'), dtype=np.uint8)
+
+    array = np.asarray(image, dtype=np.uint8)
+    if array.ndim != 3 or array.shape[2] not in (3, 4):
+        raise ValueError("Layer images must have a shape of (height, width, 3) or (height, width, 4)")
+
+    if array.shape[2] == 3:
+        alpha = np.full(array.shape[:2] + (1,), 255, dtype=np.uint8)
+        array = np.concatenate((array, alpha), axis=2)
+
+    return array
+
+
+class Layer(object):
+    """An RGBA image placed on a compositor canvas
+
+    Layers may be freely changed between composites. Every change marks the area covered by
+    the layer before and after the change so that only those rectangles are recomposited.
+
+    Args:
+        image: A PIL Image or a uint8 array of the form image[y, x] = (red, green, blue[, alpha])
+        offset: The canvas position of the top-left pixel of the layer
+        opacity: The opacity of the whole layer from 0.0 to 1.0
+        blend_mode: How the layer is combined with the layers beneath it
+        visible: Whether the layer takes part in compositing
+    """
+    def __init__(self, image: Union[Image, np.ndarray], offset: Tuple[int, int] = (0, 0),
+                 opacity: float = 1.0, blend_mode: BlendMode = BlendMode.NORMAL, visible: bool = True):
+
+        self.__image = _to_rgba_array(image)
+        self.__offset = (int(offset[0]), int(offset[1]))
+        self.__opacity = float(opacity)
+        self.__blend_mode = blend_mode
+        self.__visible = visible
+        self.__version = 0
+
+        # Normalized color and alpha planes are cached and only rebuilt when the image or opacity
+        # change, so static layers cost nothing but the blend itself
+        self.__cached_rgb = None
+        self.__cached_alpha = None
+
+    def __changed(self, content_changed=False):
+        self.__version += 1
+        if content_changed:
+            self.__cached_rgb = None
+            self.__cached_alpha = None
+
+    @property
+    def image(self):
+        """The RGBA pixel data of the layer as a (height, width, 4) array"""
+        return self.__image
+
+    @image.setter
+    def image(self, value):
+        self.__image = _to_rgba_array(value)
+        self.__changed(content_changed=True)
+
+    @property
+    def offset(self):
+        """The canvas position of the top-left pixel of the layer"""
+        return self.__offset
+
+    @offset.setter
+    def offset(self, value):
+        value = (int(value[0]), int(value[1]))
+        if value != self.__offset:
+            self.__offset = value
+            self.__changed()
+
+    @property
+    def opacity(self):
+        """The opacity of the whole layer from 0.0 to 1.0"""
+        return self.__opacity
+
+    @opacity.setter
+    def opacity(self, value):
+        value = min(max(float(value), 0.0), 1.0)
+        if value != self.__opacity:
+            self.__opacity = value
+            self.__changed(content_changed=True)
+
+    @property
+    def blend_mode(self):
+        """How the layer is combined with the layers beneath it"""
+        return self.__blend_mode
+
+    @blend_mode.setter
+    def blend_mode(self, value):
+        if value != self.__blend_mode:
+            self.__blend_mode = value
+            self.__changed()
+
+    @property
+    def visible(self):
+        """Whether the layer takes part in compositing"""
+        return self.__visible
+
+    @visible.setter
+    def visible(self, value):
+        if value != self.__visible:
+            self.__visible = value
+            self.__changed()
+
+    @property
+    def version(self):
+        """A counter that increases every time the layer changes"""
+        return self.__version
+
+    @property
+    def rect(self) -> Rect:
+        """The unclipped canvas rectangle covered by the layer"""
+        height, width = self.__image.shape[:2]
+        return self.__offset[0], self.__offset[1], self.__offset[0] + width, self.__offset[1] + height
+
+    def touch(self):
+        """Marks the layer as changed
+
+        Call this after modifying the array returned by `image` in place.
+        """
+        self.__changed(content_changed=True)
+
+    def planes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets the cached normalized planes of the layer
+
+        Returns:
+            A tuple of a float32 (height, width, 3) color plane and a float32 (height, width, 1)
+            alpha plane with the layer opacity applied
+        """
+        if self.__cached_rgb is None:
+            self.__cached_rgb = self.__image[..., :3].astype(np.float32) / 255.0
+            self.__cached_alpha = self.__image[..., 3:].astype(np.float32) * (self.__opacity / 255.0)
+
+        return self.__cached_rgb, self.__cached_alpha
+
+
+def _clip_rect(rect: Rect, width: int, height: int) -> Optional[Rect]:
+    x0, y0 = max(rect[0], 0), max(rect[1], 0)
+    x1, y1 = min(rect[2], width), min(rect[3], height)
+
+    if x0 >= x1 or y0 >= y1:
+        return None
+
+    return x0, y0, x1, y1
+
+
+def _rects_overlap(a: Rect, b: Rect) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _merge_rects(rects: List[Rect]) -> List[Rect]:
+    """Merges overlapping rectangles into their bounding boxes until none overlap
+    """
+    merged = []
+    for rect in rects:
+        while True:
+            for i, other in enumerate(merged):
+                if _rects_overlap(rect, other):
+                    rect = (min(rect[0], other[0]), min(rect[1], other[1]),
+                            max(rect[2], other[2]), max(rect[3], other[3]))
+                    del merged[i]
+                    break
+            else:
+                break
+        merged.append(rect)
+
+    return merged
+
+
+class Compositor(object):
+    """Blends an ordered stack of layers into a single frame
+
+    The compositor keeps its own framebuffer and remembers where each layer was when it was
+    last composited. Only the rectangles touched by layers that changed since then are
+    recomposited, so small moving sprites over static content are cheap.
+
+    Args:
+        pixel_width: The width of the canvas in pixels, usually `Display.pixel_width`
+        pixel_height: The height of the canvas in pixels, usually `Display.pixel_height`
+        background: The color shown where no layer covers the canvas
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, background: Color = None):
+
+        self.__pixel_width = pixel_width
+        self.__pixel_height = pixel_height
+        self.__background = background if background is not None else Color()
+
+        self.__layers = []
+        self.__composited_state = {}
+        self.__pending_rects = [(0, 0, pixel_width, pixel_height)]
+        self.__last_dirty_rects = []
+
+        self.__frame = np.zeros((pixel_height, pixel_width, 3), dtype=np.uint8)
+
+    @property
+    def pixel_width(self):
+        return self.__pixel_width
+
+    @property
+    def pixel_height(self):
+        return self.__pixel_height
+
+    @property
+    def layers(self):
+        """The layers of the compositor ordered from bottom to top"""
+        return tuple(self.__layers)
+
+    @property
+    def background(self):
+        return self.__background
+
+    @background.setter
+    def background(self, value):
+        self.__background = value
+        self.invalidate()
+
+    @property
+    def last_dirty_rects(self) -> List[Rect]:
+        """The rectangles that were recomposited by the most recent call to `composite`"""
+        return list(self.__last_dirty_rects)
+
+    def add_layer(self, layer: Layer, index: int = None) -> Layer:
+        """Adds a layer to the stack
+
+        Args:
+            layer: The layer to add
+            index: The position in the stack, where 0 is the bottom. By default the
+            layer is placed on top.
+
+        Returns:
+            The added layer
+        """
+        if index is None:
+            self.__layers.append(layer)
+        else:
+            self.__layers.insert(index, layer)
+
+        self.__pending_rects.append(layer.rect)
+        return layer
+
+    def remove_layer(self, layer: Layer):
+        """Removes a layer from the stack
+
+        Args:
+            layer: The layer to remove
+        """
+        self.__layers.remove(layer)
+
+        state = self.__composited_state.pop(id(layer), None)
+        self.__pending_rects.append(state[1] if state is not None else layer.rect)
+
+    def move_layer(self, layer: Layer, index: int):
+        """Moves a layer to a new position in the stack
+
+        Args:
+            layer: The layer to move
+            index: The new position in the stack, where 0 is the bottom
+        """
+        self.__layers.remove(layer)
+        self.__layers.insert(index, layer)
+        self.__pending_rects.append(layer.rect)
+
+    def invalidate(self):
+        """Forces the whole canvas to be recomposited on the next call to `composite`"""
+        self.__pending_rects.append((0, 0, self.__pixel_width, self.__pixel_height))
+
+    def composite(self) -> np.ndarray:
+        """Recomposites any changed areas of the canvas
+
+        Returns:
+            The compositor framebuffer as a (pixel_height, pixel_width, 3) uint8 array. The array
+            is reused between calls and must not be modified by the caller.
+        """
+        rects = self.__pending_rects
+        self.__pending_rects = []
+
+        for layer in self.__layers:
+            state = self.__composited_state.get(id(layer))
+            if state is None or state[0] != layer.version:
+                if state is not None:
+                    rects.append(state[1])
+                rects.append(layer.rect)
+                self.__composited_state[id(layer)] = (layer.version, layer.rect)
+
+        clipped_rects = [_clip_rect(rect, self.__pixel_width, self.__pixel_height) for rect in rects]
+        dirty_rects = _merge_rects([rect for rect in clipped_rects if rect is not None])
+
+        for rect in dirty_rects:
+            self.__composite_rect(rect)
+
+        self.__last_dirty_rects = dirty_rects
+        return self.__frame
+
+    def __composite_rect(self, rect: Rect):
+        x0, y0, x1, y1 = rect
+
+        accumulator = np.empty((y1 - y0, x1 - x0, 3), dtype=np.float32)
+        accumulator[...] = np.array(self.__background.to_tuple(), dtype=np.float32) / 255.0
+
+        for layer in self.__layers:
+            if not layer.visible:
+                continue
+
+            overlap = _clip_rect(layer.rect, x1, y1)
+            if overlap is None:
+                continue
+            overlap = (max(overlap[0], x0), max(overlap[1], y0), overlap[2], overlap[3])
+            if overlap[0] >= overlap[2] or overlap[1] >= overlap[3]:
+                continue
+
+            rgb, alpha = layer.planes()
+            layer_x, layer_y = layer.offset
+            source = (slice(overlap[1] - layer_y, overlap[3] - layer_y),
+                      slice(overlap[0] - layer_x, overlap[2] - layer_x))
+            target = accumulator[overlap[1] - y0:overlap[3] - y0, overlap[0] - x0:overlap[2] - x0]
+
+            _blend(target, rgb[source], alpha[source], layer.blend_mode)
+
+        np.multiply(accumulator, 255.0, out=accumulator)
+        np.add(accumulator, 0.5, out=accumulator)
+        self.__frame[y0:y1, x0:x1] = accumulator.astype(np.uint8)
+
+
+def _blend(target: np.ndarray, rgb: np.ndarray, alpha: np.ndarray, blend_mode: BlendMode):
+    """Blends normalized layer planes into a normalized target in place
+    """
+    if blend_mode == BlendMode.NORMAL:
+        blended = rgb
+    elif blend_mode == BlendMode.ADD:
+        blended = np.minimum(target + rgb, 1.0)
+    elif blend_mode == BlendMode.MULTIPLY:
+        blended = target * rgb
+    elif blend_mode == BlendMode.SCREEN:
+        blended = 1.0 - (1.0 - target) * (1.0 - rgb)
+    else:
+        raise ValueError("Unsupported blend mode: {0}".format(blend_mode))
+
+    # target = target * (1 - alpha) + blended * alpha, rearranged to avoid temporaries
+    target += (blended - target) * alpha
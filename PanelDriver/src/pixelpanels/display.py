@@ -1,27 +1,162 @@
-import copy
+import math
 import time
-from threading import Lock
-from typing import List, Callable
+from enum import Enum, auto
+from threading import RLock
+from typing import List, Callable, Iterable, Iterator, Tuple, Union
+
+import numpy as np
 
 # We must alias the module separately so that type hinting works
 from PIL import Image as ImageLib
 from PIL.Image import Image
 
-from .color import Color
+from .calibration import CalibrationTable
+from .color import Color, ColorArray
+from .layout import LedLayout
+from .palette import PaletteMapper, seek_palette_frame
 from .panel import PanelOrigin, Panel, PanelPlacement
+from .stats import FrameStats
+from .strip import ColorOrder, PixelStrip
+from .tracing import span
+from .viewport import Viewport
+from .wipes import WipeOrder, wipe_order_map, wipe_frame_count, wipe_frames
+
+
+def calibrate_pixel_values(pixel_values: np.ndarray, color_cal: Callable[[Color], Color]) -> np.ndarray:
+    """Applies a color calibration to an array of packed pixel values
+
+    The calibration function is only called once for each unique color in the array
+    which keeps the cost proportional to the palette of the content instead of its size.
 
-# This import and associated mock module is used to allow for running and debugging code
-# on platforms for which rpi_ws281x cannot compile or execute
-try:
-    from rpi_ws281x import PixelStrip
-except ImportError:
-    print("rpi_ws281x not on this system. Providing mock for testing.")
-    from .mock_rpi_ws281x import PixelStrip
+    Args:
+        pixel_values: An array of 24-bit packed pixel values
+        color_cal: A function that takes a Color and transforms it into another Color, or None
+
+    Returns:
+        An array of calibrated pixel values with the same shape
+    """
+    if color_cal is None:
+        return pixel_values
+
+    unique_values, inverse = np.unique(pixel_values, return_inverse=True)
+    calibrated_values = np.fromiter((color_cal(Color.from_pixel_value(int(value))).to_pixel_value()
+                                     for value in unique_values), dtype=np.uint32, count=len(unique_values))
+
+    return calibrated_values[inverse].reshape(pixel_values.shape)
+
+
+def frame_to_led_values(frame: np.ndarray, led_order: np.ndarray,
+                        color_cal: Callable[[Color], Color] = None, led_weights: np.ndarray = None) -> np.ndarray:
+    """Converts an RGB frame into calibrated pixel values in LED order
+
+    Args:
+        frame: A uint8 array of the form frame[y, x] = (red, green, blue)
+        led_order: The flat frame index of each LED as given by `Display.led_order`
+        color_cal: A function that takes a Color and transforms it into another Color, or None
+        led_weights: The bilinear weights given by `Display.led_weights`, or None if each LED
+        shows a single frame pixel
+
+    Returns:
+        A uint32 array of the form led_values[led_index] = pixel_value
+    """
+    if led_weights is not None:
+        # Each LED blends the four pixels around it with fixed point weights that sum to 1.0
+        samples = np.asarray(frame).reshape(-1, 3)[led_order]
+        rgb = np.einsum('lkc,lk->lc', samples, led_weights, dtype=np.uint32) >> 8
+        pixel_values = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        return calibrate_pixel_values(pixel_values, color_cal)
+
+    frame = frame.astype(np.uint32, copy=False)
+    pixel_values = (frame[..., 0] << 16) | (frame[..., 1] << 8) | frame[..., 2]
+    pixel_values = calibrate_pixel_values(pixel_values, color_cal)
+
+    return pixel_values.ravel()[led_order]
+
+
+class PreparedFrame(np.ndarray):
+    """An RGB frame that carries its calibrated pixel values in LED order
+
+    `Display.show_frame` uses the attached LED values directly when the display layout and
+    calibration still match the ones the frame was prepared with. Otherwise the frame is
+    handled like any other RGB array.
+
+    The LED values do not include the per-panel calibrations of the display, which are
+    applied as frames are shown, so prepared frames stay valid when those calibrations change.
+
+    Attributes:
+        led_values: A uint32 array of the form led_values[led_index] = pixel_value
+        led_order: The `Display.led_order` the LED values were mapped with
+        color_cal: The calibration function the LED values were calibrated with
+        panel_calibrated: Whether the LED values already include the per-panel calibrations
+        and are written to the strip as they are
+    """
+    led_values = None
+    led_order = None
+    color_cal = None
+    panel_calibrated = False
+
+
+class CommitPolicy(Enum):
+    """Decides which of several competing writers gets to show its frames
+
+    LAST_WRITER_WINS = Every commit is shown in the order commits complete
+
+    PRIORITY = A commit is dropped while a writer of higher priority has committed within
+    the last `Display.priority_hold_s` seconds
+    """
+    LAST_WRITER_WINS = auto()
+    PRIORITY = auto()
+
+
+class FrameTransaction(object):
+    """A frame built off to the side of a display and committed in a single step
+
+    The transaction starts with a writable copy of the frame being displayed. Nothing is
+    shown until `commit` is called, at which point the whole frame replaces the displayed one
+    atomically. Used as a context manager, the frame is committed when the block exits
+    normally and discarded if it raises.
+
+    Example:
+        Draw a red bar over whatever is on the display
+
+            with display.transaction() as frame:
+                frame[:, :8] = (255, 0, 0)
+
+    Args:
+        display: The display the frame is committed to
+        priority: The priority of the writer, see `CommitPolicy.PRIORITY`
+    """
+    def __init__(self, display: 'Display', priority: int = 0):
+
+        self.display = display
+        self.priority = priority
+        self.frame = np.array(display.frame)
+        self.committed = None
+
+    def __enter__(self) -> np.ndarray:
+        return self.frame
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+    def commit(self) -> bool:
+        """Shows the frame on the display
+
+        Returns:
+            True if the frame was shown, False if the commit policy dropped it
+        """
+        self.committed = self.display.show_frame(self.frame, self.priority)
+        return self.committed
 
 
 class Display(object):
     """Represents a pixel display made up of several panels
 
+    Every change to the display is committed as a whole frame. Frames are converted to LED
+    values by the writing thread and swapped in under a single lock, so concurrent writers
+    never produce a frame that mixes their pixels. Which writer wins is set by commit_policy.
+
     Note:
         Placements must be listed in order of how they are connected to ensure the
         LED data is clocked out properly
@@ -36,12 +171,30 @@ class Display(object):
 
         color_cal: A function that takes a Color and transforms it into another Color. Called
         before each pixel color is set to provide arbitrary color calibration.
+
+        layout: The position of every LED for installations that are not a grid of panels.
+        When given, placements are ignored.
+
+        color_order: The channel order of the LED strip
+
+    Attributes:
+        commit_policy (CommitPolicy): How competing writers are resolved
+
+        priority_hold_s (float): How long a writer keeps the display from lower priority writers
+        after its last commit when commit_policy is PRIORITY
+
+        tracer (Tracer): Records a span for each stage of each frame (decode, resize, map,
+        calibrate, panel calibrate, load, show and callback) when set. Tracing is off while this is None.
+
+        stats (FrameStats): Running counts and timings of the frames shown, which are always kept
+        since they cost next to nothing per frame
     """
     def __init__(self, placements: List[PanelPlacement] = None,
                  draw_callback: Callable[[Image], None] = None,
-                 color_cal: Callable[[Color], Color] = None):
+                 color_cal: Callable[[Color], Color] = None, layout: LedLayout = None,
+                 color_order: ColorOrder = ColorOrder.GRB):
 
-        if placements is None:
+        if placements is None and layout is None:
             # Create a default 2x4 panel placement
             placements = [PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 16), (15, 31)),
                           PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 16), (31, 31)),
@@ -53,10 +206,25 @@ class Display(object):
                           PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 0), (63, 15))]
 
         self.__placements = placements
+        self.__layout = layout
+        self.__rotation = 0
+        self.__flip_horizontal = False
+        self.__flip_vertical = False
+        self.__frame = None
+        self.__committed = (0, None)
         self.__regenerate_pixel_indices()
 
-        self.__draw_lock = Lock()
+        # Reentrant so the draw callback can read the display while a commit holds the lock
+        self.__commit_lock = RLock()
         self.__draw_callback = draw_callback
+        self.__sinks = []
+
+        self.commit_policy = CommitPolicy.LAST_WRITER_WINS
+        self.priority_hold_s = 1.0
+        self.tracer = None
+        self.stats = FrameStats()
+        self.__held_priority = None
+        self.__held_time = 0.0
 
         # TODO: extract these into a settings class
         LED_COUNT = self.__pixel_count  # Number of LED pixels.
@@ -67,7 +235,10 @@ class Display(object):
         LED_INVERT = False  # True to invert the signal (when using NPN transistor level shift)
         LED_CHANNEL = 0  # set to '1' for GPIOs 13, 19, 41, 45 or 53
 
-        self.pixel_strip = PixelStrip(LED_COUNT, LED_PIN, LED_FREQ_HZ, LED_DMA, LED_INVERT, LED_BRIGHTNESS, LED_CHANNEL)
+        self.__led_freq_hz = LED_FREQ_HZ
+
+        self.pixel_strip = PixelStrip(LED_COUNT, LED_PIN, LED_FREQ_HZ, LED_DMA, LED_INVERT, LED_BRIGHTNESS, LED_CHANNEL,
+                                      color_order)
 
         # Intialize the pixel strip library. This must be called before pixel_strip is otherwise used
         self.pixel_strip.begin()
@@ -79,6 +250,13 @@ class Display(object):
         in the pixel strip.
         """
 
+        if self.__layout is not None:
+            self.__pixel_count = self.__layout.led_count
+            self.__physical_index_map = None
+            self.__calibration_table = None
+            self.__compose_transform()
+            return
+
         led_index_offset = 0
         display_index_dict = {}
 
@@ -92,39 +270,140 @@ class Display(object):
 
         # Extract key variables from the dictionary
         self.__pixel_count = len(display_index_dict)
-        self.__pixel_width = max(display_index_dict.keys(), key=lambda pixel: pixel[0])[0] + 1
-        self.__pixel_height = max(display_index_dict.keys(), key=lambda pixel: pixel[1])[1] + 1
+        physical_width = max(display_index_dict.keys(), key=lambda pixel: pixel[0])[0] + 1
+        physical_height = max(display_index_dict.keys(), key=lambda pixel: pixel[1])[1] + 1
 
-        # We convert the dictionary to a 2d list for a couple of reasons. First, it makes lookup
-        # very quick which is better since it will be done real-time. Second, we must explicitly
-        # convert our earlier numpy integer elements to plain Python integers or our lower-level
-        # LED driver code will complain
-        self.__pixel_indices = [[int(display_index_dict[(x, y)]) for y in range(self.__pixel_height)] for x in
-                                range(self.__pixel_width)]
+        # The mapping of the panels as mounted, of the form physical_index_map[y, x]=led_index. Placements
+        # don't have to tile the whole rectangle and gaps without an LED are marked with -1.
+        self.__physical_index_map = np.array([[display_index_dict.get((x, y), -1) for x in range(physical_width)]
+                                              for y in range(physical_height)], dtype=np.intp)
 
-    def __set_pixel_color(self, x, y, color):
+        self.__calibration_table = CalibrationTable.from_placements(self.placements)
+        self.__compose_transform()
 
-        cal_color = copy.copy(color)
+    def __compose_transform(self):
+        """Folds the display transform into the index map and recomputes everything derived from it
 
-        if self.color_cal is not None:
-            cal_color = self.color_cal(cal_color)
+        Frames are shown as rot_cw(flip(frame)), so the logical index map is the inverse
+        transform of the physical one.
+        """
+        if self.__layout is not None:
+            layout = self.__layout.transformed(self.__rotation, self.__flip_horizontal, self.__flip_vertical)
+            self.__pixel_height, self.__pixel_width = layout.pixel_height, layout.pixel_width
+            self.__led_order = layout.led_order
+            self.__led_weights = layout.led_weights
+            self.__led_pixels = layout.nearest_pixels
+
+            # LEDs sharing a nearest pixel are shown in the index map by the last of them
+            index_map = np.full((self.__pixel_height, self.__pixel_width), -1, dtype=np.intp)
+            index_map.ravel()[self.__led_pixels] = np.arange(self.__pixel_count, dtype=np.intp)
+            self.__index_map = index_map
+        else:
+            index_map = np.rot90(self.__physical_index_map, self.__rotation // 90)
+            if self.__flip_horizontal:
+                index_map = index_map[:, ::-1]
+            if self.__flip_vertical:
+                index_map = index_map[::-1, :]
+
+            # Frames are handled as (height, width, 3) arrays so we also keep the mapping as an array of the
+            # form index_map[y, x]=led_index along with its inverse. The inverse lets us gather a whole frame
+            # into LED order with a single indexing operation.
+            self.__index_map = np.ascontiguousarray(index_map)
+            self.__pixel_height, self.__pixel_width = self.__index_map.shape
+
+            flat_index_map = self.__index_map.ravel()
+            pixels = np.flatnonzero(flat_index_map >= 0)
+            led_order = np.empty(self.__pixel_count, dtype=np.intp)
+            led_order[flat_index_map[pixels]] = pixels
+            self.__led_order = led_order
+            self.__led_weights = None
+            self.__led_pixels = led_order
+
+        # We also keep the mapping as a 2d list of the form pixel_indices[x][y]=led_index. We must
+        # explicitly convert the numpy integer elements to plain Python integers or our lower-level
+        # LED driver code will complain
+        self.__pixel_indices = self.__index_map.T.tolist()
+
+        # The uncalibrated RGB frame that is currently being displayed. Content is kept when the
+        # transform doesn't change the shape of frames.
+        frame_shape = (self.__pixel_height, self.__pixel_width, 3)
+        if self.__frame is None or self.__frame.shape != frame_shape:
+            self.__set_frame(np.zeros(frame_shape, dtype=np.uint8))
+
+    def __set_frame(self, frame):
+        """Replaces the frame being displayed and numbers it"""
+        self.__frame = frame
+        # The number and frame are swapped in together so readers never see one without the other
+        self.__committed = (self.__committed[0] + 1, frame)
+
+    def __frame_to_led_values(self, frame):
+        """Converts an RGB frame into the pixel values written to the strip, in LED order
+        """
+        calibration_table = self.__calibration_table
+        led_values = self.__map_frame(frame)
 
-        pixel_value = cal_color.to_pixel_value()
-        self.pixel_strip.setPixelColor(self.__pixel_indices[x][y], pixel_value)
+        if calibration_table is None or (getattr(frame, "panel_calibrated", False) and led_values is frame.led_values):
+            return led_values
+
+        with span(self.tracer, "panel calibrate"):
+            return calibration_table.apply(led_values)
+
+    def __map_frame(self, frame):
+        """Converts an RGB frame into calibrated pixel values in LED order
+        """
+        led_values = getattr(frame, "led_values", None)
+        if led_values is not None and frame.led_order is self.__led_order and frame.color_cal == self.color_cal:
+            # Frames prepared ahead of time by palette mapping or asset workers skip the mapping
+            self.stats.cache("prepared frames").hits += 1
+            return led_values
+        self.stats.cache("prepared frames").misses += 1
+
+        frame = np.asarray(frame)
+        if frame.shape != (self.__pixel_height, self.__pixel_width, 3):
+            raise ValueError("Frame shape {0} does not match the display shape {1}"
+                             .format(frame.shape, (self.__pixel_height, self.__pixel_width, 3)))
+
+        if self.tracer is None:
+            return frame_to_led_values(frame, self.__led_order, self.color_cal, self.__led_weights)
+
+        # Calibrating the LED values after the gather gives the same result and lets the two stages be traced apart
+        with self.tracer.span("map"):
+            led_values = frame_to_led_values(frame, self.__led_order, None, self.__led_weights)
+        if self.color_cal is None:
+            return led_values
+        with self.tracer.span("calibrate"):
+            return calibrate_pixel_values(led_values, self.color_cal)
 
     def __fit_image_to_panel(self, src_image):
 
-        resized_image = src_image.resize((self.__pixel_width, self.__pixel_height), ImageLib.LANCZOS)
+        with span(self.tracer, "resize"):
+            resized_image = src_image.resize((self.__pixel_width, self.__pixel_height), ImageLib.LANCZOS)
         return resized_image
 
     def __draw(self):
+        """Latches the strip. This must be called with the commit lock held."""
 
-        self.__draw_lock.acquire()
-
-        self.pixel_strip.show()
+        show_start = time.perf_counter()
+        with span(self.tracer, "show"):
+            self.pixel_strip.show()
+        show_end = time.perf_counter()
+        self.stats.record_frame(show_end, show_end - show_start)
         if self.__draw_callback is not None:
-            self.__draw_callback(self.get_display_image())
-        self.__draw_lock.release()
+            with span(self.tracer, "callback"):
+                self.__draw_callback(self.get_display_image())
+
+    def __accept_commit(self, priority):
+        """Applies the commit policy. This must be called with the commit lock held."""
+        if self.commit_policy == CommitPolicy.PRIORITY:
+            now = time.monotonic()
+            held = self.__held_priority is not None and now - self.__held_time < self.priority_hold_s
+            if held and priority < self.__held_priority:
+                return False
+
+            self.__held_priority = priority
+            self.__held_time = now
+
+        return True
 
     @property
     def placements(self):
@@ -135,8 +414,141 @@ class Display(object):
     def placements(self, value):
 
         self.__placements = value
+        self.__layout = None
         self.__regenerate_pixel_indices()
 
+    @property
+    def calibration_table(self):
+        """The compiled per-panel calibrations of the display, or None if no placement has one"""
+        return self.__calibration_table
+
+    def update_calibrations(self):
+        """Compiles the calibrations of the placements again after they were changed
+
+        Frames are shown with the new calibrations from the next frame on. Prepared frames and
+        assets are stored without the per-panel calibrations, so they stay valid.
+        """
+        if self.__layout is None:
+            self.__calibration_table = CalibrationTable.from_placements(self.placements)
+
+    @property
+    def rotation(self):
+        """The clockwise rotation of the content in degrees, one of 0, 90, 180 or 270
+
+        Rotating by 90 or 270 degrees swaps pixel_width and pixel_height.
+        """
+        return self.__rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        self.set_transform(value, self.__flip_horizontal, self.__flip_vertical)
+
+    @property
+    def flip_horizontal(self):
+        """Whether the content is mirrored left to right before it is rotated"""
+        return self.__flip_horizontal
+
+    @flip_horizontal.setter
+    def flip_horizontal(self, value):
+        self.set_transform(self.__rotation, value, self.__flip_vertical)
+
+    @property
+    def flip_vertical(self):
+        """Whether the content is mirrored top to bottom before it is rotated"""
+        return self.__flip_vertical
+
+    @flip_vertical.setter
+    def flip_vertical(self, value):
+        self.set_transform(self.__rotation, self.__flip_horizontal, value)
+
+    def set_transform(self, rotation: int = 0, flip_horizontal: bool = False, flip_vertical: bool = False):
+        """Sets how content is oriented on the mounted panels
+
+        The transform is composed into the index map once, so it costs nothing per frame.
+        Prepared frames stay valid since only the mapping to LEDs changes, as long as the
+        transform keeps the shape of frames.
+
+        Args:
+            rotation: The clockwise rotation of the content in degrees, one of 0, 90, 180 or 270
+            flip_horizontal: Whether the content is mirrored left to right before it is rotated
+            flip_vertical: Whether the content is mirrored top to bottom before it is rotated
+        """
+        if rotation not in (0, 90, 180, 270):
+            raise ValueError("Rotation must be 0, 90, 180 or 270 degrees, got {0}".format(rotation))
+
+        with self.__commit_lock:
+            self.__rotation = rotation
+            self.__flip_horizontal = bool(flip_horizontal)
+            self.__flip_vertical = bool(flip_vertical)
+            self.__compose_transform()
+
+    @property
+    def frame(self):
+        """The uncalibrated frame currently being displayed as a read-only (pixel_height, pixel_width, 3) array
+
+        Committed frames are never modified, so the array keeps showing the frame that was
+        current when this property was read.
+        """
+        frame = self.__frame.view()
+        frame.flags.writeable = False
+        return frame
+
+    @property
+    def committed_frame(self) -> Tuple[int, np.ndarray]:
+        """The number of the frame being displayed along with the frame as given by `frame`
+
+        Both are read in a single step without taking the commit lock, so readers such as
+        remote previews never hold up the render loop. The number goes up with every committed
+        frame, so it tells whether the frame changed since it was last read.
+        """
+        number, frame = self.__committed
+        frame = frame.view()
+        frame.flags.writeable = False
+        return number, frame
+
+    def transaction(self, priority: int = 0) -> FrameTransaction:
+        """Starts building a frame from a copy of the frame being displayed
+
+        Args:
+            priority: The priority of the writer, see `CommitPolicy.PRIORITY`
+
+        Returns:
+            A new FrameTransaction
+        """
+        return FrameTransaction(self, priority)
+
+    @property
+    def led_order(self):
+        """The flat frame index of each LED, such that frame.reshape(-1, 3)[led_order] is in LED order
+
+        With a bilinear layout, this holds the four frame indices each LED blends together.
+        """
+        return self.__led_order
+
+    @property
+    def led_weights(self):
+        """The fixed-point weights of the pixels in led_order for a bilinear layout, otherwise None"""
+        return self.__led_weights
+
+    @property
+    def layout(self):
+        """The LED layout, or None if the display is made up of placements"""
+        return self.__layout
+
+    @layout.setter
+    def layout(self, value):
+
+        self.__layout = value
+        self.__regenerate_pixel_indices()
+
+    @property
+    def max_frame_rate(self):
+        """The highest frame rate the LED data line can carry for this display
+
+        Each LED takes 24 bits and every frame ends with a reset of at least 50us.
+        """
+        return self.__led_freq_hz / (24 * self.__pixel_count + 50e-6 * self.__led_freq_hz)
+
     @property
     def pixel_count(self):
         return self.__pixel_count
@@ -149,15 +561,120 @@ class Display(object):
     def pixel_height(self):
         return self.__pixel_height
 
+    @property
+    def led_pixels(self):
+        """The flat index of the frame pixel nearest to each LED, where the debug image draws it"""
+        return self.__led_pixels
+
+    def add_sink(self, sink):
+        """Sends the LED values of every frame shown from now on to a sink as well as the strip
+
+        Sinks are called in the order frames are shown while the commit lock is held, which
+        stalls every writer, so a sink that does slow work like file or network I/O should hand
+        it to a thread of its own.
+
+        Args:
+            sink: An object with a write(led_values, timestamp) method, such as an `LedRecorder`.
+            It is passed the uint32 LED values of each frame, which it must not modify, and the
+            time.monotonic() time the frame was shown.
+        """
+        with self.__commit_lock:
+            self.__sinks = self.__sinks + [sink]
+
+    def remove_sink(self, sink):
+        """Stops sending frames to a sink added with `add_sink`
+        """
+        with self.__commit_lock:
+            self.__sinks = [other for other in self.__sinks if other is not sink]
+
     def print_indices(self):
         print(self.__pixel_indices)
 
-    def set_color(self, color):
-        for x in range(self.__pixel_width):
-            for y in range(self.__pixel_height):
-                self.__set_pixel_color(x, y, color)
+    def set_color(self, color: Union[Color, ColorArray]):
+        """Sets every pixel of the display to a color
 
-        self.__draw()
+        Args:
+            color: A Color or a ColorArray holding a single color
+        """
+        self.show_frame(self.__to_frame(color))
+
+    def show_frame(self, frame: Union[np.ndarray, ColorArray], priority: int = 0) -> bool:
+        """Displays a frame of pixel data
+
+        The frame is committed atomically. It is fully converted before the commit lock is
+        taken and the strip only ever holds complete frames when it is latched.
+
+        Args:
+            frame: A uint8 array of the form frame[y, x] = (red, green, blue) with a shape
+            of (pixel_height, pixel_width, 3), or a ColorArray of that shape or with one color
+            per pixel in row order
+            priority: The priority of the writer, see `CommitPolicy.PRIORITY`
+
+        Returns:
+            True if the frame was shown, False if the commit policy dropped it
+        """
+        with span(self.tracer, "frame"):
+            if isinstance(frame, ColorArray):
+                frame = self.__to_frame(frame)
+
+            led_order = self.__led_order
+            calibration_table = self.__calibration_table
+            led_values = self.__frame_to_led_values(frame)
+            # The committed frame is a private copy so callers can keep reusing their buffers
+            committed_frame = np.array(frame, dtype=np.uint8)
+
+            with self.__commit_lock:
+                if not self.__accept_commit(priority):
+                    self.stats.drop_frames()
+                    return False
+
+                # The transform or calibrations changed while the frame was being converted
+                if led_order is not self.__led_order or calibration_table is not self.__calibration_table:
+                    led_values = self.__frame_to_led_values(frame)
+
+                # The whole frame crosses into the strip driver in a single call
+                with span(self.tracer, "load"):
+                    self.pixel_strip.write(led_values)
+
+                self.__set_frame(committed_frame)
+                self.__draw()
+
+                if self.__sinks:
+                    timestamp = time.monotonic()
+                    with span(self.tracer, "sinks"):
+                        for sink in self.__sinks:
+                            sink.write(led_values, timestamp)
+
+        return True
+
+    def play_frames(self, frames: Iterable[np.ndarray], fps: float = 30.0):
+        """Displays a sequence of frames at a fixed frame rate
+
+        Frames are paced against a monotonic clock. If a frame is late, the schedule restarts
+        from that frame rather than rushing the following frames to catch up.
+
+        Args:
+            frames: An iterable of frames as accepted by `show_frame`
+            fps: The number of frames to display per second. If None, frames are displayed
+            as quickly as possible.
+        """
+        if fps is None:
+            for frame in frames:
+                self.show_frame(frame)
+            return
+
+        frame_period = 1.0 / fps
+        next_frame_time = time.monotonic()
+
+        for frame in frames:
+            self.show_frame(frame)
+
+            next_frame_time += frame_period
+            delay = next_frame_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_frame_time = time.monotonic()
 
     def get_display_image(self):
         """Gets the currently displayed pixel data as an image
@@ -165,82 +682,161 @@ class Display(object):
         Returns:
             A PIL Image matching what is currently stored in the display
         """
-        image = ImageLib.new("RGB", (self.__pixel_width, self.__pixel_height))
-        rgb_data = [0] * (self.__pixel_width*self.__pixel_height)
+        with self.__commit_lock:
+            led_values = self.pixel_strip.read()
+
+        return ImageLib.fromarray(np.asarray(self.frame_from_led_values(led_values)), "RGB")
 
-        for y in range(self.__pixel_height):
-            for x in range(self.__pixel_width):
-                pixel_value = self.pixel_strip.getPixelColor(self.__pixel_indices[x][y])
-                pixel_color = Color.from_pixel_value(pixel_value)
-                i = y*self.__pixel_width + x
-                rgb_data[i] = pixel_color.to_tuple()
+    def frame_from_led_values(self, led_values: np.ndarray, panel_calibrated: bool = False) -> PreparedFrame:
+        """Builds a frame that shows LED values as they are
 
-        image.putdata(rgb_data)
-        return image
+        The frame carries the LED values, so `show_frame` writes them to the strip without
+        mapping or calibrating them with color_cal. Each LED is drawn at its nearest pixel in
+        the frame and pixels without an LED are black.
 
-    def horizontal_wipe(self, color: Color, delay_ms: int = 50):
+        Args:
+            led_values: A uint32 array of the form led_values[led_index] = pixel_value
+            panel_calibrated: Whether the LED values already include the per-panel calibrations,
+            which are otherwise applied when the frame is shown
+
+        Returns:
+            A frame as accepted by `show_frame`
+        """
+        if len(led_values) != self.__pixel_count:
+            raise ValueError("Got {0} LED values for a display of {1} LEDs".format(len(led_values), self.__pixel_count))
+
+        rgb = np.zeros((self.__pixel_height * self.__pixel_width, 3), dtype=np.uint8)
+        rgb[self.__led_pixels] = ColorArray.from_pixel_values(led_values).rgb
+
+        frame = rgb.reshape(self.__pixel_height, self.__pixel_width, 3).view(PreparedFrame)
+        frame.led_values = led_values
+        frame.led_order = self.__led_order
+        frame.color_cal = self.color_cal
+        frame.panel_calibrated = panel_calibrated
+        return frame
+
+    def __to_frame(self, target):
+        """Converts a Color, ColorArray, PIL Image or RGB array into a frame the size of the display
+        """
+        if isinstance(target, Color):
+            frame = np.empty((self.__pixel_height, self.__pixel_width, 3), dtype=np.uint8)
+            frame[...] = target.to_tuple()
+            return frame
+
+        if isinstance(target, ColorArray):
+            rgb = target.rgb.reshape(-1, 3)
+            if len(rgb) == 1:
+                frame = np.empty((self.__pixel_height, self.__pixel_width, 3), dtype=np.uint8)
+                frame[...] = rgb[0]
+                return frame
+            if len(rgb) != self.__pixel_count:
+                raise ValueError("ColorArray of shape {0} does not have one color per pixel of the display"
+                                 .format(target.shape))
+            return rgb.reshape(self.__pixel_height, self.__pixel_width, 3)
+
+        if isinstance(target, Image):
+            return np.asarray(self.__fit_image_to_panel(target.convert('RGB')), dtype=np.uint8)
+
+        return np.asarray(target, dtype=np.uint8)
+
+    def wipe(self, target: Union[Color, ColorArray, Image, np.ndarray], order: WipeOrder = WipeOrder.HORIZONTAL,
+             step: int = 1, delay_ms: int = 50, duration_ms: int = None):
+        """Wipes from the current content of the display to a color or image
+
+        Args:
+            target: A Color, a PIL Image that is fit to the display or a frame or ColorArray as
+            accepted by `show_frame`
+            order: The order in which pixels change
+            step: The number of wipe steps (columns, rows, pixels, diagonals or rings depending
+            on the order) drawn in each frame
+            delay_ms: The number of milliseconds between frames of animation. A delay shorter
+            than the display can show frames at keeps the length of the wipe but draws fewer
+            frames, as if the matching duration_ms was given. A delay of 0 draws every frame as
+            quickly as possible.
+            duration_ms: The total duration of the wipe in milliseconds. When given, this
+            overrides delay_ms and step is raised if needed so that no more frames are
+            drawn than the display can show in that time.
+        """
+        order_map = wipe_order_map(order, self.__pixel_width, self.__pixel_height)
+
+        # Frames faster than the LED data line can carry would only pile up behind each other
+        if duration_ms is None and 0 < delay_ms < 1000.0 / self.max_frame_rate:
+            duration_ms = wipe_frame_count(order_map, step) * delay_ms
+
+        fps = 1000.0 / delay_ms if delay_ms > 0 else None
+        if duration_ms is not None:
+            visible_frame_count = max(int(duration_ms / 1000.0 * self.max_frame_rate), 1)
+            step = max(step, math.ceil((int(order_map.max()) + 1) / visible_frame_count))
+            fps = wipe_frame_count(order_map, step) / (duration_ms / 1000.0) if duration_ms > 0 else None
+
+        self.play_frames(wipe_frames(self.__frame, self.__to_frame(target), order_map, step), fps)
+
+    def horizontal_wipe(self, color: Union[Color, ColorArray], delay_ms: int = 50, step: int = 2,
+                        duration_ms: int = None):
         """Performs a horizontal color wipe across the display
 
         Args:
             color: The color to display
             delay_ms: The number of milliseconds to wait between
             frames of animation
-
-        Todo:
-            * Extract the modulus parameter into an argument so
-            that the number of lines drawn for each frame in the
-            wipe is controlled by the caller
+            step: The number of columns drawn in each frame
+            duration_ms: The total duration of the wipe, see `wipe`
         """
-        for x in range(self.__pixel_width):
-
-            for y in range(self.__pixel_height):
-                self.__set_pixel_color(x, y, color)
+        self.wipe(color, WipeOrder.HORIZONTAL, step, delay_ms, duration_ms)
 
-            if (x + 1) % 2 == 0:
-                time.sleep(delay_ms / 1000.0)
-                self.__draw()
-
-    def vertical_wipe(self, color: Color, delay_ms: int = 50):
+    def vertical_wipe(self, color: Union[Color, ColorArray], delay_ms: int = 50, step: int = 2,
+                      duration_ms: int = None):
         """Performs a vertical color wipe across the display
 
         Args:
             color: The color to display
             delay_ms: The number of milliseconds to wait between
             frames of animation
-
-        Todo:
-            * Extract the modulus parameter into an argument so
-            that the number of lines drawn for each frame in the
-            wipe is controlled by the caller
+            step: The number of rows drawn in each frame
+            duration_ms: The total duration of the wipe, see `wipe`
         """
-        for y in range(self.__pixel_height):
-
-            for x in range(self.__pixel_width):
-                self.__set_pixel_color(x, y, color)
+        self.wipe(color, WipeOrder.VERTICAL, step, delay_ms, duration_ms)
 
-            if (y + 1) % 2 == 0:
-                time.sleep(delay_ms / 1000.0)
-                self.__draw()
+    def pixel_wipe(self, color, delay_ms=1, step: int = 1, duration_ms: int = None):
+        """Performs a color wipe in row order starting from the top-left pixel
 
-    def pixel_wipe(self, color, delay_ms=1):
-        """Performs a color wipe in order of the pixel indices
+        By default the wipe takes a millisecond per pixel and is drawn at the highest frame
+        rate of the display, with several pixels changing in each frame.
 
         Args:
             color: The color to display
             delay_ms: The number of milliseconds to wait between
-            frames of animation
+            frames of animation, see `wipe`
+            step: The number of pixels drawn in each frame
+            duration_ms: The total duration of the wipe, see `wipe`
+        """
+        self.wipe(color, WipeOrder.PIXEL, step, delay_ms, duration_ms)
 
-        Todo:
-            * Add a modulus parameter as an argument so
-            that the number of pixels drawn for each frame in the
-            wipe is controlled by the caller
+    def pan(self, source: Union[Viewport, Image, str, np.ndarray], path: List[Tuple[float, float]], speed: float,
+            fps: float = 30.0, loop: bool = False, wrap: bool = False):
+        """Pans the display as a window over an image or animation larger than the display
+
+        The source is cached once and every frame is a slice of the cache, so panning costs
+        the same as showing a static frame.
+
+        Args:
+            source: A Viewport, or a PIL Image, image file path or (height, width, 3) array to
+            create one from. Images are used at their own size.
+            path: The waypoints of the top-left corner of the display in canvas pixels
+            speed: The panning speed in pixels per second
+            fps: The number of frames to display per second
+            loop: Whether panning restarts from the first waypoint after reaching the last
+            wrap: Whether a newly created viewport repeats the canvas past its edges
         """
-        for y in range(self.__pixel_height):
+        viewport = source
+        if isinstance(source, str):
+            viewport = Viewport.from_file(source, self.__pixel_width, self.__pixel_height, wrap)
+        elif isinstance(source, Image):
+            viewport = Viewport.from_image(source, self.__pixel_width, self.__pixel_height, wrap)
+        elif not isinstance(source, Viewport):
+            viewport = Viewport(source, self.__pixel_width, self.__pixel_height, wrap)
 
-            for x in range(self.__pixel_width):
-                self.__set_pixel_color(x, y, color)
-                time.sleep(delay_ms / 1000.0)
-                self.__draw()
+        self.play_frames(viewport.frames(path, speed, fps, loop), fps)
 
     def set_image(self, path: str):
         """Displays an image file on the pixel display
@@ -253,26 +849,69 @@ class Display(object):
             leave the caller to do any opening of files or
             creation of image data
         """
-        with Image.open(path) as image:
+        with span(self.tracer, "decode"), ImageLib.open(path) as image:
+            rgb = np.asarray(image.convert('RGB'), dtype=np.uint8)
+
+        # The image is drawn from the top-left without scaling. Pixels it doesn't cover keep their color.
+        height, width = min(rgb.shape[0], self.__pixel_height), min(rgb.shape[1], self.__pixel_width)
+        frame = self.__frame.copy()
+        frame[:height, :width] = rgb[:height, :width]
+
+        self.show_frame(frame)
+
+    def gif_frames(self, path: str) -> Iterator[np.ndarray]:
+        """Generates the frames of a GIF fit to the display
+
+        Palette-indexed frames are resized with nearest neighbour sampling and carry their
+        LED values, which are looked up in a palette calibrated once per GIF. Other images are
+        converted to RGB and resized with Lanczos sampling.
+
+        Args:
+            path: The path to the GIF
+
+        Returns:
+            An iterator of frames as accepted by `show_frame`
+        """
+        with ImageLib.open(path) as image:
+
+            if image.mode == 'P' and self.__led_weights is None:
+                yield from self.__palette_frames(image)
+                return
+
+            for i in range(getattr(image, "n_frames", 1)):
 
-            image_width, image_height = image.size
+                with span(self.tracer, "decode"):
+                    image.seek(i)
+                    rgb_image = image.convert('RGB')
+                yield np.asarray(self.__fit_image_to_panel(rgb_image), dtype=np.uint8)
 
-            for y in range(self.__pixel_height):
+    def __palette_frames(self, image: Image) -> Iterator[np.ndarray]:
+        """Generates the frames of a palette-indexed image fit to the display, see `gif_frames`
+        """
+        mapper = PaletteMapper(image.width, image.height, self.__pixel_width, self.__pixel_height,
+                               self.__led_order, self.color_cal, self.stats.cache("palette"))
 
-                if y >= image_height:
-                    continue
+        for i in range(getattr(image, "n_frames", 1)):
 
-                for x in range(self.__pixel_width):
+            with span(self.tracer, "decode"):
+                is_palette_frame = seek_palette_frame(image, i)
 
-                    if x >= image_width:
-                        continue
+            if not is_palette_frame:
+                # Frames with a palette of their own come out as RGB and are sampled the same way
+                with span(self.tracer, "resize"):
+                    rgb_image = image.convert('RGB').resize((self.__pixel_width, self.__pixel_height),
+                                                            ImageLib.NEAREST)
+                yield np.asarray(rgb_image, dtype=np.uint8)
+                continue
 
-                    pixel_color = image.getpixel((x, y))
-                    self.__set_pixel_color(x, y, Color(pixel_color[0],
-                                                       pixel_color[1],
-                                                       pixel_color[2]))
+            with span(self.tracer, "map"):
+                rgb, led_values = mapper.map(image)
 
-            self.__draw()
+            frame = rgb.view(PreparedFrame)
+            frame.led_values = led_values
+            frame.led_order = mapper.led_order
+            frame.color_cal = mapper.color_cal
+            yield frame
 
     def play_gif(self, path):
         """Plays a GIF from the file path provided
@@ -286,21 +925,9 @@ class Display(object):
             creation of image data
         """
         with ImageLib.open(path) as image:
-
             frame_count = getattr(image, "n_frames", 1)
 
-            if frame_count == 1:
-                return
-
-            for i in range(frame_count):
+        if frame_count == 1:
+            return
 
-                image.seek(i)
-                frame = image.convert('RGB')
-                resized = self.__fit_image_to_panel(frame)
-
-                for y in range(self.__pixel_height):
-                    for x in range(self.__pixel_width):
-                        pixel_color = resized.getpixel((x, y))
-                        self.__set_pixel_color(x, y, Color.from_tuple(pixel_color))
-
-                self.__draw()
+        self.play_frames(self.gif_frames(path), fps=None)
@@ -0,0 +1,391 @@
+"""Procedural effects rendered directly into frames
+
+Every effect precomputes its per-pixel coordinates as table indices when it is created, so
+rendering a frame only offsets those indices by the current time and looks the result up in
+a sine or palette table. Effects are deterministic for a given seed and time.
+
+Example:
+    Play ten seconds of plasma at 60 frames per second
+
+        effect = Plasma(display.pixel_width, display.pixel_height, seed=7)
+        display.play_frames(effect.frames(60.0, duration=10.0), fps=60.0)
+"""
+import colorsys
+from typing import Iterator, List
+
+import numpy as np
+
+from .color import Color
+
+SINE_TABLE_SIZE = 1024
+
+# One period of a sine wave scaled to the range 0-255
+SINE_TABLE = np.round((np.sin(np.arange(SINE_TABLE_SIZE) * 2 * np.pi / SINE_TABLE_SIZE) + 1) * 127.5)
+SINE_TABLE = SINE_TABLE.astype(np.int32)
+
+
+def make_palette(colors: List[Color], size: int = 256, cyclic: bool = False) -> np.ndarray:
+    """Creates a palette by linearly interpolating between colors
+
+    Args:
+        colors: The colors to interpolate between, spaced evenly along the palette
+        size: The number of palette entries
+        cyclic: Whether the palette blends from the last color back into the first so that it
+        can be indexed with wrapping indices
+
+    Returns:
+        A (size, 3) uint8 array
+    """
+    stops = np.array([color.to_tuple() for color in colors], dtype=np.float32)
+    if cyclic:
+        stops = np.concatenate((stops, stops[:1]))
+
+    positions = np.linspace(0, len(stops) - 1, size, endpoint=not cyclic)
+    channels = [np.interp(positions, np.arange(len(stops)), stops[:, channel]) for channel in range(3)]
+
+    return np.round(np.stack(channels, axis=1)).astype(np.uint8)
+
+
+def hue_palette(size: int = 256, saturation: float = 1.0, value: float = 1.0) -> np.ndarray:
+    """Creates a palette that cycles once through every hue
+
+    Returns:
+        A (size, 3) uint8 array
+    """
+    colors = [colorsys.hsv_to_rgb(i / size, saturation, value) for i in range(size)]
+    return np.round(np.array(colors) * 255).astype(np.uint8)
+
+
+def fire_palette(size: int = 256) -> np.ndarray:
+    """Creates a black-red-yellow-white palette for heat values
+
+    Returns:
+        A (size, 3) uint8 array
+    """
+    return make_palette([Color(0, 0, 0), Color(128, 0, 0), Color(255, 64, 0),
+                         Color(255, 192, 0), Color(255, 255, 255)], size)
+
+
+class Effect(object):
+    """Base class for procedural effects
+
+    Subclasses implement `_render` to fill the effect framebuffer for a point in time.
+
+    Args:
+        pixel_width: The width of the frames in pixels, usually `Display.pixel_width`
+        pixel_height: The height of the frames in pixels, usually `Display.pixel_height`
+        seed: The seed for any randomness in the effect
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, seed: int = 0):
+
+        self.pixel_width = pixel_width
+        self.pixel_height = pixel_height
+        self.seed = seed
+
+        self._frame = np.zeros((pixel_height, pixel_width, 3), dtype=np.uint8)
+
+        # Coordinate grids of the form x[y, x]=x and y[y, x]=y for subclasses to precompute from
+        self._y, self._x = np.mgrid[0:pixel_height, 0:pixel_width]
+
+    def _render(self, time_s: float):
+        raise NotImplementedError
+
+    def render(self, time_s: float) -> np.ndarray:
+        """Renders the effect at a point in time
+
+        Args:
+            time_s: The effect time in seconds
+
+        Returns:
+            A (pixel_height, pixel_width, 3) uint8 array. The array is reused between calls
+            and must not be modified by the caller.
+        """
+        self._render(time_s)
+        return self._frame
+
+    def frames(self, fps: float = 60.0, duration: float = None) -> Iterator[np.ndarray]:
+        """Generates frames at evenly spaced effect times
+
+        Args:
+            fps: The number of frames per second of effect time
+            duration: The number of seconds to generate frames for. By default, frames are
+            generated forever.
+
+        Returns:
+            An iterator of frames suitable for `Display.play_frames`
+        """
+        frame_index = 0
+        while duration is None or frame_index < duration * fps:
+            yield self.render(frame_index / fps)
+            frame_index += 1
+
+
+class Plasma(Effect):
+    """The classic demoscene plasma made from four interfering sine waves
+
+    Args:
+        scale: The number of wave periods across the larger display dimension
+        speed: How quickly the waves move in periods per second
+        palette: A (256, 3) uint8 palette. By default, a hue palette is used.
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, seed: int = 0, scale: float = 1.0,
+                 speed: float = 0.25, palette: np.ndarray = None):
+        super().__init__(pixel_width, pixel_height, seed)
+
+        self.palette = hue_palette() if palette is None else palette
+
+        rng = np.random.default_rng(seed)
+        units = SINE_TABLE_SIZE * scale / max(pixel_width, pixel_height)
+        radius = np.hypot(self._x - pixel_width / 2, self._y - pixel_height / 2)
+
+        self.__phases = [np.round(phase * units).astype(np.int32) for phase in
+                         (self._x, self._y, (self._x + self._y) / 2, radius)]
+        self.__offsets = rng.integers(0, SINE_TABLE_SIZE, len(self.__phases))
+        self.__rates = speed * SINE_TABLE_SIZE * rng.uniform(0.5, 1.5, len(self.__phases))
+
+        self.__indices = np.empty((pixel_height, pixel_width), dtype=np.int32)
+        self.__values = np.empty((pixel_height, pixel_width), dtype=np.int32)
+        self.__accumulator = np.empty((pixel_height, pixel_width), dtype=np.int32)
+
+    def _render(self, time_s: float):
+        self.__accumulator.fill(0)
+
+        for phase, offset, rate in zip(self.__phases, self.__offsets, self.__rates):
+            np.add(phase, int(offset + time_s * rate), out=self.__indices)
+            np.bitwise_and(self.__indices, SINE_TABLE_SIZE - 1, out=self.__indices)
+            np.take(SINE_TABLE, self.__indices, out=self.__values)
+            self.__accumulator += self.__values
+
+        self.__accumulator >>= 2
+        np.take(self.palette, self.__accumulator, axis=0, out=self._frame)
+
+
+class Rainbow(Effect):
+    """Bands of hue sweeping across the display
+
+    Args:
+        cycles: The number of complete hue cycles across the display
+        speed: How quickly the hues move in cycles per second
+        angle: The direction of the sweep in degrees, where 0 sweeps along the x-axis
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, seed: int = 0, cycles: float = 1.0,
+                 speed: float = 0.5, angle: float = 0.0):
+        super().__init__(pixel_width, pixel_height, seed)
+
+        self.palette = hue_palette()
+        self.speed = speed
+
+        radians = np.radians(angle)
+        projection = self._x * np.cos(radians) + self._y * np.sin(radians)
+        extent = abs(pixel_width * np.cos(radians)) + abs(pixel_height * np.sin(radians))
+        self.__phase = np.round(projection * 256 * cycles / extent).astype(np.int32)
+
+        self.__indices = np.empty((pixel_height, pixel_width), dtype=np.int32)
+
+    def _render(self, time_s: float):
+        np.add(self.__phase, int(time_s * self.speed * 256), out=self.__indices)
+        np.bitwise_and(self.__indices, 255, out=self.__indices)
+        np.take(self.palette, self.__indices, axis=0, out=self._frame)
+
+
+class Gradient(Effect):
+    """A linear gradient between several colors
+
+    Args:
+        colors: The colors of the gradient, spaced evenly from one edge to the other
+        angle: The direction of the gradient in degrees, where 0 runs along the x-axis
+        speed: How quickly the gradient moves in gradient lengths per second
+        cyclic: Whether the gradient repeats, blending from the last color back into the first.
+        Moving gradients should usually be cyclic.
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, colors: List[Color], seed: int = 0,
+                 angle: float = 0.0, speed: float = 0.0, cyclic: bool = False):
+        super().__init__(pixel_width, pixel_height, seed)
+
+        self.palette = make_palette(colors, cyclic=cyclic)
+        self.speed = speed
+        self.cyclic = cyclic
+
+        radians = np.radians(angle)
+        projection = self._x * np.cos(radians) + self._y * np.sin(radians)
+        projection -= projection.min()
+        self.__phase = np.round(projection * 255 / max(projection.max(), 1)).astype(np.int32)
+
+        self.__indices = np.empty((pixel_height, pixel_width), dtype=np.int32)
+
+    def _render(self, time_s: float):
+        np.add(self.__phase, int(time_s * self.speed * 256), out=self.__indices)
+
+        if self.cyclic:
+            np.bitwise_and(self.__indices, 255, out=self.__indices)
+        else:
+            np.clip(self.__indices, 0, 255, out=self.__indices)
+
+        np.take(self.palette, self.__indices, axis=0, out=self._frame)
+
+
+class Fire(Effect):
+    """Heat rising from the bottom of the display and cooling as it goes
+
+    The fire is a simulation advanced in fixed steps. Rendering an earlier time than the last
+    one restarts the simulation from the seed, so any time renders identically every run.
+
+    Args:
+        steps_per_second: The simulation rate
+        cooling: The average heat lost by a pixel in each step, from 0-255
+        palette: A (256, 3) uint8 palette indexed by heat
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, seed: int = 0, steps_per_second: float = 30.0,
+                 cooling: int = 24, palette: np.ndarray = None):
+        super().__init__(pixel_width, pixel_height, seed)
+
+        self.palette = fire_palette() if palette is None else palette
+        self.steps_per_second = steps_per_second
+        self.cooling = cooling
+
+        # The heat field carries two hidden source rows beneath the visible area
+        self.__heat = np.zeros((pixel_height + 2, pixel_width), dtype=np.int32)
+        self.__next_heat = np.empty((pixel_height, pixel_width), dtype=np.int32)
+        self.__reset()
+
+    def __reset(self):
+        self.__rng = np.random.default_rng(self.seed)
+        self.__heat.fill(0)
+        self.__step_count = 0
+
+    def __step(self):
+        heat = self.__heat
+        heat[-2:] = self.__rng.integers(160, 256, (2, self.pixel_width))
+
+        below = heat[1:-1]
+        next_heat = self.__next_heat
+        np.add(below, heat[2:], out=next_heat)
+        next_heat[:, 1:] += below[:, :-1]
+        next_heat[:, 0] += below[:, 0]
+        next_heat[:, :-1] += below[:, 1:]
+        next_heat[:, -1] += below[:, -1]
+        next_heat >>= 2
+
+        next_heat -= self.__rng.integers(0, 2 * self.cooling + 1, next_heat.shape, dtype=np.int32)
+        np.clip(next_heat, 0, 255, out=heat[:-2])
+
+        self.__step_count += 1
+
+    def _render(self, time_s: float):
+        target_step = int(time_s * self.steps_per_second)
+        if target_step < self.__step_count:
+            self.__reset()
+
+        while self.__step_count < target_step:
+            self.__step()
+
+        np.take(self.palette, self.__heat[:-2], axis=0, out=self._frame)
+
+
+# Gradient directions for improved Perlin noise. The first twelve are the cube edge midpoints and
+# the last four repeat some of them so a hash can be masked with 15 instead of taken modulo 12
+_PERLIN_GRADIENTS = np.array([(1, 1, 0), (-1, 1, 0), (1, -1, 0), (-1, -1, 0),
+                              (1, 0, 1), (-1, 0, 1), (1, 0, -1), (-1, 0, -1),
+                              (0, 1, 1), (0, -1, 1), (0, 1, -1), (0, -1, -1),
+                              (1, 1, 0), (-1, 1, 0), (0, -1, 1), (0, -1, -1)], dtype=np.float32)
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+class Noise(Effect):
+    """Animated Perlin noise mapped through a palette
+
+    The noise is sampled from a 3D field where the third axis is time, which makes it flow
+    smoothly. The x and y lattice terms are precomputed per pixel for each octave so only the
+    time term changes between most frames.
+
+    Args:
+        scale: The number of noise lattice cells across the larger display dimension
+        speed: How quickly the noise evolves in lattice cells per second
+        octaves: The number of layered octaves, each at double the frequency and half the weight
+        palette: A (256, 3) uint8 palette. By default, a hue palette is used.
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, seed: int = 0, scale: float = 4.0,
+                 speed: float = 0.5, octaves: int = 2, palette: np.ndarray = None):
+        super().__init__(pixel_width, pixel_height, seed)
+
+        self.palette = hue_palette() if palette is None else palette
+        self.speed = speed
+
+        permutation = np.random.default_rng(seed).permutation(256)
+        self.__permutation = np.concatenate((permutation, permutation)).astype(np.int32)
+
+        self.__octaves = []
+        cell_size = max(pixel_width, pixel_height) / scale
+        for octave in range(octaves):
+            frequency = 2 ** octave / cell_size
+            self.__octaves.append((0.5 ** octave,
+                                   self.__precompute_lattice(self._x * frequency, self._y * frequency)))
+
+        self.__weight_total = sum(weight for weight, _ in self.__octaves)
+        self.__noise = np.empty((pixel_height, pixel_width), dtype=np.float32)
+        self.__indices = np.empty((pixel_height, pixel_width), dtype=np.int32)
+
+    def __precompute_lattice(self, x, y):
+        x_cell, y_cell = np.floor(x), np.floor(y)
+        x_fraction, y_fraction = (x - x_cell).astype(np.float32), (y - y_cell).astype(np.float32)
+        x_index, y_index = x_cell.astype(np.int32) & 255, y_cell.astype(np.int32) & 255
+
+        # Hashes of the four lattice columns surrounding each pixel, before mixing in time
+        a = self.__permutation[x_index] + y_index
+        b = self.__permutation[x_index + 1] + y_index
+        columns = (self.__permutation[a], self.__permutation[a + 1],
+                   self.__permutation[b], self.__permutation[b + 1])
+
+        return {"columns": columns, "x": x_fraction, "y": y_fraction,
+                "u": _fade(x_fraction), "v": _fade(y_fraction), "z_index": None}
+
+    def __select_z_cell(self, lattice, z_index):
+        """Caches the gradient terms of the lattice for a single cell along the time axis
+
+        The corner gradients only change when the time crosses into a new lattice cell, so the
+        x and y parts of the dot products are computed once per cell instead of once per frame.
+        """
+        xy_terms = []
+        z_gradients = []
+        for column, (x_offset, y_offset) in zip(lattice["columns"], ((0, 0), (0, 1), (1, 0), (1, 1))):
+            for z_offset in (0, 1):
+                gradient = _PERLIN_GRADIENTS[self.__permutation[column + z_index + z_offset] & 15]
+                xy_terms.append(gradient[..., 0] * (lattice["x"] - x_offset) +
+                                gradient[..., 1] * (lattice["y"] - y_offset))
+                z_gradients.append(np.ascontiguousarray(gradient[..., 2]))
+
+        lattice["z_index"] = z_index
+        lattice["xy_terms"] = xy_terms
+        lattice["z_gradients"] = z_gradients
+
+    def __sample(self, lattice, z):
+        z_cell = int(np.floor(z))
+        z_fraction = np.float32(z - z_cell)
+        w = _fade(z_fraction)
+
+        if lattice["z_index"] != z_cell & 255:
+            self.__select_z_cell(lattice, z_cell & 255)
+
+        # Corners are ordered (x, y, z) as 000, 001, 010, 011, 100, 101, 110, 111
+        corners = [xy_term + z_gradient * (z_fraction - z_offset) for xy_term, z_gradient, z_offset in
+                   zip(lattice["xy_terms"], lattice["z_gradients"], (0, 1) * 4)]
+
+        lerp = [low + w * (high - low) for low, high in zip(corners[0::2], corners[1::2])]
+        lerp = [low + lattice["v"] * (high - low) for low, high in zip(lerp[0::2], lerp[1::2])]
+        return lerp[0] + lattice["u"] * (lerp[1] - lerp[0])
+
+    def _render(self, time_s: float):
+        self.__noise.fill(0.0)
+
+        for octave, (weight, lattice) in enumerate(self.__octaves):
+            self.__noise += weight * self.__sample(lattice, time_s * self.speed * 2 ** octave)
+
+        # Perlin noise lies within roughly [-1, 1], which is stretched across the palette
+        np.multiply(self.__noise, 128.0 / self.__weight_total, out=self.__noise)
+        np.add(self.__noise, 128.0, out=self.__noise)
+        np.clip(self.__noise, 0, 255, out=self.__noise)
+        np.copyto(self.__indices, self.__noise, casting='unsafe')
+        np.take(self.palette, self.__indices, axis=0, out=self._frame)
@@ -0,0 +1,298 @@
+"""Frame ingest from producer processes on the same machine through shared memory
+
+A `FrameRing` is a ring of frame slots in a named shared memory block owned by the driver.
+A renderer in another process attaches a `FrameProducer` by name and draws each frame straight
+into the next slot, so frames never go through a socket or get serialized. The driver picks up
+the newest complete frame on every tick and skips any it was too slow to show.
+
+Each slot is guarded by a pair of sequence numbers and a checksum. The producer stamps the
+start sequence, writes the frame and its CRC-32, stamps the end sequence and then publishes
+the sequence in the ring header. The driver copies the newest published slot and only keeps
+the copy if both stamps still match it and the checksum matches the copy. There is a single
+producer per ring at a time.
+
+The stamps alone are only enough where stores become visible to other cores in program
+order, as on x86. On weakly ordered CPUs such as the ARM cores of a Raspberry Pi, the driver
+can see the published sequence and both stamps before the frame bytes, and Python has no
+memory fences to prevent that. The checksum is what keeps those frames from being shown
+torn, at the cost of a CRC-32 pass over each frame on both sides.
+
+The layout is simple enough to write from other languages. All integers are little endian.
+Producers in other languages must still order their writes: the frame and checksum before
+the end stamp, and the end stamp before the published sequence, for example by storing the
+end stamp and the published sequence with release ordering. Readers load them with acquire
+ordering.
+
+    offset 0    8 bytes   magic b"PXRING\\0\\0"
+    offset 8    uint32    layout version `RING_VERSION`, currently 2
+    offset 12   uint32    frame width
+    offset 16   uint32    frame height
+    offset 20   uint32    slot count
+    offset 24   uint64    sequence of the newest published frame, 0 before the first
+    offset 64   slots     slot_size bytes each, where slot_size is 24 + width * height * 3
+                          rounded up to a multiple of 64
+
+    slot + 0    uint64    start sequence
+    slot + 8    uint64    end sequence
+    slot + 16   uint32    CRC-32 of the frame, as computed by zlib
+    slot + 20   uint32    reserved
+    slot + 24   frame     height * width * 3 bytes of RGB in row order
+
+Frame n is written to slot n % slot_count.
+
+Example:
+    Show frames rendered by another process
+
+        with FrameRing(display.pixel_width, display.pixel_height, name="pixelpanels") as ring:
+            ring.serve(display, stop_event)
+
+    while the renderer draws into the ring
+
+        with FrameProducer("pixelpanels") as producer:
+            while True:
+                with producer.frame() as frame:
+                    frame[...] = render()
+"""
+import os
+import time
+import zlib
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from threading import Event
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .display import Display
+
+RING_MAGIC = b"PXRING\x00\x00"
+RING_VERSION = 2
+RING_HEADER_SIZE = 64
+SLOT_HEADER_SIZE = 24
+
+# The number of slots of a ring by default
+DEFAULT_SLOT_COUNT = 4
+
+# The names of the rings created by this process, which its resource tracker already knows about
+_created_rings = set()
+
+
+def _slot_size(width: int, height: int) -> int:
+    return -(-(SLOT_HEADER_SIZE + width * height * 3) // 64) * 64
+
+
+class _RingViews(object):
+    """NumPy views of the header and slots of a ring in a shared memory buffer"""
+    def __init__(self, buffer, width: int, height: int, slot_count: int):
+
+        self.width = width
+        self.height = height
+        self.slot_count = slot_count
+
+        self.published = np.ndarray((1,), dtype="<u8", buffer=buffer, offset=24)
+
+        slot_size = _slot_size(width, height)
+        self.sequences = [np.ndarray((2,), dtype="<u8", buffer=buffer, offset=RING_HEADER_SIZE + i * slot_size)
+                          for i in range(slot_count)]
+        self.checksums = [np.ndarray((1,), dtype="<u4", buffer=buffer, offset=RING_HEADER_SIZE + i * slot_size + 16)
+                          for i in range(slot_count)]
+        self.frames = [np.ndarray((height, width, 3), dtype=np.uint8, buffer=buffer,
+                                  offset=RING_HEADER_SIZE + i * slot_size + SLOT_HEADER_SIZE)
+                       for i in range(slot_count)]
+
+
+class FrameRing(object):
+    """The driver side of a shared memory frame ring
+
+    Args:
+        width: The width of the frames, usually `Display.pixel_width`
+        height: The height of the frames, usually `Display.pixel_height`
+        slot_count: The number of frames the ring holds. More slots give the driver more time
+        to copy a frame before the producer comes around to its slot again.
+        name: The name producers attach to, or None for a generated name
+    """
+    def __init__(self, width: int, height: int, slot_count: int = DEFAULT_SLOT_COUNT, name: str = None):
+
+        if slot_count < 2:
+            raise ValueError("A ring needs at least two slots")
+
+        self.width = width
+        self.height = height
+        self.slot_count = slot_count
+
+        self.frames_received = 0
+        self.frames_skipped = 0
+        self.frames_torn = 0
+
+        self.__block = SharedMemory(name=name, create=True,
+                                    size=RING_HEADER_SIZE + slot_count * _slot_size(width, height))
+        _created_rings.add(self.__block.name)
+        self.__block.buf[:RING_HEADER_SIZE] = bytes(RING_HEADER_SIZE)
+        self.__block.buf[:len(RING_MAGIC)] = RING_MAGIC
+        np.ndarray((4,), dtype="<u4", buffer=self.__block.buf, offset=8)[:] = (RING_VERSION, width, height,
+                                                                               slot_count)
+
+        self.__views = _RingViews(self.__block.buf, width, height, slot_count)
+        self.__frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self.__last_sequence = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def name(self) -> str:
+        """The name producers attach to"""
+        return self.__block.name
+
+    @property
+    def sequence(self) -> int:
+        """The sequence number of the last frame returned by `latest`"""
+        return self.__last_sequence
+
+    def latest(self) -> Optional[np.ndarray]:
+        """Gets the newest complete frame if one was published since the last call
+
+        Returns:
+            A (height, width, 3) uint8 frame, or None if there is no new frame. The frame is
+            reused by the next call.
+        """
+        views = self.__views
+        published = int(views.published[0])
+        if published == self.__last_sequence:
+            return None
+
+        slot = published % self.slot_count
+        sequences = views.sequences[slot]
+
+        # The end stamp is read before the copy and the start stamp after it. If the producer
+        # started overwriting the slot in between, the start stamp has moved on. The checksum
+        # catches frame bytes that arrived out of order with the stamps.
+        if int(sequences[1]) != published:
+            self.frames_torn += 1
+            return None
+        checksum = int(views.checksums[slot][0])
+        np.copyto(self.__frame, views.frames[slot])
+        if int(sequences[0]) != published or zlib.crc32(self.__frame) != checksum:
+            self.frames_torn += 1
+            return None
+
+        self.frames_received += 1
+        self.frames_skipped += max(published - self.__last_sequence - 1, 0)
+        self.__last_sequence = published
+        return self.__frame
+
+    def serve(self, display: Display, stop: Event, fps: float = 120.0):
+        """Shows the newest frame on a display on every tick until an event is set
+
+        Args:
+            display: The display frames are shown on
+            stop: The event that stops serving
+            fps: The rate at which the ring is checked for new frames
+        """
+        tick_period = 1.0 / fps
+        next_tick = time.monotonic()
+
+        while not stop.is_set():
+            skipped = self.frames_skipped
+            frame = self.latest()
+            if frame is not None:
+                display.stats.drop_frames(self.frames_skipped - skipped)
+                display.show_frame(frame)
+
+            next_tick += tick_period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                stop.wait(delay)
+            else:
+                # Running behind, so the schedule restarts from now instead of rushing to catch up
+                next_tick = time.monotonic()
+
+    def close(self):
+        """Closes and removes the ring. Attached producers keep their mapping until they close."""
+        self.__views = None
+        _created_rings.discard(self.__block.name)
+        self.__block.close()
+        self.__block.unlink()
+
+
+class FrameProducer(object):
+    """The producer side of a shared memory frame ring
+
+    Args:
+        name: The name of the ring created by the driver
+    """
+    def __init__(self, name: str):
+
+        self.__block = SharedMemory(name=name)
+        if os.name == "posix" and self.__block.name not in _created_rings:
+            # The driver owns the block, so the resource tracker of the producer must not remove
+            # it when the producer exits
+            resource_tracker.unregister(self.__block._name, "shared_memory")
+
+        buffer = self.__block.buf
+        if bytes(buffer[:len(RING_MAGIC)]) != RING_MAGIC:
+            self.__block.close()
+            raise ValueError("{0} is not a frame ring".format(name))
+
+        version, width, height, slot_count = np.ndarray((4,), dtype="<u4", buffer=buffer, offset=8).tolist()
+        if version != RING_VERSION:
+            self.__block.close()
+            raise ValueError("Frame ring version {0} is not supported".format(version))
+
+        self.width = width
+        self.height = height
+        self.slot_count = slot_count
+
+        self.__views = _RingViews(buffer, width, height, slot_count)
+        self.__sequence = int(self.__views.published[0])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def sequence(self) -> int:
+        """The sequence number of the last published frame"""
+        return self.__sequence
+
+    @contextmanager
+    def frame(self) -> Iterator[np.ndarray]:
+        """Lends out the next slot of the ring to draw a frame into
+
+        The frame is published when the block exits normally. It holds whatever was drawn
+        into the slot the last time it was used, so every pixel should be drawn.
+
+        Returns:
+            A writable (height, width, 3) uint8 view of the slot
+        """
+        sequence = self.__sequence + 1
+        slot = sequence % self.slot_count
+        sequences = self.__views.sequences[slot]
+
+        sequences[0] = sequence
+        frame = self.__views.frames[slot]
+        yield frame
+        self.__views.checksums[slot][0] = zlib.crc32(frame)
+        sequences[1] = sequence
+
+        self.__views.published[0] = sequence
+        self.__sequence = sequence
+
+    def write(self, frame: np.ndarray):
+        """Copies a whole frame into the ring and publishes it
+
+        Args:
+            frame: A uint8 array of the form frame[y, x] = (red, green, blue)
+        """
+        with self.frame() as slot:
+            np.copyto(slot, frame)
+
+    def close(self):
+        self.__views = None
+        self.__block.close()
@@ -0,0 +1,226 @@
+"""Sparse LED layouts for installations that are not a grid of panels
+
+A layout gives the frame position of every LED on the strip, so rings, curves and gapped
+installs can be driven from ordinary rectangular frames. The sampling of frames onto the
+LEDs is precomputed as a gather index, or as gather indices and fixed-point bilinear
+weights, so each frame is sampled with a single NumPy operation.
+
+Example:
+    Drive a ring of LEDs from a coordinate file
+
+        display = Display(layout=LedLayout.from_csv("ring.csv", sampling=SamplingMode.BILINEAR))
+
+    where ring.csv has one LED per row in strip order
+
+        x,y
+        31.5,0.0
+        34.6,0.2
+"""
+import csv
+import json
+import math
+from enum import Enum, auto
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Bilinear weights are fixed point numbers where this value represents 1.0
+WEIGHT_ONE = 256
+
+
+class SamplingMode(Enum):
+    """How frames are sampled at LED positions
+
+    NEAREST = Each LED shows the frame pixel closest to its position
+
+    BILINEAR = Each LED shows a blend of the four frame pixels around its position
+    """
+    NEAREST = auto()
+    BILINEAR = auto()
+
+
+class LedLayout(object):
+    """The frame position of every LED on the strip
+
+    Args:
+        coordinates: An (led_count, 2) array of (x, y) frame positions in strip order. Positions
+        may be fractional.
+        pixel_width: The width of the frames sampled onto the layout. By default, this is just
+        wide enough to cover every LED.
+        pixel_height: The height of the frames sampled onto the layout. By default, this is just
+        tall enough to cover every LED.
+        sampling: How frames are sampled at the LED positions
+    """
+    def __init__(self, coordinates: Sequence[Tuple[float, float]], pixel_width: int = None, pixel_height: int = None,
+                 sampling: SamplingMode = SamplingMode.NEAREST):
+
+        coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        if len(coordinates) == 0:
+            raise ValueError("A layout needs at least one LED")
+
+        if pixel_width is None:
+            pixel_width = int(math.ceil(coordinates[:, 0].max())) + 1
+        if pixel_height is None:
+            pixel_height = int(math.ceil(coordinates[:, 1].max())) + 1
+
+        self.__coordinates = coordinates
+        self.__pixel_width = pixel_width
+        self.__pixel_height = pixel_height
+        self.__sampling = sampling
+
+        # Positions outside the frame sample its nearest edge
+        x = np.clip(coordinates[:, 0], 0.0, pixel_width - 1)
+        y = np.clip(coordinates[:, 1], 0.0, pixel_height - 1)
+        self.__nearest_pixels = np.rint(y).astype(np.intp) * pixel_width + np.rint(x).astype(np.intp)
+
+        if sampling == SamplingMode.NEAREST:
+            self.__led_order = self.__nearest_pixels
+            self.__led_weights = None
+        else:
+            x0 = np.floor(x).astype(np.intp)
+            y0 = np.floor(y).astype(np.intp)
+            x1 = np.minimum(x0 + 1, pixel_width - 1)
+            y1 = np.minimum(y0 + 1, pixel_height - 1)
+            fx = x - x0
+            fy = y - y0
+
+            self.__led_order = np.stack([y0 * pixel_width + x0, y0 * pixel_width + x1,
+                                         y1 * pixel_width + x0, y1 * pixel_width + x1], axis=1)
+
+            weights = np.stack([(1.0 - fx) * (1.0 - fy), fx * (1.0 - fy), (1.0 - fx) * fy, fx * fy], axis=1)
+            weights = np.rint(weights * WEIGHT_ONE).astype(np.int64)
+            # Rounding error goes to the heaviest weight so every LED's weights sum to exactly 1.0
+            heaviest = weights.argmax(axis=1)
+            weights[np.arange(len(weights)), heaviest] += WEIGHT_ONE - weights.sum(axis=1)
+            self.__led_weights = weights.astype(np.uint16)
+
+    @staticmethod
+    def __from_records(records: List[Tuple[int, float, float]], pixel_width, pixel_height, sampling):
+        if all(index is None for index, _, _ in records):
+            coordinates = [(x, y) for _, x, y in records]
+        else:
+            indices = sorted(index for index, _, _ in records)
+            if indices != list(range(len(records))):
+                raise ValueError("LED indices must cover 0 to {0} exactly once".format(len(records) - 1))
+            coordinates = [None] * len(records)
+            for index, x, y in records:
+                coordinates[index] = (x, y)
+
+        return LedLayout(coordinates, pixel_width, pixel_height, sampling)
+
+    @staticmethod
+    def from_csv(path: str, pixel_width: int = None, pixel_height: int = None,
+                 sampling: SamplingMode = SamplingMode.NEAREST) -> 'LedLayout':
+        """Loads a layout from a CSV file
+
+        Rows are either x,y in strip order or index,x,y. A header row naming the x, y and
+        optional index columns may be used instead, and lines starting with # are skipped.
+
+        Returns:
+            A new LedLayout instance
+        """
+        with open(path, newline='') as f:
+            rows = [row for row in csv.reader(f) if row and not row[0].lstrip().startswith('#')]
+
+        if not rows:
+            raise ValueError("{0} does not list any LEDs".format(path))
+
+        try:
+            float(rows[0][0])
+            index_column, x_column, y_column = (0, 1, 2) if len(rows[0]) >= 3 else (None, 0, 1)
+        except ValueError:
+            header = [column.strip().lower() for column in rows.pop(0)]
+            index_column = header.index("index") if "index" in header else None
+            x_column, y_column = header.index("x"), header.index("y")
+
+        records = [(None if index_column is None else int(row[index_column]), float(row[x_column]),
+                    float(row[y_column])) for row in rows]
+        return LedLayout.__from_records(records, pixel_width, pixel_height, sampling)
+
+    @staticmethod
+    def from_json(path: str, pixel_width: int = None, pixel_height: int = None,
+                  sampling: SamplingMode = SamplingMode.NEAREST) -> 'LedLayout':
+        """Loads a layout from a JSON file
+
+        The file holds a list of LEDs in strip order, each either an [x, y] pair or an object
+        with x, y and optional index keys. The list may also be the "leds" key of an object
+        that sets the frame size with "width" and "height" keys.
+
+        Returns:
+            A new LedLayout instance
+        """
+        with open(path) as f:
+            document = json.load(f)
+
+        if isinstance(document, dict):
+            pixel_width = document.get("width", pixel_width)
+            pixel_height = document.get("height", pixel_height)
+            document = document["leds"]
+
+        records = []
+        for led in document:
+            if isinstance(led, dict):
+                records.append((led.get("index"), float(led["x"]), float(led["y"])))
+            else:
+                records.append((None, float(led[0]), float(led[1])))
+
+        return LedLayout.__from_records(records, pixel_width, pixel_height, sampling)
+
+    @property
+    def coordinates(self):
+        """The (led_count, 2) array of (x, y) LED positions"""
+        return self.__coordinates
+
+    @property
+    def led_count(self):
+        return len(self.__coordinates)
+
+    @property
+    def pixel_width(self):
+        return self.__pixel_width
+
+    @property
+    def pixel_height(self):
+        return self.__pixel_height
+
+    @property
+    def sampling(self):
+        return self.__sampling
+
+    @property
+    def led_order(self):
+        """The gather index of each LED into a flattened frame
+
+        An (led_count,) array for nearest sampling, or (led_count, 4) for bilinear sampling
+        """
+        return self.__led_order
+
+    @property
+    def led_weights(self):
+        """The (led_count, 4) fixed-point weights of each gathered pixel, or None for nearest sampling"""
+        return self.__led_weights
+
+    @property
+    def nearest_pixels(self):
+        """The flat index of the frame pixel closest to each LED"""
+        return self.__nearest_pixels
+
+    def transformed(self, rotation: int = 0, flip_horizontal: bool = False,
+                    flip_vertical: bool = False) -> 'LedLayout':
+        """Creates the layout that shows frames flipped and then rotated clockwise, see `Display.set_transform`
+
+        Returns:
+            A new LedLayout instance
+        """
+        x, y = self.__coordinates[:, 0], self.__coordinates[:, 1]
+        width, height = self.__pixel_width, self.__pixel_height
+
+        # Each quarter turn of the content is a counter-clockwise quarter turn of the positions
+        for _ in range(rotation // 90):
+            x, y, width, height = y, (width - 1) - x, height, width
+        if flip_horizontal:
+            x = (width - 1) - x
+        if flip_vertical:
+            y = (height - 1) - y
+
+        return LedLayout(np.stack([x, y], axis=1), width, height, self.__sampling)
@@ -1,11 +1,22 @@
+import time
+from collections import deque
+
+# The number of presentation times the mock remembers
+SHOW_HISTORY_LENGTH = 4096
+
+
 class PixelStrip:
     """Mocked PixelStrip class that allows for developing on non-RPI platforms.
+
+    The mock records the monotonic time of each call to show() in show_times so
+    that tests can check when frames were presented.
     """
 
     def __init__(self, num, pin, freq_hz=800000, dma=10, invert=False,
                  brightness=255, channel=0, strip_type=None, gamma=None):
         self.num = num
         self.__led_data = [0 for i in range(num)]
+        self.show_times = deque(maxlen=SHOW_HISTORY_LENGTH)
 
     def numPixels(self):
         return self.num
@@ -17,10 +28,17 @@ class PixelStrip:
         self.__led_data[n] = color
         return
 
+    def write(self, led_values):
+        """Sets the first len(led_values) LEDs from a uint32 NumPy array, like the bulk write of the driver
+        """
+        self.__led_data[:len(led_values)] = led_values.tolist()
+        return
+
     def getPixelColor(self, n):
         return self.__led_data[n]
 
     def show(self):
+        self.show_times.append(time.monotonic())
         return
 
     def getPixels(self):
@@ -0,0 +1,349 @@
+"""Network outputs that send the LED buffer to remote controllers over UDP
+
+`DdpSink` and `E131Sink` are display sinks, so a display can drive remote ESP32/WLED style
+controllers alongside its local strip. Every packet of a frame is laid out once in a
+preallocated buffer, so each frame only rewrites the channel bytes and sequence numbers in
+place. On Linux, all packets for a destination are handed to the kernel in a single
+sendmmsg call. Elsewhere they are sent one at a time from preallocated views of the buffer.
+
+Example:
+    Mirror a display onto two WLED controllers that each drive half of the LEDs
+
+        sink = DdpSink(2048, [Destination("10.0.0.20", led_count=1024),
+                              Destination("10.0.0.21", first_led=1024)])
+        display.add_sink(sink)
+"""
+import ctypes
+import errno
+import socket
+import struct
+import sys
+import uuid
+from typing import List
+
+import numpy as np
+
+from .strip import ColorOrder, _CHANNEL_SHIFTS, split_white
+
+DDP_PORT = 4048
+E131_PORT = 5568
+
+# The largest DDP payload that keeps a packet within a standard Ethernet MTU
+DDP_MAX_DATA = 1440
+DDP_HEADER_SIZE = 10
+_DDP_VERSION_1 = 0x40
+_DDP_PUSH = 0x01
+_DDP_DESTINATION_DISPLAY = 0x01
+# Data types of 8 bits per channel
+_DDP_TYPE_RGB8 = 0x0B
+_DDP_TYPE_RGBW8 = 0x1B
+
+E131_MAX_SLOTS = 512
+E131_HEADER_SIZE = 126
+_E131_SEQUENCE_OFFSET = 111
+
+
+class _Iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _Msghdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(_Iovec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+
+class _Mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _Msghdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    """Gets the sendmmsg function of the C library, or None where it isn't available"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        sendmmsg = ctypes.CDLL(None, use_errno=True).sendmmsg
+    except (OSError, AttributeError):
+        return None
+
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+def _sockaddr(family: int, address: tuple) -> bytes:
+    """Packs a resolved address into the sockaddr struct of Linux"""
+    if family == socket.AF_INET:
+        return struct.pack("=H", family) + struct.pack("!H", address[1]) + socket.inet_pton(family, address[0]) + \
+            bytes(8)
+    return struct.pack("=H", family) + struct.pack("!HI", address[1], address[2]) + \
+        socket.inet_pton(family, address[0]) + struct.pack("=I", address[3])
+
+
+class Destination(object):
+    """A remote controller and the part of the LED buffer it receives
+
+    Args:
+        host: The host name or IP address of the controller
+        port: The UDP port, or None for the standard port of the protocol
+        first_led: The first LED of the buffer sent to this controller
+        led_count: The number of LEDs sent, or None for every LED from first_led on
+        universe: The E1.31 universe of the first LED. Following LEDs continue into the next
+        universes. Not used by DDP, which addresses LEDs by byte offset.
+    """
+    def __init__(self, host: str, port: int = None, first_led: int = 0, led_count: int = None, universe: int = 1):
+        self.host = host
+        self.port = port
+        self.first_led = first_led
+        self.led_count = led_count
+        self.universe = universe
+
+
+class _Route(object):
+    """The preallocated packets and socket for one destination"""
+    def __init__(self, destination: Destination, port: int, first_led: int, led_count: int,
+                 packets: np.ndarray, packet_sizes: List[int]):
+
+        self.destination = destination
+        self.first_led = first_led
+        self.led_count = led_count
+        self.packets = packets
+        self.packet_sizes = packet_sizes
+
+        family, _, _, _, address = socket.getaddrinfo(destination.host, port, 0, socket.SOCK_DGRAM)[0]
+        self.address = address
+        self.socket = socket.socket(family, socket.SOCK_DGRAM)
+
+        # Views of every packet for sending them one at a time
+        buffer = memoryview(packets).cast("B")
+        stride = packets.shape[1]
+        self.views = [buffer[i * stride:i * stride + size] for i, size in enumerate(packet_sizes)]
+
+        self.messages = None
+        if _sendmmsg is not None:
+            self.name = ctypes.create_string_buffer(_sockaddr(family, address))
+            self.iovecs = (_Iovec * len(packet_sizes))()
+            self.messages = (_Mmsghdr * len(packet_sizes))()
+            base = packets.ctypes.data
+            for i, size in enumerate(packet_sizes):
+                self.iovecs[i].iov_base = base + i * stride
+                self.iovecs[i].iov_len = size
+                header = self.messages[i].msg_hdr
+                header.msg_name = ctypes.addressof(self.name)
+                header.msg_namelen = len(self.name.raw)
+                header.msg_iov = ctypes.pointer(self.iovecs[i])
+                header.msg_iovlen = 1
+
+    def send(self) -> int:
+        """Sends every packet and returns the number that could not be sent"""
+        if self.messages is None:
+            return self.__send_each(0)
+
+        count = len(self.packet_sizes)
+        sent = 0
+        while sent < count:
+            result = _sendmmsg(self.socket.fileno(), ctypes.addressof(self.messages) + sent * ctypes.sizeof(_Mmsghdr),
+                               count - sent, 0)
+            if result < 0:
+                if ctypes.get_errno() == errno.EINTR:
+                    continue
+                # sendmmsg stops at the first packet that fails, so the rest go out one at a time
+                return self.__send_each(sent)
+            sent += result
+
+        return 0
+
+    def __send_each(self, first: int) -> int:
+        dropped = 0
+        for view in self.views[first:]:
+            try:
+                self.socket.sendto(view, self.address)
+            except OSError:
+                dropped += 1
+        return dropped
+
+    def close(self):
+        self.socket.close()
+
+
+class NetworkSink(object):
+    """A display sink that sends every frame to one or more controllers over UDP
+
+    Subclasses lay out the packets of a protocol. The channel bytes of every frame are written
+    straight into the preallocated packets, so sending a frame allocates nothing per packet.
+
+    Args:
+        led_count: The number of LEDs in the buffers passed to `write`
+        destinations: The controllers to send to
+        color_order: The channel order the controllers expect
+        leds_per_packet: The most LEDs that fit in one packet
+        header_size: The size of the header in front of the channel bytes of each packet
+        default_port: The port used for destinations without one
+    """
+    def __init__(self, led_count: int, destinations: List[Destination], color_order: ColorOrder,
+                 leds_per_packet: int, header_size: int, default_port: int):
+
+        self.led_count = led_count
+        self.color_order = color_order
+        self.channel_count = len(color_order.name)
+        self.packets_sent = 0
+        self.packets_dropped = 0
+
+        self.__shifts = [_CHANNEL_SHIFTS[channel] for channel in color_order.name]
+        self.__routes = []
+        for destination in destinations:
+            first_led = destination.first_led
+            count = led_count - first_led if destination.led_count is None else destination.led_count
+            if first_led < 0 or count <= 0 or first_led + count > led_count:
+                raise ValueError("Destination {0} is outside of the {1} LEDs of the sink"
+                                 .format(destination.host, led_count))
+
+            packet_count = -(-count // leds_per_packet)
+            packets = np.zeros((packet_count, header_size + leds_per_packet * self.channel_count), dtype=np.uint8)
+            packet_sizes = [header_size + min(leds_per_packet, count - i * leds_per_packet) * self.channel_count
+                            for i in range(packet_count)]
+            self._write_headers(destination, packets, packet_sizes)
+
+            port = default_port if destination.port is None else destination.port
+            self.__routes.append(_Route(destination, port, first_led, count, packets, packet_sizes))
+
+        self.__packets = [route.packets for route in self.__routes]
+
+        # Frames are padded out to whole packets and split into channels in these buffers
+        self.__values = [np.zeros((len(route.packets), leds_per_packet), dtype=np.uint32) for route in self.__routes]
+        self.__channels = [np.zeros_like(values) for values in self.__values]
+        self.__channel_views = [route.packets[:, header_size:].reshape(len(route.packets), leds_per_packet,
+                                                                       self.channel_count)
+                                for route in self.__routes]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def destinations(self) -> List[Destination]:
+        return [route.destination for route in self.__routes]
+
+    def _write_headers(self, destination: Destination, packets: np.ndarray, packet_sizes: List[int]):
+        """Writes the parts of the packet headers that are the same for every frame"""
+        raise NotImplementedError()
+
+    def _next_frame(self, packets: List[np.ndarray]):
+        """Updates the parts of the packet headers of every destination that change with every frame"""
+        raise NotImplementedError()
+
+    def write(self, led_values: np.ndarray, timestamp: float = None):
+        """Sends a frame of LED values to every destination
+
+        Packets that cannot be sent are counted in packets_dropped rather than raised, so an
+        unreachable controller doesn't stop the display.
+
+        Args:
+            led_values: A uint32 array of the form led_values[led_index] = pixel_value
+            timestamp: The time.monotonic() time the frame was shown. Not used.
+        """
+        if len(led_values) != self.led_count:
+            raise ValueError("Got {0} LED values for a sink of {1} LEDs".format(len(led_values), self.led_count))
+        if self.color_order.has_white:
+            led_values = split_white(led_values)
+
+        self._next_frame(self.__packets)
+        for route, values, channels, channel_view in zip(self.__routes, self.__values, self.__channels,
+                                                         self.__channel_views):
+            values.ravel()[:route.led_count] = led_values[route.first_led:route.first_led + route.led_count]
+            for i, shift in enumerate(self.__shifts):
+                np.right_shift(values, shift, out=channels)
+                np.copyto(channel_view[:, :, i], channels, casting='unsafe')
+
+            dropped = route.send()
+            self.packets_sent += len(route.packet_sizes) - dropped
+            self.packets_dropped += dropped
+
+    def close(self):
+        """Closes the sockets of the sink"""
+        for route in self.__routes:
+            route.close()
+
+
+class DdpSink(NetworkSink):
+    """Sends frames with the Distributed Display Protocol
+
+    Each destination gets its LEDs as a run of packets of up to 1440 bytes of channel data,
+    with the push flag set on the last one so the controller shows the whole frame at once.
+
+    Args:
+        led_count: The number of LEDs in the buffers passed to `write`
+        destinations: The controllers to send to
+        color_order: The channel order the controllers expect, usually RGB
+    """
+    def __init__(self, led_count: int, destinations: List[Destination], color_order: ColorOrder = ColorOrder.RGB):
+
+        self.__sequence = 0
+        channel_count = len(color_order.name)
+        super().__init__(led_count, destinations, color_order, DDP_MAX_DATA // channel_count, DDP_HEADER_SIZE,
+                         DDP_PORT)
+
+    def _write_headers(self, destination: Destination, packets: np.ndarray, packet_sizes: List[int]):
+        data_type = _DDP_TYPE_RGBW8 if self.color_order.has_white else _DDP_TYPE_RGB8
+        offset = 0
+        for packet, size in zip(packets, packet_sizes):
+            data_size = size - DDP_HEADER_SIZE
+            packet[:DDP_HEADER_SIZE] = np.frombuffer(struct.pack("!BBBBIH", _DDP_VERSION_1, 0, data_type,
+                                                                 _DDP_DESTINATION_DISPLAY, offset, data_size),
+                                                     dtype=np.uint8)
+            offset += data_size
+        packets[-1, 0] |= _DDP_PUSH
+
+    def _next_frame(self, packets: List[np.ndarray]):
+        # Sequence numbers run from 1 to 15, 0 means the receiver shouldn't check them
+        self.__sequence = self.__sequence % 15 + 1
+        for route_packets in packets:
+            route_packets[:, 1] = self.__sequence
+
+
+class E131Sink(NetworkSink):
+    """Sends frames with E1.31 (streaming ACN)
+
+    Each destination gets its LEDs as consecutive universes of up to 512 channels. LEDs are
+    not split across universes, so an RGB universe holds 170 LEDs.
+
+    Args:
+        led_count: The number of LEDs in the buffers passed to `write`
+        destinations: The controllers to send to
+        color_order: The channel order the controllers expect, usually RGB
+        priority: The priority of the source from 0 to 200
+        source_name: The name of the source shown by receivers
+    """
+    def __init__(self, led_count: int, destinations: List[Destination], color_order: ColorOrder = ColorOrder.RGB,
+                 priority: int = 100, source_name: str = "pixelpanels"):
+
+        self.priority = priority
+        self.source_name = source_name
+        self.cid = uuid.uuid4().bytes
+        self.__sequence = 0
+        channel_count = len(color_order.name)
+        super().__init__(led_count, destinations, color_order, E131_MAX_SLOTS // channel_count, E131_HEADER_SIZE,
+                         E131_PORT)
+
+    def _write_headers(self, destination: Destination, packets: np.ndarray, packet_sizes: List[int]):
+        source_name = self.source_name.encode("utf-8")[:63]
+        for i, (packet, size) in enumerate(zip(packets, packet_sizes)):
+            slot_count = size - E131_HEADER_SIZE
+            header = struct.pack("!HH12sHI16s", 0x0010, 0x0000, b"ASC-E1.17", 0x7000 | (size - 16), 0x00000004,
+                                 self.cid)
+            header += struct.pack("!HI64sBHBBH", 0x7000 | (size - 38), 0x00000002, source_name, self.priority, 0, 0,
+                                  0, destination.universe + i)
+            header += struct.pack("!HBBHHHB", 0x7000 | (size - 115), 0x02, 0xA1, 0x0000, 0x0001, slot_count + 1,
+                                  0x00)
+            packet[:E131_HEADER_SIZE] = np.frombuffer(header, dtype=np.uint8)
+
+    def _next_frame(self, packets: List[np.ndarray]):
+        self.__sequence = (self.__sequence + 1) % 256
+        for route_packets in packets:
+            route_packets[:, _E131_SEQUENCE_OFFSET] = self.__sequence
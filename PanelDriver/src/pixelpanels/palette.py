@@ -0,0 +1,135 @@
+"""Palette-indexed fast path for GIF playback
+
+GIF frames hold at most 256 colors. Instead of converting every frame to RGB, resizing it
+and calibrating every pixel, the palette is calibrated and packed once. Each frame is then
+resized with nearest neighbour sampling on its index plane and becomes a gather from palette
+index to packed LED value, which for pixel art content costs little more than a copy.
+
+Example:
+    Map the frames of a GIF to LED values for a display
+
+        with ImageLib.open("Example.gif") as image:
+            mapper = PaletteMapper(image.width, image.height, display.pixel_width,
+                                   display.pixel_height, display.led_order, display.color_cal)
+            for i in range(image.n_frames):
+                if seek_palette_frame(image, i):
+                    rgb, led_values = mapper.map(image)
+"""
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Tuple
+
+import numpy as np
+from PIL import GifImagePlugin
+from PIL.Image import Image
+
+from .color import Color, ColorArray
+from .stats import CacheStats
+
+_loading_lock = Lock()
+
+
+@contextmanager
+def _palette_loading():
+    """Keeps GIF frames that share the global palette in P mode while they are loaded
+
+    Pillow converts every frame after the first to RGB by default. The loading strategy is a
+    module setting of Pillow, so it is only changed while a frame is loaded. GIFs loaded by
+    other threads in the meantime may come out in P mode, which `Image.convert` handles.
+    """
+    with _loading_lock:
+        loading_strategy = GifImagePlugin.LOADING_STRATEGY
+        GifImagePlugin.LOADING_STRATEGY = GifImagePlugin.LoadingStrategy.RGB_AFTER_DIFFERENT_PALETTE_ONLY
+        try:
+            yield
+        finally:
+            GifImagePlugin.LOADING_STRATEGY = loading_strategy
+
+
+def seek_palette_frame(image: Image, index: int) -> bool:
+    """Seeks to and loads a frame of an image, keeping it palette-indexed where possible
+
+    Args:
+        image: An open image
+        index: The frame to load
+
+    Returns:
+        True if the frame is in P mode and can be passed to `PaletteMapper.map`
+    """
+    with _palette_loading():
+        image.seek(index)
+        image.load()
+
+    return image.mode == 'P'
+
+
+class PaletteMapper(object):
+    """Maps palette-indexed frames to RGB frames and calibrated LED values
+
+    Calibrated palettes are cached, so each palette is calibrated once no matter how many
+    frames use it.
+
+    Args:
+        source_width: The width of the frames being mapped
+        source_height: The height of the frames being mapped
+        pixel_width: The width of the display
+        pixel_height: The height of the display
+        led_order: The flat frame index of each LED as given by `Display.led_order`. Bilinear
+        layouts are not supported.
+        color_cal: A function that takes a Color and transforms it into another Color, or None
+        cache_stats: Counts the hits and misses of the palette cache when given
+    """
+    def __init__(self, source_width: int, source_height: int, pixel_width: int, pixel_height: int,
+                 led_order: np.ndarray, color_cal: Callable[[Color], Color] = None, cache_stats: CacheStats = None):
+
+        self.pixel_width = pixel_width
+        self.pixel_height = pixel_height
+        self.led_order = led_order
+        self.color_cal = color_cal
+
+        # The nearest source pixel to the centre of each display pixel, as sampled by PIL
+        columns = ((np.arange(pixel_width) + 0.5) * (source_width / pixel_width)).astype(np.intp)
+        rows = ((np.arange(pixel_height) + 0.5) * (source_height / pixel_height)).astype(np.intp)
+        self.__pixel_sources = (rows[:, np.newaxis] * source_width + columns[np.newaxis, :]).ravel()
+        self.__led_sources = self.__pixel_sources[led_order]
+
+        self.__palettes = {}
+        self.__cache_stats = cache_stats
+
+    def __palette(self, palette: bytes) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets the RGB colors and calibrated LED values of all 256 entries of a palette
+        """
+        entries = self.__palettes.get(palette)
+        if self.__cache_stats is not None:
+            if entries is None:
+                self.__cache_stats.misses += 1
+            else:
+                self.__cache_stats.hits += 1
+
+        if entries is None:
+            rgb = np.zeros((256, 3), dtype=np.uint8)
+            colors = np.frombuffer(palette, dtype=np.uint8)[:768]
+            rgb.ravel()[:len(colors)] = colors
+
+            led_values = ColorArray(rgb).to_pixel_values()
+            if self.color_cal is not None:
+                led_values = np.fromiter((self.color_cal(Color.from_pixel_value(int(value))).to_pixel_value()
+                                          for value in led_values), dtype=np.uint32, count=256)
+
+            entries = (rgb, led_values)
+            self.__palettes[palette] = entries
+
+        return entries
+
+    def map(self, image: Image) -> Tuple[np.ndarray, np.ndarray]:
+        """Maps the current frame of a P mode image
+
+        Returns:
+            The (pixel_height, pixel_width, 3) RGB frame fit to the display and a uint32
+            array of the form led_values[led_index] = pixel_value
+        """
+        indices = np.asarray(image, dtype=np.uint8).ravel()
+        rgb, led_values = self.__palette(bytes(image.getpalette()))
+
+        frame = rgb.take(indices.take(self.__pixel_sources), axis=0)
+        return frame.reshape(self.pixel_height, self.pixel_width, 3), led_values.take(indices.take(self.__led_sources))
@@ -1,18 +1,11 @@
 import numpy as np
 
-# This import and associated mock module is used to allow for running and debugging code
-# on platforms for which rpi_ws281x cannot compile or execute
 from typing import Tuple
 
-try:
-    from rpi_ws281x import PixelStrip
-except ImportError:
-    print("rpi_ws281x not on this system. Providing mock for testing.")
-    from .mock_rpi_ws281x import PixelStrip
-
-
 from enum import Enum, auto
 
+from .calibration import PanelCalibration
+
 
 class PanelOrigin(Enum):
     """Defines the location of the 0-index of the panel
@@ -180,8 +173,12 @@ class PanelPlacement(object):
         panel: The panel being placed
         start_pixel: The pixel index of the first pixel in this panel
         end_pixel: The pixel index of the last pixel in this panel
+        calibration: The PanelCalibration of the LEDs of this panel, or None if they are not
+        calibrated
     """
-    def __init__(self, panel: Panel, start_pixel: Tuple[int, int] = (0, 0), end_pixel: Tuple[int, int] = (0, 0)):
+    def __init__(self, panel: Panel, start_pixel: Tuple[int, int] = (0, 0), end_pixel: Tuple[int, int] = (0, 0),
+                 calibration: PanelCalibration = None):
         self.panel = panel
         self.start_pixel = start_pixel
         self.end_pixel = end_pixel
+        self.calibration = calibration
@@ -0,0 +1,245 @@
+import logging
+import time
+from collections import deque
+from threading import Condition, Thread
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from .display import Display
+from .transitions import Transition
+
+
+class PlaybackItem(object):
+    """Content waiting to be played by a `PlaybackEngine`
+
+    Args:
+        frames: A function that returns a new iterable of frames each time the item starts.
+        Frames must be accepted by `Display.show_frame`.
+        fps: The number of frames to display per second
+        loop: Whether the item repeats. A looping item plays until another item is queued.
+        transition: The transition into this item. If None, the engine default is used.
+    """
+    def __init__(self, frames: Callable[[], Iterable[np.ndarray]], fps: float = 30.0, loop: bool = False,
+                 transition: Transition = None):
+        self.frames = frames
+        self.fps = fps
+        self.loop = loop
+        self.transition = transition
+
+
+class _FramePacer(object):
+    """Sleeps between frames to hold a frame rate against a monotonic clock
+    """
+    def __init__(self):
+        self.__next_frame_time = time.monotonic()
+
+    def wait(self, fps: float):
+        self.__next_frame_time += 1.0 / fps
+        delay = self.__next_frame_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self.__next_frame_time = time.monotonic()
+
+    def reset(self):
+        self.__next_frame_time = time.monotonic()
+
+
+class PlaybackEngine(object):
+    """Plays a queue of frame sources on a display
+
+    Items play in the order they are queued. Whenever one item hands over to the next, the
+    transition of the incoming item (or the engine default) blends the two. Outgoing looping
+    items keep animating during the transition while finished items hold their last frame.
+
+    A looping item with a single frame is shown once and then held. The engine thread
+    blocks until another item is queued or the engine is stopped.
+
+    An item whose frames raise an error, or that produces a frame the display rejects, is
+    logged and dropped so the engine keeps playing the rest of the queue.
+
+    Args:
+        display: The display to play on
+        transition: The default transition between items. If None, items cut directly.
+    """
+    def __init__(self, display: Display, transition: Transition = None):
+
+        self.display = display
+        self.transition = transition
+
+        self.__queue = deque()
+        self.__condition = Condition()
+        self.__stopped = False
+        self.__thread = None
+
+        self.__current = None
+        self.__current_frames = None
+        self.__current_frame_count = 0
+        self.__holding = False
+        self.__pacer = _FramePacer()
+
+    @property
+    def holding(self):
+        """Whether the engine is holding a still image while it waits for new content"""
+        return self.__holding
+
+    @property
+    def queue_depth(self):
+        """The number of items waiting to play"""
+        return len(self.__queue)
+
+    @property
+    def current_item(self) -> Optional[PlaybackItem]:
+        """The item that is playing, or None if the engine is idle"""
+        return self.__current
+
+    def enqueue(self, frames: Callable[[], Iterable[np.ndarray]], fps: float = 30.0, loop: bool = False,
+                transition: Transition = None) -> PlaybackItem:
+        """Adds content to the end of the queue
+
+        Args:
+            frames: A function that returns a new iterable of frames each time the item starts
+            fps: The number of frames to display per second
+            loop: Whether the item repeats until another item is queued
+            transition: The transition into this item. If None, the engine default is used.
+
+        Returns:
+            The queued item
+        """
+        item = PlaybackItem(frames, fps, loop, transition)
+
+        with self.__condition:
+            self.__queue.append(item)
+            self.__condition.notify_all()
+
+        return item
+
+    def clear(self):
+        """Removes every item that has not started playing yet"""
+        with self.__condition:
+            self.__queue.clear()
+
+    def start(self):
+        """Starts playing on a background thread"""
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+
+        self.__stopped = False
+        self.__thread = Thread(target=self.run, name="PlaybackEngine", daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stops playback after the current frame
+
+        Args:
+            timeout: The number of seconds to wait for the background thread to finish
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+
+    def run(self):
+        """Plays queued items until `stop` is called"""
+        while not self.__stopped:
+            with self.__condition:
+                while self.__current is None and not self.__queue and not self.__stopped:
+                    self.__condition.wait()
+
+                if self.__stopped:
+                    return
+
+                incoming = None
+                if self.__queue and (self.__current is None or self.__current.loop):
+                    incoming = self.__queue.popleft()
+
+            if incoming is not None:
+                try:
+                    self.__start_item(incoming)
+                except Exception:
+                    logging.exception("Dropping a playback item that failed to start")
+                    self.__drop_current()
+                continue
+
+            try:
+                self.__advance()
+            except Exception:
+                logging.exception("Dropping a playback item that failed while playing")
+                self.__drop_current()
+
+    def __advance(self):
+        frame = next(self.__current_frames, None)
+        if frame is None:
+            if self.__current.loop and self.__current_frame_count == 1:
+                # Static content stays on the display without being redrawn until something
+                # else is queued, so holding a still image costs no CPU
+                self.__hold()
+            elif self.__current.loop and self.__current_frame_count > 0:
+                self.__current_frames = iter(self.__current.frames())
+                self.__current_frame_count = 0
+            else:
+                # Sources that produce nothing are not restarted so they can't spin the thread
+                self.__drop_current()
+            return
+
+        self.display.show_frame(frame)
+        self.__current_frame_count += 1
+        self.__pacer.wait(self.__current.fps)
+
+    def __drop_current(self):
+        self.__current = None
+        self.__current_frames = None
+
+    def __hold(self):
+        with self.__condition:
+            self.__holding = True
+            while not self.__queue and not self.__stopped:
+                self.__condition.wait()
+            self.__holding = False
+
+    def __start_item(self, incoming: PlaybackItem):
+        outgoing_frames = self.__current_frames
+        incoming_frames = iter(incoming.frames())
+        transition = incoming.transition if incoming.transition is not None else self.transition
+
+        self.__current = incoming
+        self.__current_frames = incoming_frames
+        self.__current_frame_count = 0
+
+        if transition is not None:
+            self.__run_transition(transition, incoming, outgoing_frames, incoming_frames)
+
+    def __run_transition(self, transition: Transition, incoming: PlaybackItem, outgoing_frames, incoming_frames):
+        outgoing_frame = np.array(self.display.frame)
+        incoming_frame = outgoing_frame
+
+        frame_count = max(int(round(transition.duration_s * incoming.fps)), 1)
+        self.__pacer.reset()
+
+        for frame_index in range(1, frame_count + 1):
+            if self.__stopped:
+                return
+
+            if outgoing_frames is not None:
+                try:
+                    frame = next(outgoing_frames, None)
+                except Exception:
+                    # A failing outgoing item holds its last frame rather than stopping the incoming one
+                    logging.exception("Outgoing playback item failed during a transition")
+                    frame = None
+                if frame is None:
+                    outgoing_frames = None
+                else:
+                    outgoing_frame = frame
+
+            frame = next(incoming_frames, None)
+            if frame is not None:
+                incoming_frame = frame
+                self.__current_frame_count += 1
+
+            self.display.show_frame(transition.blend(outgoing_frame, incoming_frame, frame_index / frame_count))
+            self.__pacer.wait(incoming.fps)
@@ -0,0 +1,178 @@
+"""Compact encodings of display frames for remote previews
+
+Previews are encoded from the frame last committed to a display, so they never read the
+strip or wait for the render loop. A `FrameEncoder` keeps the latest encoding of each format
+and scale, so any number of viewers of the same frame share a single encoding.
+
+Example:
+    Save what the display is showing as a PNG four times its size
+
+        encoded = FrameEncoder(display).encode(PreviewFormat.PNG, scale=4)
+        with open("preview.png", "wb") as f:
+            f.write(encoded.data)
+"""
+import io
+from enum import Enum, auto
+from threading import Lock
+from typing import Tuple
+
+import numpy as np
+from PIL import Image as ImageLib
+
+from .display import Display
+
+# The largest upscale factor, which keeps a 64x32 display well below the gRPC message size limit
+MAX_SCALE = 16
+
+
+class PreviewFormat(Enum):
+    """How the pixels of a preview are encoded
+
+    RAW_RGB = Three bytes of red, green and blue per pixel in row order
+
+    PALETTE = One byte per pixel in row order indexing a palette of up to 256 colors. Frames
+    with more colors are quantized.
+
+    PNG = A PNG image, palette-indexed when the frame has at most 256 colors
+    """
+    RAW_RGB = auto()
+    PALETTE = auto()
+    PNG = auto()
+
+
+class EncodedFrame(object):
+    """A frame encoded for a preview
+
+    Attributes:
+        number (int): The number of the frame as given by `Display.committed_frame`
+
+        width (int): The width of the encoded frame after scaling
+
+        height (int): The height of the encoded frame after scaling
+
+        format (PreviewFormat): How the pixels are encoded
+
+        data (bytes): The encoded pixels
+
+        palette (bytes): Three bytes of red, green and blue per palette entry for the PALETTE
+        format, otherwise empty
+    """
+    def __init__(self, number: int, width: int, height: int, format: PreviewFormat, data: bytes,
+                 palette: bytes = b""):
+        self.number = number
+        self.width = width
+        self.height = height
+        self.format = format
+        self.data = data
+        self.palette = palette
+
+
+def upscale(image: np.ndarray, scale: int) -> np.ndarray:
+    """Repeats every pixel of an image scale times in both directions"""
+    if scale == 1:
+        return image
+    return np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
+
+
+def palette_pack(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """Splits a frame into palette indices and the palette
+
+    Args:
+        frame: A uint8 array of the form frame[y, x] = (red, green, blue)
+
+    Returns:
+        The (height, width) uint8 indices, the (colors, 3) uint8 palette and whether the
+        palette holds every color of the frame exactly
+    """
+    packed = (frame[..., 0].astype(np.uint32) << 16) | (frame[..., 1].astype(np.uint32) << 8) | frame[..., 2]
+    colors, indices = np.unique(packed.ravel(), return_inverse=True)
+
+    if colors.size <= 256:
+        palette = np.stack([colors >> 16, (colors >> 8) & 0xFF, colors & 0xFF], axis=-1).astype(np.uint8)
+        return indices.astype(np.uint8).reshape(frame.shape[:2]), palette, True
+
+    quantized = ImageLib.fromarray(frame, "RGB").quantize(256, method=ImageLib.FASTOCTREE)
+    palette = np.array(quantized.getpalette()[:768], dtype=np.uint8).reshape(-1, 3)
+    return np.asarray(quantized, dtype=np.uint8), palette, False
+
+
+def encode_frame(frame: np.ndarray, format: PreviewFormat = PreviewFormat.PNG, scale: int = 1,
+                 number: int = 0) -> EncodedFrame:
+    """Encodes a frame for a preview
+
+    Args:
+        frame: A uint8 array of the form frame[y, x] = (red, green, blue)
+        format: How the pixels are encoded
+        scale: The whole number of times each pixel is repeated in both directions
+        number: The number of the frame, see `Display.committed_frame`
+
+    Returns:
+        The encoded frame
+    """
+    if scale < 1 or scale > MAX_SCALE:
+        raise ValueError("The scale must be between 1 and {0}".format(MAX_SCALE))
+
+    height, width = frame.shape[0] * scale, frame.shape[1] * scale
+
+    if format == PreviewFormat.RAW_RGB:
+        return EncodedFrame(number, width, height, format, upscale(frame, scale).tobytes())
+
+    # Indices are packed at the size of the display and only then scaled up
+    indices, palette, exact = palette_pack(frame)
+    indices = upscale(indices, scale)
+
+    if format == PreviewFormat.PALETTE:
+        return EncodedFrame(number, width, height, format, indices.tobytes(), palette.tobytes())
+
+    if exact:
+        image = ImageLib.fromarray(indices, "P")
+        image.putpalette(palette.ravel().tolist())
+    else:
+        image = ImageLib.fromarray(np.ascontiguousarray(upscale(frame, scale)), "RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return EncodedFrame(number, width, height, format, buffer.getvalue())
+
+
+class FrameEncoder(object):
+    """Encodes the frame being displayed, reusing the latest encoding of each format and scale
+
+    Args:
+        display: The display to preview
+
+    Attributes:
+        encode_count (int): The number of frames encoded so far, as opposed to handed out again
+    """
+    def __init__(self, display: Display):
+
+        self.display = display
+        self.encode_count = 0
+
+        self.__lock = Lock()
+        self.__encoded = {}
+
+    def encode(self, format: PreviewFormat = PreviewFormat.PNG, scale: int = 1) -> EncodedFrame:
+        """Encodes the frame being displayed
+
+        Callers asking for the same format and scale while the frame is unchanged get the
+        same encoded frame, and a caller that arrives during an encoding waits for it rather
+        than encoding again.
+
+        Args:
+            format: How the pixels are encoded
+            scale: The whole number of times each pixel is repeated in both directions
+
+        Returns:
+            The encoded frame
+        """
+        number, frame = self.display.committed_frame
+
+        with self.__lock:
+            encoded = self.__encoded.get((format, scale))
+            if encoded is None or encoded.number != number:
+                encoded = encode_frame(frame, format, scale, number)
+                self.__encoded[(format, scale)] = encoded
+                self.encode_count += 1
+
+        return encoded
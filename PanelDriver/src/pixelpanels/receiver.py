@@ -0,0 +1,302 @@
+"""Realtime input from lighting consoles and sequencers over E1.31, Art-Net or DDP
+
+A `FrameReceiver` listens on a UDP port, reassembles the universes or DDP packets of each
+frame into a preallocated channel buffer and shows complete frames on a display. Packets are
+read with `recv_into` into a single preallocated packet buffer. A frame that is missing data
+when the next one starts is dropped rather than shown half updated.
+
+The channels either hold the LEDs in strip order, as sent by tools that know the physical
+wiring, or an RGB frame in row order that is mapped onto the LEDs by the display.
+
+Example:
+    Let xLights drive the display over E1.31 starting at universe 1
+
+        receiver = FrameReceiver(display, Protocol.E131)
+        receiver.serve(stop_event)
+"""
+import socket
+import struct
+import time
+from enum import Enum, auto
+from threading import Event
+
+import numpy as np
+
+from .color import ColorArray
+from .display import Display
+from .network import DDP_HEADER_SIZE, DDP_PORT, E131_HEADER_SIZE, E131_PORT
+from .strip import ColorOrder
+
+ARTNET_PORT = 6454
+ARTNET_HEADER_SIZE = 18
+_ARTNET_ID = b"Art-Net\x00"
+_ARTNET_OP_DMX = 0x5000
+
+_E131_ROOT_VECTOR_DATA = 0x00000004
+_E131_FRAMING_VECTOR_DATA = 0x00000002
+
+_DDP_PUSH = 0x01
+
+# The largest UDP payload any of the protocols sends
+_MAX_PACKET_SIZE = 2048
+
+
+class Protocol(Enum):
+    """The network protocol of the input
+
+    E131 = Streaming ACN, with LEDs continuing from universe to universe
+
+    ARTNET = Art-Net ArtDmx packets, with LEDs continuing from universe to universe
+
+    DDP = The Distributed Display Protocol, where packets carry a byte offset into the frame
+    and the last packet of a frame has the push flag set
+    """
+    E131 = auto()
+    ARTNET = auto()
+    DDP = auto()
+
+    @property
+    def default_port(self) -> int:
+        return {Protocol.E131: E131_PORT, Protocol.ARTNET: ARTNET_PORT, Protocol.DDP: DDP_PORT}[self]
+
+
+class InputMapping(Enum):
+    """How the received channels are laid out
+
+    LED_ORDER = The channels of each LED in strip order, written to the strip as they are
+
+    FRAME = An RGB frame of the size of the display in row order, mapped onto the LEDs like
+    any other frame
+    """
+    LED_ORDER = auto()
+    FRAME = auto()
+
+
+class FrameReceiver(object):
+    """Shows the frames received over the network on a display
+
+    Args:
+        display: The display frames are shown on
+        protocol: The network protocol of the input
+        port: The UDP port to listen on, or None for the standard port of the protocol. Port 0
+        picks a free port, see `address`.
+        host: The address to listen on
+        mapping: How the received channels are laid out
+        first_universe: The universe holding the first channels for E1.31 and Art-Net, or None
+        for universe 1 with E1.31 and universe 0 with Art-Net
+        channels_per_universe: The channels used in each universe. LEDs are not split across
+        universes, so this is usually 510 for RGB LEDs.
+        color_order: The order of the channels of each LED
+    """
+    def __init__(self, display: Display, protocol: Protocol = Protocol.E131, port: int = None, host: str = "0.0.0.0",
+                 mapping: InputMapping = InputMapping.LED_ORDER, first_universe: int = None,
+                 channels_per_universe: int = 510, color_order: ColorOrder = ColorOrder.RGB):
+
+        if color_order.has_white:
+            raise ValueError("Only RGB channel orders are supported")
+
+        self.display = display
+        self.protocol = protocol
+        self.mapping = mapping
+        if first_universe is None:
+            first_universe = 0 if protocol == Protocol.ARTNET else 1
+        self.first_universe = first_universe
+        self.channels_per_universe = channels_per_universe
+        self.color_order = color_order
+
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.packets_received = 0
+        self.packets_ignored = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.__total_latency = 0.0
+
+        if mapping == InputMapping.LED_ORDER:
+            self.channel_count = display.pixel_count * 3
+        else:
+            self.channel_count = display.pixel_width * display.pixel_height * 3
+
+        # The position of red, green and blue among the channels of each LED
+        self.__rgb_channels = [color_order.name.index(channel) for channel in "RGB"]
+
+        self.__packet = bytearray(_MAX_PACKET_SIZE)
+        self.__packet_array = np.frombuffer(self.__packet, dtype=np.uint8)
+        self.__channels = np.zeros(self.channel_count, dtype=np.uint8)
+
+        # The parts of the current frame received so far, by universe or by DDP byte
+        self.universe_count = -(-self.channel_count // channels_per_universe)
+        self.__received_universes = np.zeros(self.universe_count, dtype=bool)
+        self.__received_channels = np.zeros(self.channel_count, dtype=bool)
+        self.__frame_start = None
+        self.__packet_time = None
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, protocol.default_port if port is None else port))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def address(self):
+        """The (host, port) the receiver is listening on"""
+        return self.socket.getsockname()
+
+    @property
+    def mean_latency(self):
+        """The mean time in seconds from the first packet of a frame until it was shown"""
+        if self.frames_shown == 0:
+            return None
+        return self.__total_latency / self.frames_shown
+
+    def close(self):
+        self.socket.close()
+
+    def serve(self, stop: Event, poll_interval: float = 0.1):
+        """Receives and shows frames until an event is set
+
+        Args:
+            stop: The event that stops the receiver
+            poll_interval: How often the event is checked while no packets arrive
+        """
+        while not stop.is_set():
+            self.receive(poll_interval)
+
+    def receive(self, timeout: float = None) -> bool:
+        """Receives and handles a single packet
+
+        Args:
+            timeout: How long to wait for a packet in seconds, or None to wait forever
+
+        Returns:
+            True if the packet completed a frame that was shown
+        """
+        self.socket.settimeout(timeout)
+        try:
+            size = self.socket.recv_into(self.__packet)
+        except socket.timeout:
+            return False
+
+        self.packets_received += 1
+        self.__packet_time = time.monotonic()
+
+        if self.protocol == Protocol.DDP:
+            return self.__handle_ddp(size)
+        return self.__handle_universe(size)
+
+    def __universe_data(self, size: int):
+        """Parses the universe and channel data of an E1.31 or Art-Net packet
+
+        Returns:
+            The universe, offset of the data and data length, or None if the packet holds no
+            channel data
+        """
+        packet = self.__packet
+        if self.protocol == Protocol.E131:
+            if size < E131_HEADER_SIZE or packet[4:13] != b"ASC-E1.17":
+                return None
+            root_vector, = struct.unpack_from("!I", packet, 18)
+            framing_vector, = struct.unpack_from("!I", packet, 40)
+            if root_vector != _E131_ROOT_VECTOR_DATA or framing_vector != _E131_FRAMING_VECTOR_DATA:
+                return None
+            # The property count includes the start code in front of the channels
+            universe, = struct.unpack_from("!H", packet, 113)
+            length = struct.unpack_from("!H", packet, 123)[0] - 1
+            if packet[125] != 0 or length <= 0:
+                return None
+            return universe, E131_HEADER_SIZE, min(length, size - E131_HEADER_SIZE)
+
+        if size < ARTNET_HEADER_SIZE or packet[:8] != _ARTNET_ID:
+            return None
+        opcode, = struct.unpack_from("<H", packet, 8)
+        if opcode != _ARTNET_OP_DMX:
+            return None
+        universe, = struct.unpack_from("<H", packet, 14)
+        length, = struct.unpack_from("!H", packet, 16)
+        return universe, ARTNET_HEADER_SIZE, min(length, size - ARTNET_HEADER_SIZE)
+
+    def __handle_universe(self, size: int) -> bool:
+        data = self.__universe_data(size)
+        if data is None:
+            self.packets_ignored += 1
+            return False
+
+        universe, offset, length = data
+        index = universe - self.first_universe
+        if index < 0 or index >= self.universe_count:
+            self.packets_ignored += 1
+            return False
+
+        # A universe arriving again means the next frame started before this one was complete
+        if self.__received_universes[index]:
+            self.__drop_frame()
+        if self.__frame_start is None:
+            self.__frame_start = self.__packet_time
+
+        start = index * self.channels_per_universe
+        length = min(length, self.channels_per_universe, self.channel_count - start)
+        self.__channels[start:start + length] = self.__packet_array[offset:offset + length]
+        self.__received_universes[index] = True
+
+        if not self.__received_universes.all():
+            return False
+
+        self.__show_frame()
+        return True
+
+    def __handle_ddp(self, size: int) -> bool:
+        if size < DDP_HEADER_SIZE:
+            self.packets_ignored += 1
+            return False
+
+        flags, _, _, _, offset, length = struct.unpack_from("!BBBBIH", self.__packet, 0)
+        if flags & 0xC0 != 0x40 or offset >= self.channel_count:
+            self.packets_ignored += 1
+            return False
+
+        if self.__frame_start is None:
+            self.__frame_start = self.__packet_time
+
+        length = min(length, size - DDP_HEADER_SIZE, self.channel_count - offset)
+        self.__channels[offset:offset + length] = self.__packet_array[DDP_HEADER_SIZE:DDP_HEADER_SIZE + length]
+        self.__received_channels[offset:offset + length] = True
+
+        if not flags & _DDP_PUSH:
+            return False
+
+        if not self.__received_channels.all():
+            self.__drop_frame()
+            return False
+
+        self.__show_frame()
+        return True
+
+    def __drop_frame(self):
+        self.frames_dropped += 1
+        self.display.stats.drop_frames()
+        self.__next_frame()
+
+    def __next_frame(self):
+        self.__received_universes[:] = False
+        self.__received_channels[:] = False
+        self.__frame_start = None
+
+    def __show_frame(self):
+        rgb = self.__channels.reshape(-1, 3)[:, self.__rgb_channels]
+
+        if self.mapping == InputMapping.LED_ORDER:
+            led_values = ColorArray(rgb).to_pixel_values()
+            self.display.show_frame(self.display.frame_from_led_values(led_values))
+        else:
+            self.display.show_frame(rgb.reshape(self.display.pixel_height, self.display.pixel_width, 3))
+
+        latency = time.monotonic() - self.__frame_start
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.__total_latency += latency
+        self.frames_shown += 1
+
+        self.__next_frame()
@@ -0,0 +1,259 @@
+"""Recording and replay of the LED values sent to a display
+
+An `LedRecorder` is a display sink that appends every shown LED buffer and the time it was
+shown to a chunked .npz file. Full chunks are written to the file on a background thread, so
+recording only costs the render thread a copy of each frame. A fixed number of chunk buffers is
+reused, so long sessions can be captured with a fixed memory cost. If the disk falls behind,
+writes wait for a buffer to come free. An `LedRecording` reads the file back and replays it into
+any display with the same number of LEDs, either with the original timing or as fast as
+possible, which turns captured sessions into realistic benchmark workloads.
+
+Example:
+    Capture a session and replay it as fast as the display can take it
+
+        with LedRecorder("session.npz") as recorder:
+            display.add_sink(recorder)
+            display.play_gif("Example.gif")
+            display.remove_sink(recorder)
+
+        LedRecording("session.npz").replay(display, speed=None)
+"""
+import time
+import zipfile
+from queue import Queue
+from threading import Thread
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from .display import Display
+
+# The number of frames written to each chunk of a recording by default
+DEFAULT_CHUNK_FRAMES = 256
+
+# The number of chunks a recording holds in memory at once by default
+DEFAULT_MAX_CHUNKS = 4
+
+
+class LedRecorder(object):
+    """A display sink that records every shown LED buffer to a chunked .npz file
+
+    Sinks are called on the render thread while the display commit lock is held, so `write`
+    only copies the frame into the current chunk. Full chunks are handed to a writer thread
+    that stores them in the file while the next chunk fills up. Once `max_chunks` chunks are
+    in memory, `write` waits for the writer thread to finish one.
+
+    Each chunk is stored as a leds_NNNNNN array of shape (frames, led_count) and a
+    times_NNNNNN array of monotonic timestamps in seconds, so the file can also be opened
+    with `numpy.load`.
+
+    Args:
+        path: The path of the .npz file, which is overwritten
+        chunk_frames: The number of frames buffered in memory before they are written out
+        max_chunks: The number of chunks held in memory at once, including the one filling up
+        compress: Whether chunks are deflated. LED data usually compresses well but takes
+        longer to write.
+    """
+    def __init__(self, path: str, chunk_frames: int = DEFAULT_CHUNK_FRAMES, compress: bool = False,
+                 max_chunks: int = DEFAULT_MAX_CHUNKS):
+        if max_chunks < 1:
+            raise ValueError("A recording needs at least one chunk in memory")
+
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.max_chunks = max_chunks
+
+        self.__archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED,
+                                         allowZip64=True)
+        self.__leds = None
+        self.__times = None
+        self.__led_count = None
+        self.__buffer_count = 0
+        self.__buffered_frames = 0
+        self.__frame_count = 0
+
+        # Chunks go to the writer thread, which hands their buffers back to be filled again
+        self.__full_chunks = Queue()
+        self.__free_buffers = Queue()
+        self.__write_error = None
+        self.__writer = Thread(target=self.__write_chunks, name="LedRecorder", daemon=True)
+        self.__writer.start()
+
+    def __enter__(self) -> 'LedRecorder':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def frame_count(self):
+        """The number of frames recorded so far"""
+        return self.__frame_count
+
+    def write(self, led_values: np.ndarray, timestamp: float):
+        """Appends a frame of LED values to the recording
+
+        Args:
+            led_values: A uint32 array of the form led_values[led_index] = pixel_value
+            timestamp: The time.monotonic() time the frame was shown
+        """
+        if self.__archive is None:
+            raise ValueError("The recording is closed")
+        if self.__write_error is not None:
+            raise self.__write_error
+
+        if self.__led_count is None:
+            self.__led_count = len(led_values)
+        elif len(led_values) != self.__led_count:
+            raise ValueError("Frame of {0} LEDs does not match the {1} LEDs of the recording"
+                             .format(len(led_values), self.__led_count))
+
+        if self.__leds is None:
+            self.__take_buffer()
+
+        self.__leds[self.__buffered_frames] = led_values
+        self.__times[self.__buffered_frames] = timestamp
+        self.__buffered_frames += 1
+        self.__frame_count += 1
+
+        if self.__buffered_frames == self.chunk_frames:
+            self.__queue_chunk()
+
+    def __take_buffer(self):
+        # A new buffer is only allocated when the writer still holds every earlier one, and
+        # once max_chunks exist the recording waits for the writer to hand one back
+        if self.__free_buffers.empty() and self.__buffer_count < self.max_chunks:
+            self.__leds = np.empty((self.chunk_frames, self.__led_count), dtype=np.uint32)
+            self.__times = np.empty(self.chunk_frames, dtype=np.float64)
+            self.__buffer_count += 1
+        else:
+            self.__leds, self.__times = self.__free_buffers.get()
+
+    def __queue_chunk(self):
+        self.__full_chunks.put((self.__leds, self.__times, self.__buffered_frames))
+        self.__leds = None
+        self.__times = None
+        self.__buffered_frames = 0
+
+    def __write_chunks(self):
+        chunk_count = 0
+        while True:
+            chunk = self.__full_chunks.get()
+            if chunk is None:
+                return
+
+            leds, times, frame_count = chunk
+            try:
+                if self.__write_error is None:
+                    for name, values in (("leds", leds), ("times", times)):
+                        with self.__archive.open("{0}_{1:06d}.npy".format(name, chunk_count), "w",
+                                                 force_zip64=True) as f:
+                            np.lib.format.write_array(f, values[:frame_count], allow_pickle=False)
+                    chunk_count += 1
+            except Exception as error:
+                # The error is raised to the recording thread by the next write or by close
+                self.__write_error = error
+            self.__free_buffers.put((leds, times))
+
+    def close(self):
+        """Writes out any buffered frames and closes the file"""
+        if self.__archive is None:
+            return
+
+        if self.__buffered_frames > 0:
+            self.__queue_chunk()
+        self.__full_chunks.put(None)
+        self.__writer.join()
+
+        self.__archive.close()
+        self.__archive = None
+
+        if self.__write_error is not None:
+            raise self.__write_error
+
+
+class LedRecording(object):
+    """A recording made by an `LedRecorder`
+
+    Chunks are read from the file one at a time as the recording is played.
+
+    Args:
+        path: The path of the .npz file
+    """
+    def __init__(self, path: str):
+
+        self.path = path
+
+        with np.load(path) as archive:
+            self.__chunk_names = sorted(name[len("leds_"):] for name in archive.files if name.startswith("leds_"))
+            self.__frame_count = 0
+            self.__led_count = 0
+            self.__start_time = None
+            self.__end_time = None
+
+            for chunk_name in self.__chunk_names:
+                times = archive["times_" + chunk_name]
+                self.__frame_count += len(times)
+                if len(times) > 0:
+                    self.__start_time = times[0] if self.__start_time is None else self.__start_time
+                    self.__end_time = times[-1]
+
+            if self.__chunk_names:
+                self.__led_count = archive["leds_" + self.__chunk_names[0]].shape[1]
+
+    @property
+    def frame_count(self):
+        return self.__frame_count
+
+    @property
+    def led_count(self):
+        return self.__led_count
+
+    @property
+    def duration(self):
+        """The time in seconds from the first to the last frame of the recording"""
+        if self.__start_time is None:
+            return 0.0
+        return float(self.__end_time - self.__start_time)
+
+    def frames(self) -> Iterator[Tuple[float, np.ndarray]]:
+        """Generates the frames of the recording in order
+
+        Returns:
+            An iterator of (seconds since the first frame, LED values) pairs
+        """
+        with np.load(self.path) as archive:
+            for chunk_name in self.__chunk_names:
+                leds = archive["leds_" + chunk_name]
+                times = archive["times_" + chunk_name] - self.__start_time
+
+                for timestamp, led_values in zip(times.tolist(), leds):
+                    yield timestamp, led_values
+
+    def replay(self, display: Display, speed: float = 1.0):
+        """Shows the recording on a display
+
+        The LED values are shown exactly as recorded, including their calibration, so the
+        per-panel calibrations of the display are not applied again. The frame the display
+        reports is rebuilt from the LED values, see `Display.get_display_image`.
+
+        Args:
+            display: A display with as many LEDs as the recording
+            speed: How much faster than recorded the frames are shown. If None, frames are
+            shown as quickly as possible.
+        """
+        if display.pixel_count != self.__led_count and self.__frame_count > 0:
+            raise ValueError("Recording of {0} LEDs does not fit a display of {1} LEDs"
+                             .format(self.__led_count, display.pixel_count))
+
+        start_time = time.monotonic()
+
+        for timestamp, led_values in self.frames():
+            frame = display.frame_from_led_values(led_values, panel_calibrated=True)
+
+            if speed is not None:
+                delay = start_time + timestamp / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            display.show_frame(frame)
@@ -2,6 +2,7 @@
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: pixelpanels/rpc_library/panelrpc.proto
 """Generated protocol buffer code."""
+from google.protobuf.internal import enum_type_wrapper
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
 from google.protobuf import message as _message
@@ -14,12 +15,27 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n&pixelpanels/rpc_library/panelrpc.proto\x12\rpixelpanelrpc\"\x1e\n\x0ePlayGifRequest\x12\x0c\n\x04path\x18\x01 \x01(\t\"\"\n\x0fPlayGifResponse\x12\x0f\n\x07message\x18\x01 \x01(\t2]\n\x0fPanelController\x12J\n\x07PlayGif\x12\x1d.pixelpanelrpc.PlayGifRequest\x1a\x1e.pixelpanelrpc.PlayGifResponse\"\x00\x42\x31\n\x18\x63om.grizzhak.pixelpanelsB\rPanelRpcProtoP\x01\xa2\x02\x03HLWb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n&pixelpanels/rpc_library/panelrpc.proto\x12\rpixelpanelrpc\"\x1e\n\x0ePlayGifRequest\x12\x0c\n\x04path\x18\x01 \x01(\t\"\"\n\x0fPlayGifResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\" \n\x0fGetTraceRequest\x12\r\n\x05\x63lear\x18\x01 \x01(\x08\"&\n\x10GetTraceResponse\x12\x12\n\ntrace_json\x18\x01 \x01(\t\"\'\n\x11WatchStatsRequest\x12\x12\n\ninterval_s\x18\x01 \x01(\x01\"J\n\nCacheStats\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04hits\x18\x02 \x01(\x04\x12\x0e\n\x06misses\x18\x03 \x01(\x04\x12\x10\n\x08hit_rate\x18\x04 \x01(\x01\"\x9f\x03\n\rStatsSnapshot\x12\x11\n\ttimestamp\x18\x01 \x01(\x01\x12\x0b\n\x03\x66ps\x18\x02 \x01(\x01\x12\x19\n\x11\x66rame_time_p50_ms\x18\x03 \x01(\x01\x12\x19\n\x11\x66rame_time_p95_ms\x18\x04 \x01(\x01\x12\x19\n\x11\x66rame_time_p99_ms\x18\x05 \x01(\x01\x12\x19\n\x11\x66rame_time_max_ms\x18\x06 \x01(\x01\x12\x18\n\x10show_time_p50_ms\x18\x07 \x01(\x01\x12\x18\n\x10show_time_p99_ms\x18\x08 \x01(\x01\x12\x18\n\x10show_time_max_ms\x18\t \x01(\x01\x12\x14\n\x0c\x66rames_shown\x18\n \x01(\x04\x12\x16\n\x0e\x66rames_dropped\x18\x0b \x01(\x04\x12)\n\x06\x63\x61\x63hes\x18\x0c \x03(\x0b\x32\x19.pixelpanelrpc.CacheStats\x12\x13\n\x0b\x63pu_percent\x18\r \x01(\x01\x12\x14\n\x0cload_average\x18\x0e \x01(\x01\x12\x13\n\x0bqueue_depth\x18\x0f \x01(\r\x12\x1b\n\x13\x64isplay_queue_depth\x18\x10 \x01(\r\"L\n\x0fGetFrameRequest\x12*\n\x06\x66ormat\x18\x01 \x01(\x0e\x32\x1a.pixelpanelrpc.FrameFormat\x12\r\n\x05scale\x18\x02 \x01(\r\"`\n\x12WatchFramesRequest\x12*\n\x06\x66ormat\x18\x01 \x01(\x0e\x32\x1a.pixelpanelrpc.FrameFormat\x12\r\n\x05scale\x18\x02 \x01(\r\x12\x0f\n\x07max_fps\x18\x03 \x01(\x01\"\x88\x01\n\x0c\x46ramePreview\x12\x0e\n\x06number\x18\x01 \x01(\x04\x12\r\n\x05width\x18\x02 \x01(\r\x12\x0e\n\x06height\x18\x03 \x01(\r\x12*\n\x06\x66ormat\x18\x04 \x01(\x0e\x32\x1a.pixelpanelrpc.FrameFormat\x12\x0c\n\x04\x64\x61ta\x18\x05 \x01(\x0c\x12\x0f\n\x07palette\x18\x06 \x01(\x0c*0\n\x0b\x46rameFormat\x12\x0b\n\x07RAW_RGB\x10\x00\x12\x0b\n\x07PALETTE\x10\x01\x12\x07\n\x03PNG\x10\x02\x32\x9c\x03\n\x0fPanelController\x12J\n\x07PlayGif\x12\x1d.pixelpanelrpc.PlayGifRequest\x1a\x1e.pixelpanelrpc.PlayGifResponse\"\x00\x12M\n\x08GetTrace\x12\x1e.pixelpanelrpc.GetTraceRequest\x1a\x1f.pixelpanelrpc.GetTraceResponse\"\x00\x12P\n\nWatchStats\x12 .pixelpanelrpc.WatchStatsRequest\x1a\x1c.pixelpanelrpc.StatsSnapshot\"\x00\x30\x01\x12I\n\x08GetFrame\x12\x1e.pixelpanelrpc.GetFrameRequest\x1a\x1b.pixelpanelrpc.FramePreview\"\x00\x12Q\n\x0bWatchFrames\x12!.pixelpanelrpc.WatchFramesRequest\x1a\x1b.pixelpanelrpc.FramePreview\"\x00\x30\x01\x42\x31\n\x18\x63om.grizzhak.pixelpanelsB\rPanelRpcProtoP\x01\xa2\x02\x03HLWb\x06proto3')
 
 
 
+_FRAMEFORMAT = DESCRIPTOR.enum_types_by_name['FrameFormat']
+FrameFormat = enum_type_wrapper.EnumTypeWrapper(_FRAMEFORMAT)
+RAW_RGB = 0
+PALETTE = 1
+PNG = 2
+
+
 _PLAYGIFREQUEST = DESCRIPTOR.message_types_by_name['PlayGifRequest']
 _PLAYGIFRESPONSE = DESCRIPTOR.message_types_by_name['PlayGifResponse']
+_GETTRACEREQUEST = DESCRIPTOR.message_types_by_name['GetTraceRequest']
+_GETTRACERESPONSE = DESCRIPTOR.message_types_by_name['GetTraceResponse']
+_WATCHSTATSREQUEST = DESCRIPTOR.message_types_by_name['WatchStatsRequest']
+_CACHESTATS = DESCRIPTOR.message_types_by_name['CacheStats']
+_STATSSNAPSHOT = DESCRIPTOR.message_types_by_name['StatsSnapshot']
+_GETFRAMEREQUEST = DESCRIPTOR.message_types_by_name['GetFrameRequest']
+_WATCHFRAMESREQUEST = DESCRIPTOR.message_types_by_name['WatchFramesRequest']
+_FRAMEPREVIEW = DESCRIPTOR.message_types_by_name['FramePreview']
 PlayGifRequest = _reflection.GeneratedProtocolMessageType('PlayGifRequest', (_message.Message,), {
   'DESCRIPTOR' : _PLAYGIFREQUEST,
   '__module__' : 'pixelpanels.rpc_library.panelrpc_pb2'
@@ -34,15 +50,89 @@ PlayGifResponse = _reflection.GeneratedProtocolMessageType('PlayGifResponse', (_
   })
 _sym_db.RegisterMessage(PlayGifResponse)
 
+GetTraceRequest = _reflection.GeneratedProtocolMessageType('GetTraceRequest', (_message.Message,), {
+  'DESCRIPTOR' : _GETTRACEREQUEST,
+  '__module__' : 'pixelpanels.rpc_library.panelrpc_pb2'
+  # @@protoc_insertion_point(class_scope:pixelpanelrpc.GetTraceRequest)
+  })
+_sym_db.RegisterMessage(GetTraceRequest)
+
+GetTraceResponse = _reflection.GeneratedProtocolMessageType('GetTraceResponse', (_message.Message,), {
+  'DESCRIPTOR' : _GETTRACERESPONSE,
+  '__module__' : 'pixelpanels.rpc_library.panelrpc_pb2'
+  # @@protoc_insertion_point(class_scope:pixelpanelrpc.GetTraceResponse)
+  })
+_sym_db.RegisterMessage(GetTraceResponse)
+
+WatchStatsRequest = _reflection.GeneratedProtocolMessageType('WatchStatsRequest', (_message.Message,), {
+  'DESCRIPTOR' : _WATCHSTATSREQUEST,
+  '__module__' : 'pixelpanels.rpc_library.panelrpc_pb2'
+  # @@protoc_insertion_point(class_scope:pixelpanelrpc.WatchStatsRequest)
+  })
+_sym_db.RegisterMessage(WatchStatsRequest)
+
+CacheStats = _reflection.GeneratedProtocolMessageType('CacheStats', (_message.Message,), {
+  'DESCRIPTOR' : _CACHESTATS,
+  '__module__' : 'pixelpanels.rpc_library.panelrpc_pb2'
+  # @@protoc_insertion_point(class_scope:pixelpanelrpc.CacheStats)
+  })
+_sym_db.RegisterMessage(CacheStats)
+
+StatsSnapshot = _reflection.GeneratedProtocolMessageType('StatsSnapshot', (_message.Message,), {
+  'DESCRIPTOR' : _STATSSNAPSHOT,
+  '__module__' : 'pixelpanels.rpc_library.panelrpc_pb2'
+  # @@protoc_insertion_point(class_scope:pixelpanelrpc.StatsSnapshot)
+  })
+_sym_db.RegisterMessage(StatsSnapshot)
+
+GetFrameRequest = _reflection.GeneratedProtocolMessageType('GetFrameRequest', (_message.Message,), {
+  'DESCRIPTOR' : _GETFRAMEREQUEST,
+  '__module__' : 'pixelpanels.rpc_library.panelrpc_pb2'
+  # @@protoc_insertion_point(class_scope:pixelpanelrpc.GetFrameRequest)
+  })
+_sym_db.RegisterMessage(GetFrameRequest)
+
+WatchFramesRequest = _reflection.GeneratedProtocolMessageType('WatchFramesRequest', (_message.Message,), {
+  'DESCRIPTOR' : _WATCHFRAMESREQUEST,
+  '__module__' : 'pixelpanels.rpc_library.panelrpc_pb2'
+  # @@protoc_insertion_point(class_scope:pixelpanelrpc.WatchFramesRequest)
+  })
+_sym_db.RegisterMessage(WatchFramesRequest)
+
+FramePreview = _reflection.GeneratedProtocolMessageType('FramePreview', (_message.Message,), {
+  'DESCRIPTOR' : _FRAMEPREVIEW,
+  '__module__' : 'pixelpanels.rpc_library.panelrpc_pb2'
+  # @@protoc_insertion_point(class_scope:pixelpanelrpc.FramePreview)
+  })
+_sym_db.RegisterMessage(FramePreview)
+
 _PANELCONTROLLER = DESCRIPTOR.services_by_name['PanelController']
 if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
   DESCRIPTOR._serialized_options = b'\n\030com.grizzhak.pixelpanelsB\rPanelRpcProtoP\001\242\002\003HLW'
+  _FRAMEFORMAT._serialized_start=1049
+  _FRAMEFORMAT._serialized_end=1097
   _PLAYGIFREQUEST._serialized_start=57
   _PLAYGIFREQUEST._serialized_end=87
   _PLAYGIFRESPONSE._serialized_start=89
   _PLAYGIFRESPONSE._serialized_end=123
-  _PANELCONTROLLER._serialized_start=125
-  _PANELCONTROLLER._serialized_end=218
+  _GETTRACEREQUEST._serialized_start=125
+  _GETTRACEREQUEST._serialized_end=157
+  _GETTRACERESPONSE._serialized_start=159
+  _GETTRACERESPONSE._serialized_end=197
+  _WATCHSTATSREQUEST._serialized_start=199
+  _WATCHSTATSREQUEST._serialized_end=238
+  _CACHESTATS._serialized_start=240
+  _CACHESTATS._serialized_end=314
+  _STATSSNAPSHOT._serialized_start=317
+  _STATSSNAPSHOT._serialized_end=732
+  _GETFRAMEREQUEST._serialized_start=734
+  _GETFRAMEREQUEST._serialized_end=810
+  _WATCHFRAMESREQUEST._serialized_start=812
+  _WATCHFRAMESREQUEST._serialized_end=908
+  _FRAMEPREVIEW._serialized_start=911
+  _FRAMEPREVIEW._serialized_end=1047
+  _PANELCONTROLLER._serialized_start=1100
+  _PANELCONTROLLER._serialized_end=1512
 # @@protoc_insertion_point(module_scope)
@@ -20,6 +20,26 @@ class PanelControllerStub(object):
                 request_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.PlayGifRequest.SerializeToString,
                 response_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.PlayGifResponse.FromString,
                 )
+        self.GetTrace = channel.unary_unary(
+                '/pixelpanelrpc.PanelController/GetTrace',
+                request_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.GetTraceRequest.SerializeToString,
+                response_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.GetTraceResponse.FromString,
+                )
+        self.WatchStats = channel.unary_stream(
+                '/pixelpanelrpc.PanelController/WatchStats',
+                request_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.WatchStatsRequest.SerializeToString,
+                response_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.StatsSnapshot.FromString,
+                )
+        self.GetFrame = channel.unary_unary(
+                '/pixelpanelrpc.PanelController/GetFrame',
+                request_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.GetFrameRequest.SerializeToString,
+                response_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.FramePreview.FromString,
+                )
+        self.WatchFrames = channel.unary_stream(
+                '/pixelpanelrpc.PanelController/WatchFrames',
+                request_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.WatchFramesRequest.SerializeToString,
+                response_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.FramePreview.FromString,
+                )
 
 
 class PanelControllerServicer(object):
@@ -33,6 +53,35 @@ class PanelControllerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetTrace(self, request, context):
+        """Snapshots the frame timeline of a server started with --trace
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchStats(self, request, context):
+        """Streams periodic snapshots of the frame rate, frame times, dropped frames, cache hit
+        rates, CPU load and queue depths of the display
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetFrame(self, request, context):
+        """Gets the frame being displayed
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchFrames(self, request, context):
+        """Streams the frame being displayed whenever it changes, at a capped rate
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_PanelControllerServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -41,6 +90,26 @@ def add_PanelControllerServicer_to_server(servicer, server):
                     request_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.PlayGifRequest.FromString,
                     response_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.PlayGifResponse.SerializeToString,
             ),
+            'GetTrace': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetTrace,
+                    request_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.GetTraceRequest.FromString,
+                    response_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.GetTraceResponse.SerializeToString,
+            ),
+            'WatchStats': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchStats,
+                    request_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.WatchStatsRequest.FromString,
+                    response_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.StatsSnapshot.SerializeToString,
+            ),
+            'GetFrame': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetFrame,
+                    request_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.GetFrameRequest.FromString,
+                    response_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.FramePreview.SerializeToString,
+            ),
+            'WatchFrames': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchFrames,
+                    request_deserializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.WatchFramesRequest.FromString,
+                    response_serializer=pixelpanels_dot_rpc__library_dot_panelrpc__pb2.FramePreview.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'pixelpanelrpc.PanelController', rpc_method_handlers)
@@ -68,3 +137,71 @@ class PanelController(object):
             pixelpanels_dot_rpc__library_dot_panelrpc__pb2.PlayGifResponse.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetTrace(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/pixelpanelrpc.PanelController/GetTrace',
+            pixelpanels_dot_rpc__library_dot_panelrpc__pb2.GetTraceRequest.SerializeToString,
+            pixelpanels_dot_rpc__library_dot_panelrpc__pb2.GetTraceResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def WatchStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/pixelpanelrpc.PanelController/WatchStats',
+            pixelpanels_dot_rpc__library_dot_panelrpc__pb2.WatchStatsRequest.SerializeToString,
+            pixelpanels_dot_rpc__library_dot_panelrpc__pb2.StatsSnapshot.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetFrame(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/pixelpanelrpc.PanelController/GetFrame',
+            pixelpanels_dot_rpc__library_dot_panelrpc__pb2.GetFrameRequest.SerializeToString,
+            pixelpanels_dot_rpc__library_dot_panelrpc__pb2.FramePreview.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def WatchFrames(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/pixelpanelrpc.PanelController/WatchFrames',
+            pixelpanels_dot_rpc__library_dot_panelrpc__pb2.WatchFramesRequest.SerializeToString,
+            pixelpanels_dot_rpc__library_dot_panelrpc__pb2.FramePreview.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -1,49 +1,108 @@
 """Pixelpanel Demo RPC Server
 
 Provides a very simple demo RPC Server to test against the reference pixel
-panel electronics design. The server exposes a single handler for playing
-a GIF from a path local to the server.
+panel electronics design. The server exposes handlers for playing a GIF from a
+path local to the server (PlayGif), reading a performance trace (GetTrace),
+streaming frame statistics (WatchStats) and reading the frame on the panels,
+either once (GetFrame) or as a stream (WatchFrames).
 
 Attributes:
     panel_display (Display): A process-global variable used to hold the display
     being used by the worker threads on the server
 
+    playback_engine (PlaybackEngine): A process-global engine that plays requested
+    content one item at a time and crossfades between items
+
+    asset_preparer (AssetPreparer): A process-global pool of worker processes that
+    decode and prepare requested content off the render thread
+
+    asset_worker_count (int): The number of asset preparation workers. If 0, content
+    is decoded on the render thread instead.
+
     image_queue (Queue): A process-global queue used to pass images from the
     worker threads to the main thread for display. Pyplot is not thread safe
     and must be run on the main thread so we require this queue mechanism
-    to manage that lack of thread safety
+    to manage that lack of thread safety. Images are only queued with --debug.
+
+    tracer (Tracer): A process-global frame timeline, or None if the server was
+    started without --trace. Snapshots are served by the GetTrace request.
+
+    frame_encoder (FrameEncoder): A process-global encoder of the frame being displayed for the
+    GetFrame and WatchFrames requests
+
+    stream_slots (BoundedSemaphore): The slots of the streams that are open
+
+The WatchStats and WatchFrames requests stream for as long as the client listens. Every stream
+holds one of the worker threads of the server while it is open, so at most MAX_STREAMS are open at
+once and the remaining workers stay free for other requests. Streams past the limit are rejected
+with RESOURCE_EXHAUSTED.
 """
 import argparse
+import os
+import signal
 import sys
 from concurrent import futures
 import logging
 from queue import Queue
-
-import grpc
-import matplotlib.pyplot as pyplot
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Event, Thread
 
 from pixelpanels import PanelPlacement, Panel, Display, Color
+from pixelpanels.assets import AssetPreparer, asset_frame_rate, default_worker_count
 from pixelpanels.panel import PanelOrigin
-from pixelpanels.rpc_library import panelrpc_pb2_grpc, panelrpc_pb2
+from pixelpanels.playback import PlaybackEngine
+from pixelpanels.preview import MAX_SCALE, FrameEncoder, PreviewFormat
+from pixelpanels.tracing import Tracer, span
+from pixelpanels.transitions import Crossfade
 
 panel_display = None
+playback_engine = None
+asset_preparer = None
+asset_worker_count = default_worker_count()
 image_queue = Queue()
+tracer = None
+frame_encoder = None
 
+# The length of the crossfade between requested items
+TRANSITION_DURATION_S = 0.5
 
-def show_debug_image(display_time=0.001):
-    """A simple debug display call using matplotlib.pyplot
-    """
-    global image_queue
+# The seconds between stats snapshots when a WatchStats request doesn't set them, and the
+# shortest interval served
+DEFAULT_STATS_INTERVAL_S = 1.0
+MIN_STATS_INTERVAL_S = 0.05
+
+# The number of threads serving requests and how many of them streams can hold
+SERVER_WORKERS = 10
+MAX_STREAMS = 6
+stream_slots = BoundedSemaphore(MAX_STREAMS)
+
+# The address the server listens on, everywhere on the standard port
+SERVER_ADDRESS = '[::]:50051'
+
+# The directory holding the server certificate and key along with the root CA that client
+# certificates must be signed by
+CERTIFICATE_DIR = './certificates'
+
+# Clients keep their channels alive with pings, see pixelpanels.client. The server has to accept
+# pings this often, even between calls, or it closes the connection.
+SERVER_OPTIONS = [('grpc.keepalive_permit_without_calls', 1),
+                  ('grpc.http2.min_ping_interval_without_data_ms', 10000)]
 
-    display_time = 0.001
+# The preview rate when a WatchFrames request doesn't set one, and the highest rate served
+DEFAULT_PREVIEW_FPS = 10.0
+MAX_PREVIEW_FPS = 30.0
 
-    while not image_queue.empty():
-        image = image_queue.get()
 
-        pyplot.clf()
-        pyplot.imshow(image)
-        pyplot.show(block=False)
-        pyplot.pause(display_time)
+def show_debug_image(image, display_time=0.001):
+    """A simple debug display call using matplotlib.pyplot
+    """
+    # Importing pyplot takes seconds on a Pi, so it only happens once there is something to draw
+    import matplotlib.pyplot as pyplot
+
+    pyplot.clf()
+    pyplot.imshow(image)
+    pyplot.show(block=False)
+    pyplot.pause(display_time)
 
 
 def apply_color_cal(raw_color: Color) -> Color:
@@ -67,34 +126,79 @@ def push_image_to_display_queue(image):
     image_queue.put(image)
 
 
+def default_placements():
+    """The placements of the eight panels of the reference display, two rows of four"""
+    return [PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 16), (15, 31)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 16), (31, 31)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 16), (47, 31)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 16), (63, 31)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 0), (15, 15)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 0), (31, 15)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 0), (47, 15)),
+            PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 0), (63, 15))]
+
+
 def get_panel_display():
     """A module-level method to provide access to a single instance of the panel display
+
+    main() creates the display from the command line options. Without it, as when the
+    server is embedded, the display has no debug window and no calibration.
     """
     global panel_display
 
     if panel_display is None:
-        placements = [PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 16), (15, 31)),
-                      PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 16), (31, 31)),
-                      PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 16), (47, 31)),
-                      PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 16), (63, 31)),
-                      PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 0), (15, 15)),
-                      PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 0), (31, 15)),
-                      PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 0), (47, 15)),
-                      PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 0), (63, 15))]
-
-        panel_display = Display(placements, push_image_to_display_queue)
+        panel_display = Display(default_placements())
+        panel_display.tracer = tracer
 
     return panel_display
 
 
+def get_playback_engine():
+    """A module-level method to provide access to a single running playback engine
+    """
+    global playback_engine
+
+    if playback_engine is None:
+        display = get_panel_display()
+        transition = Crossfade(display.pixel_width, display.pixel_height, TRANSITION_DURATION_S)
+
+        playback_engine = PlaybackEngine(display, transition)
+        playback_engine.start()
+
+    return playback_engine
+
+
+def get_asset_preparer():
+    """A module-level method to provide access to a single asset preparation pool
+
+    Returns:
+        The pool, or None if asset_worker_count is 0
+    """
+    global asset_preparer
+
+    if asset_preparer is None and asset_worker_count > 0:
+        asset_preparer = AssetPreparer(get_panel_display(), asset_worker_count)
+
+    return asset_preparer
+
+
 def play_gif(gif_path):
     """The handler for the play_gif request
+
+    The GIF is queued on the playback engine and loops until the next request arrives, at
+    which point the engine crossfades into the new content.
     """
-    display = get_panel_display()
+    engine = get_playback_engine()
+    preparer = get_asset_preparer()
 
     result_msg = "GIF Playback Failed"
     try:
-        display.play_gif(gif_path)
+        fps = asset_frame_rate(gif_path)
+
+        if preparer is not None:
+            engine.enqueue(lambda: preparer.frames(gif_path), fps=fps, loop=True)
+        else:
+            engine.enqueue(lambda: engine.display.gif_frames(gif_path), fps=fps, loop=True)
         result_msg = "Play Successful!"
     except Exception:
         logging.warning("GIF playback was unsuccessful with path: {0}".format(gif_path))
@@ -103,25 +207,161 @@ def play_gif(gif_path):
     return result_msg
 
 
-class PanelController(panelrpc_pb2_grpc.PanelControllerServicer):
+def get_frame_encoder():
+    """A module-level method to provide access to a single encoder of the displayed frame
+    """
+    global frame_encoder
+
+    if frame_encoder is None:
+        frame_encoder = FrameEncoder(get_panel_display())
+
+    return frame_encoder
+
+
+def encode_preview(request, context):
+    """Encodes the displayed frame as asked for by a GetFrame or WatchFrames request
+
+    Returns:
+        A FramePreview message
+    """
+    import grpc
+    from pixelpanels.rpc_library import panelrpc_pb2
+
+    scale = request.scale or 1
+    if scale > MAX_SCALE:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, "The scale can be at most {0}".format(MAX_SCALE))
+
+    format_name = panelrpc_pb2.FrameFormat.Name(request.format)
+    encoded = get_frame_encoder().encode(PreviewFormat[format_name], scale)
+    return panelrpc_pb2.FramePreview(number=encoded.number, width=encoded.width, height=encoded.height,
+                                     format=request.format, data=encoded.data, palette=encoded.palette)
+
+
+def stats_message(snapshot):
+    """Converts a stats snapshot of the display into a StatsSnapshot message along with the queue depths
+    """
+    from pixelpanels.rpc_library import panelrpc_pb2
+
+    caches = [panelrpc_pb2.CacheStats(name=name, hits=cache.hits, misses=cache.misses, hit_rate=cache.hit_rate or 0.0)
+              for name, cache in sorted(snapshot.caches.items())]
+
+    return panelrpc_pb2.StatsSnapshot(
+        timestamp=snapshot.timestamp,
+        fps=snapshot.fps,
+        frame_time_p50_ms=snapshot.frame_time_p50 * 1000.0,
+        frame_time_p95_ms=snapshot.frame_time_p95 * 1000.0,
+        frame_time_p99_ms=snapshot.frame_time_p99 * 1000.0,
+        frame_time_max_ms=snapshot.frame_time_max * 1000.0,
+        show_time_p50_ms=snapshot.show_time_p50 * 1000.0,
+        show_time_p99_ms=snapshot.show_time_p99 * 1000.0,
+        show_time_max_ms=snapshot.show_time_max * 1000.0,
+        frames_shown=snapshot.frames_shown,
+        frames_dropped=snapshot.frames_dropped,
+        caches=caches,
+        cpu_percent=snapshot.cpu_percent,
+        load_average=snapshot.load_average or 0.0,
+        # Watching doesn't start the playback engine, an engine that never started has nothing queued
+        queue_depth=playback_engine.queue_depth if playback_engine is not None else 0,
+        display_queue_depth=image_queue.qsize())
+
+
+@contextmanager
+def stream_slot(context):
+    """Holds one of the MAX_STREAMS stream slots for as long as a stream is open
+
+    Aborts the request with RESOURCE_EXHAUSTED if every slot is taken.
+    """
+    import grpc
+
+    if not stream_slots.acquire(blocking=False):
+        context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                      "The server is serving its limit of {0} streams".format(MAX_STREAMS))
+    try:
+        yield
+    finally:
+        stream_slots.release()
+
+
+class PanelController(object):
     """A controller to handle incoming requests
+
+    The controller implements the methods of the generated PanelControllerServicer without
+    inheriting from it so that grpc is only imported once the server is started.
     """
 
     def PlayGif(self, request, context):
-        result_msg = play_gif(request.path)
+        from pixelpanels.rpc_library import panelrpc_pb2
+
+        with span(tracer, "PlayGif", path=request.path):
+            result_msg = play_gif(request.path)
         return panelrpc_pb2.PlayGifResponse(message=result_msg)
 
+    def GetTrace(self, request, context):
+        import grpc
+        from pixelpanels.rpc_library import panelrpc_pb2
+
+        if tracer is None:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, "Tracing is off. Start the server with --trace.")
+
+        trace_json = tracer.dumps()
+        if request.clear:
+            tracer.clear()
+        return panelrpc_pb2.GetTraceResponse(trace_json=trace_json)
+
+    def WatchStats(self, request, context):
+        stats = get_panel_display().stats
+        interval = max(request.interval_s or DEFAULT_STATS_INTERVAL_S, MIN_STATS_INTERVAL_S)
+
+        cancelled = Event()
+        context.add_callback(cancelled.set)
 
-def serve():
-    """Starts the server and enters a main loop that splits time between the server processing messages and
-    the debug display showing resulting images.
+        with stream_slot(context):
+            while True:
+                # Streams share any snapshot taken within half the shortest interval, so the work
+                # doesn't grow with the number of subscribers
+                yield stats_message(stats.snapshot(max_age=MIN_STATS_INTERVAL_S / 2.0))
+                if cancelled.wait(interval):
+                    return
+
+    def GetFrame(self, request, context):
+        return encode_preview(request, context)
+
+    def WatchFrames(self, request, context):
+        interval = 1.0 / min(request.max_fps or DEFAULT_PREVIEW_FPS, MAX_PREVIEW_FPS)
+
+        cancelled = Event()
+        context.add_callback(cancelled.set)
+
+        with stream_slot(context):
+            last_number = None
+            while True:
+                # A frame is only sent again once something new was committed
+                preview = encode_preview(request, context)
+                if preview.number != last_number:
+                    last_number = preview.number
+                    yield preview
+                if cancelled.wait(interval):
+                    return
+
+
+def create_server(address: str = SERVER_ADDRESS, certificate_dir: str = CERTIFICATE_DIR):
+    """Creates a server for the PanelController service that requires clients to present a certificate
+
+    Args:
+        address: The address to listen on. Port 0 picks a free port.
+        certificate_dir: The directory holding panel_driver.crt, panel_driver_nopass.key and root_ca.crt
+
+    Returns:
+        The server, which still has to be started, and the port it listens on
     """
+    import grpc
+    from pixelpanels.rpc_library import panelrpc_pb2_grpc
 
-    server_key_path = './certificates/panel_driver_nopass.key'
-    server_cert_path = './certificates/panel_driver.crt'
-    rootca_cert_path = './certificates/root_ca.crt'
+    server_key_path = os.path.join(certificate_dir, 'panel_driver_nopass.key')
+    server_cert_path = os.path.join(certificate_dir, 'panel_driver.crt')
+    rootca_cert_path = os.path.join(certificate_dir, 'root_ca.crt')
 
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=SERVER_WORKERS), options=SERVER_OPTIONS)
     panelrpc_pb2_grpc.add_PanelControllerServicer_to_server(PanelController(), server)
     with open(server_key_path, 'rb') as f:
         server_key = f.read()
@@ -131,40 +371,72 @@ def serve():
         root_ca_cert = f.read()
     server_credentials = grpc.ssl_server_credentials([(server_key, server_cert)], root_ca_cert, True)
 
-    # Opens the port everywhere
-    server.add_secure_port('[::]:50051', server_credentials)
+    port = server.add_secure_port(address, server_credentials)
+    return server, port
+
+
+def serve(debug: bool = False):
+    """Starts the server and blocks until it terminates, which SIGTERM triggers
+
+    Args:
+        debug: Whether the main thread shows the queued images on the debug display. It blocks
+            until an image is queued, so an idle server or one holding a still image uses no CPU.
+    """
+    server, _ = create_server()
     server.start()
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop(None))
+
+    if not debug:
+        server.wait_for_termination()
+        return
 
-    while server.wait_for_termination(0.1):
-        show_debug_image()
+    # Termination wakes the main loop with a None image
+    def wait_for_termination():
+        server.wait_for_termination()
+        image_queue.put(None)
+
+    Thread(target=wait_for_termination, daemon=True).start()
+
+    try:
+        while True:
+            image = image_queue.get()
+            if image is None:
+                break
+            with span(tracer, "debug display"):
+                show_debug_image(image)
+    finally:
+        server.stop(None)
 
 
 def main() -> int:
-    logging.basicConfig()
+    global asset_worker_count, tracer, panel_display
 
-    placements = [PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 16), (15, 31)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 16), (31, 31)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 16), (47, 31)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 16), (63, 31)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 0), (15, 15)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (16, 0), (31, 15)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 0), (47, 15)),
-                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (48, 0), (63, 15))]
+    logging.basicConfig()
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--debug", help="Whether to activate the debug display window", action="store_true")
     parser.add_argument("--use_cal", help="Whether to use the default cal function", action="store_true")
+    parser.add_argument("--workers", help="The number of asset preparation processes, or 0 to decode on the "
+                                          "render thread", type=int, default=default_worker_count())
+    parser.add_argument("--trace", help="Record a timeline of every frame that the GetTrace request returns",
+                        action="store_true")
     args = parser.parse_args()
 
+    asset_worker_count = args.workers
+    if args.trace:
+        tracer = Tracer()
+
+    # Frames only become images for the debug window when it is asked for, which keeps pyplot unloaded
     draw_callback = None
     if args.debug:
-        draw_callback = show_debug_image
+        draw_callback = push_image_to_display_queue
 
-    display = Display(placements, draw_callback)
+    panel_display = Display(default_placements(), draw_callback)
+    panel_display.tracer = tracer
 
     if args.use_cal:
-        display.color_cal = apply_color_cal
-    serve()
+        panel_display.color_cal = apply_color_cal
+    serve(args.debug)
 
 
 if __name__ == '__main__':
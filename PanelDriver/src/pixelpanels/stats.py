@@ -0,0 +1,219 @@
+"""Running statistics of the frames shown on a display
+
+The render loop only stores a timestamp and a duration per frame into preallocated ring
+buffers and bumps a few counters. Frame rates, percentiles and CPU load are worked out when
+a snapshot is taken, and snapshots can be shared between readers, so watching the statistics
+adds nothing to the cost of a frame however many watchers there are.
+
+Example:
+    Print the frame rate of a display once a second
+
+        while True:
+            time.sleep(1.0)
+            print("{0:.1f} fps".format(display.stats.snapshot().fps))
+"""
+import os
+import time
+from threading import Lock
+from typing import Dict, Optional
+
+import numpy as np
+
+# The number of frames kept by default, which covers the window at up to 500 FPS
+DEFAULT_CAPACITY = 1024
+
+# The frames shown within this many seconds before a snapshot make up its rates and percentiles
+DEFAULT_WINDOW_S = 2.0
+
+
+class CacheStats(object):
+    """The hit and miss counts of a cache
+
+    Caches keep the object they get from `FrameStats.cache` and count into it directly.
+    """
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """The fraction of lookups that were hits, or None before the first lookup"""
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return None
+        return self.hits / lookups
+
+
+class StatsSnapshot(object):
+    """The statistics of a display at one point in time
+
+    Rates and percentiles cover the frames shown during the window before the snapshot and
+    are 0 when there are too few frames to work them out. Counts are totals since the
+    statistics were created. All times are in seconds.
+
+    Attributes:
+        timestamp (float): The time of the snapshot as given by `time.time`
+
+        fps (float): The frames shown per second
+
+        frame_time_p50 (float): The median time between consecutive frames
+
+        frame_time_p95 (float): The 95th percentile of the time between consecutive frames
+
+        frame_time_p99 (float): The 99th percentile of the time between consecutive frames
+
+        frame_time_max (float): The longest time between consecutive frames
+
+        show_time_p50 (float): The median time the strip took to latch a frame
+
+        show_time_p99 (float): The 99th percentile of the time the strip took to latch a frame
+
+        show_time_max (float): The longest time the strip took to latch a frame
+
+        frames_shown (int): The number of frames shown
+
+        frames_dropped (int): The number of frames that never made it to the strip
+
+        caches (Dict[str, CacheStats]): Copies of the counts of every cache by name
+
+        cpu_percent (float): The CPU time of this process since the previous snapshot, as a
+        percentage of one core
+
+        load_average (float): The one minute load average of the system, or None where the
+        platform doesn't have one
+    """
+    def __init__(self, timestamp: float, fps: float, frame_times: np.ndarray, show_times: np.ndarray,
+                 frames_shown: int, frames_dropped: int, caches: Dict[str, CacheStats], cpu_percent: float,
+                 load_average: Optional[float]):
+
+        self.timestamp = timestamp
+        self.fps = fps
+        self.frame_time_p50, self.frame_time_p95, self.frame_time_p99, self.frame_time_max = \
+            _percentiles(frame_times, [50, 95, 99, 100])
+        self.show_time_p50, self.show_time_p99, self.show_time_max = _percentiles(show_times, [50, 99, 100])
+        self.frames_shown = frames_shown
+        self.frames_dropped = frames_dropped
+        self.caches = caches
+        self.cpu_percent = cpu_percent
+        self.load_average = load_average
+
+
+def _percentiles(values: np.ndarray, percentiles):
+    if values.size == 0:
+        return [0.0] * len(percentiles)
+    return np.percentile(values, percentiles).tolist()
+
+
+class FrameStats(object):
+    """Counters and recent frame timings kept by a display
+
+    Frames are recorded without locking. A snapshot taken while a frame is recorded may miss
+    that frame, which only ever shifts the numbers by a single frame.
+
+    Args:
+        capacity: The number of recent frames kept for the rates and percentiles
+        window_s: The seconds before a snapshot covered by its rates and percentiles
+
+    Attributes:
+        frames_shown (int): The number of frames shown
+
+        frames_dropped (int): The number of frames that never made it to the strip, counted by
+        the display and by the sources feeding it
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, window_s: float = DEFAULT_WINDOW_S):
+
+        self.capacity = capacity
+        self.window_s = window_s
+
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.__caches = {}
+
+        self.__frame_times = np.zeros(capacity)
+        self.__show_times = np.zeros(capacity)
+
+        self.__snapshot_lock = Lock()
+        self.__snapshot = None
+        self.__snapshot_time = 0.0
+        self.__cpu_time = time.process_time()
+        self.__cpu_wall_time = time.perf_counter()
+
+    def record_frame(self, timestamp: float, show_time: float):
+        """Records a frame that was latched onto the strip
+
+        Args:
+            timestamp: The `time.perf_counter` time the frame was latched
+            show_time: The seconds the strip took to latch the frame
+        """
+        index = self.frames_shown % self.capacity
+        self.__frame_times[index] = timestamp
+        self.__show_times[index] = show_time
+        self.frames_shown += 1
+
+    def drop_frames(self, count: int = 1):
+        """Counts frames that were skipped, rejected or arrived incomplete"""
+        self.frames_dropped += count
+
+    def cache(self, name: str) -> CacheStats:
+        """Gets the counts of a cache, creating them the first time a name is used"""
+        cache = self.__caches.get(name)
+        if cache is None:
+            cache = self.__caches.setdefault(name, CacheStats())
+        return cache
+
+    def snapshot(self, max_age: float = 0.0) -> StatsSnapshot:
+        """Works out the current statistics
+
+        Args:
+            max_age: The age in seconds up to which the previous snapshot is returned instead
+            of taking a new one, so any number of readers can share the work
+
+        Returns:
+            The statistics at the time of the snapshot
+        """
+        with self.__snapshot_lock:
+            now = time.perf_counter()
+            if self.__snapshot is not None and now - self.__snapshot_time <= max_age:
+                return self.__snapshot
+
+            count = min(self.frames_shown, self.capacity)
+            frame_times = self.__frame_times[:count].copy()
+            show_times = self.__show_times[:count].copy()
+
+            recent = frame_times >= now - self.window_s
+            order = np.argsort(frame_times[recent])
+            frame_times = frame_times[recent][order]
+            show_times = show_times[recent][order]
+
+            # The rate is measured over the time the window's frames actually cover, so it holds
+            # straight after a start or an idle gap, and still falls away once frames stop
+            fps = 0.0
+            if frame_times.size > 1:
+                fps = (frame_times.size - 1) / max(now - frame_times[0], 1e-9)
+
+            cpu_time = time.process_time()
+            cpu_percent = 100.0 * (cpu_time - self.__cpu_time) / max(now - self.__cpu_wall_time, 1e-9)
+            self.__cpu_time = cpu_time
+            self.__cpu_wall_time = now
+
+            caches = {}
+            for name, cache in list(self.__caches.items()):
+                caches[name] = CacheStats()
+                caches[name].hits = cache.hits
+                caches[name].misses = cache.misses
+
+            self.__snapshot = StatsSnapshot(
+                timestamp=time.time(),
+                fps=fps,
+                frame_times=np.diff(frame_times),
+                show_times=show_times,
+                frames_shown=self.frames_shown,
+                frames_dropped=self.frames_dropped,
+                caches=caches,
+                cpu_percent=cpu_percent,
+                load_average=os.getloadavg()[0] if hasattr(os, "getloadavg") else None)
+            self.__snapshot_time = now
+
+            return self.__snapshot
@@ -0,0 +1,174 @@
+"""LED strip backends that take a whole frame of LED values in a single call
+
+Every backend has the interface of the rpi_ws281x PixelStrip plus a bulk `write`. On a
+Raspberry Pi, `write` copies a packed uint32 array straight into the channel buffer of the
+driver. Everywhere else the mock strip stands in with the same interface.
+
+LED values are packed as 0xWWRRGGBB, where the white byte is only used by RGBW strips. The
+driver reorders channels for the strip while rendering, so `pack_led_values` is only needed
+by outputs that send raw channel bytes.
+
+Example:
+    Drive an RGBW strip of 300 LEDs
+
+        strip = PixelStrip(300, 18, color_order=ColorOrder.GRBW)
+        strip.begin()
+        strip.write(led_values)
+        strip.show()
+"""
+import ctypes
+import logging
+from enum import Enum, auto
+
+import numpy as np
+
+# This import and associated mock module is used to allow for running and debugging code
+# on platforms for which rpi_ws281x cannot compile or execute
+try:
+    import _rpi_ws281x as ws
+    from rpi_ws281x import PixelStrip as DriverPixelStrip
+except ImportError:
+    logging.getLogger(__name__).debug("rpi_ws281x not on this system. Providing mock for testing.")
+    ws = None
+    from .mock_rpi_ws281x import PixelStrip as DriverPixelStrip
+
+
+class ColorOrder(Enum):
+    """The order in which a strip expects the channels of each LED
+
+    WS2812B strips are GRB. Orders ending in W are for RGBW strips such as the SK6812.
+    """
+    RGB = auto()
+    RBG = auto()
+    GRB = auto()
+    GBR = auto()
+    BRG = auto()
+    BGR = auto()
+    RGBW = auto()
+    RBGW = auto()
+    GRBW = auto()
+    GBRW = auto()
+    BRGW = auto()
+    BGRW = auto()
+
+    @property
+    def has_white(self) -> bool:
+        return self.name.endswith("W")
+
+
+# The bit offset of each channel in a packed LED value
+_CHANNEL_SHIFTS = {"W": 24, "R": 16, "G": 8, "B": 0}
+
+
+def split_white(led_values: np.ndarray) -> np.ndarray:
+    """Moves the part of each color shared by red, green and blue onto the white channel
+
+    Args:
+        led_values: An array of packed 0xRRGGBB values
+
+    Returns:
+        A uint32 array of packed 0xWWRRGGBB values
+    """
+    led_values = np.asarray(led_values, dtype=np.uint32)
+    red = (led_values >> 16) & 0xFF
+    green = (led_values >> 8) & 0xFF
+    blue = led_values & 0xFF
+    white = np.minimum(np.minimum(red, green), blue)
+
+    return (white << 24) | ((red - white) << 16) | ((green - white) << 8) | (blue - white)
+
+
+def merge_white(led_values: np.ndarray) -> np.ndarray:
+    """Adds the white channel back onto red, green and blue, the inverse of `split_white`
+
+    Args:
+        led_values: An array of packed 0xWWRRGGBB values
+
+    Returns:
+        A uint32 array of packed 0xRRGGBB values
+    """
+    led_values = np.asarray(led_values, dtype=np.uint32)
+    white = led_values >> 24
+    red = np.minimum(((led_values >> 16) & 0xFF) + white, 0xFF)
+    green = np.minimum(((led_values >> 8) & 0xFF) + white, 0xFF)
+    blue = np.minimum((led_values & 0xFF) + white, 0xFF)
+
+    return (red << 16) | (green << 8) | blue
+
+
+def pack_led_values(led_values: np.ndarray, color_order: ColorOrder) -> np.ndarray:
+    """Converts packed LED values into the channel bytes a strip expects
+
+    Args:
+        led_values: An array of packed 0xWWRRGGBB values. For RGBW orders, values without a
+        white byte should go through `split_white` first.
+        color_order: The channel order of the strip
+
+    Returns:
+        A (led_count, channel_count) uint8 array with the channels of each LED in order
+    """
+    led_values = np.asarray(led_values, dtype=np.uint32).ravel()
+    channels = np.empty((len(led_values), len(color_order.name)), dtype=np.uint8)
+    for i, channel in enumerate(color_order.name):
+        channels[:, i] = led_values >> _CHANNEL_SHIFTS[channel]
+
+    return channels
+
+
+class PixelStrip(DriverPixelStrip):
+    """A pixel strip that takes a whole frame of LED values in one call
+
+    Args:
+        num: The number of LEDs on the strip
+        pin: The GPIO pin driving the strip
+        freq_hz: The LED signal frequency in hertz
+        dma: The DMA channel used to generate the signal
+        invert: Whether the signal is inverted, as with an NPN transistor level shift
+        brightness: The global brightness from 0 to 255
+        channel: The PWM channel of the pin
+        color_order: The channel order of the strip. RGBW strips get a white channel split
+        off of each color as it is written.
+    """
+    def __init__(self, num, pin, freq_hz=800000, dma=10, invert=False, brightness=255, channel=0,
+                 color_order: ColorOrder = ColorOrder.GRB):
+
+        strip_type = None
+        if ws is not None:
+            prefix = "SK6812_STRIP_" if color_order.has_white else "WS2811_STRIP_"
+            strip_type = getattr(ws, prefix + color_order.name)
+
+        super().__init__(num, pin, freq_hz, dma, invert, brightness, channel, strip_type)
+        self.color_order = color_order
+
+    def write(self, led_values: np.ndarray):
+        """Sets every LED from a packed array, starting with the first LED
+
+        Args:
+            led_values: An array of packed 0xRRGGBB values with at most one per LED
+        """
+        led_values = np.ascontiguousarray(led_values, dtype=np.uint32)
+        if len(led_values) > self.numPixels():
+            raise ValueError("{0} LED values do not fit on a strip of {1} LEDs"
+                             .format(len(led_values), self.numPixels()))
+
+        if self.color_order.has_white:
+            led_values = split_white(led_values)
+
+        if ws is None:
+            super().write(led_values)
+            return
+
+        # The SWIG pointer to the channel's LED buffer converts to its address
+        leds = int(ws.ws2811_channel_t_leds_get(self._channel))
+        ctypes.memmove(leds, led_values.ctypes.data, led_values.nbytes)
+
+    def read(self) -> np.ndarray:
+        """Gets the packed 0xRRGGBB value of every LED, as written
+
+        Returns:
+            A uint32 array with one value per LED
+        """
+        led_values = np.array(self.getPixels()[:self.numPixels()], dtype=np.uint32)
+        if self.color_order.has_white:
+            led_values = merge_white(led_values)
+        return led_values
@@ -0,0 +1,267 @@
+import string
+import time
+from typing import Callable, Iterator
+
+import numpy as np
+from PIL import Image as ImageLib
+
+from .color import Color
+
+
+class GlyphAtlas(object):
+    """A font rasterized once into a single coverage strip
+
+    Each glyph is drawn a single time into a column range of the atlas, so laying out text is
+    nothing more than concatenating column slices. Characters missing from the atlas are
+    rasterized the first time they are requested.
+
+    Args:
+        font: A PIL font. By default, PIL's built-in bitmap font is used.
+        characters: The characters to rasterize up front
+    """
+    def __init__(self, font=None, characters: str = string.printable):
+
+        # ImageFont loads the FreeType extension, so it is only imported once text is needed
+        from PIL import ImageFont
+
+        if font is None:
+            font = ImageFont.load_default()
+
+        self.__font = font
+
+        characters = "".join(sorted(set(characters) - set("\t\n\r\x0b\x0c")))
+        bboxes = [font.getbbox(character) for character in characters or " "]
+        self.__top = min(0, min(bbox[1] for bbox in bboxes))
+        self.__line_height = max(bbox[3] for bbox in bboxes) - self.__top
+
+        self.__atlas = np.zeros((self.__line_height, 0), dtype=np.uint8)
+        self.__glyph_columns = {}
+
+        self.__add_glyphs(characters)
+
+    @property
+    def line_height(self):
+        """The height of a line of text in pixels"""
+        return self.__line_height
+
+    @property
+    def atlas(self):
+        """The coverage data of every rasterized glyph as a (line_height, width) uint8 array"""
+        return self.__atlas
+
+    def __rasterize(self, character):
+        advance = max(int(round(self.__font.getlength(character))), 1)
+        glyph_image = ImageLib.new('L', (advance, self.__line_height))
+
+        from PIL import ImageDraw
+        ImageDraw.Draw(glyph_image).text((0, -self.__top), character, fill=255, font=self.__font)
+
+        return np.asarray(glyph_image, dtype=np.uint8)
+
+    def __add_glyphs(self, characters):
+        glyphs = [self.__rasterize(character) for character in characters]
+        x = self.__atlas.shape[1]
+
+        for character, glyph in zip(characters, glyphs):
+            self.__glyph_columns[character] = (x, x + glyph.shape[1])
+            x += glyph.shape[1]
+
+        self.__atlas = np.concatenate([self.__atlas] + glyphs, axis=1)
+
+    def glyph(self, character: str) -> np.ndarray:
+        """Gets the coverage data of a single character
+
+        Args:
+            character: The character to look up
+
+        Returns:
+            A (line_height, advance) uint8 view into the atlas
+        """
+        if character not in self.__glyph_columns:
+            self.__add_glyphs(character)
+
+        start, end = self.__glyph_columns[character]
+        return self.__atlas[:, start:end]
+
+    def advance(self, character: str) -> int:
+        """The number of columns the layout moves forward after the character"""
+        if character not in self.__glyph_columns:
+            self.__add_glyphs(character)
+
+        start, end = self.__glyph_columns[character]
+        return end - start
+
+    def layout(self, text: str) -> np.ndarray:
+        """Lays out a single line of text
+
+        Args:
+            text: The text to lay out
+
+        Returns:
+            A (line_height, text_width) uint8 coverage array
+        """
+        glyphs = [self.glyph(character) for character in text]
+        if not glyphs:
+            return np.zeros((self.__line_height, 0), dtype=np.uint8)
+
+        return np.concatenate(glyphs, axis=1)
+
+
+class Marquee(object):
+    """A line of text scrolling right to left across the display
+
+    The text is colored once into a wide RGB strip that wraps around on itself. Every frame
+    is a slice of that strip, so scrolling costs nothing beyond displaying the frame.
+
+    Args:
+        atlas: The glyph atlas used to lay out text
+        text: The text to scroll
+        pixel_width: The width of the frames in pixels, usually `Display.pixel_width`
+        pixel_height: The height of the frames in pixels, usually `Display.pixel_height`
+        color: The color of the text
+        background: The color behind the text
+        gap: The number of blank columns between the end of the text and its next repeat. By
+        default, this is the frame width so that the text fully leaves the display.
+    """
+    def __init__(self, atlas: GlyphAtlas, text: str, pixel_width: int, pixel_height: int,
+                 color: Color = None, background: Color = None, gap: int = None):
+
+        if color is None:
+            color = Color(255, 255, 255)
+        if background is None:
+            background = Color()
+
+        self.__atlas = atlas
+        self.__pixel_width = pixel_width
+        self.__pixel_height = pixel_height
+        self.__color = np.array(color.to_tuple(), dtype=np.int16)
+        self.__background = np.array(background.to_tuple(), dtype=np.uint8)
+        self.__gap = pixel_width if gap is None else gap
+
+        # Text is vertically centered on the frame and clipped if the font is taller than the display
+        self.__row_offset = (pixel_height - atlas.line_height) // 2
+
+        self.__text = ""
+        self.__text_width = 0
+        self.__strip = np.zeros((pixel_height, 0, 3), dtype=np.uint8)
+        self.__blend_buffer = np.empty((pixel_height, pixel_width, 3), dtype=np.uint8)
+        self.__weight_buffers = (np.empty((pixel_height, pixel_width, 3), dtype=np.uint16),
+                                 np.empty((pixel_height, pixel_width, 3), dtype=np.uint16))
+
+        self.text = text
+
+    @property
+    def text(self):
+        """The scrolling text"""
+        return self.__text
+
+    @text.setter
+    def text(self, value):
+        prefix_length = 0
+        for old_character, new_character in zip(self.__text, value):
+            if old_character != new_character:
+                break
+            prefix_length += 1
+
+        # The columns of the unchanged prefix are carried over from the old strip as-is
+        prefix_width = sum(self.__atlas.advance(character) for character in value[:prefix_length])
+        suffix_mask = self.__atlas.layout(value[prefix_length:])
+        text_width = prefix_width + suffix_mask.shape[1]
+
+        # The strip holds one period of text and gap followed by a copy of the first frame width
+        # (plus one column for sub-pixel blending) so every scroll position is a contiguous slice
+        period = max(text_width + self.__gap, 1)
+        strip = np.empty((self.__pixel_height, period + self.__pixel_width + 1, 3), dtype=np.uint8)
+
+        strip[:, :prefix_width] = self.__strip[:, :prefix_width]
+        strip[:, prefix_width:] = self.__background
+        self.__render_mask(strip[:, prefix_width:text_width], suffix_mask)
+
+        wrap_width = strip.shape[1] - period
+        for start in range(0, wrap_width, period):
+            end = min(start + period, wrap_width)
+            strip[:, period + start:period + end] = strip[:, start:end]
+
+        self.__text = value
+        self.__text_width = text_width
+        self.__strip = strip
+
+    @property
+    def text_width(self):
+        """The width of the laid out text in pixels"""
+        return self.__text_width
+
+    @property
+    def period(self):
+        """The number of columns scrolled before the marquee repeats"""
+        return self.__strip.shape[1] - self.__pixel_width - 1
+
+    @property
+    def strip(self):
+        """The wrapped RGB strip that frames are sliced from"""
+        return self.__strip
+
+    def __render_mask(self, target, mask):
+        rows = np.arange(self.__pixel_height) - self.__row_offset
+        visible = (rows >= 0) & (rows < mask.shape[0])
+        if not np.any(visible):
+            return
+
+        coverage = mask[rows[visible]].astype(np.int16)[..., np.newaxis]
+        background = self.__background.astype(np.int16)
+        target[visible] = (background + ((self.__color - background) * coverage + 127) // 255).astype(np.uint8)
+
+    def frame_at(self, position: float, smooth: bool = False) -> np.ndarray:
+        """Gets the frame for a scroll position
+
+        Args:
+            position: The number of columns the text has scrolled to the left
+            smooth: Whether to blend neighbouring columns for fractional positions. Without
+            this, the frame is a zero-copy view into the strip.
+
+        Returns:
+            A (pixel_height, pixel_width, 3) uint8 array that must not be modified by the caller
+        """
+        column = int(np.floor(position))
+        fraction = position - column
+        column %= self.period
+
+        frame = self.__strip[:, column:column + self.__pixel_width]
+        if not smooth or fraction <= 0.0:
+            return frame
+
+        following = self.__strip[:, column + 1:column + 1 + self.__pixel_width]
+        weight = int(fraction * 256)
+        current_weighted, following_weighted = self.__weight_buffers
+        np.multiply(frame, np.uint16(256 - weight), out=current_weighted)
+        np.multiply(following, np.uint16(weight), out=following_weighted)
+        current_weighted += following_weighted
+        current_weighted >>= 8
+        np.copyto(self.__blend_buffer, current_weighted, casting='unsafe')
+
+        return self.__blend_buffer
+
+    def frames(self, speed: float, duration: float = None, smooth: bool = True,
+               clock: Callable[[], float] = time.monotonic) -> Iterator[np.ndarray]:
+        """Generates frames scrolling at a fixed speed
+
+        The scroll position is derived from the clock rather than a frame count, so the text
+        moves at the same speed however quickly the frames are consumed.
+
+        Args:
+            speed: The scroll speed in pixels per second
+            duration: The number of seconds to scroll for. By default, scrolling never ends.
+            smooth: Whether to blend neighbouring columns for fractional positions
+            clock: A function returning the current time in seconds
+
+        Returns:
+            An iterator of frames suitable for `Display.play_frames`
+        """
+        start_time = clock()
+
+        while True:
+            elapsed = clock() - start_time
+            if duration is not None and elapsed >= duration:
+                return
+
+            yield self.frame_at(elapsed * speed, smooth)
@@ -0,0 +1,162 @@
+"""Frame timeline tracing in the Chrome trace-event format
+
+A tracer records a span for each stage of each frame along with the thread that ran it.
+Spans go into a bounded ring buffer, so tracing can stay on in a long running process, and
+the buffer can be exported at any time as trace-event JSON that opens in Perfetto
+(https://ui.perfetto.dev) or chrome://tracing.
+
+Example:
+    Trace a GIF playing on a display and save the timeline
+
+        display.tracer = Tracer()
+        display.play_frames(display.gif_frames("Example.gif"), fps=10.0)
+        display.tracer.save("trace.json")
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# The number of spans kept by default, which covers several minutes of playback at 30 FPS
+DEFAULT_CAPACITY = 65536
+
+# Perfetto groups spans by the small thread IDs of the OS when they are available
+if hasattr(threading, "get_native_id"):
+    _current_thread_id = threading.get_native_id
+else:
+    _current_thread_id = threading.get_ident
+
+
+class _Span(object):
+    """Records the time between entering and exiting a with block"""
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: 'Tracer', name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.add_span(self.name, self.start, time.perf_counter(), self.args)
+
+
+class _NullSpan(object):
+    """Stands in for a span when tracing is off"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(tracer: 'Tracer', name: str, **args):
+    """Creates a span on a tracer that may be None
+
+    Returns:
+        A context manager that records the span, or does nothing if tracer is None
+    """
+    if tracer is None:
+        return NULL_SPAN
+    return tracer.span(name, **args)
+
+
+class Tracer(object):
+    """Records spans in a bounded ring buffer and exports them as a Chrome trace
+
+    Spans can be recorded from any thread. Once the buffer is full the oldest spans are
+    dropped.
+
+    Args:
+        capacity: The number of spans kept
+        category: The trace-event category of the spans
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, category: str = "pixelpanels"):
+
+        self.category = category
+
+        # Appending to a deque is atomic, so recording a span never takes a lock
+        self.__spans = deque(maxlen=capacity)
+        self.__thread_names = {}
+        self.__origin = time.perf_counter()
+
+    @property
+    def capacity(self):
+        return self.__spans.maxlen
+
+    def __len__(self):
+        return len(self.__spans)
+
+    def span(self, name: str, **args) -> _Span:
+        """Creates a context manager that records a span around a with block
+
+        Args:
+            name: The name of the span, usually the stage of the frame
+            args: Values shown with the span in the trace viewer
+
+        Returns:
+            The span
+        """
+        return _Span(self, name, args)
+
+    def add_span(self, name: str, start: float, end: float, args: dict = None):
+        """Records a span on the calling thread
+
+        Args:
+            name: The name of the span
+            start: The start of the span from time.perf_counter()
+            end: The end of the span from time.perf_counter()
+            args: Values shown with the span in the trace viewer
+        """
+        thread_id = _current_thread_id()
+        if thread_id not in self.__thread_names:
+            self.__thread_names[thread_id] = threading.current_thread().name
+
+        self.__spans.append((name, start, end, thread_id, args))
+
+    def clear(self):
+        """Drops every recorded span"""
+        self.__spans.clear()
+
+    def chrome_trace(self) -> dict:
+        """Exports the recorded spans
+
+        Returns:
+            A dictionary in the Chrome trace-event format
+        """
+        process_id = os.getpid()
+        spans = list(self.__spans)
+
+        events = [{"name": "process_name", "ph": "M", "pid": process_id, "tid": 0,
+                   "args": {"name": "pixelpanels"}}]
+        for thread_id, thread_name in list(self.__thread_names.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": process_id, "tid": thread_id,
+                           "args": {"name": thread_name}})
+
+        for name, start, end, thread_id, args in spans:
+            event = {"name": name, "cat": self.category, "ph": "X", "pid": process_id, "tid": thread_id,
+                     "ts": round((start - self.__origin) * 1e6, 3), "dur": round((end - start) * 1e6, 3)}
+            if args:
+                event["args"] = args
+            events.append(event)
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dumps(self) -> str:
+        """Exports the recorded spans as trace-event JSON, see `chrome_trace`"""
+        return json.dumps(self.chrome_trace())
+
+    def save(self, path: str):
+        """Writes the recorded spans to a trace-event JSON file, see `chrome_trace`"""
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
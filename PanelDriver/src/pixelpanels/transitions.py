@@ -0,0 +1,206 @@
+"""Transitions between two frame sources
+
+Transitions blend an outgoing and an incoming frame for a progress from 0.0 to 1.0. All math
+is done in 8-bit fixed point with buffers allocated when the transition is created, so
+blending a frame allocates nothing.
+
+Example:
+    Crossfade between two frames halfway
+
+        crossfade = Crossfade(display.pixel_width, display.pixel_height)
+        display.show_frame(crossfade.blend(outgoing, incoming, 0.5))
+"""
+from enum import Enum, auto
+
+import numpy as np
+
+from .wipes import WipeOrder, wipe_order_map
+
+# Blend weights are fixed point numbers where this value represents 1.0
+WEIGHT_ONE = 256
+
+
+class Transition(object):
+    """Base class for transitions
+
+    Subclasses implement `_blend` to fill the transition framebuffer.
+
+    Args:
+        pixel_width: The width of the frames in pixels, usually `Display.pixel_width`
+        pixel_height: The height of the frames in pixels, usually `Display.pixel_height`
+        duration_s: The length of the transition in seconds
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, duration_s: float = 1.0):
+
+        self.pixel_width = pixel_width
+        self.pixel_height = pixel_height
+        self.duration_s = duration_s
+
+        self._frame = np.zeros((pixel_height, pixel_width, 3), dtype=np.uint8)
+
+    def _blend(self, outgoing: np.ndarray, incoming: np.ndarray, progress: float):
+        raise NotImplementedError
+
+    def blend(self, outgoing: np.ndarray, incoming: np.ndarray, progress: float) -> np.ndarray:
+        """Blends two frames
+
+        Args:
+            outgoing: The frame being transitioned away from
+            incoming: The frame being transitioned to
+            progress: How far the transition has come from 0.0 (all outgoing) to 1.0 (all incoming)
+
+        Returns:
+            A (pixel_height, pixel_width, 3) uint8 array. The array is reused between calls
+            and must not be modified by the caller.
+        """
+        self._blend(outgoing, incoming, min(max(progress, 0.0), 1.0))
+        return self._frame
+
+
+class _WeightedTransition(Transition):
+    """A transition that mixes the frames with fixed point weights
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, duration_s: float = 1.0):
+        super().__init__(pixel_width, pixel_height, duration_s)
+
+        self.__outgoing_weighted = np.empty((pixel_height, pixel_width, 3), dtype=np.uint16)
+        self.__incoming_weighted = np.empty((pixel_height, pixel_width, 3), dtype=np.uint16)
+
+    def _mix(self, outgoing, incoming, incoming_weight, outgoing_weight):
+        """Sets the frame to (outgoing * outgoing_weight + incoming * incoming_weight) / WEIGHT_ONE
+
+        The weights may be uint16 scalars or uint16 arrays the shape of the frame.
+        """
+        # Widening into the preallocated buffers first keeps the ufuncs from allocating cast buffers
+        np.copyto(self.__outgoing_weighted, outgoing)
+        np.multiply(self.__outgoing_weighted, outgoing_weight, out=self.__outgoing_weighted)
+        np.copyto(self.__incoming_weighted, incoming)
+        np.multiply(self.__incoming_weighted, incoming_weight, out=self.__incoming_weighted)
+        np.add(self.__outgoing_weighted, self.__incoming_weighted, out=self.__outgoing_weighted)
+        np.right_shift(self.__outgoing_weighted, 8, out=self.__outgoing_weighted)
+        np.copyto(self._frame, self.__outgoing_weighted, casting='unsafe')
+
+
+class Crossfade(_WeightedTransition):
+    """Fades the incoming frames in over the outgoing frames
+    """
+    def _blend(self, outgoing, incoming, progress):
+        weight = int(progress * WEIGHT_ONE)
+        self._mix(outgoing, incoming, np.uint16(weight), np.uint16(WEIGHT_ONE - weight))
+
+
+class MaskWipe(_WeightedTransition):
+    """Reveals the incoming frames in the order given by a grayscale mask
+
+    Darker areas of the mask change first. A soft edge blends pixels near the moving boundary.
+
+    Args:
+        mask: A (pixel_height, pixel_width) array of values from 0-255
+        softness: The width of the soft edge in mask levels. 1 gives a hard edge.
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, mask: np.ndarray, duration_s: float = 1.0,
+                 softness: int = 32):
+        super().__init__(pixel_width, pixel_height, duration_s)
+
+        self.__mask = np.asarray(mask, dtype=np.int32).reshape(pixel_height, pixel_width, 1)
+        self.__softness = max(int(softness), 1)
+
+        self.__levels = np.empty((pixel_height, pixel_width, 1), dtype=np.int32)
+        # Weights are kept per channel because in-place ufuncs copy broadcast operands
+        self.__incoming_weights = np.empty((pixel_height, pixel_width, 3), dtype=np.uint16)
+        self.__outgoing_weights = np.empty((pixel_height, pixel_width, 3), dtype=np.uint16)
+
+    @staticmethod
+    def from_order(pixel_width: int, pixel_height: int, order: WipeOrder, duration_s: float = 1.0,
+                   softness: int = 32) -> 'MaskWipe':
+        """Creates a mask wipe that follows the order of a color wipe
+
+        Args:
+            order: The order in which pixels change
+
+        Returns:
+            A new MaskWipe instance
+        """
+        order_map = wipe_order_map(order, pixel_width, pixel_height)
+        mask = order_map * 255 // max(int(order_map.max()), 1)
+        return MaskWipe(pixel_width, pixel_height, mask, duration_s, softness)
+
+    def _blend(self, outgoing, incoming, progress):
+        # The boundary sweeps from just before the darkest level to just past the brightest so
+        # that the soft edge fully enters and leaves the display
+        boundary = int(progress * (255 + self.__softness))
+
+        np.subtract(boundary, self.__mask, out=self.__levels)
+        np.multiply(self.__levels, WEIGHT_ONE, out=self.__levels)
+        np.floor_divide(self.__levels, self.__softness, out=self.__levels)
+        np.maximum(self.__levels, 0, out=self.__levels)
+        np.minimum(self.__levels, WEIGHT_ONE, out=self.__levels)
+
+        np.copyto(self.__incoming_weights, self.__levels, casting='unsafe')
+        np.subtract(WEIGHT_ONE, self.__levels, out=self.__levels)
+        np.copyto(self.__outgoing_weights, self.__levels, casting='unsafe')
+
+        self._mix(outgoing, incoming, self.__incoming_weights, self.__outgoing_weights)
+
+
+class Dissolve(Transition):
+    """Swaps pixels from outgoing to incoming in a random order
+
+    Args:
+        seed: The seed for the order in which pixels are swapped
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, duration_s: float = 1.0, seed: int = 0):
+        super().__init__(pixel_width, pixel_height, duration_s)
+
+        pixel_count = pixel_width * pixel_height
+        self.__ranks = np.random.default_rng(seed).permutation(pixel_count).reshape(pixel_height, pixel_width, 1)
+        self.__revealed = np.empty((pixel_height, pixel_width, 1), dtype=bool)
+
+    def _blend(self, outgoing, incoming, progress):
+        np.less(self.__ranks, int(progress * self.__ranks.size), out=self.__revealed)
+        np.copyto(self._frame, outgoing)
+        np.copyto(self._frame, incoming, where=self.__revealed)
+
+
+class SlideDirection(Enum):
+    """The direction content moves in during a slide
+    """
+    LEFT = auto()
+    RIGHT = auto()
+    UP = auto()
+    DOWN = auto()
+
+
+class Slide(Transition):
+    """Pushes the outgoing frames off the display with the incoming frames
+
+    Args:
+        direction: The direction both frames move in
+    """
+    def __init__(self, pixel_width: int, pixel_height: int, duration_s: float = 1.0,
+                 direction: SlideDirection = SlideDirection.LEFT):
+        super().__init__(pixel_width, pixel_height, duration_s)
+
+        self.direction = direction
+
+    def _blend(self, outgoing, incoming, progress):
+        frame = self._frame
+
+        if self.direction in (SlideDirection.LEFT, SlideDirection.RIGHT):
+            shift = int(round(progress * self.pixel_width))
+            rest = self.pixel_width - shift
+            if self.direction == SlideDirection.LEFT:
+                frame[:, :rest] = outgoing[:, shift:]
+                frame[:, rest:] = incoming[:, :shift]
+            else:
+                frame[:, shift:] = outgoing[:, :rest]
+                frame[:, :shift] = incoming[:, rest:]
+        else:
+            shift = int(round(progress * self.pixel_height))
+            rest = self.pixel_height - shift
+            if self.direction == SlideDirection.UP:
+                frame[:rest] = outgoing[shift:]
+                frame[rest:] = incoming[:shift]
+            else:
+                frame[shift:] = outgoing[:rest]
+                frame[:shift] = incoming[rest:]
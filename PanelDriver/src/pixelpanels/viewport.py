@@ -0,0 +1,200 @@
+"""Viewports into canvases larger than the display
+
+A viewport shows a display-sized window of a larger image or animation, such as a panorama.
+The canvas is decoded and cached once, so every frame is a NumPy slice of the cache and
+panning costs no more than showing a static frame.
+
+Example:
+    Scroll endlessly across a wrapped panorama at 20 pixels per second
+
+        viewport = Viewport.from_file("panorama.png", display.pixel_width, display.pixel_height,
+                                      wrap=True, fit_height=True)
+        display.play_frames(viewport.frames([(0, 0), (viewport.canvas_width, 0)], speed=20.0), fps=30.0)
+"""
+import bisect
+import math
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+from PIL import Image as ImageLib
+from PIL.Image import Image
+
+
+class Viewport(object):
+    """A display-sized window into a larger canvas
+
+    Args:
+        canvas: The canvas as a (height, width, 3) uint8 array, or a (frame_count, height,
+        width, 3) array for an animated canvas
+        pixel_width: The width of the window in pixels, usually `Display.pixel_width`
+        pixel_height: The height of the window in pixels, usually `Display.pixel_height`
+        wrap: Whether the canvas repeats past its edges. Otherwise positions are clamped so
+        the window stays on the canvas.
+        animation_fps: The frame rate of an animated canvas
+    """
+    def __init__(self, canvas: np.ndarray, pixel_width: int, pixel_height: int, wrap: bool = False,
+                 animation_fps: float = 10.0):
+
+        canvas = np.asarray(canvas, dtype=np.uint8)
+        if canvas.ndim == 3:
+            canvas = canvas[np.newaxis]
+
+        frame_count, canvas_height, canvas_width, _ = canvas.shape
+        if not wrap and (canvas_width < pixel_width or canvas_height < pixel_height):
+            raise ValueError("Canvas of size {0}x{1} is smaller than the {2}x{3} viewport"
+                             .format(canvas_width, canvas_height, pixel_width, pixel_height))
+
+        self.pixel_width = pixel_width
+        self.pixel_height = pixel_height
+        self.wrap = wrap
+        self.animation_fps = animation_fps
+
+        self.__canvas_width = canvas_width
+        self.__canvas_height = canvas_height
+
+        if wrap:
+            # The canvas is extended by a window's worth of wrapped rows and columns so that a
+            # window straddling the edge is still a single slice
+            rows = np.arange(canvas_height + pixel_height - 1) % canvas_height
+            columns = np.arange(canvas_width + pixel_width - 1) % canvas_width
+            canvas = canvas[:, rows[:, np.newaxis], columns[np.newaxis, :]]
+
+        self.__canvas = canvas
+
+    @staticmethod
+    def from_image(image: Image, pixel_width: int, pixel_height: int, wrap: bool = False,
+                   fit_height: bool = False) -> 'Viewport':
+        """Creates a viewport into every frame of a PIL Image
+
+        Args:
+            image: A still or animated image
+            fit_height: Whether the image is scaled, once, so its height matches the viewport
+
+        Returns:
+            A new Viewport instance
+        """
+        frame_count = getattr(image, "n_frames", 1)
+        frame_duration_ms = image.info.get("duration")
+
+        size = image.size
+        if fit_height:
+            size = (max(int(round(image.width * pixel_height / image.height)), 1), pixel_height)
+
+        canvas = np.empty((frame_count, size[1], size[0], 3), dtype=np.uint8)
+        for i in range(frame_count):
+            image.seek(i)
+            frame = image.convert('RGB')
+            if frame.size != size:
+                frame = frame.resize(size, ImageLib.LANCZOS)
+            canvas[i] = np.asarray(frame, dtype=np.uint8)
+
+        animation_fps = 1000.0 / frame_duration_ms if frame_duration_ms else 10.0
+        return Viewport(canvas, pixel_width, pixel_height, wrap, animation_fps)
+
+    @staticmethod
+    def from_file(path: str, pixel_width: int, pixel_height: int, wrap: bool = False,
+                  fit_height: bool = False) -> 'Viewport':
+        """Creates a viewport into an image or animation file, see `from_image`
+
+        Returns:
+            A new Viewport instance
+        """
+        with ImageLib.open(path) as image:
+            return Viewport.from_image(image, pixel_width, pixel_height, wrap, fit_height)
+
+    @property
+    def canvas_width(self):
+        """The width of the canvas in pixels"""
+        return self.__canvas_width
+
+    @property
+    def canvas_height(self):
+        """The height of the canvas in pixels"""
+        return self.__canvas_height
+
+    @property
+    def frame_count(self):
+        """The number of frames of an animated canvas, or 1 for a still canvas"""
+        return self.__canvas.shape[0]
+
+    @property
+    def canvas(self):
+        """The cached canvas as a (frame_count, height, width, 3) array, including any wrapped edges"""
+        return self.__canvas
+
+    def frame_at(self, x: int, y: int, frame_index: int = 0) -> np.ndarray:
+        """Gets the window with its top-left pixel at a canvas position
+
+        Args:
+            x: The canvas column of the left edge of the window
+            y: The canvas row of the top edge of the window
+            frame_index: The frame of an animated canvas
+
+        Returns:
+            A read-only (pixel_height, pixel_width, 3) view of the canvas
+        """
+        if self.wrap:
+            x %= self.__canvas_width
+            y %= self.__canvas_height
+        else:
+            x = min(max(x, 0), self.__canvas_width - self.pixel_width)
+            y = min(max(y, 0), self.__canvas_height - self.pixel_height)
+
+        frame = self.__canvas[frame_index % self.frame_count, y:y + self.pixel_height, x:x + self.pixel_width]
+        frame.flags.writeable = False
+        return frame
+
+    def positions(self, path: Sequence[Tuple[float, float]], speed: float, fps: float = 30.0,
+                  loop: bool = False) -> Iterator[Tuple[int, int]]:
+        """Generates the window positions for panning along a path at a fixed speed
+
+        Args:
+            path: The waypoints of the top-left corner of the window in canvas pixels
+            speed: The panning speed in pixels per second
+            fps: The number of frames per second the positions are played at
+            loop: Whether panning restarts from the first waypoint after reaching the last.
+            To pan back and forth, end the path where it started.
+
+        Returns:
+            An iterator of (x, y) positions, one per frame
+        """
+        waypoints = [(float(x), float(y)) for x, y in path]
+        distances = [0.0]
+        for (x0, y0), (x1, y1) in zip(waypoints, waypoints[1:]):
+            distances.append(distances[-1] + math.hypot(x1 - x0, y1 - y0))
+        path_length = distances[-1]
+
+        step = speed / fps
+        frame_index = 0
+        while True:
+            distance = frame_index * step
+            if distance > path_length:
+                if not loop or path_length == 0.0:
+                    return
+                distance = math.fmod(distance, path_length)
+
+            # Plain float math keeps the per-frame overhead far below the cost of the LED gather
+            segment = max(bisect.bisect_right(distances, distance) - 1, 0)
+            if segment >= len(waypoints) - 1:
+                x, y = waypoints[-1]
+            else:
+                (x0, y0), (x1, y1) = waypoints[segment], waypoints[segment + 1]
+                length = distances[segment + 1] - distances[segment]
+                fraction = (distance - distances[segment]) / length if length > 0.0 else 0.0
+                x, y = x0 + (x1 - x0) * fraction, y0 + (y1 - y0) * fraction
+
+            yield int(round(x)), int(round(y))
+
+            frame_index += 1
+
+    def frames(self, path: Sequence[Tuple[float, float]], speed: float, fps: float = 30.0,
+               loop: bool = False) -> Iterator[np.ndarray]:
+        """Generates the windows for panning along a path, see `positions`
+
+        An animated canvas keeps playing at animation_fps while the window pans.
+
+        Returns:
+            An iterator of read-only views of the canvas as accepted by `Display.show_frame`
+        """
+        for frame_index, (x, y) in enumerate(self.positions(path, speed, fps, loop)):
+            yield self.frame_at(x, y, int(frame_index * self.animation_fps / fps))
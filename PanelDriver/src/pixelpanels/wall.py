@@ -0,0 +1,635 @@
+"""Multi-node video walls
+
+A wall is one large canvas split between several Raspberry Pis. Each follower node drives a
+`Display` that covers one rectangle of the canvas. The coordinator sends each follower either
+the pixels of its rectangle or a reference to a content-addressed asset that every node
+already has, along with a presentation time. Followers estimate the offset between their
+clock and the coordinator clock over UDP, then show each frame when the coordinator clock
+reaches its presentation time so that all rectangles change together.
+
+Example:
+    Run a follower for the right half of a 128x32 wall
+
+        $ python -m pixelpanels.wall follower --coordinator 192.168.1.10:50060 --port 50061 --size 64x32
+
+    Play a GIF across two followers from the coordinator
+
+        $ python -m pixelpanels.wall coordinator --canvas 128x32 --port 50060 \\
+              --node 192.168.1.11:50061@0,0:64x32 --node 192.168.1.12:50061@64,0:64x32 \\
+              --gif "../data/Test_64x32.gif"
+"""
+import argparse
+import hashlib
+import heapq
+import logging
+import os
+import shutil
+import socket
+import struct
+import sys
+import time
+from collections import OrderedDict, deque
+from queue import Queue
+from threading import Condition, Event, Thread
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image as ImageLib
+
+from .display import Display
+from .layout import LedLayout
+from .panel import Panel, PanelOrigin, PanelPlacement
+
+PROTOCOL_MAGIC = b'PPW1'
+
+MESSAGE_SYNC_REQUEST = 1
+MESSAGE_SYNC_REPLY = 2
+MESSAGE_FRAME_FRAGMENT = 3
+MESSAGE_ASSET_FRAME = 4
+
+# Packets are kept below a typical Ethernet MTU so they are never fragmented at the IP layer
+MAX_FRAGMENT_PAYLOAD = 1400
+
+_HEADER = struct.Struct('!4sB')
+_SYNC_REQUEST = struct.Struct('!4sBd')
+_SYNC_REPLY = struct.Struct('!4sBddd')
+_FRAME_FRAGMENT = struct.Struct('!4sBIdHH')
+_ASSET_FRAME = struct.Struct('!4sBId32sIHHHH')
+
+# The size of the panels a follower display is tiled with when it has no LED layout
+PANEL_SIZE = 16
+
+# The number of clock samples a follower keeps. The sample with the shortest round trip wins.
+CLOCK_SAMPLE_COUNT = 8
+
+
+def _parse_address(address: str) -> Tuple[str, int]:
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+class WallNode(object):
+    """A follower as seen by the coordinator
+
+    Args:
+        address: The (host, port) UDP address of the follower
+        origin: The canvas position of the top-left pixel of the follower display
+        size: The (width, height) of the follower display in pixels
+    """
+    def __init__(self, address: Tuple[str, int], origin: Tuple[int, int], size: Tuple[int, int]):
+        self.address = address
+        self.origin = origin
+        self.size = size
+
+    @property
+    def region(self) -> Tuple[slice, slice]:
+        """The (rows, columns) slices of the canvas covered by the follower"""
+        return (slice(self.origin[1], self.origin[1] + self.size[1]),
+                slice(self.origin[0], self.origin[0] + self.size[0]))
+
+
+class AssetStore(object):
+    """A directory of assets named by the SHA-256 digest of their content
+
+    Assets are copied to every node out of band, so the coordinator only needs to send a
+    digest and a frame index for followers to render their part of a frame.
+
+    Args:
+        directory: The directory holding the assets
+        cache_size: The number of decoded assets kept in memory
+    """
+    def __init__(self, directory: str, cache_size: int = 2):
+
+        self.directory = directory
+        self.cache_size = cache_size
+        self.__cache = OrderedDict()
+
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def digest_of(path: str) -> bytes:
+        """Computes the content digest of a file
+
+        Returns:
+            The 32 byte SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+
+        return digest.digest()
+
+    def path(self, digest: bytes) -> str:
+        """The path of the asset with the given digest within the store"""
+        return os.path.join(self.directory, digest.hex())
+
+    def add(self, path: str) -> bytes:
+        """Copies a file into the store
+
+        Returns:
+            The digest of the asset
+        """
+        digest = self.digest_of(path)
+        if not os.path.exists(self.path(digest)):
+            shutil.copyfile(path, self.path(digest))
+
+        return digest
+
+    def frames(self, digest: bytes, canvas_size: Tuple[int, int], origin: Tuple[int, int],
+               size: Tuple[int, int]) -> List[np.ndarray]:
+        """Decodes the frames of an asset fit to the canvas and cropped to one region
+
+        Returns:
+            A list of (height, width, 3) uint8 arrays
+        """
+        key = (digest, canvas_size, origin, size)
+        if key in self.__cache:
+            self.__cache.move_to_end(key)
+            return self.__cache[key]
+
+        frames = []
+        with ImageLib.open(self.path(digest)) as image:
+            for i in range(getattr(image, "n_frames", 1)):
+                image.seek(i)
+                canvas = image.convert('RGB').resize(canvas_size, ImageLib.LANCZOS)
+                region = canvas.crop((origin[0], origin[1], origin[0] + size[0], origin[1] + size[1]))
+                frames.append(np.asarray(region, dtype=np.uint8))
+
+        self.__cache[key] = frames
+        while len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+
+        return frames
+
+
+class WallCoordinator(object):
+    """Distributes frames of a large canvas to the followers of a wall
+
+    The coordinator clock is `time.monotonic()` on the coordinator. Every frame is stamped
+    with a presentation time a little in the future so that all followers receive it before
+    it is due.
+
+    Args:
+        canvas_width: The width of the whole wall in pixels
+        canvas_height: The height of the whole wall in pixels
+        nodes: The followers of the wall
+        bind_address: The (host, port) the coordinator listens on for clock requests
+        latency_s: How far ahead of sending frames are scheduled for presentation
+    """
+    def __init__(self, canvas_width: int, canvas_height: int, nodes: List[WallNode],
+                 bind_address: Tuple[str, int] = ('0.0.0.0', 0), latency_s: float = 0.05):
+
+        self.canvas_width = canvas_width
+        self.canvas_height = canvas_height
+        self.nodes = nodes
+        self.latency_s = latency_s
+
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__socket.bind(bind_address)
+        self.__socket.settimeout(0.1)
+
+        self.__sequence = 0
+        self.__stopped = Event()
+        self.__thread = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """The address the coordinator is listening on"""
+        return self.__socket.getsockname()
+
+    def start(self):
+        """Starts answering clock requests on a background thread"""
+        self.__stopped.clear()
+        self.__thread = Thread(target=self.__serve_clock, name="WallCoordinator", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """Stops answering clock requests and closes the socket"""
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        self.__socket.close()
+
+    def __serve_clock(self):
+        buffer = bytearray(64)
+
+        while not self.__stopped.is_set():
+            try:
+                size, address = self.__socket.recvfrom_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+
+            receive_time = time.monotonic()
+            if size != _SYNC_REQUEST.size:
+                continue
+
+            magic, message_type, request_time = _SYNC_REQUEST.unpack_from(buffer)
+            if magic != PROTOCOL_MAGIC or message_type != MESSAGE_SYNC_REQUEST:
+                continue
+
+            reply = _SYNC_REPLY.pack(PROTOCOL_MAGIC, MESSAGE_SYNC_REPLY, request_time, receive_time, time.monotonic())
+            self.__socket.sendto(reply, address)
+
+    def __next_presentation(self, present_at):
+        self.__sequence = (self.__sequence + 1) & 0xFFFFFFFF
+        if present_at is None:
+            present_at = time.monotonic() + self.latency_s
+
+        return self.__sequence, present_at
+
+    def present_frame(self, frame: np.ndarray, present_at: float = None) -> float:
+        """Sends each follower its region of a canvas frame
+
+        Args:
+            frame: A (canvas_height, canvas_width, 3) uint8 array
+            present_at: The coordinator time at which to show the frame. By default, this is
+            latency_s from now.
+
+        Returns:
+            The coordinator time at which the frame will be shown
+        """
+        sequence, present_at = self.__next_presentation(present_at)
+
+        for node in self.nodes:
+            payload = np.ascontiguousarray(frame[node.region], dtype=np.uint8).tobytes()
+            fragment_count = max((len(payload) + MAX_FRAGMENT_PAYLOAD - 1) // MAX_FRAGMENT_PAYLOAD, 1)
+
+            for fragment in range(fragment_count):
+                header = _FRAME_FRAGMENT.pack(PROTOCOL_MAGIC, MESSAGE_FRAME_FRAGMENT, sequence, present_at,
+                                              fragment, fragment_count)
+                chunk = payload[fragment * MAX_FRAGMENT_PAYLOAD:(fragment + 1) * MAX_FRAGMENT_PAYLOAD]
+                self.__socket.sendto(header + chunk, node.address)
+
+        return present_at
+
+    def present_asset(self, digest: bytes, frame_index: int, present_at: float = None) -> float:
+        """Tells every follower to show a frame of an asset from its asset store
+
+        Args:
+            digest: The digest of the asset as given by `AssetStore.digest_of`
+            frame_index: The frame of the asset to show
+            present_at: The coordinator time at which to show the frame
+
+        Returns:
+            The coordinator time at which the frame will be shown
+        """
+        sequence, present_at = self.__next_presentation(present_at)
+
+        for node in self.nodes:
+            message = _ASSET_FRAME.pack(PROTOCOL_MAGIC, MESSAGE_ASSET_FRAME, sequence, present_at, digest,
+                                        frame_index, self.canvas_width, self.canvas_height,
+                                        node.origin[0], node.origin[1])
+            self.__socket.sendto(message, node.address)
+
+        return present_at
+
+    def play_frames(self, frames: Iterable[np.ndarray], fps: float = 30.0):
+        """Presents a sequence of canvas frames across the wall at a fixed frame rate
+
+        Args:
+            frames: An iterable of (canvas_height, canvas_width, 3) frames
+            fps: The number of frames to display per second
+        """
+        present_at = time.monotonic() + self.latency_s
+
+        for frame in frames:
+            self.present_frame(frame, present_at)
+            present_at += 1.0 / fps
+
+            # Stay roughly latency_s ahead of the followers without building up a backlog
+            delay = present_at - self.latency_s - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def play_asset(self, path: str, fps: float = 10.0):
+        """Presents every frame of a content-addressed asset across the wall
+
+        Args:
+            path: The path to the asset, which must also be in every follower's asset store
+            fps: The number of frames to display per second
+        """
+        digest = AssetStore.digest_of(path)
+        with ImageLib.open(path) as image:
+            frame_count = getattr(image, "n_frames", 1)
+
+        present_at = time.monotonic() + self.latency_s
+        for frame_index in range(frame_count):
+            self.present_asset(digest, frame_index, present_at)
+            present_at += 1.0 / fps
+
+            delay = present_at - self.latency_s - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+
+class WallFollower(object):
+    """Shows the region of a wall assigned to this node at the coordinator's presentation times
+
+    Args:
+        display: The local display, which covers the follower's region of the canvas
+        coordinator_address: The (host, port) of the coordinator
+        bind_address: The (host, port) this follower listens on for frames
+        asset_store: The store used to resolve asset references
+        sync_interval_s: How often the clock offset is refreshed
+    """
+    def __init__(self, display: Display, coordinator_address: Tuple[str, int],
+                 bind_address: Tuple[str, int] = ('0.0.0.0', 0), asset_store: AssetStore = None,
+                 sync_interval_s: float = 1.0):
+
+        self.display = display
+        self.coordinator_address = coordinator_address
+        self.asset_store = asset_store
+        self.sync_interval_s = sync_interval_s
+
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__socket.bind(bind_address)
+        self.__socket.settimeout(0.1)
+
+        self.__frame_size = display.pixel_width * display.pixel_height * 3
+        self.__assembly = {}
+
+        self.__clock_samples = deque(maxlen=CLOCK_SAMPLE_COUNT)
+        self.__clock_offset = None
+
+        # Decoding an asset can take seconds, so it happens on its own thread while packets keep arriving
+        self.__asset_requests = Queue()
+
+        self.__schedule = []
+        self.__schedule_condition = Condition()
+        self.__last_scheduled_sequence = None
+
+        self.presentation_log = deque(maxlen=4096)
+
+        self.__stopped = Event()
+        self.__threads = []
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """The address the follower is listening on"""
+        return self.__socket.getsockname()
+
+    @property
+    def clock_offset(self) -> Optional[float]:
+        """The estimated coordinator time minus local time, or None before the first sync"""
+        return self.__clock_offset
+
+    def start(self):
+        """Starts receiving, syncing and presenting on background threads"""
+        self.__stopped.clear()
+        self.__threads = [Thread(target=self.__receive, name="WallFollowerReceive", daemon=True),
+                          Thread(target=self.__sync, name="WallFollowerSync", daemon=True),
+                          Thread(target=self.__present, name="WallFollowerPresent", daemon=True),
+                          Thread(target=self.__resolve_assets, name="WallFollowerAssets", daemon=True)]
+        for thread in self.__threads:
+            thread.start()
+
+    def stop(self):
+        """Stops all background threads and closes the socket"""
+        self.__stopped.set()
+        with self.__schedule_condition:
+            self.__schedule_condition.notify_all()
+        self.__asset_requests.put(None)
+
+        for thread in self.__threads:
+            thread.join()
+        self.__threads = []
+        self.__socket.close()
+
+    def __sync(self):
+        # A quick burst of samples gets an estimate in place before the first frames arrive
+        for _ in range(CLOCK_SAMPLE_COUNT):
+            self.__send_sync_request()
+            if self.__stopped.wait(0.02):
+                return
+
+        while not self.__stopped.wait(self.sync_interval_s):
+            self.__send_sync_request()
+
+    def __send_sync_request(self):
+        request = _SYNC_REQUEST.pack(PROTOCOL_MAGIC, MESSAGE_SYNC_REQUEST, time.monotonic())
+        try:
+            self.__socket.sendto(request, self.coordinator_address)
+        except OSError:
+            logging.warning("Unable to reach the wall coordinator at {0}".format(self.coordinator_address))
+
+    def __handle_sync_reply(self, buffer):
+        receive_time = time.monotonic()
+        _, _, request_time, coordinator_receive_time, coordinator_send_time = _SYNC_REPLY.unpack_from(buffer)
+
+        round_trip = (receive_time - request_time) - (coordinator_send_time - coordinator_receive_time)
+        offset = ((coordinator_receive_time - request_time) + (coordinator_send_time - receive_time)) / 2
+        self.__clock_samples.append((round_trip, offset))
+
+        self.__clock_offset = min(self.__clock_samples)[1]
+
+    def __receive(self):
+        buffer = bytearray(65536)
+        view = memoryview(buffer)
+
+        while not self.__stopped.is_set():
+            try:
+                size = self.__socket.recv_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+
+            if size < _HEADER.size:
+                continue
+            magic, message_type = _HEADER.unpack_from(buffer)
+            if magic != PROTOCOL_MAGIC:
+                continue
+
+            if message_type == MESSAGE_SYNC_REPLY and size == _SYNC_REPLY.size:
+                self.__handle_sync_reply(buffer)
+            elif message_type == MESSAGE_FRAME_FRAGMENT and size >= _FRAME_FRAGMENT.size:
+                self.__handle_fragment(view[:size])
+            elif message_type == MESSAGE_ASSET_FRAME and size == _ASSET_FRAME.size:
+                self.__handle_asset_frame(buffer)
+
+    def __handle_fragment(self, packet):
+        _, _, sequence, present_at, fragment, fragment_count = _FRAME_FRAGMENT.unpack_from(packet)
+        payload = packet[_FRAME_FRAGMENT.size:]
+
+        entry = self.__assembly.get(sequence)
+        if entry is None:
+            entry = [bytearray(self.__frame_size), set(), present_at]
+            self.__assembly[sequence] = entry
+
+        offset = fragment * MAX_FRAGMENT_PAYLOAD
+        if offset + len(payload) > self.__frame_size:
+            logging.warning("Dropping a wall frame that doesn't match the display size")
+            del self.__assembly[sequence]
+            return
+
+        entry[0][offset:offset + len(payload)] = payload
+        entry[1].add(fragment)
+
+        if len(entry[1]) == fragment_count:
+            del self.__assembly[sequence]
+            frame = np.frombuffer(entry[0], dtype=np.uint8)
+            self.__schedule_frame(sequence, present_at, frame.reshape(self.display.pixel_height,
+                                                                     self.display.pixel_width, 3))
+
+            # Anything older than a completed frame can never be shown, so partial frames are dropped
+            for stale_sequence in [s for s in self.__assembly if ((sequence - s) & 0xFFFFFFFF) < 0x80000000]:
+                del self.__assembly[stale_sequence]
+
+    def __handle_asset_frame(self, buffer):
+        self.__asset_requests.put(_ASSET_FRAME.unpack_from(buffer))
+
+    def __resolve_assets(self):
+        while True:
+            request = self.__asset_requests.get()
+            if request is None or self.__stopped.is_set():
+                return
+
+            (_, _, sequence, present_at, digest, frame_index, canvas_width, canvas_height,
+             origin_x, origin_y) = request
+
+            if self.asset_store is None or not os.path.exists(self.asset_store.path(digest)):
+                logging.warning("Asset {0} is not in the asset store".format(digest.hex()))
+                continue
+
+            # The first reference to an asset decodes all of its frames, later ones hit the cache
+            frames = self.asset_store.frames(digest, (canvas_width, canvas_height), (origin_x, origin_y),
+                                             (self.display.pixel_width, self.display.pixel_height))
+            self.__schedule_frame(sequence, present_at, frames[frame_index % len(frames)])
+
+    def __schedule_frame(self, sequence, present_at, frame):
+        with self.__schedule_condition:
+            heapq.heappush(self.__schedule, (present_at, sequence, frame))
+            self.__schedule_condition.notify_all()
+
+    def __present(self):
+        while not self.__stopped.is_set():
+            with self.__schedule_condition:
+                if not self.__schedule or self.__clock_offset is None:
+                    self.__schedule_condition.wait(0.1)
+                    continue
+
+                present_at, sequence, frame = self.__schedule[0]
+                local_due = present_at - self.__clock_offset
+                delay = local_due - time.monotonic()
+
+                # Sleep most of the way with the lock released so new frames can be scheduled
+                if delay > 0.002:
+                    self.__schedule_condition.wait(delay - 0.002)
+                    continue
+
+                heapq.heappop(self.__schedule)
+
+                # If newer frames are already due this one is dropped rather than shown late
+                if self.__schedule and self.__schedule[0][0] - self.__clock_offset <= time.monotonic():
+                    continue
+
+            # The last stretch is slept too, spinning would hold the GIL from the receive thread
+            remaining = local_due - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+            self.display.show_frame(frame)
+            self.presentation_log.append((sequence, time.monotonic()))
+
+
+def _parse_size(value: str) -> Tuple[int, int]:
+    """Parses a size of the form widthxheight"""
+    width, height = (int(v) for v in value.split('x'))
+    return width, height
+
+
+def _parse_node(value: str) -> WallNode:
+    """Parses a node of the form host:port@x,y:widthxheight"""
+    address, placement = value.split('@')
+    origin, size = placement.split(':')
+    x, y = (int(v) for v in origin.split(','))
+    return WallNode(_parse_address(address), (x, y), _parse_size(size))
+
+
+def follower_display(width: int, height: int, layout_path: str = None) -> Display:
+    """Creates the display of a follower that covers a width x height region of the wall
+
+    Args:
+        width: The width of the region in pixels
+        height: The height of the region in pixels
+        layout_path: A CSV or JSON LED layout as read by `LedLayout`, scaled to the region. By
+        default the region is tiled with 16x16 panels connected a row at a time from the bottom
+        row up, like the default `Display`.
+
+    Returns:
+        A new Display instance
+    """
+    if layout_path is not None:
+        load = LedLayout.from_json if layout_path.lower().endswith('.json') else LedLayout.from_csv
+        return Display(layout=load(layout_path, width, height))
+
+    if width % PANEL_SIZE or height % PANEL_SIZE:
+        raise ValueError("A display of panels must be a multiple of {0} pixels in each direction".format(PANEL_SIZE))
+
+    placements = [PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (x, y),
+                                 (x + PANEL_SIZE - 1, y + PANEL_SIZE - 1))
+                  for y in reversed(range(0, height, PANEL_SIZE)) for x in range(0, width, PANEL_SIZE)]
+    return Display(placements)
+
+
+def main() -> int:
+    logging.basicConfig()
+
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    follower_parser = subparsers.add_parser("follower", help="Show one region of the wall on the local display")
+    follower_parser.add_argument("--coordinator", help="The host:port of the coordinator", required=True)
+    follower_parser.add_argument("--port", help="The UDP port to receive frames on", type=int, default=50061)
+    follower_parser.add_argument("--assets", help="The asset store directory", default="./assets")
+    follower_parser.add_argument("--size", help="The size of this node's region of the wall as widthxheight",
+                                 default="64x32")
+    follower_parser.add_argument("--layout", help="A CSV or JSON file with the position of every LED, for "
+                                                  "displays that are not a grid of 16x16 panels")
+
+    coordinator_parser = subparsers.add_parser("coordinator", help="Play a GIF across the wall")
+    coordinator_parser.add_argument("--canvas", help="The wall size as widthxheight", required=True)
+    coordinator_parser.add_argument("--port", help="The UDP port for clock requests", type=int, default=50060)
+    coordinator_parser.add_argument("--node", help="A follower as host:port@x,y:widthxheight", action="append",
+                                    required=True)
+    coordinator_parser.add_argument("--gif", help="Path to a gif that every follower has in its asset store",
+                                    required=True)
+    coordinator_parser.add_argument("--fps", help="The frame rate of playback", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.mode == "follower":
+        try:
+            display = follower_display(*_parse_size(args.size), args.layout)
+        except ValueError as error:
+            follower_parser.error(str(error))
+
+        follower = WallFollower(display, _parse_address(args.coordinator), ('0.0.0.0', args.port),
+                                AssetStore(args.assets))
+        follower.start()
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            pass
+        follower.stop()
+    else:
+        canvas_width, canvas_height = _parse_size(args.canvas)
+        coordinator = WallCoordinator(canvas_width, canvas_height, [_parse_node(node) for node in args.node],
+                                      ('0.0.0.0', args.port))
+        coordinator.start()
+        try:
+            while True:
+                coordinator.play_asset(args.gif, args.fps)
+        except KeyboardInterrupt:
+            pass
+        coordinator.stop()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import math
+from enum import Enum, auto
+from typing import Iterator
+
+import numpy as np
+
+
+class WipeOrder(Enum):
+    """Defines the order in which pixels change during a wipe
+
+    HORIZONTAL = Columns change from left to right
+    VERTICAL = Rows change from top to bottom
+    PIXEL = Pixels change one at a time, row by row from the top-left
+    DIAGONAL = Diagonals change from the top-left corner to the bottom-right corner
+    RADIAL = Rings change from the center outwards
+    """
+    HORIZONTAL = auto()
+    VERTICAL = auto()
+    PIXEL = auto()
+    DIAGONAL = auto()
+    RADIAL = auto()
+
+
+def wipe_order_map(order: WipeOrder, pixel_width: int, pixel_height: int) -> np.ndarray:
+    """Generates the wipe step at which each pixel changes
+
+    Args:
+        order: The order of the wipe
+        pixel_width: The width of the display in pixels
+        pixel_height: The height of the display in pixels
+
+    Returns:
+        An integer array of the form value[y, x]=step where steps count up from 0
+    """
+    y, x = np.mgrid[0:pixel_height, 0:pixel_width]
+
+    if order == WipeOrder.HORIZONTAL:
+        return x
+    if order == WipeOrder.VERTICAL:
+        return y
+    if order == WipeOrder.PIXEL:
+        return y * pixel_width + x
+    if order == WipeOrder.DIAGONAL:
+        return x + y
+    if order == WipeOrder.RADIAL:
+        radius = np.hypot(x + 0.5 - pixel_width / 2, y + 0.5 - pixel_height / 2)
+        return np.floor(radius - radius.min()).astype(int)
+
+    raise ValueError("Unsupported wipe order: {0}".format(order))
+
+
+def wipe_frame_count(order_map: np.ndarray, step: int) -> int:
+    """The number of frames a wipe takes when `step` wipe steps are drawn per frame"""
+    return math.ceil((int(order_map.max()) + 1) / step)
+
+
+def wipe_frames(start: np.ndarray, target: np.ndarray, order_map: np.ndarray, step: int = 1) -> Iterator[np.ndarray]:
+    """Generates the frames of a wipe from one frame to another
+
+    Pixels are sorted by the step at which they change once up front. Each frame then only
+    copies the pixels that change in it, rather than redrawing the whole display.
+
+    Args:
+        start: The frame shown before the wipe begins
+        target: The frame shown once the wipe completes
+        order_map: The wipe step of each pixel as generated by `wipe_order_map`
+        step: The number of wipe steps drawn in each frame
+
+    Returns:
+        An iterator of frames. The same array is updated and yielded for every frame.
+    """
+    if step < 1:
+        raise ValueError("Wipes must advance at least one step per frame")
+
+    frame = np.array(start, dtype=np.uint8)
+    flat_frame = frame.reshape(-1, 3)
+    flat_target = np.asarray(target, dtype=np.uint8).reshape(-1, 3)
+
+    flat_order = order_map.ravel()
+    sequence = np.argsort(flat_order, kind='stable')
+    frame_ends = np.arange(1, wipe_frame_count(order_map, step) + 1) * step
+    bounds = np.searchsorted(flat_order[sequence], frame_ends, side='left')
+
+    previous_bound = 0
+    for bound in bounds:
+        changed = sequence[previous_bound:bound]
+        flat_frame[changed] = flat_target[changed]
+        previous_bound = bound
+
+        yield frame
@@ -0,0 +1,87 @@
+import numpy as np
+from PIL import Image as ImageLib
+
+from pixelpanels import Display
+from pixelpanels.assets import AssetPreparer, PreparedFrame, asset_frame_rate
+
+
+def swap_channels(raw_color):
+    raw_color.red, raw_color.green, raw_color.blue = raw_color.green, raw_color.blue, raw_color.red
+    return raw_color
+
+
+def write_gif(path, frame_count):
+    rng = np.random.default_rng(frame_count)
+    frames = [ImageLib.fromarray(rng.integers(0, 255, (48, 96, 3), dtype=np.uint8)).convert('P')
+              for _ in range(frame_count)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=50, loop=0)
+
+
+def test_prepared_frames_match_render_thread(tmp_path):
+    gif_path = str(tmp_path / "test.gif")
+    write_gif(gif_path, 21)
+    display = Display(color_cal=swap_channels)
+
+    with AssetPreparer(display, max_workers=2, chunk_frames=4) as preparer:
+        prepared = list(preparer.frames(gif_path))
+
+    expected = list(display.gif_frames(gif_path))
+    assert len(prepared) == 21
+    for prepared_frame, expected_frame in zip(prepared, expected):
+        assert isinstance(prepared_frame, PreparedFrame)
+        assert np.array_equal(prepared_frame, expected_frame)
+
+    display.show_frame(prepared[-1])
+    prepared_leds = list(display.pixel_strip.getPixels())
+    display.show_frame(np.array(prepared[-1]))
+    assert prepared_leds == list(display.pixel_strip.getPixels())
+
+
+def test_unpicklable_calibration(tmp_path):
+    gif_path = str(tmp_path / "test.gif")
+    write_gif(gif_path, 5)
+    display = Display(color_cal=lambda raw_color: swap_channels(raw_color))
+
+    with AssetPreparer(display, max_workers=1, chunk_frames=4) as preparer:
+        prepared = list(preparer.frames(gif_path))
+
+    display.show_frame(prepared[-1])
+    prepared_leds = list(display.pixel_strip.getPixels())
+    display.show_frame(np.array(prepared[-1]))
+    assert prepared_leds == list(display.pixel_strip.getPixels())
+
+
+def test_stale_calibration_is_recomputed(tmp_path):
+    gif_path = str(tmp_path / "test.gif")
+    write_gif(gif_path, 2)
+    display = Display()
+
+    with AssetPreparer(display, max_workers=1) as preparer:
+        frame = next(iter(preparer.frames(gif_path)))
+
+    display.color_cal = swap_channels
+    display.show_frame(frame)
+
+    red, green, blue = (int(channel) for channel in frame[0, 0])
+    assert display.get_display_image().getpixel((0, 0)) == (green, blue, red)
+
+
+def test_abandoned_playback_releases_blocks(tmp_path):
+    gif_path = str(tmp_path / "test.gif")
+    write_gif(gif_path, 40)
+    display = Display()
+
+    with AssetPreparer(display, max_workers=2, chunk_frames=4) as preparer:
+        for _ in range(3):
+            frames = preparer.frames(gif_path)
+            next(frames)
+            frames.close()
+
+        assert len(list(preparer.frames(gif_path))) == 40
+
+
+def test_asset_frame_rate(tmp_path):
+    gif_path = str(tmp_path / "test.gif")
+    write_gif(gif_path, 2)
+
+    assert asset_frame_rate(gif_path) == 20.0
@@ -0,0 +1,133 @@
+import time
+
+import numpy as np
+import pytest
+
+from pixelpanels import CalibrationTable, Color, Display, Panel, PanelCalibration, PanelPlacement
+from pixelpanels.display import PreparedFrame, frame_to_led_values
+
+
+def random_led_values(count, seed=0):
+    return np.random.default_rng(seed).integers(0, 1 << 24, count, dtype=np.uint32)
+
+
+def unpack(led_values):
+    return np.stack([(led_values >> 16) & 0xFF, (led_values >> 8) & 0xFF, led_values & 0xFF], axis=-1)
+
+
+def two_panel_placements(left=None, right=None):
+    return [PanelPlacement(Panel(), (0, 0), (15, 15), calibration=left),
+            PanelPlacement(Panel(), (16, 0), (31, 15), calibration=right)]
+
+
+def test_curve_calibration():
+    calibration = PanelCalibration.from_gamma(2.2, gains=(1.0, 0.5, 0.8))
+    led_values = random_led_values(1000)
+
+    levels = unpack(led_values) / 255.0
+    expected = np.clip(np.floor(255.0 * levels ** 2.2 * [1.0, 0.5, 0.8] + 0.5), 0, 255)
+    assert np.array_equal(unpack(calibration.apply(led_values)), expected)
+
+    # A diagonal matrix is still a lookup per channel
+    assert PanelCalibration(matrix=np.diag([1.0, 0.5, 0.8])).is_separable
+    assert np.array_equal(PanelCalibration(matrix=np.diag([1.0, 0.5, 0.8])).lut(),
+                          PanelCalibration(gains=(1.0, 0.5, 0.8)).lut())
+
+
+def test_matrix_calibration():
+    matrix = np.array([[0.9, 0.1, 0.0],
+                       [0.05, 0.85, 0.1],
+                       [-0.1, 0.0, 1.2]])
+    calibration = PanelCalibration.from_gamma(1.8, matrix=matrix)
+    assert not calibration.is_separable
+    with pytest.raises(ValueError):
+        calibration.lut()
+
+    led_values = random_led_values(1000)
+    expected = np.clip((255.0 * (unpack(led_values) / 255.0) ** 1.8) @ matrix.T, 0, 255)
+    assert np.abs(unpack(calibration.apply(led_values)) - expected).max() <= 0.5 + 1e-6
+
+
+def test_display_calibrates_each_panel():
+    left = PanelCalibration(gains=(1.0, 0.5, 0.25))
+    right = PanelCalibration(matrix=[[0.0, 0.0, 1.0], [0.0, 1.0, 0.0], [1.0, 0.0, 0.0]])
+    display = Display(two_panel_placements(left, right), color_cal=lambda color: Color(color.red, color.green, 200))
+
+    frame = np.random.default_rng(1).integers(0, 256, (16, 32, 3), dtype=np.uint8)
+    display.show_frame(frame)
+
+    uncalibrated = frame_to_led_values(frame, display.led_order, display.color_cal)
+    shown = display.pixel_strip.read()
+    assert np.array_equal(shown[:256], left.apply(uncalibrated[:256]))
+    assert np.array_equal(shown[256:], right.apply(uncalibrated[256:]))
+
+    # Placements without a calibration are left alone
+    display = Display(two_panel_placements(right=right))
+    display.show_frame(frame)
+    uncalibrated = frame_to_led_values(frame, display.led_order)
+    assert np.array_equal(display.pixel_strip.read()[:256], uncalibrated[:256])
+    assert np.array_equal(display.pixel_strip.read()[256:], right.apply(uncalibrated[256:]))
+
+    assert Display(two_panel_placements()).calibration_table is None
+
+
+def test_prepared_frames_survive_calibration_changes():
+    placements = two_panel_placements()
+    display = Display(placements)
+
+    frame = np.random.default_rng(2).integers(0, 256, (16, 32, 3), dtype=np.uint8)
+    led_values = frame_to_led_values(frame, display.led_order)
+    prepared = frame.view(PreparedFrame)
+    prepared.led_values = led_values.copy()
+    prepared.led_order = display.led_order
+
+    display.show_frame(prepared)
+    assert np.array_equal(display.pixel_strip.read(), led_values)
+
+    # Changing a calibration doesn't touch the prepared values, which are calibrated as they are shown
+    placements[1].calibration = PanelCalibration(gains=(0.5, 0.5, 0.5))
+    display.update_calibrations()
+    display.show_frame(prepared)
+
+    assert np.array_equal(prepared.led_values, led_values)
+    assert np.array_equal(display.pixel_strip.read()[:256], led_values[:256])
+    assert np.array_equal(display.pixel_strip.read()[256:], placements[1].calibration.apply(led_values[256:]))
+
+
+@pytest.mark.benchmark
+def test_calibration_benchmark():
+    panel_count = 16
+    placements = [PanelPlacement(Panel(), (16 * i, 0), (16 * i + 15, 15),
+                                 calibration=PanelCalibration.from_gamma(2.0 + 0.05 * i, gains=(1.0, 0.9, 0.8)))
+                  for i in range(panel_count)]
+    table = CalibrationTable.from_placements(placements)
+    led_values = random_led_values(table.led_count)
+
+    luts = [placement.calibration.lut() for placement in placements]
+
+    def per_led():
+        # What a single calibration callback has to do to tell the panels apart
+        calibrated = []
+        for led_index, pixel_value in enumerate(led_values.tolist()):
+            lut = luts[led_index // 256]
+            color = Color.from_pixel_value(pixel_value)
+            calibrated.append(Color(int(lut[0, color.red]), int(lut[1, color.green]),
+                                    int(lut[2, color.blue])).to_pixel_value())
+        return np.array(calibrated, dtype=np.uint32)
+
+    def best_time(calibrate):
+        best = None
+        for _ in range(3):
+            start_time = time.perf_counter()
+            result = calibrate()
+            elapsed = time.perf_counter() - start_time
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    per_led_time, expected = best_time(per_led)
+    table_time, result = best_time(lambda: table.apply(led_values))
+    assert np.array_equal(result, expected)
+
+    print("{0} LEDs: per-LED {1:.3f} ms, table {2:.3f} ms".format(table.led_count, per_led_time * 1000.0,
+                                                                  table_time * 1000.0))
+    assert table_time * 10.0 < per_led_time
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import time
+
+import grpc
+import pytest
+
+from pixelpanels import Display, Tracer
+from pixelpanels import rpcserver
+from pixelpanels.client import (AsyncClientPool, AsyncPanelClient, ClientPool, NO_RETRIES, PanelClient, RetryPolicy,
+                                TlsConfig)
+from pixelpanels.client import load
+from pixelpanels.client.common import normalize_target
+from pixelpanels.preview import PreviewFormat
+from pixelpanels.rpc_library import panelrpc_pb2
+
+
+def openssl(*args, cwd):
+    subprocess.run(["openssl"] + list(args), cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def make_certificate(directory, name, ca=None):
+    """Writes <name>.crt and <name>_nopass.key signed by a CA, or a self-signed CA if ca is None"""
+    subject = "/O=Example Org/CN=" + name
+    if ca is None:
+        openssl("req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "2", "-subj", subject,
+                "-keyout", name + "_nopass.key", "-out", name + ".crt", cwd=directory)
+        return
+
+    with open(os.path.join(directory, name + ".ext"), "w") as f:
+        f.write("basicConstraints=CA:FALSE\nsubjectAltName=DNS:localhost,IP:127.0.0.1\n")
+    openssl("req", "-new", "-newkey", "rsa:2048", "-nodes", "-subj", subject, "-keyout", name + "_nopass.key",
+            "-out", name + ".csr", cwd=directory)
+    openssl("x509", "-req", "-in", name + ".csr", "-CA", ca + ".crt", "-CAkey", ca + "_nopass.key",
+            "-CAcreateserial", "-days", "2", "-sha256", "-extfile", name + ".ext", "-out", name + ".crt",
+            cwd=directory)
+
+
+@pytest.fixture(scope="module")
+def certificate_dir(tmp_path_factory):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is needed to make certificates")
+
+    directory = str(tmp_path_factory.mktemp("certificates"))
+    make_certificate(directory, "root_ca")
+    make_certificate(directory, "panel_driver", ca="root_ca")
+    make_certificate(directory, "panel_service", ca="root_ca")
+    # A client certificate the server doesn't trust
+    os.mkdir(os.path.join(directory, "untrusted"))
+    make_certificate(os.path.join(directory, "untrusted"), "root_ca")
+    make_certificate(os.path.join(directory, "untrusted"), "panel_service", ca="root_ca")
+    return directory
+
+
+@pytest.fixture
+def server(certificate_dir, monkeypatch):
+    monkeypatch.setattr(rpcserver, "panel_display", Display())
+    monkeypatch.setattr(rpcserver, "frame_encoder", None)
+    monkeypatch.setattr(rpcserver, "tracer", None)
+
+    server, port = rpcserver.create_server("127.0.0.1:0", certificate_dir)
+    server.start()
+    yield "127.0.0.1:{0}".format(port)
+    server.stop(None)
+
+
+@pytest.fixture
+def tls(certificate_dir):
+    return TlsConfig.from_directory(certificate_dir)
+
+
+def free_port():
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+def test_normalize_target():
+    assert normalize_target("panel.local") == "panel.local:50051"
+    assert normalize_target("10.0.0.2:6000") == "10.0.0.2:6000"
+    assert normalize_target("[::1]") == "[::1]:50051"
+
+
+def test_client_calls(server, tls):
+    with PanelClient(server, tls) as client:
+        preview = client.get_frame(PreviewFormat.RAW_RGB, scale=2)
+        assert (preview.width, preview.height) == (128, 64)
+        assert preview.data == bytes(128 * 64 * 3)
+
+        # Failures that retrying can't fix are raised right away
+        with pytest.raises(grpc.RpcError) as error:
+            client.get_trace()
+        assert error.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+        assert client.retry_count == 0
+
+        rpcserver.tracer = Tracer()
+        assert "traceEvents" in client.get_trace(clear=True)
+
+        stats = client.watch_stats(interval_s=0.05)
+        assert next(stats).frames_shown == 0
+        stats.cancel()
+
+        frames = client.watch_frames(PreviewFormat.PALETTE)
+        assert next(frames).format == panelrpc_pb2.PALETTE
+        frames.cancel()
+
+
+def test_streams_leave_workers_for_calls(server, tls):
+    with PanelClient(server, tls, NO_RETRIES, timeout=5.0) as client:
+        # Both kinds of stream share the slots
+        streams = [client.watch_stats(interval_s=0.05) if i % 2 else client.watch_frames(PreviewFormat.RAW_RGB)
+                   for i in range(rpcserver.SERVER_WORKERS + 2)]
+        rejected = 0
+        for stream in streams:
+            try:
+                next(stream)
+            except grpc.RpcError as error:
+                assert error.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+                rejected += 1
+        assert rejected == len(streams) - rpcserver.MAX_STREAMS
+
+        # A call still gets a worker while every stream slot is taken
+        with pytest.raises(grpc.RpcError) as error:
+            client.get_trace(timeout=2.0)
+        assert error.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+        assert client.get_frame(timeout=2.0).width == 64
+
+        for stream in streams:
+            stream.cancel()
+
+        # Closed streams give their slots back
+        time.sleep(0.2)
+        stats = client.watch_stats(interval_s=0.05)
+        assert next(stats).frames_shown == 0
+        stats.cancel()
+
+
+def test_client_needs_trusted_certificate(server, certificate_dir):
+    # The client trusts the server but the server doesn't trust the client
+    untrusted = TlsConfig.from_directory(os.path.join(certificate_dir, "untrusted"))
+    untrusted.root_ca = TlsConfig.from_directory(certificate_dir).root_ca
+
+    with PanelClient(server, untrusted, NO_RETRIES, timeout=5.0) as client:
+        with pytest.raises(grpc.RpcError) as error:
+            client.get_frame()
+        assert error.value.code() == grpc.StatusCode.UNAVAILABLE
+
+
+def test_retries_within_deadline(tls):
+    policy = RetryPolicy(max_attempts=100, initial_backoff_s=0.02, max_backoff_s=0.05)
+    with PanelClient("127.0.0.1:{0}".format(free_port()), tls, policy) as client:
+        start_time = time.monotonic()
+        with pytest.raises(grpc.RpcError) as error:
+            client.get_frame(timeout=0.5)
+        elapsed = time.monotonic() - start_time
+
+    assert error.value.code() in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+    assert client.retry_count > 0
+    assert elapsed < 1.0
+
+
+def test_pool(server, tls):
+    dead_target = "127.0.0.1:{0}".format(free_port())
+    with ClientPool([server], tls, NO_RETRIES, timeout=5.0) as pool:
+        assert pool.client(server) is pool.client(server)
+
+        results = pool.map(lambda client: client.get_frame(PreviewFormat.PNG).width, [server, dead_target])
+        assert results[server] == 64
+        assert isinstance(results[dead_target], grpc.RpcError)
+        assert set(pool.targets) == {server, dead_target}
+
+
+def test_async_client(server, tls):
+    async def run():
+        async with AsyncPanelClient(server, tls) as client:
+            preview = await client.get_frame(PreviewFormat.PNG, scale=3)
+            assert (preview.width, preview.format) == (192, panelrpc_pb2.PNG)
+
+            stats = client.watch_stats(interval_s=0.05)
+            async for snapshot in stats:
+                assert snapshot.frames_shown == 0
+                stats.cancel()
+                break
+
+        async with AsyncClientPool([server, server], tls) as pool:
+            assert len(pool.targets) == 1
+            results = await pool.map(lambda client: client.get_frame(PreviewFormat.RAW_RGB))
+            assert len(results[server].data) == 64 * 32 * 3
+
+    asyncio.run(run())
+
+
+def test_load_cli(server, certificate_dir, capsys):
+    status = load.main([server, "--mix", "get_frame=3,watch_stats,get_trace=1", "--requests", "60",
+                        "--concurrency", "4", "--certificates", certificate_dir, "--seed", "1"])
+    output = capsys.readouterr().out.splitlines()
+
+    # get_trace fails since the server isn't tracing
+    assert status == 1
+    # The header is followed by a row for each request and the total
+    rows = {line.split()[0]: line.split() for line in output[2:6]}
+    assert int(rows["all"][1]) + int(rows["all"][2]) == 60
+    assert int(rows["get_frame"][1]) > 0 and rows["get_frame"][2] == "0"
+    assert int(rows["watch_stats"][1]) > 0
+    assert rows["get_trace"][1] == "0"
+    assert "get_trace failed {0} times with FAILED_PRECONDITION".format(rows["get_trace"][2]) in output
+
+    with pytest.raises(SystemExit):
+        load.main([server, "--mix", "unknown=1"])
@@ -0,0 +1,74 @@
+import colorsys
+import copy
+
+import numpy as np
+import pytest
+
+from pixelpanels import Color, ColorArray
+
+
+def test_color_is_slotted():
+    color = Color(1, 2, 3)
+
+    with pytest.raises(AttributeError):
+        color.alpha = 4
+
+    assert copy.copy(color).to_tuple() == color.to_tuple()
+    assert copy.copy(color) is not color
+    assert color.replace(green=20).to_tuple() == (1, 20, 3)
+    assert color.to_tuple() == (1, 2, 3)
+
+    # Colors compare and hash by identity, so they can be set members and dictionary keys
+    assert color != Color(1, 2, 3)
+    assert len({color, Color(1, 2, 3)}) == 2
+
+
+def test_pixel_values_round_trip():
+    rgb = np.random.default_rng(0).integers(0, 255, (16, 8, 3), dtype=np.uint8)
+    colors = ColorArray(rgb)
+
+    pixel_values = colors.to_pixel_values()
+    assert pixel_values.shape == (16, 8)
+    assert pixel_values[3, 5] == Color(*rgb[3, 5].tolist()).to_pixel_value()
+    assert ColorArray.from_pixel_values(pixel_values) == colors
+
+
+def test_colors_round_trip():
+    colors = [Color(255, 0, 0), Color(0, 128, 0), Color(1, 2, 3)]
+    color_array = ColorArray.from_colors(colors)
+
+    assert color_array.shape == (3,)
+    assert [color.to_tuple() for color in color_array] == [color.to_tuple() for color in colors]
+    assert color_array[1:].shape == (2,)
+    assert np.asarray(color_array) is color_array.rgb
+
+
+def test_hsv_matches_colorsys():
+    rgb = np.random.default_rng(1).integers(0, 255, (256, 3), dtype=np.uint8)
+    hsv = ColorArray(rgb).to_hsv()
+
+    for (red, green, blue), (hue, saturation, value) in zip(rgb.tolist(), hsv.tolist()):
+        expected = colorsys.rgb_to_hsv(red / 255.0, green / 255.0, blue / 255.0)
+        assert np.allclose((hue, saturation, value), expected, atol=1e-5)
+
+    assert ColorArray.from_hsv(hsv) == ColorArray(rgb)
+    assert ColorArray.from_hsv([[1.0, 1.0, 1.0]]) == ColorArray([[255, 0, 0]])
+
+
+def test_scale_truncates_and_saturates():
+    colors = ColorArray([[200, 100, 11], [255, 255, 255]])
+
+    assert colors.scale((0.40, 0.20, 0.45)) == ColorArray([[int(200 * 0.40), int(100 * 0.20), int(11 * 0.45)],
+                                                           [int(255 * 0.40), int(255 * 0.20), int(255 * 0.45)]])
+    assert colors.scale(2.0) == ColorArray([[255, 200, 22], [255, 255, 255]])
+    assert colors.scale(-1.0) == ColorArray([[0, 0, 0], [0, 0, 0]])
+
+
+def test_out_of_range_values_saturate():
+    assert ColorArray([[300, -5, 10]]) == ColorArray(np.array([[255, 0, 10]], dtype=np.uint8))
+    assert ColorArray([[255.9, -0.5, 10.7]]) == ColorArray([[255, 0, 10]])
+
+
+def test_invalid_shape():
+    with pytest.raises(ValueError):
+        ColorArray(np.zeros((4, 4)))
@@ -0,0 +1,124 @@
+import copy
+import sys
+import time
+from threading import Barrier, Thread
+
+import numpy as np
+import pytest
+
+from pixelpanels import Color, CommitPolicy, Display
+from pixelpanels.mock_rpi_ws281x import PixelStrip
+
+WRITER_COUNT = 8
+COMMITS_PER_WRITER = 30
+
+
+def recording_show(self):
+    if not hasattr(self, 'led_history'):
+        self.led_history = []
+    self.led_history.append(copy.copy(self._PixelStrip__led_data))
+
+
+@pytest.fixture
+def fast_thread_switching():
+    # Switching threads as often as possible gives writers every chance to interleave
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(switch_interval)
+
+
+def writer(display, writer_index, barrier):
+    color = Color(writer_index + 1, 0, 255 - writer_index)
+    barrier.wait()
+
+    for commit_index in range(COMMITS_PER_WRITER):
+        mode = commit_index % 3
+        if mode == 0:
+            display.set_color(color)
+        elif mode == 1:
+            frame = np.empty((display.pixel_height, display.pixel_width, 3), dtype=np.uint8)
+            frame[...] = color.to_tuple()
+            display.show_frame(frame)
+        else:
+            # Transactions are built a row at a time while other writers commit
+            with display.transaction() as frame:
+                for y in range(display.pixel_height):
+                    frame[y] = color.to_tuple()
+                    time.sleep(0)
+
+
+def test_concurrent_writers_never_tear(mocker, fast_thread_switching):
+    mocker.patch.object(PixelStrip, 'show', recording_show)
+    display = Display()
+
+    barrier = Barrier(WRITER_COUNT)
+    threads = [Thread(target=writer, args=(display, i, barrier)) for i in range(WRITER_COUNT)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    led_history = display.pixel_strip.led_history
+    assert len(led_history) == WRITER_COUNT * COMMITS_PER_WRITER
+    for led_data in led_history:
+        assert len(set(led_data)) == 1
+
+    # The frame the display reports matches the last latched LED data
+    last_value = led_history[-1][0]
+    assert np.all(display.frame == Color.from_pixel_value(last_value).to_tuple())
+
+
+def test_get_display_image_is_consistent(fast_thread_switching):
+    display = Display()
+    colors = [Color(255, 0, 0), Color(0, 0, 255)]
+    stopped = []
+
+    def flip():
+        i = 0
+        while not stopped:
+            display.set_color(colors[i % 2])
+            i += 1
+
+    thread = Thread(target=flip)
+    thread.start()
+    try:
+        for _ in range(50):
+            pixels = np.asarray(display.get_display_image()).reshape(-1, 3)
+            assert len(np.unique(pixels, axis=0)) == 1
+    finally:
+        stopped.append(True)
+        thread.join()
+
+
+def test_priority_policy():
+    display = Display()
+    display.commit_policy = CommitPolicy.PRIORITY
+    display.priority_hold_s = 0.1
+
+    assert display.show_frame(np.zeros((32, 64, 3), dtype=np.uint8), priority=0)
+    assert display.transaction(priority=5).commit()
+
+    ambient = display.transaction(priority=0)
+    ambient.frame[...] = 20
+    assert not ambient.commit()
+    assert not display.frame.any()
+
+    # Equal and higher priorities always get through
+    assert display.show_frame(np.full((32, 64, 3), 5, dtype=np.uint8), priority=5)
+
+    time.sleep(0.15)
+    assert ambient.commit()
+    assert np.all(display.frame == 20)
+
+
+def test_transaction_discarded_on_error():
+    display = Display()
+
+    with pytest.raises(RuntimeError):
+        with display.transaction() as frame:
+            frame[...] = 255
+            raise RuntimeError()
+
+    assert not display.frame.any()
+    assert all(pixel_value == 0 for pixel_value in display.pixel_strip.getPixels())
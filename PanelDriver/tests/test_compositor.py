@@ -0,0 +1,67 @@
+import numpy as np
+
+from pixelpanels import Display
+from pixelpanels.color import Color
+from pixelpanels.compositor import Compositor, Layer, BlendMode
+
+
+def full_composite(compositor):
+    compositor.invalidate()
+    return compositor.composite().copy()
+
+
+def test_normal_blend():
+    compositor = Compositor(8, 4, Color(0, 0, 255))
+
+    sprite = np.zeros((2, 2, 4), dtype=np.uint8)
+    sprite[...] = (255, 0, 0, 255)
+    sprite[1, 1, 3] = 0
+    compositor.add_layer(Layer(sprite, offset=(3, 1)))
+
+    frame = compositor.composite()
+
+    assert tuple(frame[0, 0]) == (0, 0, 255)
+    assert tuple(frame[1, 3]) == (255, 0, 0)
+    assert tuple(frame[2, 4]) == (0, 0, 255)
+
+
+def test_opacity_and_blend_modes():
+    compositor = Compositor(2, 2, Color(100, 100, 100))
+    layer = compositor.add_layer(Layer(np.full((2, 2, 3), 200, dtype=np.uint8), opacity=0.5))
+
+    assert tuple(compositor.composite()[0, 0]) == (150, 150, 150)
+
+    layer.opacity = 1.0
+    layer.blend_mode = BlendMode.ADD
+    assert tuple(compositor.composite()[0, 0]) == (255, 255, 255)
+
+    layer.blend_mode = BlendMode.MULTIPLY
+    assert tuple(compositor.composite()[0, 0]) == (78, 78, 78)
+
+
+def test_moving_sprite_only_recomposites_dirty_rects():
+    compositor = Compositor(64, 32)
+    background = np.random.default_rng(1).integers(0, 255, (32, 64, 3), dtype=np.uint8)
+    compositor.add_layer(Layer(background))
+    sprite = compositor.add_layer(Layer(np.full((8, 8, 4), 255, dtype=np.uint8), opacity=0.75))
+    compositor.composite()
+
+    for x in range(1, 60, 3):
+        sprite.offset = (x, x // 3)
+        frame = compositor.composite().copy()
+
+        dirty_area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in compositor.last_dirty_rects)
+        assert dirty_area <= 2 * 8 * 8
+        assert np.array_equal(frame, full_composite(compositor))
+
+
+def test_composite_to_display():
+    display = Display()
+    compositor = Compositor(display.pixel_width, display.pixel_height, Color(0, 255, 0))
+    compositor.add_layer(Layer(np.full((4, 4, 3), 255, dtype=np.uint8), offset=(60, 28)))
+
+    display.show_frame(compositor.composite())
+
+    image = display.get_display_image()
+    assert image.getpixel((0, 0)) == (0, 255, 0)
+    assert image.getpixel((63, 31)) == (255, 255, 255)
@@ -1,7 +1,14 @@
 import copy
 
-from pixelpanels import Display
-from pixelpanels.color import Color
+import numpy as np
+import pytest
+
+from PIL import Image as ImageLib
+
+from pixelpanels import Display, WipeOrder
+from pixelpanels.assets import PreparedFrame
+from pixelpanels.display import frame_to_led_values
+from pixelpanels.color import Color, ColorArray
 from pixelpanels.panel import PanelOrigin, Panel, PanelPlacement
 
 placements = [PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 16), (15, 31)),
@@ -32,9 +39,6 @@ def mock__draw(self):
     else:
         self.image_history = [self.get_display_image()]
 
-    if self.debug_display:
-        self.show_debug_image(self.debug_display_time)
-
 
 def mock_show(self):
     if hasattr(self, 'led_history'):
@@ -78,6 +82,19 @@ def test_calibration():
             assert (pixel_value == cal_color.to_pixel_value())
 
 
+def test_show_frame():
+    display = Display(placements, color_cal=cal_function)
+
+    frame = np.random.default_rng(0).integers(0, 255, (display.pixel_height, display.pixel_width, 3), dtype=np.uint8)
+    display.show_frame(frame)
+
+    image = display.get_display_image()
+    for x in range(display.pixel_width):
+        for y in range(display.pixel_height):
+            red, green, blue = frame[y, x]
+            assert (image.getpixel((x, y)) == (green, blue, red))
+
+
 def test_horizontal_wipe(mocker):
     color = Color(255, 255, 255)
     wipe_speed = 2
@@ -135,6 +152,78 @@ def test_pixel_wipe(mocker):
                     assert (frame.getpixel((x, y)) == (0, 0, 0))
 
 
+def test_wipe_step(mocker):
+    color = Color(255, 0, 0)
+    wipe_speed = 5
+
+    mocker.patch.object(Display, '_Display__draw', mock__draw)
+    display = Display(placements)
+
+    display.horizontal_wipe(color, 0, step=wipe_speed)
+
+    assert len(display.image_history) == 13
+    for frame_index, frame in enumerate(display.image_history):
+        wipe_end = min((frame_index + 1) * wipe_speed, display.pixel_width)
+        assert frame.getpixel((wipe_end - 1, 0)) == color.to_tuple()
+        if wipe_end < display.pixel_width:
+            assert frame.getpixel((wipe_end, 0)) == (0, 0, 0)
+
+
+def test_wipe_duration_limits_frames(mocker):
+    mocker.patch.object(Display, '_Display__draw', mock__draw)
+    display = Display(placements)
+
+    display.pixel_wipe(Color(255, 255, 255), duration_ms=200)
+
+    # Only the frames the LED data line can carry in the duration are drawn
+    assert len(display.image_history) <= int(0.2 * display.max_frame_rate)
+    assert np.all(np.asarray(display.image_history[-1]) == 255)
+
+
+def test_short_delay_is_capped_at_frame_rate(mocker):
+    mocker.patch.object(Display, '_Display__draw', mock__draw)
+    display = Display([PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 0), (15, 15))])
+
+    # A millisecond per pixel is a 256 ms wipe, drawn at the frame rate instead of once per pixel
+    display.pixel_wipe(Color(255, 255, 255))
+
+    assert len(display.image_history) <= int(0.256 * display.max_frame_rate) + 1
+    assert np.all(np.asarray(display.image_history[-1]) == 255)
+
+
+def test_radial_and_diagonal_wipes(mocker):
+    color = Color(0, 0, 255)
+
+    mocker.patch.object(Display, '_Display__draw', mock__draw)
+    display = Display(placements)
+
+    display.wipe(color, WipeOrder.RADIAL, delay_ms=0)
+    first_frame = display.image_history[0]
+    assert first_frame.getpixel((32, 16)) == color.to_tuple()
+    assert first_frame.getpixel((0, 0)) == (0, 0, 0)
+
+    display.image_history = []
+    display.wipe(Color(0, 0, 0), WipeOrder.DIAGONAL, step=4, delay_ms=0)
+    assert len(display.image_history) == 24
+    assert display.image_history[0].getpixel((3, 0)) == (0, 0, 0)
+    assert display.image_history[0].getpixel((4, 0)) == color.to_tuple()
+
+
+def test_wipe_to_image(mocker):
+    image = ImageLib.new("RGB", (64, 32), (10, 20, 30))
+    image.paste((200, 100, 50), (0, 0, 32, 32))
+
+    mocker.patch.object(Display, '_Display__draw', mock__draw)
+    display = Display(placements)
+
+    display.wipe(image, WipeOrder.VERTICAL, step=8, delay_ms=0)
+
+    assert len(display.image_history) == 4
+    assert display.image_history[0].getpixel((10, 7)) == (200, 100, 50)
+    assert display.image_history[0].getpixel((10, 8)) == (0, 0, 0)
+    assert display.image_history[-1].getpixel((40, 31)) == (10, 20, 30)
+
+
 def test_show_image(mocker):
     image_path = "../data/Test1_64x32.png"
 
@@ -153,3 +242,84 @@ def test_play_gif(mocker):
 
     display.play_gif(image_path)
     # TODO: Add assertions
+
+
+def test_color_array_targets(mocker):
+    mocker.patch.object(Display, '_Display__draw', mock__draw)
+    display = Display(placements, color_cal=cal_function)
+
+    rgb = np.random.default_rng(1).integers(0, 255, (display.pixel_count, 3), dtype=np.uint8)
+    display.show_frame(ColorArray(rgb))
+    assert np.array_equal(display.frame, rgb.reshape(display.pixel_height, display.pixel_width, 3))
+    assert np.array_equal(np.asarray(display.image_history[-1]),
+                          rgb.reshape(display.pixel_height, display.pixel_width, 3)[..., [1, 2, 0]])
+
+    display.set_color(ColorArray([[1, 2, 3]]))
+    assert all(pixel_value == Color(2, 3, 1).to_pixel_value() for pixel_value in display.pixel_strip.getPixels())
+
+    display.horizontal_wipe(ColorArray([4, 5, 6]), 0, step=32)
+    assert len(display.image_history) == 4
+    assert display.image_history[-1].getpixel((63, 31)) == (5, 6, 4)
+
+
+def test_set_image_file(tmp_path, mocker):
+    image_path = str(tmp_path / "small.png")
+    ImageLib.new("RGB", (40, 40), (10, 20, 30)).save(image_path)
+
+    mocker.patch.object(Display, '_Display__draw', mock__draw)
+    display = Display(placements)
+    display.set_color(Color(255, 0, 0))
+
+    display.set_image(image_path)
+
+    # Images are drawn unscaled from the top-left and leave uncovered pixels alone
+    image = display.image_history[-1]
+    assert image.getpixel((39, 31)) == (10, 20, 30)
+    assert image.getpixel((40, 0)) == (255, 0, 0)
+
+
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+@pytest.mark.parametrize("flip_horizontal", [False, True])
+@pytest.mark.parametrize("flip_vertical", [False, True])
+def test_transform(rotation, flip_horizontal, flip_vertical):
+    reference = Display(placements)
+    display = Display(placements)
+    display.set_transform(rotation, flip_horizontal, flip_vertical)
+
+    if rotation in (90, 270):
+        assert (display.pixel_width, display.pixel_height) == (reference.pixel_height, reference.pixel_width)
+
+    frame = np.random.default_rng(rotation).integers(0, 255, (display.pixel_height, display.pixel_width, 3),
+                                                     dtype=np.uint8)
+    display.show_frame(frame)
+
+    # The panels show the content flipped and then rotated clockwise
+    mounted = frame
+    if flip_horizontal:
+        mounted = mounted[:, ::-1]
+    if flip_vertical:
+        mounted = mounted[::-1, :]
+    reference.show_frame(np.rot90(mounted, -rotation // 90))
+
+    assert display.pixel_strip.getPixels() == reference.pixel_strip.getPixels()
+
+
+def test_transform_keeps_prepared_frames_valid():
+    display = Display(placements, color_cal=cal_function)
+    frame = np.random.default_rng(3).integers(0, 255, (display.pixel_height, display.pixel_width, 3),
+                                              dtype=np.uint8)
+
+    prepared = frame.view(PreparedFrame)
+    prepared.led_values = frame_to_led_values(frame, display.led_order, display.color_cal)
+    prepared.led_order = display.led_order
+    prepared.color_cal = display.color_cal
+
+    display.rotation = 180
+    display.show_frame(prepared)
+    prepared_leds = list(display.pixel_strip.getPixels())
+
+    display.show_frame(frame)
+    assert prepared_leds == list(display.pixel_strip.getPixels())
+
+    with pytest.raises(ValueError):
+        display.rotation = 45
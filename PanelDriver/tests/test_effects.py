@@ -0,0 +1,89 @@
+import time
+
+import numpy as np
+import pytest
+
+from pixelpanels import Display
+from pixelpanels.color import Color
+from pixelpanels.effects import Plasma, Rainbow, Gradient, Fire, Noise, make_palette
+
+EFFECTS = {
+    "plasma": lambda width, height, seed: Plasma(width, height, seed),
+    "rainbow": lambda width, height, seed: Rainbow(width, height, seed, angle=30.0),
+    "gradient": lambda width, height, seed: Gradient(width, height, [Color(255, 0, 0), Color(0, 0, 255)], seed,
+                                                     speed=0.5, cyclic=True),
+    "fire": lambda width, height, seed: Fire(width, height, seed),
+    "noise": lambda width, height, seed: Noise(width, height, seed),
+}
+
+# The per-frame budget to hold 60 FPS on one core
+FRAME_BUDGET_S = 1.0 / 60.0
+
+
+@pytest.mark.parametrize("name", EFFECTS)
+def test_effects_are_deterministic(name):
+    first = EFFECTS[name](64, 32, 3)
+    second = EFFECTS[name](64, 32, 3)
+
+    for time_s in (0.0, 0.5, 2.25):
+        assert np.array_equal(first.render(time_s), second.render(time_s))
+
+    # Rendering an earlier time must not depend on what was rendered before
+    assert np.array_equal(first.render(0.5).copy(), second.render(0.5))
+
+
+@pytest.mark.parametrize("name", EFFECTS)
+def test_effects_animate(name):
+    effect = EFFECTS[name](64, 32, 0)
+
+    frames = [frame.copy() for frame in effect.frames(fps=10.0, duration=1.0)]
+
+    assert len(frames) == 10
+    assert frames[0].shape == (32, 64, 3)
+    assert not np.array_equal(frames[0], frames[-1])
+
+
+def test_gradient_endpoints():
+    effect = Gradient(64, 32, [Color(255, 0, 0), Color(0, 0, 255)])
+
+    frame = effect.render(0.0)
+
+    assert tuple(frame[0, 0]) == (255, 0, 0)
+    assert tuple(frame[0, 63]) == (0, 0, 255)
+
+
+def test_make_palette():
+    palette = make_palette([Color(0, 0, 0), Color(255, 255, 255)], 256)
+
+    assert np.array_equal(palette[:, 0], np.arange(256))
+
+
+def test_effect_on_display():
+    display = Display()
+    effect = Plasma(display.pixel_width, display.pixel_height)
+    reference = Plasma(display.pixel_width, display.pixel_height)
+    shows = len(display.pixel_strip.show_times)
+
+    display.play_frames(effect.frames(fps=10.0, duration=1.0), fps=None)
+
+    # Every frame reaches the strip and the display ends on the effect's last frame
+    assert len(display.pixel_strip.show_times) - shows == 10
+    assert np.array_equal(display.frame, reference.render(0.9))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("size", [(64, 32), (256, 128)])
+@pytest.mark.parametrize("name", EFFECTS)
+def test_effect_frame_rate(name, size):
+    effect = EFFECTS[name](size[0], size[1], 0)
+    frame_count = 60
+
+    effect.render(0.0)
+    start_time = time.perf_counter()
+    for frame_index in range(1, frame_count + 1):
+        effect.render(frame_index / 60.0)
+    frame_time = (time.perf_counter() - start_time) / frame_count
+
+    print("{0} {1}x{2}: {3:.3f} ms/frame ({4:.0f} FPS)".format(name, size[0], size[1], frame_time * 1000.0,
+                                                              1.0 / frame_time))
+    assert frame_time < FRAME_BUDGET_S
@@ -0,0 +1,110 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+from PIL import Image as ImageLib
+
+import pixelpanels
+from pixelpanels import Display
+from pixelpanels.playback import PlaybackEngine
+
+# The CPU time a process may use while holding a still image, as a fraction of the wall clock time
+IDLE_CPU_BUDGET = 0.05
+
+IDLE_MEASUREMENT_S = 1.0
+
+
+def wait_for(condition, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_engine_holds_still_items():
+    display = Display()
+    engine = PlaybackEngine(display)
+    still = np.full((display.pixel_height, display.pixel_width, 3), 50, dtype=np.uint8)
+
+    engine.enqueue(lambda: [still], fps=30.0, loop=True)
+    engine.start()
+    try:
+        assert wait_for(lambda: engine.holding)
+        show_count = len(display.pixel_strip.show_times)
+
+        time.sleep(0.2)
+        assert len(display.pixel_strip.show_times) == show_count
+
+        # Queued content wakes the engine
+        engine.enqueue(lambda: [still // 2] * 3, fps=100.0)
+        assert wait_for(lambda: engine.current_item is None and not engine.holding)
+        assert np.all(display.frame == 25)
+    finally:
+        engine.stop(1.0)
+
+
+@pytest.mark.benchmark
+def test_engine_idle_cpu():
+    display = Display()
+    engine = PlaybackEngine(display)
+
+    engine.enqueue(lambda: [np.zeros((display.pixel_height, display.pixel_width, 3), dtype=np.uint8)],
+                   fps=30.0, loop=True)
+    engine.start()
+    try:
+        assert wait_for(lambda: engine.holding)
+
+        start_cpu = time.process_time()
+        time.sleep(IDLE_MEASUREMENT_S)
+        idle_cpu = time.process_time() - start_cpu
+
+        print("idle CPU: {0:.1f} ms over {1:.1f} s".format(idle_cpu * 1000.0, IDLE_MEASUREMENT_S))
+        assert idle_cpu < IDLE_CPU_BUDGET * IDLE_MEASUREMENT_S
+    finally:
+        engine.stop(1.0)
+
+
+def process_cpu_time(pid):
+    """Reads the user and system CPU time of a process from /proc in seconds"""
+    with open("/proc/{0}/stat".format(pid)) as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Reads CPU times from /proc")
+def test_cli_holds_still_image(tmp_path):
+    image_path = str(tmp_path / "still.png")
+    ImageLib.new("RGB", (64, 32), (0, 80, 160)).save(image_path)
+
+    env = dict(os.environ)
+    src_path = os.path.dirname(os.path.dirname(pixelpanels.__file__))
+    env["PYTHONPATH"] = os.pathsep.join([src_path, env.get("PYTHONPATH", "")])
+
+    process = subprocess.Popen([sys.executable, "-m", "pixelpanels", image_path], env=env)
+    try:
+        # Startup is over once the process stops accumulating CPU time
+        previous_cpu = -1.0
+        deadline = time.monotonic() + 10.0
+        while time.monotonic() < deadline:
+            time.sleep(0.25)
+            cpu = process_cpu_time(process.pid)
+            if cpu == previous_cpu:
+                break
+            previous_cpu = cpu
+        assert process.poll() is None
+
+        start_cpu = process_cpu_time(process.pid)
+        time.sleep(IDLE_MEASUREMENT_S)
+        idle_cpu = process_cpu_time(process.pid) - start_cpu
+        assert idle_cpu < IDLE_CPU_BUDGET * IDLE_MEASUREMENT_S
+
+        # The hold ends cleanly on SIGTERM
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(5.0) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
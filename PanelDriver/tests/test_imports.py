@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pixelpanels
+
+# Cold start budget for importing the CLI and the server, measured on the host running the tests
+IMPORT_BUDGET_S = 0.5
+
+# Modules that take seconds to import on a Pi and must only load when a code path needs them
+LAZY_MODULES = ["matplotlib", "grpc", "PIL.ImageFont", "PIL.ImageDraw"]
+
+ENTRY_POINTS = ["pixelpanels.__main__", "pixelpanels.rpcserver"]
+
+
+def import_times(module_name):
+    """Imports a module in a fresh interpreter with -X importtime
+
+    Returns:
+        The captured stdout and a dictionary of module name to cumulative import time in seconds
+    """
+    env = dict(os.environ)
+    src_path = os.path.dirname(os.path.dirname(pixelpanels.__file__))
+    env["PYTHONPATH"] = os.pathsep.join([src_path, env.get("PYTHONPATH", "")])
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import {0}".format(module_name)],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, universal_newlines=True,
+                            check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative_us) / 1e6
+
+    return result.stdout, times
+
+
+@pytest.mark.parametrize("module_name", ENTRY_POINTS)
+def test_heavy_imports_are_lazy(module_name):
+    stdout, times = import_times(module_name)
+
+    assert stdout == ""
+    for name in times:
+        assert not any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES), name
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("module_name", ENTRY_POINTS)
+def test_import_time_benchmark(module_name):
+    # The best of a few runs keeps a busy host from failing the budget
+    import_time = min(import_times(module_name)[1][module_name] for _ in range(3))
+
+    print("{0}: {1:.1f} ms".format(module_name, import_time * 1000.0))
+    assert import_time < IMPORT_BUDGET_S
+
+
+def test_server_display_without_debug(monkeypatch):
+    from pixelpanels import rpcserver, Color
+
+    monkeypatch.setattr(rpcserver, "panel_display", None)
+    display = rpcserver.get_panel_display()
+    display.set_color(Color(10, 20, 30))
+
+    # Frames only become debug images when the server runs with --debug
+    assert rpcserver.image_queue.empty()
+
+
+def test_import_leaves_logging_alone():
+    # Configuring the root logger is up to the application
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.dirname(os.path.dirname(pixelpanels.__file__)),
+                                         env.get("PYTHONPATH", "")])
+    result = subprocess.run([sys.executable, "-c", "import logging, pixelpanels; print(logging.root.handlers)"],
+                            stdout=subprocess.PIPE, env=env, universal_newlines=True, check=True)
+
+    assert result.stdout.strip() == "[]"
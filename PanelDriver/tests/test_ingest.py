@@ -0,0 +1,173 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pytest
+
+import pixelpanels
+from pixelpanels import Display
+from pixelpanels.ingest import FrameProducer, FrameRing, RING_HEADER_SIZE, SLOT_HEADER_SIZE
+
+PRODUCER_SCRIPT = """
+import sys
+import time
+
+from pixelpanels.ingest import FrameProducer
+
+frame_count, fps = int(sys.argv[2]), float(sys.argv[3])
+with FrameProducer(sys.argv[1]) as producer:
+    next_frame_time = time.monotonic()
+    for _ in range(frame_count):
+        sequence = producer.sequence + 1
+        with producer.frame() as frame:
+            frame[..., 0] = sequence & 0xFF
+            frame[..., 1] = sequence >> 8
+            frame[..., 2] = 0x5A
+
+        next_frame_time += 1.0 / fps
+        time.sleep(max(next_frame_time - time.monotonic(), 0.0))
+"""
+
+
+def ring_name():
+    return "pixelpanels-test-" + uuid.uuid4().hex[:8]
+
+
+def subprocess_env():
+    env = dict(os.environ)
+    src_path = os.path.dirname(os.path.dirname(pixelpanels.__file__))
+    env["PYTHONPATH"] = os.pathsep.join([src_path, env.get("PYTHONPATH", "")])
+    return env
+
+
+class SequenceSink(object):
+    """Decodes the sequence number the producer script draws into every frame"""
+    def __init__(self):
+        self.sequences = []
+        self.torn = 0
+
+    def write(self, led_values, timestamp):
+        if not np.all(led_values == led_values[0]):
+            self.torn += 1
+        value = int(led_values[0])
+        self.sequences.append((value >> 16) | (((value >> 8) & 0xFF) << 8))
+
+
+def test_ring_round_trip():
+    with FrameRing(64, 32, slot_count=3) as ring, FrameProducer(ring.name) as producer:
+        assert (producer.width, producer.height, producer.slot_count) == (64, 32, 3)
+        assert ring.latest() is None
+
+        frames = [np.random.default_rng(seed).integers(0, 256, (32, 64, 3), dtype=np.uint8) for seed in range(5)]
+        producer.write(frames[0])
+        assert np.array_equal(ring.latest(), frames[0])
+        assert ring.latest() is None
+
+        # Frames drawn in place are published when the block exits
+        with producer.frame() as frame:
+            frame[...] = frames[1]
+            assert ring.latest() is None
+        assert np.array_equal(ring.latest(), frames[1])
+
+        # The newest frame wins when the driver falls behind
+        for frame in frames[2:]:
+            producer.write(frame)
+        assert np.array_equal(ring.latest(), frames[4])
+        assert (ring.sequence, ring.frames_received, ring.frames_skipped) == (5, 3, 2)
+
+
+def test_overwritten_slot_is_not_shown():
+    with FrameRing(16, 16, slot_count=2) as ring, FrameProducer(ring.name) as producer:
+        producer.write(np.full((16, 16, 3), 10, dtype=np.uint8))
+
+        # The producer lapping the ring restamps the start of the slot while the driver copies it
+        block = SharedMemory(name=ring.name)
+        try:
+            slot_size = (block.size - RING_HEADER_SIZE) // 2
+            start = np.ndarray((1,), dtype="<u8", buffer=block.buf, offset=RING_HEADER_SIZE + slot_size)
+            start[0] = 3
+            assert ring.latest() is None
+            assert ring.frames_torn == 1
+
+            start[0] = 1
+            assert ring.latest() is not None
+            del start
+        finally:
+            block.close()
+
+    with pytest.raises(ValueError):
+        FrameRing(16, 16, slot_count=1)
+
+
+def test_frame_behind_its_stamps_is_not_shown():
+    with FrameRing(16, 16, slot_count=2) as ring, FrameProducer(ring.name) as producer:
+        producer.write(np.full((16, 16, 3), 10, dtype=np.uint8))
+
+        # On a weakly ordered CPU the stamps can be seen before the bytes of the frame
+        block = SharedMemory(name=ring.name)
+        try:
+            slot_size = (block.size - RING_HEADER_SIZE) // 2
+            block.buf[RING_HEADER_SIZE + slot_size + SLOT_HEADER_SIZE] = 11
+            assert ring.latest() is None
+            assert ring.frames_torn == 1
+
+            block.buf[RING_HEADER_SIZE + slot_size + SLOT_HEADER_SIZE] = 10
+            assert ring.latest()[0, 0].tolist() == [10, 10, 10]
+        finally:
+            block.close()
+
+
+def test_producer_process_at_120_fps():
+    display = Display()
+    sink = SequenceSink()
+    display.add_sink(sink)
+    frame_count = 180
+
+    with FrameRing(display.pixel_width, display.pixel_height, name=ring_name()) as ring:
+        stop = threading.Event()
+        consumer = threading.Thread(target=ring.serve, args=(display, stop, 120.0))
+        consumer.start()
+
+        try:
+            subprocess.run([sys.executable, "-c", PRODUCER_SCRIPT, ring.name, str(frame_count), "120"],
+                           env=subprocess_env(), check=True, timeout=30)
+            time.sleep(0.05)
+        finally:
+            stop.set()
+            consumer.join()
+
+    # Every frame shown is whole and in order, and the driver keeps up with most of them
+    assert sink.torn == 0
+    assert sink.sequences == sorted(set(sink.sequences))
+    assert sink.sequences[-1] == frame_count
+    assert len(sink.sequences) >= frame_count * 0.75
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="Stops the CLI with SIGTERM")
+def test_cli_ingest():
+    name = ring_name()
+    process = subprocess.Popen([sys.executable, "-m", "pixelpanels", "ingest", "--name", name],
+                               env=subprocess_env(), stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        assert process.stdout.readline().startswith("Ingesting 64x32 frames from {0}".format(name))
+
+        with FrameProducer(name) as producer:
+            for i in range(20):
+                with producer.frame() as frame:
+                    frame[...] = i
+                time.sleep(1.0 / 60.0)
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(5.0) == 0
+        shown = int(process.stdout.readline().split()[0])
+        assert 0 < shown <= 20
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
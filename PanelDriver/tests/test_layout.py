@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pytest
+
+from pixelpanels import Display, LedLayout, Panel, PanelPlacement, SamplingMode
+from pixelpanels.panel import PanelOrigin
+
+
+def random_frame(display, seed=0):
+    return np.random.default_rng(seed).integers(0, 255, (display.pixel_height, display.pixel_width, 3),
+                                                dtype=np.uint8)
+
+
+@pytest.mark.parametrize("rotation, flip_horizontal", [(0, False), (90, True), (270, False)])
+def test_grid_layout_matches_placements(rotation, flip_horizontal):
+    reference = Display()
+    coordinates = np.stack([reference.led_order % reference.pixel_width,
+                            reference.led_order // reference.pixel_width], axis=1)
+
+    display = Display(layout=LedLayout(coordinates))
+    reference.set_transform(rotation, flip_horizontal)
+    display.set_transform(rotation, flip_horizontal)
+    assert (display.pixel_width, display.pixel_height) == (reference.pixel_width, reference.pixel_height)
+
+    frame = random_frame(display)
+    display.show_frame(frame)
+    reference.show_frame(frame)
+    assert display.pixel_strip.getPixels() == reference.pixel_strip.getPixels()
+
+
+def test_bilinear_sampling():
+    coordinates = [(0.0, 0.0), (2.5, 0.0), (1.25, 1.0), (3.0, 1.5)]
+    display = Display(layout=LedLayout(coordinates, 4, 3, SamplingMode.BILINEAR))
+
+    frame = np.zeros((3, 4, 3), dtype=np.uint8)
+    frame[..., 0] = np.array([0, 40, 80, 120], dtype=np.uint8)[np.newaxis, :]
+    frame[..., 1] = np.array([0, 100, 200], dtype=np.uint8)[:, np.newaxis]
+    display.show_frame(frame)
+
+    assert np.all(display.led_weights.sum(axis=1) == 256)
+    leds = [((value >> 16) & 0xFF, (value >> 8) & 0xFF) for value in display.pixel_strip.getPixels()]
+    assert leds == [(0, 0), (100, 0), (50, 100), (120, 150)]
+
+    # The debug image shows each LED at its nearest pixel
+    image = display.get_display_image()
+    assert image.getpixel((2, 0)) == (100, 0, 0)
+    assert image.getpixel((1, 1)) == (50, 100, 0)
+    assert image.getpixel((0, 2)) == (0, 0, 0)
+
+
+def test_load_csv_and_json(tmp_path):
+    csv_path = tmp_path / "ring.csv"
+    csv_path.write_text("# a ring of four\nindex,y,x\n2,4.0,2.0\n0,0.0,2.0\n1,2.0,4.0\n3,2.0,0.0\n")
+    csv_layout = LedLayout.from_csv(str(csv_path))
+    assert csv_layout.coordinates.tolist() == [[2.0, 0.0], [4.0, 2.0], [2.0, 4.0], [0.0, 2.0]]
+    assert (csv_layout.pixel_width, csv_layout.pixel_height) == (5, 5)
+
+    plain_path = tmp_path / "plain.csv"
+    plain_path.write_text("2,0\n4,2\n2,4\n0,2\n")
+    assert LedLayout.from_csv(str(plain_path)).coordinates.tolist() == csv_layout.coordinates.tolist()
+
+    json_path = tmp_path / "ring.json"
+    json_path.write_text(json.dumps({"width": 8, "height": 6,
+                                     "leds": [{"x": 2, "y": 0}, {"x": 4, "y": 2}, {"x": 2, "y": 4}, [0, 2]]}))
+    json_layout = LedLayout.from_json(str(json_path), sampling=SamplingMode.BILINEAR)
+    assert json_layout.coordinates.tolist() == csv_layout.coordinates.tolist()
+    assert (json_layout.pixel_width, json_layout.pixel_height) == (8, 6)
+    assert json_layout.led_order.shape == (4, 4)
+
+    bad_path = tmp_path / "bad.csv"
+    bad_path.write_text("index,x,y\n0,1,1\n0,2,2\n")
+    with pytest.raises(ValueError):
+        LedLayout.from_csv(str(bad_path))
+
+
+def test_gapped_placements():
+    # Two panels with a panel-sized gap between them
+    placements = [PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 0), (15, 15)),
+                  PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (32, 0), (47, 15))]
+    display = Display(placements)
+
+    assert (display.pixel_width, display.pixel_height, display.pixel_count) == (48, 16, 512)
+
+    frame = random_frame(display, 1)
+    display.show_frame(frame)
+
+    image = np.asarray(display.get_display_image())
+    assert np.array_equal(image[:, :16], frame[:, :16])
+    assert np.array_equal(image[:, 32:], frame[:, 32:])
+    assert not image[:, 16:32].any()
@@ -0,0 +1,160 @@
+import socket
+import struct
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from pixelpanels import ColorOrder, Display
+from pixelpanels import network
+from pixelpanels.network import DdpSink, Destination, E131Sink
+from pixelpanels.strip import pack_led_values
+
+
+def random_led_values(count, seed=0):
+    return np.random.default_rng(seed).integers(0, 1 << 24, count, dtype=np.uint32)
+
+
+@pytest.fixture
+def receiver():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(2.0)
+    yield receiver
+    receiver.close()
+
+
+def receive(receiver, count):
+    return [receiver.recv(2048) for _ in range(count)]
+
+
+@pytest.fixture(params=["sendmmsg", "sendto"])
+def send_mode(request, monkeypatch):
+    if request.param == "sendto":
+        monkeypatch.setattr(network, "_sendmmsg", None)
+    elif network._sendmmsg is None:
+        pytest.skip("sendmmsg is not available")
+    return request.param
+
+
+def test_ddp_packets(receiver, send_mode):
+    led_values = random_led_values(1000)
+    with DdpSink(1000, [Destination("127.0.0.1", receiver.getsockname()[1])]) as sink:
+        sink.write(led_values, 0.0)
+        packets = receive(receiver, 3)
+
+        data = bytearray(3000)
+        for i, packet in enumerate(packets):
+            flags, sequence, data_type, destination, offset, length = struct.unpack("!BBBBIH", packet[:10])
+            assert flags == (0x41 if i == 2 else 0x40)
+            assert (sequence, data_type, destination) == (1, 0x0B, 1)
+            assert length == len(packet) - 10 and length % 3 == 0 and length <= 1440
+            data[offset:offset + length] = packet[10:]
+        assert bytes(data) == pack_led_values(led_values, ColorOrder.RGB).tobytes()
+
+        sink.write(led_values, 0.0)
+        assert all(packet[1] == 2 for packet in receive(receiver, 3))
+        assert (sink.packets_sent, sink.packets_dropped) == (6, 0)
+
+
+def test_e131_universes(send_mode):
+    receivers = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(2)]
+    try:
+        for r in receivers:
+            r.bind(("127.0.0.1", 0))
+            r.settimeout(2.0)
+
+        led_values = random_led_values(600)
+        destinations = [Destination("127.0.0.1", receivers[0].getsockname()[1], led_count=400, universe=5),
+                        Destination("127.0.0.1", receivers[1].getsockname()[1], first_led=400, universe=1)]
+        with E131Sink(600, destinations, color_order=ColorOrder.GRB, source_name="test") as sink:
+            sink.write(led_values)
+
+            # 400 LEDs take three universes of at most 170 LEDs, the remaining 200 take two
+            for r, first_universe, led_counts, first_led in [(receivers[0], 5, [170, 170, 60], 0),
+                                                             (receivers[1], 1, [170, 30], 400)]:
+                for i, led_count in enumerate(led_counts):
+                    packet = r.recv(1024)
+                    assert len(packet) == 126 + led_count * 3
+                    assert packet[4:13] == b"ASC-E1.17"
+                    assert packet[16:38] == packet[16:18] + b"\x00\x00\x00\x04" + sink.cid
+                    assert struct.unpack("!H", packet[16:18])[0] == 0x7000 | (len(packet) - 16)
+                    assert packet[44:48] == b"test"
+                    assert packet[108] == 100 and packet[111] == 1
+                    assert struct.unpack("!H", packet[113:115])[0] == first_universe + i
+                    assert struct.unpack("!H", packet[123:125])[0] == led_count * 3 + 1
+                    assert packet[125] == 0
+
+                    start = first_led + 170 * i
+                    expected = pack_led_values(led_values[start:start + led_count], ColorOrder.GRB)
+                    assert packet[126:] == expected.tobytes()
+    finally:
+        for r in receivers:
+            r.close()
+
+
+def test_display_sink(receiver):
+    display = Display(color_order=ColorOrder.GRBW)
+    with DdpSink(display.pixel_count, [Destination("127.0.0.1", receiver.getsockname()[1])]) as sink:
+        display.add_sink(sink)
+        display.show_frame(np.full((display.pixel_height, display.pixel_width, 3), (200, 120, 60), dtype=np.uint8))
+
+        # The remote controller gets the frame as RGB regardless of the local strip
+        data = b"".join(packet[10:] for packet in receive(receiver, 5))
+        assert data == bytes([200, 120, 60]) * display.pixel_count
+
+
+def test_destination_outside_of_sink():
+    with pytest.raises(ValueError):
+        DdpSink(100, [Destination("127.0.0.1", first_led=50, led_count=60)])
+
+
+def test_unreachable_destination_is_counted(send_mode):
+    # Sending to a broadcast address without SO_BROADCAST fails for every packet
+    with DdpSink(1000, [Destination("255.255.255.255", 4048)]) as sink:
+        sink.write(random_led_values(1000))
+        assert (sink.packets_sent, sink.packets_dropped) == (0, 3)
+
+
+def test_writes_reuse_buffers(receiver, send_mode):
+    led_count = 20000
+    frames = [random_led_values(led_count, seed) for seed in range(4)]
+
+    for sink_class in [DdpSink, E131Sink]:
+        with sink_class(led_count, [Destination("127.0.0.1", receiver.getsockname()[1])]) as sink:
+            sink.write(frames[0])
+
+            # Writing a frame only touches preallocated buffers
+            tracemalloc.start()
+            try:
+                for frame in frames:
+                    sink.write(frame)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        assert peak < 4096
+
+
+@pytest.mark.benchmark
+def test_network_sink_benchmark(receiver, send_mode):
+    led_count = 20000
+    frames = [random_led_values(led_count, seed) for seed in range(4)]
+    port = receiver.getsockname()[1]
+
+    for sink_class in [DdpSink, E131Sink]:
+        with sink_class(led_count, [Destination("127.0.0.1", port)]) as sink:
+            sink.write(frames[0])
+
+            frame_count = 120
+            start_time = time.perf_counter()
+            for i in range(frame_count):
+                sink.write(frames[i % len(frames)])
+            frame_time = (time.perf_counter() - start_time) / frame_count
+
+        packet_count = sink.packets_sent // (frame_count + 1)
+        print("{0} {1}: {2} packets, {3:.3f} ms/frame".format(sink_class.__name__, send_mode, packet_count,
+                                                              frame_time * 1000.0))
+        assert frame_time < 1.0 / 60.0
@@ -0,0 +1,104 @@
+import time
+
+import numpy as np
+import pytest
+from PIL import Image as ImageLib
+
+from pixelpanels import Color, Display
+from pixelpanels.display import PreparedFrame, frame_to_led_values
+
+
+def write_palette_gif(path, frame_count, size=(96, 48), seed=0):
+    """Writes a GIF whose frames all use one global palette
+
+    Returns:
+        The (256, 3) palette and the index plane of every frame
+    """
+    rng = np.random.default_rng(seed)
+    palette = rng.integers(0, 255, (256, 3), dtype=np.uint8)
+    planes = [rng.integers(0, 256, (size[1], size[0]), dtype=np.uint8) for _ in range(frame_count)]
+
+    frames = []
+    for plane in planes:
+        frame = ImageLib.fromarray(plane, 'P')
+        frame.putpalette(palette.ravel().tolist())
+        frames.append(frame)
+    # Saving with a palette writes it once as the global palette instead of once per frame
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=50, loop=0, optimize=False,
+                   palette=palette.tobytes())
+
+    return palette, planes
+
+
+def test_palette_frames_match_rgb_path(tmp_path):
+    gif_path = str(tmp_path / "palette.gif")
+    palette, planes = write_palette_gif(gif_path, 4)
+
+    calls = []
+
+    def dim(color):
+        calls.append(color)
+        return Color(color.red // 2, color.green // 4, color.blue)
+
+    display = Display(color_cal=dim)
+    frames = list(display.gif_frames(gif_path))
+    assert len(frames) == 4
+
+    for frame, plane in zip(frames, planes):
+        assert isinstance(frame, PreparedFrame)
+
+        # Nearest neighbour sampling of the index plane matches PIL
+        resized = np.asarray(ImageLib.fromarray(plane, 'L').resize((64, 32), ImageLib.NEAREST))
+        assert np.array_equal(frame, palette[resized])
+
+        expected = frame_to_led_values(np.array(frame), display.led_order, dim)
+        assert np.array_equal(frame.led_values, expected)
+
+    # The palette is calibrated once for the whole GIF
+    calls.clear()
+    list(display.gif_frames(gif_path))
+    assert len(calls) == 256
+
+
+def test_frames_with_local_palettes(tmp_path):
+    gif_path = str(tmp_path / "local.gif")
+    frames = [ImageLib.new("RGB", (64, 32), (i * 60, 255 - i * 60, 30)) for i in range(3)]
+    frames[0].save(gif_path, save_all=True, append_images=frames[1:], duration=50, loop=0)
+
+    display = Display()
+    for frame, expected in zip(display.gif_frames(gif_path), frames):
+        assert np.array_equal(frame, np.asarray(expected))
+
+
+@pytest.mark.benchmark
+def test_palette_path_benchmark(tmp_path):
+    gif_path = str(tmp_path / "benchmark.gif")
+    write_palette_gif(gif_path, 30, size=(64, 32))
+    display = Display(color_cal=lambda color: Color(color.red // 2, color.green, color.blue))
+
+    def rgb_frames():
+        with ImageLib.open(gif_path) as image:
+            for i in range(image.n_frames):
+                image.seek(i)
+                frame = np.asarray(image.convert('RGB').resize((64, 32), ImageLib.LANCZOS), dtype=np.uint8)
+                yield frame, frame_to_led_values(frame, display.led_order, display.color_cal)
+
+    def palette_frames():
+        for frame in display.gif_frames(gif_path):
+            yield frame, frame.led_values
+
+    def best_time(frames):
+        best = None
+        for _ in range(3):
+            start_time = time.perf_counter()
+            for _ in frames():
+                pass
+            elapsed = time.perf_counter() - start_time
+            best = elapsed if best is None else min(best, elapsed)
+        return best / 30
+
+    rgb_time = best_time(rgb_frames)
+    palette_time = best_time(palette_frames)
+
+    print("RGB: {0:.3f} ms/frame, palette: {1:.3f} ms/frame".format(rgb_time * 1000.0, palette_time * 1000.0))
+    assert palette_time * 2.0 < rgb_time
@@ -0,0 +1,160 @@
+import io
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image as ImageLib
+
+from pixelpanels import Display
+from pixelpanels import rpcserver
+from pixelpanels.preview import FrameEncoder, PreviewFormat, encode_frame, upscale
+from pixelpanels.rpc_library import panelrpc_pb2
+
+
+def few_color_frame(height=32, width=64):
+    colors = np.array([(255, 0, 0), (0, 255, 0), (10, 20, 30), (0, 0, 0)], dtype=np.uint8)
+    return colors[np.random.default_rng(0).integers(0, len(colors), (height, width))]
+
+
+def random_frame(height=32, width=64, seed=1):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def test_committed_frame():
+    display = Display()
+    number, frame = display.committed_frame
+    assert not frame.flags.writeable and not frame.any()
+
+    display.show_frame(random_frame())
+    next_number, next_frame = display.committed_frame
+    assert next_number == number + 1
+    assert np.array_equal(next_frame, display.frame)
+    # The frame read before the commit still shows the old frame
+    assert not frame.any()
+
+    display.rotation = 90
+    assert display.committed_frame[0] == number + 2
+    assert display.committed_frame[1].shape == (64, 32, 3)
+
+
+def test_encodings():
+    for frame in [few_color_frame(), random_frame()]:
+        scaled = upscale(frame, 3)
+        assert scaled.shape == (96, 192, 3) and np.array_equal(scaled[::3, ::3], frame)
+
+        raw = encode_frame(frame, PreviewFormat.RAW_RGB, 3)
+        assert (raw.width, raw.height, raw.palette) == (192, 96, b"")
+        assert raw.data == scaled.tobytes()
+
+        packed = encode_frame(frame, PreviewFormat.PALETTE, 3)
+        indices = np.frombuffer(packed.data, dtype=np.uint8).reshape(96, 192)
+        palette = np.frombuffer(packed.palette, dtype=np.uint8).reshape(-1, 3)
+        assert len(palette) <= 256
+        unpacked = palette[indices]
+
+        png = encode_frame(frame, PreviewFormat.PNG, 3)
+        with ImageLib.open(io.BytesIO(png.data)) as image:
+            assert image.size == (192, 96)
+            assert np.array_equal(np.asarray(image.convert("RGB")), scaled)
+            few_colors = image.mode == "P"
+
+        if few_colors:
+            assert np.array_equal(unpacked, scaled)
+            assert len(png.data) < len(raw.data) // 20
+        else:
+            # Frames with too many colors are quantized
+            assert np.abs(unpacked.astype(int) - scaled).mean() < 16
+
+    with pytest.raises(ValueError):
+        encode_frame(few_color_frame(), scale=17)
+
+
+def test_encoder_reuses_encodings():
+    display = Display()
+    encoder = FrameEncoder(display)
+    display.show_frame(few_color_frame())
+
+    first = encoder.encode(PreviewFormat.PNG, 2)
+    assert encoder.encode(PreviewFormat.PNG, 2) is first
+    assert encoder.encode(PreviewFormat.PALETTE, 2) is not first
+    assert encoder.encode_count == 2
+
+    display.show_frame(random_frame())
+    assert encoder.encode(PreviewFormat.PNG, 2).number == first.number + 1
+    assert encoder.encode_count == 3
+
+
+class AbortingContext(object):
+    def __init__(self):
+        self.callbacks = []
+
+    def abort(self, code, details):
+        raise RuntimeError(details)
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def cancel(self):
+        for callback in self.callbacks:
+            callback()
+
+
+@pytest.fixture
+def served_display(monkeypatch):
+    display = Display()
+    monkeypatch.setattr(rpcserver, "panel_display", display)
+    monkeypatch.setattr(rpcserver, "frame_encoder", None)
+    return display
+
+
+def test_get_frame_request(served_display):
+    controller = rpcserver.PanelController()
+    frame = random_frame()
+    served_display.show_frame(frame)
+
+    preview = controller.GetFrame(panelrpc_pb2.GetFrameRequest(format=panelrpc_pb2.RAW_RGB), AbortingContext())
+    assert (preview.width, preview.height, preview.format) == (64, 32, panelrpc_pb2.RAW_RGB)
+    assert preview.data == frame.tobytes()
+
+    with pytest.raises(RuntimeError):
+        controller.GetFrame(panelrpc_pb2.GetFrameRequest(scale=100), AbortingContext())
+
+    # Previews are served while a frame is being shown without waiting for it
+    release = threading.Event()
+    drawing = threading.Event()
+
+    def slow_callback(image):
+        drawing.set()
+        release.wait(5.0)
+
+    blocked = Display(draw_callback=slow_callback)
+    rpcserver.panel_display = blocked
+    rpcserver.frame_encoder = None
+    writer = threading.Thread(target=blocked.show_frame, args=(frame,))
+    writer.start()
+    try:
+        assert drawing.wait(5.0)
+        preview = controller.GetFrame(panelrpc_pb2.GetFrameRequest(format=panelrpc_pb2.PNG, scale=2),
+                                      AbortingContext())
+        assert (preview.number, preview.width) == (blocked.committed_frame[0], 128)
+    finally:
+        release.set()
+        writer.join()
+
+
+def test_watch_frames_request(served_display):
+    controller = rpcserver.PanelController()
+    context = AbortingContext()
+    stream = controller.WatchFrames(panelrpc_pb2.WatchFramesRequest(format=panelrpc_pb2.PALETTE, max_fps=1000.0),
+                                    context)
+
+    first = next(stream)
+    assert first.format == panelrpc_pb2.PALETTE and len(first.palette) == 3
+
+    served_display.show_frame(few_color_frame())
+    second = next(stream)
+    assert second.number == first.number + 1
+    assert len(second.palette) == 12
+
+    context.cancel()
+    assert list(stream) == []
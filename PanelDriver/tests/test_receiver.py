@@ -0,0 +1,155 @@
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+import pixelpanels
+from pixelpanels import Display
+from pixelpanels.network import DdpSink, Destination, E131Sink
+from pixelpanels.receiver import FrameReceiver, InputMapping, Protocol
+
+
+def random_led_values(count, seed=0):
+    return np.random.default_rng(seed).integers(0, 1 << 24, count, dtype=np.uint32)
+
+
+def receive_frames(receiver, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while receiver.frames_shown < count:
+        assert time.monotonic() < deadline, "Only {0} frames were shown".format(receiver.frames_shown)
+        receiver.receive(0.1)
+
+
+def artnet_packet(universe, data, sequence=1):
+    return b"Art-Net\x00" + struct.pack("<H", 0x5000) + struct.pack("!H", 14) + \
+        struct.pack("<BBH", sequence, 0, universe) + struct.pack("!H", len(data)) + bytes(data)
+
+
+def test_e131_led_order():
+    display = Display()
+    with FrameReceiver(display, Protocol.E131, port=0, host="127.0.0.1") as receiver:
+        led_values = random_led_values(display.pixel_count)
+        with E131Sink(display.pixel_count, [Destination("127.0.0.1", receiver.address[1])]) as sink:
+            sink.write(led_values)
+            receive_frames(receiver, 1)
+
+        assert np.array_equal(display.pixel_strip.read(), led_values)
+        assert receiver.packets_received == receiver.universe_count == 13
+        assert receiver.frames_dropped == 0
+        assert 0.0 < receiver.last_latency < 1.0 and receiver.mean_latency == receiver.last_latency
+
+
+def test_ddp_frame_mapping():
+    display = Display(color_cal=lambda color: color)
+    display.rotation = 180
+    with FrameReceiver(display, Protocol.DDP, port=0, host="127.0.0.1", mapping=InputMapping.FRAME) as receiver:
+        frame = np.random.default_rng(1).integers(0, 256, (display.pixel_height, display.pixel_width, 3),
+                                                  dtype=np.uint8)
+
+        # A frame in row order is sent like a strip of width * height LEDs
+        led_values = (frame[..., 0].astype(np.uint32) << 16) | (frame[..., 1].astype(np.uint32) << 8) | frame[..., 2]
+        with DdpSink(led_values.size, [Destination("127.0.0.1", receiver.address[1])]) as sink:
+            sink.write(led_values.ravel())
+            receive_frames(receiver, 1)
+
+        assert np.array_equal(display.frame, frame)
+        reference = Display(color_cal=display.color_cal)
+        reference.rotation = 180
+        reference.show_frame(frame)
+        assert np.array_equal(display.pixel_strip.read(), reference.pixel_strip.read())
+
+
+def test_artnet_universes():
+    display = Display()
+    with FrameReceiver(display, Protocol.ARTNET, port=0, host="127.0.0.1", color_order=pixelpanels.ColorOrder.GRB) \
+            as receiver:
+        assert receiver.first_universe == 0
+
+        led_values = random_led_values(display.pixel_count, seed=2)
+        channels = np.stack([(led_values >> 8) & 0xFF, (led_values >> 16) & 0xFF, led_values & 0xFF], axis=-1)
+        channels = channels.astype(np.uint8).ravel()
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for universe in range(receiver.universe_count):
+                sender.sendto(artnet_packet(universe, channels[universe * 510:(universe + 1) * 510]), receiver.address)
+            receive_frames(receiver, 1)
+        finally:
+            sender.close()
+
+        assert np.array_equal(display.pixel_strip.read(), led_values)
+
+
+def test_incomplete_frames_are_dropped():
+    display = Display()
+    with FrameReceiver(display, Protocol.E131, port=0, host="127.0.0.1") as receiver:
+        port = receiver.address[1]
+        first = random_led_values(display.pixel_count, seed=3)
+        second = random_led_values(display.pixel_count, seed=4)
+
+        # The first frame is missing its last universe when the second frame starts
+        with E131Sink(display.pixel_count, [Destination("127.0.0.1", port, led_count=170 * 12)]) as partial, \
+                E131Sink(display.pixel_count, [Destination("127.0.0.1", port)]) as sink:
+            partial.write(first)
+            sink.write(second)
+            receive_frames(receiver, 1)
+
+        assert receiver.frames_dropped == 1
+        assert np.array_equal(display.pixel_strip.read(), second)
+
+    with FrameReceiver(display, Protocol.DDP, port=0, host="127.0.0.1") as receiver:
+        # DDP pushes a frame with its last packet, so a frame with gaps is dropped at the push
+        with DdpSink(display.pixel_count, [Destination("127.0.0.1", receiver.address[1], first_led=480)]) as sink:
+            sink.write(first)
+            for _ in range(4):
+                assert not receiver.receive(2.0)
+
+        assert (receiver.frames_shown, receiver.frames_dropped) == (0, 1)
+
+    # Packets of other protocols or universes are ignored
+    with FrameReceiver(display, Protocol.E131, port=0, host="127.0.0.1") as receiver:
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sender.sendto(artnet_packet(1, bytes(510)), receiver.address)
+            assert not receiver.receive(2.0)
+        finally:
+            sender.close()
+        assert receiver.packets_ignored == 1
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="Stops the CLI with SIGTERM")
+def test_cli_receive():
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    env = dict(os.environ)
+    src_path = os.path.dirname(os.path.dirname(pixelpanels.__file__))
+    env["PYTHONPATH"] = os.pathsep.join([src_path, env.get("PYTHONPATH", "")])
+
+    process = subprocess.Popen([sys.executable, "-m", "pixelpanels", "receive", "--protocol", "ddp", "--port",
+                                str(port), "--host", "127.0.0.1", "--stats", "0.2"],
+                               env=env, stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        assert process.stdout.readline().startswith("Receiving DDP on 127.0.0.1:{0}".format(port))
+
+        with DdpSink(2048, [Destination("127.0.0.1", port)]) as sink:
+            line = ""
+            while " fps" not in line or line.startswith("0.0 fps"):
+                sink.write(random_led_values(2048))
+                line = process.stdout.readline()
+        assert "latency" in line
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(5.0) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
@@ -0,0 +1,170 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from pixelpanels import Color, Display, LedRecorder, LedRecording, Panel, PanelPlacement
+
+
+class ListSink(object):
+    def __init__(self):
+        self.frames = []
+
+    def write(self, led_values, timestamp):
+        self.frames.append(led_values.copy())
+
+
+def random_frames(display, count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (display.pixel_height, display.pixel_width, 3), dtype=np.uint8)
+            for _ in range(count)]
+
+
+def record(path, display, frames, fps=None, chunk_frames=4):
+    with LedRecorder(path, chunk_frames=chunk_frames) as recorder:
+        display.add_sink(recorder)
+        display.play_frames(frames, fps=fps)
+        display.remove_sink(recorder)
+    return recorder
+
+
+def test_record_session(tmp_path):
+    path = str(tmp_path / "session.npz")
+    display = Display(color_cal=lambda color: Color(color.red // 2, color.green, 0))
+    frames = random_frames(display, 10)
+
+    sink = ListSink()
+    display.add_sink(sink)
+    recorder = record(path, display, frames)
+    assert recorder.frame_count == 10
+
+    # Frames are stored in chunks that numpy can open directly
+    with np.load(path) as archive:
+        assert sorted(archive.files) == ["leds_000000", "leds_000001", "leds_000002",
+                                         "times_000000", "times_000001", "times_000002"]
+        leds = np.concatenate([archive["leds_00000{0}".format(i)] for i in range(3)])
+        times = np.concatenate([archive["times_00000{0}".format(i)] for i in range(3)])
+    assert np.array_equal(leds, np.array(sink.frames))
+    assert np.all(np.diff(times) >= 0)
+
+    recording = LedRecording(path)
+    assert recording.frame_count == 10
+    assert recording.led_count == display.pixel_count
+
+    # A removed sink is no longer written to
+    display.set_color(Color(1, 2, 3))
+    assert recorder.frame_count == 10
+    with pytest.raises(ValueError):
+        recorder.write(leds[0], 0.0)
+
+
+def test_chunks_are_written_off_the_render_thread(tmp_path, monkeypatch):
+    write_array = np.lib.format.write_array
+    writer_threads = set()
+
+    def slow_write_array(*args, **kwargs):
+        writer_threads.add(threading.current_thread())
+        time.sleep(0.2)
+        write_array(*args, **kwargs)
+
+    monkeypatch.setattr(np.lib.format, "write_array", slow_write_array)
+    display = Display()
+    frames = random_frames(display, 8)
+
+    with LedRecorder(str(tmp_path / "session.npz"), chunk_frames=2) as recorder:
+        display.add_sink(recorder)
+        start_time = time.monotonic()
+        display.play_frames(frames, fps=None)
+        assert time.monotonic() - start_time < 0.2
+        display.remove_sink(recorder)
+
+    assert threading.current_thread() not in writer_threads
+    assert LedRecording(str(tmp_path / "session.npz")).frame_count == 8
+
+
+def test_memory_is_bounded_when_the_writer_falls_behind(tmp_path, monkeypatch):
+    write_array = np.lib.format.write_array
+    disk_ready = threading.Event()
+
+    def stalled_write_array(*args, **kwargs):
+        disk_ready.wait()
+        write_array(*args, **kwargs)
+
+    monkeypatch.setattr(np.lib.format, "write_array", stalled_write_array)
+    leds = np.zeros(16, dtype=np.uint32)
+
+    with LedRecorder(str(tmp_path / "session.npz"), chunk_frames=1, max_chunks=2) as recorder:
+        writer = threading.Thread(target=lambda: [recorder.write(leds, float(i)) for i in range(3)])
+        writer.start()
+
+        # The third frame needs a buffer the stalled writer thread still holds
+        writer.join(0.2)
+        assert writer.is_alive()
+        assert recorder.frame_count == 2
+
+        disk_ready.set()
+        writer.join(5.0)
+        assert recorder.frame_count == 3
+
+    assert LedRecording(str(tmp_path / "session.npz")).frame_count == 3
+
+
+def test_replay_as_fast_as_possible(tmp_path):
+    path = str(tmp_path / "session.npz")
+    display = Display(color_cal=lambda color: Color(color.red, color.green // 2, color.blue))
+    record(path, display, random_frames(display, 6))
+
+    replayed = []
+    target = Display(draw_callback=lambda image: replayed.append(target.pixel_strip.read().copy()))
+    LedRecording(path).replay(target, speed=None)
+
+    # The LED values are shown as recorded, without being calibrated again
+    for (_, led_values), shown in zip(LedRecording(path).frames(), replayed):
+        assert np.array_equal(led_values, shown)
+    assert len(replayed) == 6
+    assert target.get_display_image() == display.get_display_image()
+
+
+def test_replay_keeps_timing(tmp_path):
+    path = str(tmp_path / "timed.npz")
+    display = Display()
+    record(path, display, random_frames(display, 5), fps=20)
+
+    recording = LedRecording(path)
+    assert recording.duration == pytest.approx(0.2, abs=0.05)
+
+    start_time = time.monotonic()
+    recording.replay(Display(), speed=1.0)
+    assert time.monotonic() - start_time == pytest.approx(recording.duration, abs=0.05)
+
+    start_time = time.monotonic()
+    recording.replay(Display(), speed=4.0)
+    assert time.monotonic() - start_time < recording.duration / 2
+
+
+def test_replay_needs_matching_display(tmp_path):
+    path = str(tmp_path / "session.npz")
+    display = Display()
+    record(path, display, random_frames(display, 2))
+
+    with pytest.raises(ValueError):
+        LedRecording(path).replay(Display([PanelPlacement(Panel(), (0, 0), (15, 15))]), speed=None)
+
+
+@pytest.mark.benchmark
+def test_recording_benchmark(tmp_path):
+    path = str(tmp_path / "benchmark.npz")
+    display = Display()
+    frames = random_frames(display, 200)
+
+    start_time = time.perf_counter()
+    record(path, display, frames, chunk_frames=64)
+    record_time = (time.perf_counter() - start_time) / len(frames)
+
+    start_time = time.perf_counter()
+    LedRecording(path).replay(display, speed=None)
+    replay_time = (time.perf_counter() - start_time) / len(frames)
+
+    print("record: {0:.3f} ms/frame, replay: {1:.3f} ms/frame".format(record_time * 1000.0, replay_time * 1000.0))
+    assert LedRecording(path).frame_count == 200
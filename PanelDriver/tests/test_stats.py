@@ -0,0 +1,141 @@
+import time
+
+import numpy as np
+import pytest
+
+from pixelpanels import Color, CommitPolicy, Display, FrameStats
+from pixelpanels import rpcserver
+from pixelpanels.rpc_library import panelrpc_pb2
+from tests.test_palette import write_palette_gif
+
+
+def test_snapshot():
+    stats = FrameStats(capacity=64, window_s=1.0)
+    snapshot = stats.snapshot()
+    assert (snapshot.fps, snapshot.frame_time_p50, snapshot.show_time_max) == (0.0, 0.0, 0.0)
+
+    # Frames that fell out of the window only count towards the totals
+    now = time.perf_counter()
+    stats.record_frame(now - 5.0, 0.5)
+    for i in range(40):
+        stats.record_frame(now - 0.39 + i * 0.01, 0.001 * (i + 1))
+    stats.drop_frames(3)
+
+    cache = stats.cache("palette")
+    assert stats.cache("palette") is cache
+    cache.hits, cache.misses = 3, 1
+
+    snapshot = stats.snapshot()
+    assert snapshot.fps == pytest.approx(100.0, rel=0.05)
+    assert snapshot.frame_time_p50 == pytest.approx(0.01)
+    assert snapshot.frame_time_max == pytest.approx(0.01)
+    assert snapshot.show_time_max == pytest.approx(0.04)
+    assert (snapshot.frames_shown, snapshot.frames_dropped) == (41, 3)
+    assert snapshot.caches["palette"].hit_rate == 0.75
+    assert snapshot.load_average is None or snapshot.load_average >= 0.0
+
+    # Snapshots hold copies, and readers within max_age share a single snapshot
+    cache.hits += 1
+    assert snapshot.caches["palette"].hits == 3
+    assert stats.snapshot(max_age=60.0) is snapshot
+    assert stats.snapshot().caches["palette"].hits == 4
+
+
+def test_ring_wraps():
+    stats = FrameStats(capacity=8)
+    start = time.perf_counter() - 0.38
+    for i in range(20):
+        stats.record_frame(start + i * 0.02, 0.0)
+
+    snapshot = stats.snapshot()
+    assert snapshot.frames_shown == 20
+    # Only the 8 newest frames are kept
+    assert snapshot.fps == pytest.approx(50.0, rel=0.05)
+
+
+def test_fps_before_window_fills():
+    stats = FrameStats(window_s=2.0)
+    start = time.perf_counter() - 0.5
+    for i in range(31):
+        stats.record_frame(start + i / 60.0, 0.0)
+
+    # Half a second into a steady 60 FPS run, the rate is not diluted by the empty rest of the window
+    assert stats.snapshot().fps == pytest.approx(60.0, rel=0.05)
+
+
+def test_display_stats(tmp_path):
+    display = Display()
+    frame = np.zeros((display.pixel_height, display.pixel_width, 3), dtype=np.uint8)
+    for _ in range(3):
+        display.show_frame(frame)
+
+    display.commit_policy = CommitPolicy.PRIORITY
+    display.show_frame(frame, priority=5)
+    assert not display.show_frame(frame, priority=1)
+    display.commit_policy = CommitPolicy.LAST_WRITER_WINS
+
+    gif_path = str(tmp_path / "palette.gif")
+    write_palette_gif(gif_path, 3)
+    display.play_frames(display.gif_frames(gif_path), fps=None)
+
+    snapshot = display.stats.snapshot()
+    assert (snapshot.frames_shown, snapshot.frames_dropped) == (7, 1)
+    assert snapshot.fps > 0.0 and snapshot.show_time_max > 0.0
+    assert (snapshot.caches["palette"].hits, snapshot.caches["palette"].misses) == (2, 1)
+    assert snapshot.caches["prepared frames"].hits == 3
+
+
+class StreamContext(object):
+    def __init__(self):
+        self.callbacks = []
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def cancel(self):
+        for callback in self.callbacks:
+            callback()
+
+
+def test_watch_stats_request(monkeypatch):
+    display = Display()
+    monkeypatch.setattr(rpcserver, "panel_display", display)
+    controller = rpcserver.PanelController()
+
+    context = StreamContext()
+    stream = controller.WatchStats(panelrpc_pb2.WatchStatsRequest(interval_s=0.01), context)
+
+    first = next(stream)
+    assert first.frames_shown == 0
+
+    display.set_color(Color(10, 20, 30))
+    start_time = time.monotonic()
+    second = next(stream)
+    assert time.monotonic() - start_time >= rpcserver.MIN_STATS_INTERVAL_S * 0.9
+    assert second.frames_shown == 1 and second.show_time_max_ms > 0.0
+    assert [cache.name for cache in second.caches] == ["prepared frames"]
+    assert second.queue_depth == 0
+
+    # The stream ends once the client goes away
+    context.cancel()
+    assert list(stream) == []
+
+
+@pytest.mark.benchmark
+def test_record_frame_benchmark():
+    stats = FrameStats()
+    frame_count = 100000
+
+    start_time = time.perf_counter()
+    for i in range(frame_count):
+        stats.record_frame(i * 0.001, 0.0001)
+    record_time = (time.perf_counter() - start_time) / frame_count
+
+    # Readers pay for snapshots, so they don't show up in the cost of a frame
+    start_time = time.perf_counter()
+    for _ in range(100):
+        stats.snapshot(max_age=1.0)
+    snapshot_time = (time.perf_counter() - start_time) / 100
+
+    print("record {0:.2f} us/frame, shared snapshot {1:.2f} us".format(record_time * 1e6, snapshot_time * 1e6))
+    assert record_time < 20e-6
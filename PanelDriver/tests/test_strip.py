@@ -0,0 +1,80 @@
+import time
+
+import numpy as np
+import pytest
+
+from pixelpanels import Display
+from pixelpanels.strip import ColorOrder, PixelStrip, merge_white, pack_led_values, split_white
+
+
+def random_led_values(count, seed=0):
+    return np.random.default_rng(seed).integers(0, 1 << 24, count, dtype=np.uint32)
+
+
+def test_pack_color_orders():
+    led_values = np.array([0x102030, 0xA0B0C0], dtype=np.uint32)
+
+    assert pack_led_values(led_values, ColorOrder.RGB).tolist() == [[0x10, 0x20, 0x30], [0xA0, 0xB0, 0xC0]]
+    assert pack_led_values(led_values, ColorOrder.GRB).tolist() == [[0x20, 0x10, 0x30], [0xB0, 0xA0, 0xC0]]
+    assert pack_led_values(led_values, ColorOrder.BGR).tolist() == [[0x30, 0x20, 0x10], [0xC0, 0xB0, 0xA0]]
+
+    rgbw = split_white(led_values)
+    assert rgbw.tolist() == [0x10001020, 0xA0001020]
+    assert pack_led_values(rgbw, ColorOrder.GRBW).tolist() == [[0x10, 0x00, 0x20, 0x10], [0x10, 0x00, 0x20, 0xA0]]
+    assert np.array_equal(merge_white(rgbw), led_values)
+
+
+def test_bulk_write_matches_per_led():
+    led_values = random_led_values(500)
+
+    per_led = PixelStrip(500, 18)
+    for led_index, pixel_value in enumerate(led_values.tolist()):
+        per_led.setPixelColor(led_index, pixel_value)
+
+    bulk = PixelStrip(500, 18)
+    bulk.write(led_values)
+    assert bulk.getPixels() == per_led.getPixels()
+    assert np.array_equal(bulk.read(), led_values)
+
+    with pytest.raises(ValueError):
+        bulk.write(random_led_values(501))
+
+
+def test_rgbw_display():
+    display = Display(color_order=ColorOrder.GRBW)
+    display.show_frame(np.full((display.pixel_height, display.pixel_width, 3), (200, 120, 60), dtype=np.uint8))
+
+    # The strip holds the shared part of the color as white while the display reports the full color
+    assert all(pixel_value == 0x3C8C3C00 for pixel_value in display.pixel_strip.getPixels())
+    assert display.get_display_image().getpixel((0, 0)) == (200, 120, 60)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("led_count", [2048, 16384, 65536])
+def test_bulk_handoff_benchmark(led_count):
+    led_values = random_led_values(led_count)
+    strip = PixelStrip(led_count, 18)
+
+    def per_led():
+        for led_index, pixel_value in enumerate(led_values.tolist()):
+            strip.setPixelColor(led_index, pixel_value)
+
+    def bulk():
+        strip.write(led_values)
+
+    def best_time(handoff):
+        best = None
+        for _ in range(5):
+            start_time = time.perf_counter()
+            handoff()
+            elapsed = time.perf_counter() - start_time
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    # The mock only stands in for the driver, where every per-LED call also crosses into C
+    per_led_time = best_time(per_led)
+    bulk_time = best_time(bulk)
+
+    print("{0} LEDs: per-LED {1:.3f} ms, bulk {2:.3f} ms".format(led_count, per_led_time * 1000.0,
+                                                                  bulk_time * 1000.0))
+    assert bulk_time * 2.0 < per_led_time
@@ -0,0 +1,71 @@
+import numpy as np
+
+from pixelpanels import Display
+from pixelpanels.color import Color
+from pixelpanels.text import GlyphAtlas, Marquee
+
+
+def test_layout_matches_glyphs():
+    atlas = GlyphAtlas()
+
+    layout = atlas.layout("Hi!")
+
+    assert layout.shape == (atlas.line_height, sum(atlas.advance(character) for character in "Hi!"))
+    assert np.array_equal(layout[:, :atlas.advance("H")], atlas.glyph("H"))
+    assert np.any(layout)
+
+
+def test_frames_are_views_of_the_strip():
+    marquee = Marquee(GlyphAtlas(), "Hello", 64, 32, Color(255, 0, 0))
+
+    for position in range(0, 3 * marquee.period, 7):
+        frame = marquee.frame_at(position)
+
+        assert frame.shape == (32, 64, 3)
+        assert np.shares_memory(frame, marquee.strip)
+
+    assert np.array_equal(marquee.frame_at(5), marquee.frame_at(5 + marquee.period))
+
+
+def test_smooth_frames_blend_neighbouring_columns():
+    marquee = Marquee(GlyphAtlas(), "Hello", 64, 32)
+
+    half = marquee.frame_at(10.5, smooth=True).astype(int)
+    expected = (marquee.frame_at(10).astype(int) + marquee.frame_at(11).astype(int)) // 2
+
+    assert np.array_equal(half, expected)
+
+
+def test_updating_text_matches_fresh_layout():
+    atlas = GlyphAtlas()
+    marquee = Marquee(atlas, "Temp: 21C", 64, 32, Color(0, 255, 0))
+
+    marquee.text = "Temp: 23C and rising"
+    fresh = Marquee(atlas, "Temp: 23C and rising", 64, 32, Color(0, 255, 0))
+
+    assert marquee.text_width == fresh.text_width
+    assert np.array_equal(marquee.strip, fresh.strip)
+
+
+def test_time_based_scrolling():
+    times = iter([0.0, 0.0, 0.5, 1.0, 2.0])
+    marquee = Marquee(GlyphAtlas(), "Hello", 64, 32)
+
+    frames = [frame.copy() for frame in marquee.frames(10.0, duration=2.0, smooth=False, clock=lambda: next(times))]
+
+    assert len(frames) == 3
+    assert np.array_equal(frames[1], marquee.frame_at(5))
+    assert np.array_equal(frames[2], marquee.frame_at(10))
+
+
+def test_play_marquee_on_display():
+    times = iter([0.0, 0.0, 0.01, 0.02, 0.05])
+    display = Display()
+    marquee = Marquee(GlyphAtlas(), "Hello", display.pixel_width, display.pixel_height)
+    shows = len(display.pixel_strip.show_times)
+
+    display.play_frames(marquee.frames(1000.0, duration=0.05, clock=lambda: next(times)), fps=None)
+
+    # Every frame reaches the strip and the display ends on the last scroll position
+    assert len(display.pixel_strip.show_times) - shows == 3
+    assert np.array_equal(display.frame, marquee.frame_at(20))
@@ -0,0 +1,123 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+from PIL import Image as ImageLib
+
+import pixelpanels
+from pixelpanels import Color, Display, Tracer
+from pixelpanels import rpcserver
+from pixelpanels.rpc_library import panelrpc_pb2
+
+
+def make_gif(path, frame_count=3, size=(32, 16)):
+    frames = [ImageLib.new("RGB", size, (i * 40, 0, 255 - i * 40)) for i in range(frame_count)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=20, loop=0)
+
+
+def spans(trace, name=None):
+    return [event for event in trace["traceEvents"] if event["ph"] == "X" and name in (None, event["name"])]
+
+
+def test_ring_buffer_keeps_latest_spans():
+    tracer = Tracer(capacity=4)
+    for i in range(10):
+        with tracer.span("frame", index=i):
+            pass
+
+    assert len(tracer) == 4
+    trace = json.loads(tracer.dumps())
+    assert [event["args"]["index"] for event in spans(trace)] == [6, 7, 8, 9]
+
+    tracer.clear()
+    assert not spans(tracer.chrome_trace())
+
+
+def test_display_stages(tmp_path):
+    # An RGB animation takes the path through every stage, unlike a palette-indexed GIF
+    animation_path = str(tmp_path / "stages.png")
+    make_gif(animation_path)
+
+    display = Display(draw_callback=lambda image: None, color_cal=lambda color: Color(color.red // 2, 0, 0))
+    display.tracer = Tracer()
+    display.play_frames(display.gif_frames(animation_path), fps=None)
+
+    trace = display.tracer.chrome_trace()
+    for stage in ["decode", "resize", "map", "calibrate", "load", "show", "callback"]:
+        assert len(spans(trace, stage)) == 3, stage
+
+    # Every stage of showing a frame nests inside its frame span on the same thread
+    frames = spans(trace, "frame")
+    assert len(frames) == 3
+    for stage in ["map", "calibrate", "load", "show", "callback"]:
+        for frame, event in zip(frames, spans(trace, stage)):
+            assert event["tid"] == frame["tid"]
+            assert frame["ts"] <= event["ts"] and event["ts"] + event["dur"] <= frame["ts"] + frame["dur"] + 1.0
+
+    thread_names = {event["tid"]: event["args"]["name"] for event in trace["traceEvents"]
+                    if event["name"] == "thread_name"}
+    assert thread_names[frames[0]["tid"]] == threading.current_thread().name
+
+    # Traced and untraced displays produce the same LED values
+    reference = Display(color_cal=display.color_cal)
+    reference.show_frame(display.frame)
+    assert reference.pixel_strip.getPixels() == display.pixel_strip.getPixels()
+
+
+def test_tracing_is_off_by_default():
+    display = Display()
+    display.set_color(Color(1, 2, 3))
+    assert display.tracer is None
+
+
+class AbortingContext(object):
+    def abort(self, code, details):
+        raise RuntimeError(details)
+
+
+def test_get_trace_request(monkeypatch):
+    controller = rpcserver.PanelController()
+
+    monkeypatch.setattr(rpcserver, "tracer", None)
+    with pytest.raises(RuntimeError):
+        controller.GetTrace(panelrpc_pb2.GetTraceRequest(), AbortingContext())
+
+    tracer = Tracer()
+    monkeypatch.setattr(rpcserver, "tracer", tracer)
+    with tracer.span("frame"):
+        pass
+
+    response = controller.GetTrace(panelrpc_pb2.GetTraceRequest(clear=True), AbortingContext())
+    assert len(spans(json.loads(response.trace_json), "frame")) == 1
+    assert len(tracer) == 0
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="Stops the CLI with SIGTERM")
+def test_cli_trace_flag(tmp_path):
+    gif_path = str(tmp_path / "cli.gif")
+    trace_path = str(tmp_path / "out.json")
+    make_gif(gif_path, size=(64, 32))
+
+    env = dict(os.environ)
+    src_path = os.path.dirname(os.path.dirname(pixelpanels.__file__))
+    env["PYTHONPATH"] = os.pathsep.join([src_path, env.get("PYTHONPATH", "")])
+
+    process = subprocess.Popen([sys.executable, "-m", "pixelpanels", gif_path, "--trace", trace_path], env=env)
+    try:
+        time.sleep(2.0)
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(5.0) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+    with open(trace_path) as f:
+        trace = json.load(f)
+    assert len(spans(trace, "frame")) > 0
+    assert len(spans(trace, "decode")) > 0
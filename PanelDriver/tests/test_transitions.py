@@ -0,0 +1,117 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from pixelpanels import Display, WipeOrder
+from pixelpanels.playback import PlaybackEngine
+from pixelpanels.transitions import Crossfade, Dissolve, MaskWipe, Slide, SlideDirection
+
+WIDTH = 64
+HEIGHT = 32
+
+TRANSITIONS = {
+    "crossfade": lambda: Crossfade(WIDTH, HEIGHT),
+    "dissolve": lambda: Dissolve(WIDTH, HEIGHT, seed=4),
+    "mask_wipe": lambda: MaskWipe.from_order(WIDTH, HEIGHT, WipeOrder.RADIAL),
+    "slide": lambda: Slide(WIDTH, HEIGHT, direction=SlideDirection.UP),
+}
+
+
+def solid(value):
+    return np.full((HEIGHT, WIDTH, 3), value, dtype=np.uint8)
+
+
+@pytest.mark.parametrize("name", TRANSITIONS)
+def test_transition_endpoints(name):
+    transition = TRANSITIONS[name]()
+    outgoing = solid(40)
+    incoming = solid(200)
+
+    assert np.array_equal(transition.blend(outgoing, incoming, 0.0), outgoing)
+    assert np.array_equal(transition.blend(outgoing, incoming, 1.0), incoming)
+
+
+@pytest.mark.parametrize("name", TRANSITIONS)
+def test_transition_does_not_allocate(name):
+    transition = TRANSITIONS[name]()
+    outgoing = solid(40)
+    incoming = solid(200)
+    transition.blend(outgoing, incoming, 0.5)
+
+    tracemalloc.start()
+    for step in range(100):
+        transition.blend(outgoing, incoming, step / 100)
+    allocated = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert allocated < WIDTH * HEIGHT
+
+
+def test_crossfade_midpoint():
+    frame = Crossfade(WIDTH, HEIGHT).blend(solid(0), solid(200), 0.5)
+
+    assert np.all(frame == 100)
+
+
+def test_slide_left():
+    outgoing = solid(0)
+    incoming = solid(255)
+
+    frame = Slide(WIDTH, HEIGHT, direction=SlideDirection.LEFT).blend(outgoing, incoming, 0.25)
+
+    assert np.all(frame[:, :48] == 0)
+    assert np.all(frame[:, 48:] == 255)
+
+
+def test_engine_transitions_between_items():
+    display = Display()
+    engine = PlaybackEngine(display, Crossfade(display.pixel_width, display.pixel_height, duration_s=0.1))
+    shown = []
+    show_frame = display.show_frame
+    display.show_frame = lambda frame: (shown.append(int(frame[0, 0, 0])), show_frame(frame))
+
+    engine.enqueue(lambda: [solid(0)] * 5, fps=100.0)
+    engine.enqueue(lambda: [solid(200)] * 20, fps=100.0)
+    engine.start()
+
+    deadline = time.monotonic() + 5.0
+    while (engine.current_item is not None or engine.queue_depth) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    engine.stop(1.0)
+
+    # Both items fade in over ten frames while they keep playing, the first from the blank display
+    assert len(shown) == 30
+    assert shown[-10:] == [200] * 10
+    fade = [value for value in shown if 0 < value < 200]
+    assert len(fade) >= 9
+    assert fade == sorted(fade)
+
+
+def test_engine_drops_failing_items():
+    display = Display()
+    engine = PlaybackEngine(display)
+    shown = []
+    show_frame = display.show_frame
+    display.show_frame = lambda frame: (shown.append(int(frame[0, 0, 0])), show_frame(frame))
+
+    def broken():
+        yield solid(10)
+        raise OSError("corrupt frame")
+
+    engine.enqueue(broken, fps=100.0)
+    engine.enqueue(lambda: [solid(200)] * 3, fps=100.0)
+    engine.enqueue(lambda: [np.zeros((1, 1, 3), dtype=np.uint8)], fps=100.0)
+    engine.enqueue(lambda: [solid(90)] * 2, fps=100.0)
+    engine.start()
+
+    deadline = time.monotonic() + 5.0
+    while (engine.current_item is not None or engine.queue_depth) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    engine.stop(1.0)
+
+    assert shown[0] == 10
+    assert shown[1:4] == [200] * 3
+    assert shown[-2:] == [90] * 2
+    assert np.array_equal(display.frame, solid(90))
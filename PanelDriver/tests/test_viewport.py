@@ -0,0 +1,98 @@
+import time
+
+import numpy as np
+import pytest
+from PIL import Image as ImageLib
+
+from pixelpanels import Display, Viewport
+from pixelpanels.display import frame_to_led_values
+
+
+def make_canvas(width, height):
+    rng = np.random.default_rng(width)
+    return rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+
+def test_frames_are_views():
+    canvas = make_canvas(256, 48)
+    viewport = Viewport(canvas, 64, 32)
+
+    frame = viewport.frame_at(100, 10)
+    assert np.shares_memory(frame, viewport.canvas)
+    assert np.array_equal(frame, canvas[10:42, 100:164])
+    assert not frame.flags.writeable
+
+    # Positions are clamped to keep the window on the canvas
+    assert np.array_equal(viewport.frame_at(1000, -5), canvas[0:32, 192:256])
+
+
+def test_wrapped_canvas():
+    canvas = make_canvas(100, 32)
+    viewport = Viewport(canvas, 64, 32, wrap=True)
+
+    frame = viewport.frame_at(80, 0)
+    assert np.shares_memory(frame, viewport.canvas)
+    assert np.array_equal(frame, np.concatenate([canvas[:, 80:], canvas[:, :44]], axis=1))
+    assert np.array_equal(viewport.frame_at(180, 0), frame)
+
+
+def test_pan_positions():
+    viewport = Viewport(make_canvas(256, 64), 64, 32)
+
+    positions = list(viewport.positions([(0, 0), (30, 0), (30, 20)], speed=10.0, fps=1.0))
+    assert positions == [(0, 0), (10, 0), (20, 0), (30, 0), (30, 10), (30, 20)]
+
+    looped = viewport.positions([(0, 0), (20, 0)], speed=10.0, fps=1.0, loop=True)
+    assert [next(looped) for _ in range(6)] == [(0, 0), (10, 0), (20, 0), (10, 0), (0, 0), (10, 0)]
+
+
+def test_animated_canvas(tmp_path):
+    gif_path = str(tmp_path / "panorama.gif")
+    frames = [ImageLib.new("RGB", (128, 16), (i * 40, 0, 0)) for i in range(3)]
+    frames[0].save(gif_path, save_all=True, append_images=frames[1:], duration=100, loop=0)
+
+    viewport = Viewport.from_file(gif_path, 32, 32, fit_height=True)
+    assert viewport.frame_count == 3
+    assert (viewport.canvas_width, viewport.canvas_height) == (256, 32)
+    assert viewport.animation_fps == 10.0
+
+    # At 20 FPS each animation frame is held for two panned frames
+    reds = [int(frame[0, 0, 0]) for frame in viewport.frames([(0, 0), (50, 0)], speed=100.0, fps=20.0)]
+    assert len(reds) == 11
+    assert reds[:7] == [0, 0, 40, 40, 80, 80, 0]
+
+
+def test_display_pan():
+    display = Display()
+    canvas = make_canvas(128, 32)
+
+    display.pan(canvas, [(0, 0), (64, 0)], speed=64000.0, fps=1000.0)
+    assert np.array_equal(display.frame, canvas[:, 64:])
+
+    with pytest.raises(ValueError):
+        display.pan(make_canvas(32, 32), [(0, 0)], speed=1.0)
+
+
+@pytest.mark.benchmark
+def test_pan_costs_the_same_as_a_static_frame():
+    display = Display()
+    viewport = Viewport(make_canvas(4096, 32), display.pixel_width, display.pixel_height)
+    static_frame = np.array(viewport.frame_at(0, 0))
+    frame_count = 400
+
+    def best_time(frames):
+        best = None
+        for _ in range(3):
+            start_time = time.perf_counter()
+            for frame in frames():
+                frame_to_led_values(frame, display.led_order)
+            elapsed = time.perf_counter() - start_time
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    static_time = best_time(lambda: (static_frame for _ in range(frame_count)))
+    pan_time = best_time(lambda: viewport.frames([(0, 0), (4032, 0)], speed=4032.0 * 30.0 / (frame_count - 1)))
+
+    print("static: {0:.3f} ms/frame, pan: {1:.3f} ms/frame".format(static_time / frame_count * 1000.0,
+                                                                   pan_time / frame_count * 1000.0))
+    assert pan_time < static_time * 2.0
@@ -0,0 +1,182 @@
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+from PIL import Image as ImageLib
+
+from pixelpanels import Display, Panel, PanelPlacement
+from pixelpanels.panel import PanelOrigin
+from pixelpanels.wall import AssetStore, WallCoordinator, WallNode, WallFollower, follower_display
+
+FRAME_COUNT = 20
+
+
+def run_follower(coordinator_address, asset_directory, frame_count, addresses, results):
+    display = Display([PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 0), (15, 15))])
+    follower = WallFollower(display, coordinator_address, ('127.0.0.1', 0), AssetStore(asset_directory))
+    follower.start()
+    address = follower.address
+    addresses.put(address)
+
+    deadline = time.monotonic() + 20.0
+    while len(follower.presentation_log) < frame_count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    follower.stop()
+    frame = display.frame
+    results.put((address, list(follower.presentation_log), list(display.pixel_strip.show_times),
+                 follower.clock_offset, frame[0, 0].tolist()))
+
+
+def run_wall(tmp_path, present):
+    context = multiprocessing.get_context()
+    coordinator = WallCoordinator(48, 16, [], ('127.0.0.1', 0))
+    coordinator.start()
+
+    addresses, results = context.Queue(), context.Queue()
+    followers = [context.Process(target=run_follower, args=(coordinator.address, str(tmp_path), FRAME_COUNT,
+                                                            addresses, results))
+                 for _ in range(3)]
+    for follower in followers:
+        follower.start()
+
+    follower_addresses = [addresses.get(timeout=30) for _ in followers]
+    coordinator.nodes = [WallNode(address, (16 * i, 0), (16, 16)) for i, address in enumerate(follower_addresses)]
+
+    # Let the followers settle their clock offsets before the first frame
+    time.sleep(0.5)
+    present(coordinator)
+
+    reports = {}
+    for _ in followers:
+        address, log, show_times, offset, last_pixel = results.get(timeout=30)
+        reports[address] = (log, show_times, offset, last_pixel)
+    for follower in followers:
+        follower.join(10)
+    coordinator.stop()
+
+    return [reports[address] for address in follower_addresses]
+
+
+def present_channel_frames(tmp_path):
+    frames = []
+    for i in range(FRAME_COUNT):
+        frame = np.zeros((16, 48, 3), dtype=np.uint8)
+        frame[:, :16] = (i, 0, 0)
+        frame[:, 16:32] = (0, i, 0)
+        frame[:, 32:] = (0, 0, i)
+        frames.append(frame)
+
+    reports = run_wall(tmp_path, lambda coordinator: coordinator.play_frames(frames, fps=30.0))
+
+    presentation_times = {}
+    for log, show_times, _, _ in reports:
+        # The mock strip times each show, which happens just before the follower logs the frame
+        for (sequence, _), shown in zip(log, show_times):
+            presentation_times.setdefault(sequence, []).append(shown)
+
+    spreads = [max(times) - min(times) for times in presentation_times.values() if len(times) == 3]
+    return reports, spreads
+
+
+def test_followers_present_together(tmp_path):
+    reports, spreads = present_channel_frames(tmp_path)
+
+    for node_index, (log, show_times, offset, last_pixel) in enumerate(reports):
+        assert offset is not None
+        assert [sequence for sequence, _ in log] == sorted(sequence for sequence, _ in log)
+        assert len(log) >= FRAME_COUNT - 2
+
+        expected_pixel = [0, 0, 0]
+        expected_pixel[node_index] = FRAME_COUNT - 1
+        assert last_pixel == expected_pixel
+
+    # Nearly every frame was presented by all three nodes
+    assert len(spreads) >= FRAME_COUNT - 2
+
+
+@pytest.mark.benchmark
+def test_followers_present_in_sync(tmp_path):
+    reports, spreads = present_channel_frames(tmp_path)
+
+    assert all(offset is not None and abs(offset) < 0.005 for _, _, offset, _ in reports)
+    assert len(spreads) >= FRAME_COUNT - 2
+    assert max(spreads) < 0.01
+
+
+def test_followers_render_assets(tmp_path):
+    gif_path = str(tmp_path / "wall.gif")
+    gradient = np.zeros((16, 48, 3), dtype=np.uint8)
+    gradient[:, :, 0] = np.arange(48, dtype=np.uint8)[None, :] * 5
+    frames = [ImageLib.fromarray(np.roll(gradient, 16 * i, axis=1)) for i in range(3)]
+    frames[0].save(gif_path, save_all=True, append_images=frames[1:], duration=50, loop=0)
+
+    store = AssetStore(str(tmp_path / "assets"))
+    digest = store.add(gif_path)
+    assert digest == AssetStore.digest_of(gif_path)
+
+    def present(coordinator):
+        coordinator.play_asset(gif_path, fps=30.0)
+        for _ in range(FRAME_COUNT - 3):
+            coordinator.present_asset(digest, 2)
+            time.sleep(1 / 30.0)
+
+    reports = run_wall(tmp_path / "assets", present)
+
+    with ImageLib.open(gif_path) as image:
+        image.seek(2)
+        expected = np.asarray(image.convert('RGB').resize((48, 16), ImageLib.LANCZOS))
+
+    for node_index, (log, show_times, offset, last_pixel) in enumerate(reports):
+        assert len(log) >= FRAME_COUNT - 2
+        assert last_pixel == expected[0, 16 * node_index].tolist()
+
+
+class SlowAssetStore(AssetStore):
+    def frames(self, *args):
+        time.sleep(1.0)
+        return super().frames(*args)
+
+
+def test_asset_decoding_keeps_receiving(tmp_path):
+    gif_path = str(tmp_path / "wall.gif")
+    ImageLib.new('RGB', (16, 16), (0, 0, 200)).save(gif_path)
+    store = SlowAssetStore(str(tmp_path / "assets"))
+    digest = store.add(gif_path)
+
+    display = Display([PanelPlacement(Panel(origin_location=PanelOrigin.TOP_LEFT), (0, 0), (15, 15))])
+    coordinator = WallCoordinator(16, 16, [], ('127.0.0.1', 0))
+    coordinator.start()
+    follower = WallFollower(display, coordinator.address, ('127.0.0.1', 0), store)
+    follower.start()
+    coordinator.nodes = [WallNode(follower.address, (0, 0), (16, 16))]
+
+    try:
+        time.sleep(0.2)
+        start_time = time.monotonic()
+        coordinator.present_asset(digest, 0, start_time + 1.5)
+        coordinator.present_frame(np.full((16, 16, 3), 100, dtype=np.uint8), start_time + 0.1)
+
+        # The pixel frame arrives and is shown while the asset is still being decoded
+        while len(follower.presentation_log) < 1 and time.monotonic() < start_time + 0.9:
+            time.sleep(0.01)
+        assert display.frame[0, 0].tolist() == [100, 100, 100]
+
+        while len(follower.presentation_log) < 2 and time.monotonic() < start_time + 5.0:
+            time.sleep(0.01)
+        assert display.frame[0, 0].tolist() == [0, 0, 200]
+    finally:
+        follower.stop()
+        coordinator.stop()
+
+
+def test_follower_display(tmp_path):
+    display = follower_display(32, 48)
+    assert (display.pixel_width, display.pixel_height, display.pixel_count) == (32, 48, 32 * 48)
+    assert np.array_equal(follower_display(64, 32).led_order, Display().led_order)
+
+    layout_path = tmp_path / "ring.csv"
+    layout_path.write_text("x,y\n0,0\n1,0\n1,1\n0,1\n")
+    display = follower_display(20, 10, str(layout_path))
+    assert (display.pixel_width, display.pixel_height, display.pixel_count) == (20, 10, 4)